@@ -1,7 +1,14 @@
 """LibookTrac Backend Password Management Module."""
 
+import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Literal
+
 from passlib.context import CryptContext
 
+from backend.v1.app.config.settings import settings
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated = "auto")
 
 
@@ -30,3 +37,162 @@ def verify_password(plain_password,hashed_password):
         bool: True if the plaintext password matches the hashed password, False otherwise.
     """
     return pwd_context.verify(plain_password,hashed_password)
+
+
+def verify_and_update_password(plain_password: str,
+                               hashed_password: str) -> tuple[bool, str | None]:
+    """
+    Verifies a password and rehashes it if its hash uses deprecated settings.
+
+    Args:
+        plain_password (str): The user's plaintext password input.
+        hashed_password (str): The previously hashed password stored in the system.
+
+    Returns:
+        tuple[bool, str | None]: Whether the password matched, and a replacement
+        hash to store when the existing one is deprecated.
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def hash_passwords(passwords: list[str], max_workers: int | None = None) -> list[str]:
+    """
+    Hashes many passwords across all CPU cores, e.g. for account imports.
+
+    Args:
+        passwords (list[str]): The plaintext passwords.
+        max_workers (int | None): Worker processes, one per core by default.
+
+    Returns:
+        list[str]: The hashes, in the same order as `passwords`.
+    """
+    if len(passwords) < 2:
+        return [hash_password(password) for password in passwords]
+    workers = min(max_workers or os.cpu_count() or 1, len(passwords))
+    chunksize = max(1, len(passwords) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(hash_password, passwords, chunksize=chunksize))
+
+
+class PasswordHasherBusyError(Exception):
+    """Raised when too many password operations are already waiting for a worker."""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification off the event loop.
+
+    Work is sent to a thread or process pool of `max_workers` workers. A
+    semaphore caps concurrent operations at the pool size, and callers beyond
+    `max_waiting` queued operations are rejected with PasswordHasherBusyError
+    instead of piling up behind a login storm. bcrypt releases the GIL while
+    hashing, so threads already run in parallel; processes isolate the work
+    completely at the cost of pickling each call.
+    """
+
+    def __init__(self, max_workers: int, max_waiting: int,
+                 executor: Literal["thread", "process"] = "thread"):
+        self.max_workers = max_workers
+        self.max_waiting = max_waiting
+        self.executor_type = executor
+        self._executor: Executor | None = None
+        self._slots = asyncio.Semaphore(max_workers)
+        self.in_flight = 0
+        self.waiting = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix="password-hasher")
+        return self._executor
+
+    async def _run(self, function, *args):
+        if self.waiting >= self.max_waiting and self._slots.locked():
+            self.rejected += 1
+            raise PasswordHasherBusyError("Too many password operations are queued.")
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), function, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self._slots.release()
+
+    async def hash(self, password: str) -> str:
+        """Hashes a password in the worker pool."""
+        return await self._run(hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+        """
+        Verifies a password in the worker pool.
+
+        Returns:
+            tuple[bool, str | None]: Whether the password matched, and a new
+            hash to store when the existing one is deprecated.
+        """
+        return await self._run(verify_and_update_password, plain_password, hashed_password)
+
+    def stats(self) -> dict[str, int]:
+        """Returns the pool's size, queue depth and counters."""
+        return {
+            "max_workers": self.max_workers,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def healthy(self) -> bool:
+        """Returns False while the queue is full and new work would be rejected."""
+        return self.waiting < self.max_waiting
+
+    def shutdown(self):
+        """Stops the worker pool; it is recreated on next use."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(max_workers=settings.password_hash_workers,
+                                 max_waiting=settings.password_hash_max_waiting,
+                                 executor=settings.password_hash_executor)
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    Hashes a plaintext password without blocking the event loop.
+
+    Args:
+        password (str): The plaintext password to be hashed.
+
+    Returns:
+        str: A securely hashed version of the provided password.
+    """
+    return await password_hasher.hash(password)
+
+
+async def verify_password_async(plain_password: str,
+                                hashed_password: str) -> tuple[bool, str | None]:
+    """
+    Verifies a plaintext password without blocking the event loop.
+
+    Args:
+        plain_password (str): The user's plaintext password input.
+        hashed_password (str): The previously hashed password stored in the system.
+
+    Returns:
+        tuple[bool, str | None]: Whether the password matched, and a replacement
+        hash to store when the existing one is deprecated.
+    """
+    return await password_hasher.verify(plain_password, hashed_password)
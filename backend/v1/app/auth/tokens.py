@@ -1 +1,324 @@
 """LibookTrac Backend Token Management Module."""
+
+import heapq
+import time
+import uuid
+from collections import OrderedDict
+from datetime import UTC, datetime
+from typing import Annotated
+
+import jwt
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from starlette.status import HTTP_401_UNAUTHORIZED
+
+from backend.v1.app.config.settings import settings
+from backend.v1.app.models.tokens import TokenClaims, TokenPair, TokenType
+from backend.v1.app.models.users import UserDetails
+
+
+class InvalidTokenError(Exception):
+    """Raised when a token is malformed, expired, revoked or of the wrong type."""
+
+
+def signing_key() -> str:
+    """
+    Returns the key tokens are signed with.
+
+    Raises:
+        RuntimeError: If LIBOOKTRAC_JWT_SECRET_KEY is not set. A key generated
+            per process would sign tokens no other worker, and no restarted
+            worker, accepts.
+    """
+    if settings.jwt_secret_key is None:
+        raise RuntimeError("LIBOOKTRAC_JWT_SECRET_KEY is not set; generate one with "
+                           "backend/v1/app/auth/create_secret.py.")
+    return settings.jwt_secret_key.get_secret_value()
+
+
+class RevocationList:
+    """
+    Revoked tokens kept in memory until they would have expired anyway.
+
+    Single tokens are revoked by jti. All tokens of a user issued before a
+    point in time are revoked by user, which covers deactivation and password
+    resets. Entries are evicted lazily through a min-heap of expiry times.
+
+    The list is not persisted or shared: it is lost on restart, and with
+    several workers a token revoked by one is still accepted by the others
+    until it expires, for up to access_token_ttl_seconds for access tokens
+    and refresh_token_ttl_seconds for refresh tokens. Deployments relying on
+    revocation run a single worker or keep those TTLs short.
+    """
+
+    def __init__(self):
+        self._tokens: dict[str, float] = {}
+        self._users: dict[str, tuple[float, float]] = {}
+        self._expiries: list[tuple[float, str, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._tokens) + len(self._users)
+
+    def _evict(self, now: float):
+        expiries = self._expiries
+        while expiries and expiries[0][0] <= now:
+            expires_at, kind, key = heapq.heappop(expiries)
+            if kind == "token":
+                if self._tokens.get(key) == expires_at:
+                    del self._tokens[key]
+            elif key in self._users and self._users[key][1] == expires_at:
+                del self._users[key]
+
+    def revoke_token(self, jti: str, expires_at: float):
+        """Revokes one token until its expiry time."""
+        self._evict(time.time())
+        self._tokens[jti] = expires_at
+        heapq.heappush(self._expiries, (expires_at, "token", jti))
+
+    def revoke_user(self, user_id: str, issued_before: float | None = None):
+        """Revokes every token of a user issued before `issued_before`, now by default."""
+        now = time.time()
+        self._evict(now)
+        issued_before = now if issued_before is None else issued_before
+        expires_at = issued_before + settings.refresh_token_ttl_seconds
+        self._users[user_id] = (issued_before, expires_at)
+        heapq.heappush(self._expiries, (expires_at, "user", user_id))
+
+    def is_revoked(self, claims: TokenClaims) -> bool:
+        """Returns True if the token, or every earlier token of its user, was revoked."""
+        if claims.jti in self._tokens:
+            return True
+        user = self._users.get(claims.sub)
+        return user is not None and claims.iat < user[0]
+
+    def clear(self):
+        self._tokens.clear()
+        self._users.clear()
+        self._expiries.clear()
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU cache of verified token claims.
+
+    Repeated requests with the same token skip the signature check. Entries
+    expire with the token itself; revocation is still checked on every hit.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[str, TokenClaims] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, token: str, now: float) -> TokenClaims | None:
+        claims = self._entries.get(token)
+        if claims is None or claims.exp <= now:
+            if claims is not None:
+                del self._entries[token]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return claims
+
+    def peek(self, token: str, now: float) -> TokenClaims | None:
+        """Returns cached unexpired claims without counting a hit or refreshing the entry."""
+        claims = self._entries.get(token)
+        return claims if claims is not None and claims.exp > now else None
+
+    def put(self, token: str, claims: TokenClaims):
+        self._entries[token] = claims
+        self._entries.move_to_end(token)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+revocations = RevocationList()
+verified_tokens = VerifiedTokenCache(settings.token_cache_size)
+
+TOKEN_TTLS = {
+    TokenType.ACCESS: lambda: settings.access_token_ttl_seconds,
+    TokenType.REFRESH: lambda: settings.refresh_token_ttl_seconds,
+    TokenType.PASSWORD_RESET: lambda: settings.password_reset_token_ttl_seconds,
+}
+
+
+def _issue(subject: str, username: str, user_category: str,
+           token_type: TokenType) -> tuple[str, float]:
+    now = time.time()
+    expires_at = now + TOKEN_TTLS[token_type]()
+    claims = {
+        "sub": subject,
+        "username": username,
+        "user_category": user_category,
+        "type": token_type.value,
+        "jti": uuid.uuid4().hex,
+        "iat": now,
+        "exp": expires_at,
+    }
+    token = jwt.encode(claims, signing_key(), algorithm=settings.jwt_algorithm)
+    return token, expires_at
+
+
+def _issue_pair(subject: str, username: str, user_category: str) -> TokenPair:
+    access_token, _ = _issue(subject, username, user_category, TokenType.ACCESS)
+    refresh_token, _ = _issue(subject, username, user_category, TokenType.REFRESH)
+    return TokenPair(access_token=access_token, refresh_token=refresh_token,
+                     expires_in=settings.access_token_ttl_seconds)
+
+
+def _user_subject(user: UserDetails) -> tuple[str, str, str]:
+    return str(user.user_id), user.username, user.user_category.value
+
+
+def create_token(user: UserDetails, token_type: TokenType) -> str:
+    """
+    Issues a signed token for a user account.
+
+    Args:
+        user (UserDetails): The account the token is issued to.
+        token_type (TokenType): What the token may be used for.
+
+    Returns:
+        str: The encoded JWT.
+    """
+    return _issue(*_user_subject(user), token_type)[0]
+
+
+def create_token_pair(user: UserDetails) -> TokenPair:
+    """
+    Issues a short-lived access token and a refresh token.
+
+    Args:
+        user (UserDetails): The account the tokens are issued to.
+
+    Returns:
+        TokenPair: The access and refresh tokens.
+    """
+    return _issue_pair(*_user_subject(user))
+
+
+def create_password_reset_token(user: UserDetails) -> str:
+    """
+    Issues a password reset token and stores it on the user.
+
+    Args:
+        user (UserDetails): The account requesting a reset.
+
+    Returns:
+        str: The encoded reset token.
+    """
+    token, expires_at = _issue(*_user_subject(user), TokenType.PASSWORD_RESET)
+    user.password_reset_token = token
+    user.password_reset_token_expiry = datetime.fromtimestamp(
+        expires_at, tz=UTC).replace(tzinfo=None)
+    return token
+
+
+def decode_token(token: str, expected_type: TokenType = TokenType.ACCESS) -> TokenClaims:
+    """
+    Verifies a token and returns its claims.
+
+    Tokens seen before are served from the verified-token cache, so only the
+    first request with a token pays for the signature check.
+
+    Args:
+        token (str): The encoded JWT.
+        expected_type (TokenType): The type the token must have.
+
+    Returns:
+        TokenClaims: The verified claims.
+
+    Raises:
+        InvalidTokenError: If the token is invalid, expired, revoked or of another type.
+    """
+    claims = verified_tokens.get(token, time.time())
+    if claims is None:
+        try:
+            payload = jwt.decode(token, signing_key(),
+                                 algorithms=[settings.jwt_algorithm],
+                                 options={"require": ["exp", "iat", "sub", "jti"]})
+            claims = TokenClaims.model_validate(payload)
+        except (jwt.PyJWTError, ValueError) as error:
+            raise InvalidTokenError(str(error)) from error
+        verified_tokens.put(token, claims)
+    if claims.type is not expected_type:
+        raise InvalidTokenError(f"Expected a {expected_type.value} token.")
+    if revocations.is_revoked(claims):
+        raise InvalidTokenError("Token has been revoked.")
+    return claims
+
+
+def refresh_token_pair(refresh_token: str) -> TokenPair:
+    """
+    Exchanges a refresh token for a new token pair, revoking the old refresh token.
+
+    Deactivating an account or resetting its password revokes every token of
+    the user, so the account does not need to be loaded again here.
+
+    Args:
+        refresh_token (str): The refresh token to rotate.
+
+    Returns:
+        TokenPair: The new access and refresh tokens.
+
+    Raises:
+        InvalidTokenError: If the refresh token is invalid or revoked.
+    """
+    claims = decode_token(refresh_token, TokenType.REFRESH)
+    revocations.revoke_token(claims.jti, claims.exp)
+    return _issue_pair(claims.sub, claims.username, claims.user_category)
+
+
+def revoke_token(token: str, expected_type: TokenType = TokenType.ACCESS):
+    """
+    Revokes a single token, e.g. on logout.
+
+    Args:
+        token (str): The encoded JWT.
+        expected_type (TokenType): The type the token must have.
+
+    Raises:
+        InvalidTokenError: If the token is already invalid.
+    """
+    claims = decode_token(token, expected_type)
+    revocations.revoke_token(claims.jti, claims.exp)
+
+
+def revoke_user_tokens(user: UserDetails):
+    """
+    Revokes every token issued to a user so far.
+
+    Call when an account is deactivated (is_active=False) or its password is
+    reset; any outstanding password reset token is cleared as well.
+
+    Args:
+        user (UserDetails): The account whose tokens are revoked.
+    """
+    revocations.revoke_user(str(user.user_id))
+    user.password_reset_token = None
+    user.password_reset_token_expiry = None
+
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+
+def require_access_token(
+    credentials: Annotated[HTTPAuthorizationCredentials | None, Depends(bearer_scheme)],
+) -> TokenClaims:
+    """FastAPI dependency returning the verified claims of the request's bearer token."""
+    if credentials is None:
+        raise HTTPException(status_code=HTTP_401_UNAUTHORIZED, detail="Not authenticated.",
+                            headers={"WWW-Authenticate": "Bearer"})
+    try:
+        return decode_token(credentials.credentials)
+    except InvalidTokenError as error:
+        raise HTTPException(status_code=HTTP_401_UNAUTHORIZED, detail=str(error),
+                            headers={"WWW-Authenticate": "Bearer"}) from error
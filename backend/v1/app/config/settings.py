@@ -0,0 +1,132 @@
+"""LiBookTrac Application Settings."""
+
+import os
+from pathlib import Path
+from typing import Literal
+
+from pydantic import Field, SecretStr
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    """Application Settings read from LIBOOKTRAC_* environment variables."""
+    model_config = SettingsConfigDict(env_prefix="LIBOOKTRAC_", env_file=".env",
+                                      extra="ignore")
+
+    books_backend: Literal["memory", "compact", "sql"] = Field(
+        "memory", description="Storage used by the book routes; compact suits large catalogs.")
+    database_url: str = Field(
+        "sqlite+aiosqlite:///./libooktrac.db",
+        description="SQLAlchemy async URL, e.g. postgresql+asyncpg://user:pw@host/db.")
+    database_pool_size: int = Field(10, ge=1, description="Connections kept open in the pool.")
+    database_max_overflow: int = Field(
+        10, ge=0, description="Extra connections opened when the pool is exhausted.")
+    database_pool_timeout: float = Field(
+        30.0, gt=0, description="Seconds to wait for a pooled connection.")
+    database_pool_recycle: int = Field(
+        1800, description="Seconds after which pooled connections are replaced.")
+    database_echo: bool = Field(False, description="Log every SQL statement.")
+    database_busy_timeout: float = Field(
+        30.0, gt=0, description="Seconds a SQLite writer waits for another worker's lock.")
+    catalog_sync_interval: float = Field(
+        0.5, ge=0, description="Seconds between polls for catalog changes made by other "
+                               "workers sharing the database; 0 disables polling.")
+    catalog_change_retention: int = Field(
+        24 * 60 * 60, gt=0, description="Seconds catalog change log entries are kept.")
+
+    catalog_data_dir: Path | None = Field(
+        None, description="Directory for the write-ahead log and snapshots of the memory and "
+                          "compact backends; unset keeps the catalog in memory only.")
+    wal_fsync: Literal["always", "batch", "never"] = Field(
+        "batch", description="When log writes are synced: each group commit, after waiting "
+                             "wal_fsync_interval to group more writers, or never.")
+    wal_fsync_interval: float = Field(
+        0.005, ge=0, description="Seconds a batch waits to collect writers before syncing.")
+    snapshot_interval: float = Field(
+        300.0, ge=0, description="Seconds between catalog snapshots; 0 only snapshots "
+                                 "at shutdown.")
+    snapshot_wal_bytes: int = Field(
+        64 * 1024 * 1024, gt=0, description="Log size that triggers an early snapshot.")
+    search_index_path: Path | None = Field(
+        None, description="Search index snapshot restored at startup and saved at shutdown "
+                          "by the one worker holding its .lock file.")
+    recommendations_path: Path | None = Field(
+        None, description="Recommendation snapshot restored at startup and saved at shutdown "
+                          "by the one worker holding its .lock file.")
+    response_cache_max_bytes: int = Field(
+        64 * 1024 * 1024, ge=0, description="Serialized catalog responses kept in memory.")
+    change_feed_history: int = Field(
+        10_000, ge=1, description="Recent catalog changes kept for clients resuming the feed.")
+    change_feed_max_lag: int = Field(
+        1000, ge=1, description="Changes a feed client may fall behind before it is told "
+                                "to resync.")
+    change_feed_heartbeat: float = Field(
+        15.0, gt=0, description="Idle seconds between keepalive comments on the feed.")
+
+    jwt_secret_key: SecretStr | None = Field(
+        None, description="HMAC key signing tokens, shared by every worker and kept across "
+                          "restarts; required. Generate one with auth/create_secret.py.")
+    jwt_algorithm: str = Field("HS256", description="JWT signing algorithm.")
+    access_token_ttl_seconds: int = Field(15 * 60, gt=0)
+    refresh_token_ttl_seconds: int = Field(7 * 24 * 60 * 60, gt=0)
+    password_reset_token_ttl_seconds: int = Field(30 * 60, gt=0)
+    token_cache_size: int = Field(
+        10_000, ge=1, description="Verified tokens cached to skip signature checks.")
+
+    loan_period_days: int = Field(21, ge=1, description="Days a checkout lasts.")
+    max_renewals: int = Field(2, ge=0, description="Renewals allowed per loan.")
+    hold_pickup_days: int = Field(
+        3, ge=1, description="Days a returned book stays set aside for the next hold.")
+    default_borrow_limit: int = Field(
+        5, ge=1, description="Borrow limit for patrons without an explicit one.")
+    circulation_data_dir: Path | None = Field(
+        None, description="Directory of the circulation journal. Loans and holds live in one "
+                          "process: the worker that locks the directory serves circulation "
+                          "and the others answer it with 503. Unset keeps them in memory "
+                          "only, which suits a single worker.")
+
+    fine_daily_rates: dict[str, float] = Field(
+        default_factory=lambda: {"student": 0.10, "parent": 0.25, "staff": 0.25, "admin": 0.0},
+        description="Overdue fine per day by UserType value.")
+    fine_default_daily_rate: float = Field(
+        0.25, ge=0, description="Daily fine for users whose type has no rate.")
+    fine_default_cap: float = Field(
+        25.0, ge=0, description="Fine cap for books without a replacement_cost.")
+
+    password_hash_workers: int = Field(
+        min(4, os.cpu_count() or 1), ge=1, description="Workers hashing passwords.")
+    password_hash_max_waiting: int = Field(
+        256, ge=0, description="Password operations allowed to queue before rejecting.")
+    password_hash_executor: Literal["thread", "process"] = Field(
+        "thread", description="Run bcrypt in a thread or a process pool.")
+
+    mongodb_url: SecretStr = Field(
+        SecretStr("mongodb://localhost:27017"),
+        description="MongoDB connection string of the user accounts database.")
+    mongodb_database: str = Field("libooktrac", description="MongoDB database of the users.")
+    patron_import_chunk_size: int = Field(
+        1000, ge=1, description="Patrons validated, hashed and inserted together on import.")
+
+    admission_enabled: bool = Field(
+        True, description="Rate limit clients and shed load before requests reach the routes.")
+    rate_limits: dict[str, float] = Field(
+        default_factory=lambda: {"read": 50.0, "write": 10.0, "auth": 1.0},
+        description="Requests per second each client may make, by route class.")
+    rate_limit_bursts: dict[str, int] = Field(
+        default_factory=lambda: {"read": 100, "write": 20, "auth": 5},
+        description="Requests a client may make at once after being idle, by route class.")
+    concurrency_limits: dict[str, int] = Field(
+        default_factory=lambda: {"read": 256, "write": 64, "auth": 16},
+        description="Requests served at once per route class, across all clients.")
+    admission_max_waiting: int = Field(
+        128, ge=0, description="Requests of a route class queued for a slot before shedding.")
+    admission_queue_timeout: float = Field(
+        2.0, gt=0, description="Seconds a queued request waits for a slot before shedding.")
+    shed_loop_lag: float = Field(
+        0.25, gt=0, description="Event loop lag in seconds above which requests are shed.")
+    trusted_proxies: list[str] = Field(
+        default_factory=list,
+        description="Proxy addresses whose X-Forwarded-For identifies the client.")
+
+
+settings = Settings()
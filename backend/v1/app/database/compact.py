@@ -0,0 +1,582 @@
+"""Compact Columnar In-Memory Implementation of the Books Repository."""
+
+import json
+import math
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Callable, Iterable
+from datetime import UTC, date, datetime, timedelta
+from enum import Enum
+from pathlib import Path
+from typing import Any
+from uuid import UUID
+
+from backend.v1.app.database.repository import (
+    BookRepository,
+    DuplicateISBNError,
+    check_updates,
+)
+from backend.v1.app.models.books import (
+    BookAudience,
+    BookCreateCondition,
+    BookFormat,
+    BookLanguage,
+    BookLocation,
+    BookResponse,
+    EBookType,
+)
+from backend.v1.app.services.pagination import SortKey
+
+BOOK_FIELDS = frozenset(BookResponse.model_fields)
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+# Dead rows are only compacted away in tables at least this large.
+COMPACT_MIN_ROWS = 1024
+SNAPSHOT_MAGIC = b"LBTSNAP1"
+SNAPSHOT_HEADER = struct.Struct("<8sQ")
+SNAPSHOT_ALIGNMENT = 8
+
+
+def _to_micros(value: datetime) -> int:
+    if value.tzinfo is not None:
+        value = value.astimezone(UTC).replace(tzinfo=None)
+    return (value - EPOCH) // MICROSECOND
+
+
+def _from_micros(value: int) -> datetime:
+    return EPOCH + timedelta(microseconds=value)
+
+
+class ValuePool:
+    """Dictionary encoding: every distinct value is stored once and rows hold its code."""
+
+    def __init__(self):
+        self.values: list = []
+        self.codes: dict = {}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def encode(self, value) -> int:
+        if value is None:
+            return -1
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def decode(self, code: int):
+        return None if code < 0 else self.values[code]
+
+    def clear(self):
+        self.values.clear()
+        self.codes.clear()
+
+
+class ArrayColumn:
+    """Fixed-width values in an `array.array`, converted on the way in and out."""
+
+    def __init__(self, typecode: str, encode: Callable[[Any], Any] = lambda value: value,
+                 decode: Callable[[Any], Any] = lambda value: value):
+        self.typecode = typecode
+        self.encode = encode
+        self.decode = decode
+        self.values = array(typecode)
+
+    def append(self, value):
+        self.values.append(self.encode(value))
+
+    def pop(self):
+        self.values.pop()
+
+    def get(self, row: int):
+        return self.decode(self.values[row])
+
+    def take(self, rows: list[int]):
+        values = self.values
+        self.values = array(self.typecode, [values[row] for row in rows])
+
+    def clear(self):
+        self.values = array(self.typecode)
+
+    def export(self) -> dict[str, bytes]:
+        return {"values": self.values.tobytes()}
+
+    def restore(self, buffers: dict[str, memoryview]):
+        self.clear()
+        self.values.frombytes(buffers["values"])
+
+
+class EnumColumn(ArrayColumn):
+    """Enum members stored as one-byte codes, -1 for None."""
+
+    def __init__(self, enum: type[Enum]):
+        members = tuple(enum)
+        codes = {member: code for code, member in enumerate(members)}
+        super().__init__("b", encode=lambda member: -1 if member is None else codes[member],
+                         decode=lambda code: None if code < 0 else members[code])
+
+
+class PooledColumn(ArrayColumn):
+    """Repeated values such as publishers or author names, dictionary encoded."""
+
+    def __init__(self, pool: ValuePool):
+        super().__init__("i", encode=pool.encode, decode=pool.decode)
+
+
+class TagsColumn(ArrayColumn):
+    """Tag lists interned as tuples, since the same combinations recur across books."""
+
+    def __init__(self, pool: ValuePool):
+        super().__init__("i", encode=lambda tags: pool.encode(None if tags is None
+                                                               else tuple(tags)),
+                         decode=lambda code: None if code < 0 else list(pool.values[code]))
+
+
+class TextColumn:
+    """Mostly unique text such as titles, UTF-8 encoded into one shared buffer."""
+
+    def __init__(self):
+        self.clear()
+
+    def append(self, value: str | None):
+        if value is None:
+            self.nulls.append(1)
+        else:
+            self.nulls.append(0)
+            self.data += value.encode()
+        self.offsets.append(len(self.data))
+
+    def pop(self):
+        self.offsets.pop()
+        self.nulls.pop()
+        del self.data[self.offsets[-1]:]
+
+    def get(self, row: int) -> str | None:
+        if self.nulls[row]:
+            return None
+        return self.data[self.offsets[row]:self.offsets[row + 1]].decode()
+
+    def take(self, rows: list[int]):
+        data, offsets, nulls = self.data, self.offsets, self.nulls
+        self.clear()
+        for row in rows:
+            self.data += data[offsets[row]:offsets[row + 1]]
+            self.offsets.append(len(self.data))
+            self.nulls.append(nulls[row])
+
+    def clear(self):
+        self.data = bytearray()
+        self.offsets = array("q", [0])
+        self.nulls = bytearray()
+
+    def export(self) -> dict[str, bytes]:
+        return {"data": bytes(self.data), "offsets": self.offsets.tobytes(),
+                "nulls": bytes(self.nulls)}
+
+    def restore(self, buffers: dict[str, memoryview]):
+        self.data = bytearray(buffers["data"])
+        self.offsets = array("q")
+        self.offsets.frombytes(buffers["offsets"])
+        self.nulls = bytearray(buffers["nulls"])
+
+
+class UUIDColumn:
+    """UUIDs packed as 16 raw bytes per row."""
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def append(self, value: UUID):
+        self.data += value.bytes
+
+    def pop(self):
+        del self.data[-16:]
+
+    def get(self, row: int) -> UUID:
+        return UUID(bytes=bytes(self.data[16 * row:16 * row + 16]))
+
+    def as_int(self, row: int) -> int:
+        return int.from_bytes(self.data[16 * row:16 * row + 16])
+
+    def take(self, rows: list[int]):
+        data = self.data
+        self.data = bytearray().join(data[16 * row:16 * row + 16] for row in rows)
+
+    def clear(self):
+        self.data = bytearray()
+
+    def export(self) -> dict[str, bytes]:
+        return {"data": bytes(self.data)}
+
+    def restore(self, buffers: dict[str, memoryview]):
+        self.data = bytearray(buffers["data"])
+
+
+class BookRow:
+    """
+    Read-only view of one stored book; attributes are decoded on access.
+
+    Views are only valid until the next write to the repository, which may
+    compact rows.
+    """
+
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store: "CompactBookRepository", row: int):
+        self._store = store
+        self._row = row
+
+    def __getattr__(self, name: str):
+        column = self._store.columns.get(name)
+        if column is None:
+            raise AttributeError(name)
+        return column.get(self._row)
+
+    def to_response(self) -> BookResponse:
+        """Materializes the row as a BookResponse."""
+        return self._store.materialize(self._row)
+
+
+class CompactBookRepository(BookRepository):
+    """
+    Book repository holding the catalog in parallel columns instead of objects.
+
+    Enums are stored as one-byte codes, publishers, genres, author names and
+    tag lists are dictionary encoded, numbers and timestamps live in typed
+    arrays and titles, descriptions and ISBNs share UTF-8 buffers. A book
+    costs a few hundred bytes instead of the kilobytes of a BookResponse,
+    which is only built when a book leaves the repository.
+
+    Rows are appended; deleted rows are marked dead and compacted away once
+    they make up half of the table. Keyset order is kept as a sorted list of
+    rows, appended to in the common case of increasing entry times. Rows
+    entered out of order wait in a tail that the next read sorts and merges
+    in, so it costs a sort of the tail and one bisect per tail row rather
+    than a sort of the whole table.
+
+    The columns can be written to a snapshot file as raw buffers and loaded
+    back through a memory map, which copies them without decoding a book.
+    """
+
+    def __init__(self):
+        authors = ValuePool()
+        self.pools = {"authors": authors, "publishers": ValuePool(), "genres": ValuePool(),
+                      "tags": ValuePool()}
+        optional_int = ArrayColumn("i", encode=lambda value: value or 0,
+                                   decode=lambda value: value or None)
+        self.columns = {
+            "book_id": UUIDColumn(),
+            "title": TextColumn(),
+            "author_first_name": PooledColumn(authors),
+            "author_middle_name": PooledColumn(authors),
+            "author_last_name": PooledColumn(authors),
+            "description": TextColumn(),
+            "language": EnumColumn(BookLanguage),
+            "book_type": EnumColumn(BookFormat),
+            "ebook_type": EnumColumn(EBookType),
+            "hardcover_condition": EnumColumn(BookCreateCondition),
+            "publisher": PooledColumn(self.pools["publishers"]),
+            "edition": optional_int,
+            "page_count": ArrayColumn("i"),
+            "tags": TagsColumn(self.pools["tags"]),
+            "isbn": TextColumn(),
+            "genre": PooledColumn(self.pools["genres"]),
+            "publication_year": ArrayColumn(
+                "i", encode=lambda value: 0 if value is None else value.toordinal(),
+                decode=lambda value: date.fromordinal(value) if value else None),
+            "target_audience": EnumColumn(BookAudience),
+            "location": EnumColumn(BookLocation),
+            "replacement_cost": ArrayColumn(
+                "d", encode=lambda value: math.nan if value is None else value,
+                decode=lambda value: None if math.isnan(value) else value),
+            "book_entry_time": ArrayColumn("q", encode=_to_micros, decode=_from_micros),
+            "last_updated_date": ArrayColumn("q", encode=_to_micros, decode=_from_micros),
+        }
+        self.live = bytearray()
+        self._rows: dict[int, int] = {}
+        self._isbns: set[str] = set()
+        self._order = array("q")
+        self._tail = array("q")
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    async def ping(self) -> bool:
+        return True
+
+    def _sort_key(self, row: int) -> tuple[int, int]:
+        return (self.columns["book_entry_time"].values[row], self.columns["book_id"].as_int(row))
+
+    def materialize(self, row: int) -> BookResponse:
+        """Builds the BookResponse of a row without revalidating it."""
+        return BookResponse.model_construct(
+            _fields_set=BOOK_FIELDS,
+            **{name: column.get(row) for name, column in self.columns.items()})
+
+    def view(self, book_id: UUID) -> BookRow | None:
+        """Returns a lightweight view of a stored book, or None."""
+        row = self._rows.get(book_id.int)
+        return None if row is None else BookRow(self, row)
+
+    def _append(self, book: BookResponse) -> int:
+        row = len(self.live)
+        appended = []
+        try:
+            for name, column in self.columns.items():
+                column.append(getattr(book, name))
+                appended.append(column)
+        except (OverflowError, TypeError, ValueError):
+            # A value that does not fit its column must not leave the earlier
+            # columns one row longer than the rest.
+            for column in appended:
+                column.pop()
+            raise
+        self.live.append(1)
+        self._rows[book.book_id.int] = row
+        if book.isbn:
+            self._isbns.add(book.isbn)
+        return row
+
+    def _store(self, book: BookResponse):
+        row = self._append(book)
+        if not self._tail and (not self._order or
+                               self._sort_key(row) >= self._sort_key(self._order[-1])):
+            self._order.append(row)
+        else:
+            self._tail.append(row)
+
+    async def add(self, book: BookResponse):
+        if book.isbn and book.isbn in self._isbns:
+            raise DuplicateISBNError(book.isbn)
+        await self.delete(book.book_id)
+        self._store(book)
+
+    async def add_many(self, books: list[BookResponse]) -> list[BookResponse]:
+        skipped = []
+        for book in books:
+            if book.isbn and book.isbn in self._isbns:
+                skipped.append(book)
+            else:
+                await self.delete(book.book_id)
+                self._store(book)
+        return skipped
+
+    def _position(self, row: int, key: tuple[int, int]) -> int | None:
+        """Returns the position of a row in the sorted keyset order, or None."""
+        order = self._order
+        position = bisect_left(order, key, key=self._sort_key)
+        while position < len(order) and self._sort_key(order[position]) == key:
+            if order[position] == row:
+                return position
+            position += 1
+        return None
+
+    async def update_many(self, changes: list[tuple[BookResponse, BookResponse]]):
+        last_updated = self.columns["last_updated_date"]
+
+        def stored_version(book_id: UUID) -> datetime | None:
+            row = self._rows.get(book_id.int)
+            return None if row is None else last_updated.get(row)
+
+        check_updates(changes, stored_version, self._isbns)
+        old_rows = []
+        for old, _ in changes:
+            row = self._rows.pop(old.book_id.int)
+            self.live[row] = 0
+            if old.isbn:
+                self._isbns.discard(old.isbn)
+            old_rows.append(row)
+        # An update keeps the entry time and id, so the new row takes the old
+        # row's place and the keyset order stays sorted.
+        for (_, new), old_row in zip(changes, old_rows, strict=True):
+            key = self._sort_key(old_row)
+            row = self._append(new)
+            position = self._position(old_row, key) if self._sort_key(row) == key else None
+            if position is None:
+                self._tail.append(row)
+            else:
+                self._order[position] = row
+        self._compact()
+
+    async def get(self, book_id: UUID) -> BookResponse | None:
+        row = self._rows.get(book_id.int)
+        return None if row is None else self.materialize(row)
+
+    async def get_many(self, book_ids: Iterable[UUID]) -> list[BookResponse]:
+        rows = self._rows
+        return [self.materialize(rows[book_id.int]) for book_id in book_ids
+                if book_id.int in rows]
+
+    async def delete(self, book_id: UUID) -> BookResponse | None:
+        row = self._rows.pop(book_id.int, None)
+        if row is None:
+            return None
+        book = self.materialize(row)
+        self.live[row] = 0
+        if book.isbn:
+            self._isbns.discard(book.isbn)
+        self._compact()
+        return book
+
+    def _compact(self):
+        size = len(self.live)
+        if size < COMPACT_MIN_ROWS or len(self._rows) * 2 > size:
+            return
+        live = self.live
+        keep = [row for row in range(size) if live[row]]
+        for column in self.columns.values():
+            column.take(keep)
+        # Renumbering keeps the relative order of rows, so the keyset order
+        # stays sorted.
+        renumbered = dict(zip(keep, range(len(keep)), strict=True))
+        self._order = array("q", [renumbered[row] for row in self._order if live[row]])
+        self._tail = array("q", [renumbered[row] for row in self._tail if live[row]])
+        self.live = bytearray(b"\x01" * len(keep))
+        book_ids = self.columns["book_id"]
+        self._rows = {book_ids.as_int(row): row for row in range(len(keep))}
+
+    def _sorted_order(self) -> array:
+        if self._tail:
+            live, order = self.live, self._order
+            merged, start = array("q"), 0
+            for row in sorted((row for row in self._tail if live[row]), key=self._sort_key):
+                position = bisect_right(order, self._sort_key(row), lo=start,
+                                        key=self._sort_key)
+                merged.extend(order[start:position])
+                merged.append(row)
+                start = position
+            merged.extend(order[start:])
+            self._order = merged
+            self._tail = array("q")
+        return self._order
+
+    async def existing_isbns(self, isbns: Iterable[str]) -> set[str]:
+        return self._isbns.intersection(isbns)
+
+    async def page(self, after: SortKey | None, limit: int | None) -> list[BookResponse]:
+        order = self._sorted_order()
+        start = 0
+        if after is not None:
+            start = bisect_right(order, (_to_micros(after[0]), after[1].int),
+                                 key=self._sort_key)
+        live = self.live
+        books = []
+        for position in range(start, len(order)):
+            if limit is not None and len(books) >= limit:
+                break
+            if live[order[position]]:
+                books.append(self.materialize(order[position]))
+        return books
+
+    async def count(self) -> int:
+        return len(self._rows)
+
+    async def clear(self):
+        for column in self.columns.values():
+            column.clear()
+        for pool in self.pools.values():
+            pool.clear()
+        self.live = bytearray()
+        self._rows.clear()
+        self._isbns.clear()
+        self._order = array("q")
+        self._tail = array("q")
+
+    @classmethod
+    def from_books(cls, books: Iterable[BookResponse]) -> "CompactBookRepository":
+        """Builds a repository from books already known to have unique ids and ISBNs."""
+        repository = cls()
+        for book in books:
+            repository._store(book)
+        return repository
+
+    def capture(self) -> dict:
+        """
+        Copies the buffers a snapshot is made of.
+
+        The copy is taken synchronously, so it reflects every write made so
+        far, and can then be written by `write_snapshot` off the event loop.
+        """
+        buffers = {f"{name}.{part}": data for name, column in self.columns.items()
+                   for part, data in column.export().items()}
+        buffers["live"] = bytes(self.live)
+        buffers["order"] = self._sorted_order().tobytes()
+        return {"pools": {name: list(pool.values) for name, pool in self.pools.items()},
+                "buffers": buffers}
+
+    @staticmethod
+    def write_snapshot(path: Path, state: dict):
+        """
+        Writes captured buffers to a snapshot file.
+
+        The file is a fixed header, a JSON manifest of the value pools and
+        buffer offsets, then every buffer aligned to 8 bytes. It is written
+        under a temporary name, synced and renamed, so a crash leaves either
+        the previous snapshot or the complete new one.
+        """
+        layout, offset = [], 0
+        for name, data in state["buffers"].items():
+            layout.append((name, offset, len(data)))
+            offset += -(-len(data) // SNAPSHOT_ALIGNMENT) * SNAPSHOT_ALIGNMENT
+        manifest = json.dumps({"pools": state["pools"], "buffers": layout}).encode()
+        header_size = SNAPSHOT_HEADER.size + len(manifest)
+        padding = -header_size % SNAPSHOT_ALIGNMENT
+
+        temporary = path.with_name(path.name + ".tmp")
+        with open(temporary, "wb") as file:
+            file.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, len(manifest)))
+            file.write(manifest + bytes(padding))
+            for name, _, length in layout:
+                file.write(state["buffers"][name])
+                file.write(bytes(-length % SNAPSHOT_ALIGNMENT))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)
+
+    @classmethod
+    def load_snapshot(cls, path: Path) -> "CompactBookRepository":
+        """
+        Loads a repository from a snapshot file written by `write_snapshot`.
+
+        Raises:
+            ValueError: If the file is not a snapshot.
+        """
+        repository = cls()
+        with open(path, "rb") as file, mmap.mmap(file.fileno(), 0,
+                                                  access=mmap.ACCESS_READ) as mapped:
+            magic, manifest_size = SNAPSHOT_HEADER.unpack_from(mapped)
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError(f"{path} is not a catalog snapshot.")
+            start = SNAPSHOT_HEADER.size
+            manifest = json.loads(mapped[start:start + manifest_size])
+            start += manifest_size
+            start += -start % SNAPSHOT_ALIGNMENT
+            with memoryview(mapped) as view:
+                buffers: dict[str, dict[str, memoryview]] = {}
+                for name, offset, length in manifest["buffers"]:
+                    column, _, part = name.partition(".")
+                    buffers.setdefault(column, {})[part or column] = (
+                        view[start + offset:start + offset + length])
+                for name, column in repository.columns.items():
+                    column.restore(buffers[name])
+                repository.live = bytearray(buffers["live"]["live"])
+                repository._order.frombytes(buffers["order"]["order"])
+                for parts in buffers.values():
+                    for buffer in parts.values():
+                        buffer.release()
+
+        for name, values in manifest["pools"].items():
+            pool = repository.pools[name]
+            pool.values = [tuple(value) for value in values] if name == "tags" else values
+            pool.codes = {value: code for code, value in enumerate(pool.values)}
+        book_ids, isbns = repository.columns["book_id"].data, repository.columns["isbn"]
+        rows = [row for row, live in enumerate(repository.live) if live]
+        repository._rows = {int.from_bytes(book_ids[16 * row:16 * row + 16]): row
+                            for row in rows}
+        repository._isbns = {isbn for isbn in map(isbns.get, rows) if isbn}
+        return repository
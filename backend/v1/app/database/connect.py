@@ -1 +1,125 @@
 """Database Connection Operations."""
+
+import asyncio
+
+from beanie import init_beanie
+from pymongo import AsyncMongoClient
+from pymongo.errors import PyMongoError
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from backend.v1.app.config.settings import Settings, settings
+from backend.v1.app.database.repository import BookRepository, InMemoryBookRepository
+from backend.v1.app.models.users import UserDetails
+
+
+def create_engine(config: Settings) -> AsyncEngine:
+    """
+    Creates a pooled async engine from the database settings.
+
+    Connections are opened lazily and reused across requests. An in-memory
+    SQLite database shares one connection, since every new connection would
+    otherwise see its own empty database. A SQLite file is opened in WAL
+    mode so several worker processes can share it: readers do not block the
+    writer, and a writer waits up to `database_busy_timeout` for the lock
+    instead of failing.
+
+    Args:
+        config (Settings): The application settings.
+
+    Returns:
+        AsyncEngine: The engine.
+    """
+    url = make_url(config.database_url)
+    options = {"echo": config.database_echo, "pool_pre_ping": True}
+    sqlite = url.get_backend_name() == "sqlite"
+    if sqlite and url.database in (None, "", ":memory:"):
+        return create_async_engine(url, poolclass=StaticPool, **options)
+
+    options.update(
+        pool_size=config.database_pool_size,
+        max_overflow=config.database_max_overflow,
+        pool_timeout=config.database_pool_timeout,
+        pool_recycle=config.database_pool_recycle,
+    )
+    if sqlite:
+        options["connect_args"] = {"timeout": config.database_busy_timeout}
+    engine = create_async_engine(url, **options)
+    if sqlite:
+        event.listen(engine.sync_engine, "connect", _enable_wal)
+    return engine
+
+
+def _enable_wal(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    # Commits stay durable against process crashes; only a power loss can
+    # drop the last transactions, never corrupt the file.
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+def create_book_repository(config: Settings) -> BookRepository:
+    """
+    Creates the book repository selected by the `books_backend` setting.
+
+    The in-memory backends are made durable with a write-ahead log and
+    snapshots when `catalog_data_dir` is set.
+
+    Args:
+        config (Settings): The application settings.
+
+    Returns:
+        BookRepository: The in-memory, compact in-memory or SQL repository.
+    """
+    if config.books_backend == "sql":
+        from backend.v1.app.database.sql import SQLBookRepository
+
+        return SQLBookRepository(create_engine(config))
+    if config.books_backend == "compact":
+        from backend.v1.app.database.compact import CompactBookRepository
+
+        repository = CompactBookRepository()
+    else:
+        repository = InMemoryBookRepository()
+    if config.catalog_data_dir is None:
+        return repository
+
+    from backend.v1.app.database.durable import DurableBookRepository
+
+    return DurableBookRepository(repository, config.catalog_data_dir, config.wal_fsync,
+                                 config.wal_fsync_interval, config.snapshot_interval,
+                                 config.snapshot_wal_bytes)
+
+
+book_repository = create_book_repository(settings)
+
+
+def get_book_repository() -> BookRepository:
+    """FastAPI dependency returning the configured book repository."""
+    return book_repository
+
+
+async def init_user_store(client: AsyncMongoClient, config: Settings,
+                          retry_interval: float = 5.0):
+    """
+    Initializes Beanie on the user database, retrying until MongoDB is reachable.
+
+    Run as a background task, so the app starts without MongoDB; until it
+    finishes, the user collection raises CollectionWasNotInitialized, which
+    the routes answer with 503 or a fallback.
+
+    Args:
+        client (AsyncMongoClient): Client of the MongoDB server.
+        config (Settings): The application settings.
+        retry_interval (float): Seconds between attempts.
+    """
+    while True:
+        try:
+            await init_beanie(database=client[config.mongodb_database],
+                              document_models=[UserDetails])
+            return
+        except PyMongoError:
+            await asyncio.sleep(retry_interval)
@@ -0,0 +1,393 @@
+"""Write-Ahead Log and Snapshot Persistence for the In-Memory Book Repositories."""
+
+import asyncio
+import contextlib
+import os
+import re
+import struct
+import zlib
+from collections.abc import Awaitable, Callable, Iterable
+from functools import partial
+from pathlib import Path
+from typing import BinaryIO, Literal
+from uuid import UUID
+
+from pydantic import TypeAdapter
+
+from backend.v1.app.database.compact import CompactBookRepository
+from backend.v1.app.database.repository import BookRepository, InMemoryBookRepository
+from backend.v1.app.models.books import BookResponse
+from backend.v1.app.services.pagination import SortKey
+
+FsyncPolicy = Literal["always", "batch", "never"]
+
+# Record header: payload length, CRC-32 of the op and payload, op.
+RECORD_HEADER = struct.Struct("<IIB")
+ADD, DELETE, CLEAR, UPDATE = 1, 2, 3, 4
+BOOKS_JSON = TypeAdapter(list[BookResponse])
+RECOVERY_BATCH_SIZE = 10_000
+
+
+def _checksum(op: int, payload: bytes) -> int:
+    return zlib.crc32(payload, zlib.crc32(bytes((op,))))
+
+
+def encode_record(op: int, payload: bytes = b"") -> bytes:
+    """Frames one log record."""
+    return RECORD_HEADER.pack(len(payload), _checksum(op, payload), op) + payload
+
+
+def read_segment(path: Path) -> tuple[list[tuple[int, bytes]], int]:
+    """
+    Reads the records of a log segment.
+
+    Returns:
+        tuple[list[tuple[int, bytes]], int]: The (op, payload) records and the
+        length of the intact prefix of the file. A record cut short or
+        corrupted by a crash ends the segment.
+    """
+    data = path.read_bytes()
+    records, offset = [], 0
+    while offset + RECORD_HEADER.size <= len(data):
+        length, checksum, op = RECORD_HEADER.unpack_from(data, offset)
+        start = offset + RECORD_HEADER.size
+        payload = data[start:start + length]
+        if len(payload) < length or _checksum(op, payload) != checksum:
+            break
+        records.append((op, payload))
+        offset = start + length
+    return records, offset
+
+
+class WriteAheadLog:
+    """
+    Append-only log of catalog writes, split into numbered segment files.
+
+    Records are queued and written by a single flusher task in a worker
+    thread. Records queued while a write is in flight go out together in the
+    next one with a single fsync, so concurrent writers share the cost of a
+    sync (group commit). The fsync policy is "always" (sync each group as
+    soon as the previous one is done), "batch" (wait `fsync_interval`
+    seconds first to collect a bigger group) or "never" (leave syncing to
+    the OS, which survives a process crash but not a power loss).
+    """
+
+    def __init__(self, directory: Path, fsync: FsyncPolicy = "batch",
+                 fsync_interval: float = 0.005):
+        self.directory = directory
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.generation = 0
+        self.size = 0
+        self.syncs = 0
+        self._file: BinaryIO | None = None
+        # (segment file, record or None to close the file, waiter)
+        self._pending: list[tuple[BinaryIO, bytes | None, asyncio.Future | None]] = []
+        self._flusher: asyncio.Task | None = None
+
+    def segment_path(self, generation: int) -> Path:
+        return self.directory / f"wal-{generation:08d}.log"
+
+    def _enqueue(self, file: BinaryIO, record: bytes | None, waiter: asyncio.Future | None):
+        self._pending.append((file, record, waiter))
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.get_running_loop().create_task(self._flush())
+
+    def append(self, record: bytes) -> asyncio.Future:
+        """
+        Queues a record at the end of the current segment.
+
+        Returns:
+            asyncio.Future: Resolved once the record is written and, unless
+            the policy is "never", synced.
+        """
+        waiter = asyncio.get_running_loop().create_future()
+        self._enqueue(self._file, record, waiter)
+        self.size += len(record)
+        return waiter
+
+    def rotate(self) -> int:
+        """
+        Starts a new segment and returns its generation.
+
+        Records queued before the call stay in the previous segment, which is
+        closed once they are written.
+        """
+        if self._file is not None:
+            self._enqueue(self._file, None, None)
+        self.generation += 1
+        self._file = open(self.segment_path(self.generation), "ab")
+        self.size = 0
+        return self.generation
+
+    async def _flush(self):
+        while self._pending:
+            if self.fsync == "batch":
+                await asyncio.sleep(self.fsync_interval)
+            group, self._pending = self._pending, []
+            try:
+                await asyncio.to_thread(self._write, group)
+            except OSError as error:
+                for _, _, waiter in group:
+                    if waiter is not None and not waiter.done():
+                        waiter.set_exception(error)
+            else:
+                for _, _, waiter in group:
+                    if waiter is not None and not waiter.done():
+                        waiter.set_result(None)
+
+    def _write(self, group: list[tuple[BinaryIO, bytes | None, asyncio.Future | None]]):
+        written: dict[BinaryIO, bool] = {}
+        for file, record, _ in group:
+            if record is not None:
+                file.write(record)
+                written.setdefault(file, False)
+            else:
+                written[file] = True
+        # Segments are synced in order, so a record is never durable while an
+        # earlier one in an older segment is not.
+        for file, close in written.items():
+            file.flush()
+            if self.fsync != "never":
+                os.fsync(file.fileno())
+                self.syncs += 1
+            if close:
+                file.close()
+
+    async def close(self):
+        """Writes every queued record and closes the current segment."""
+        if self._file is not None:
+            self._enqueue(self._file, None, None)
+            self._file = None
+        if self._flusher is not None:
+            await self._flusher
+            self._flusher = None
+
+
+class DurableBookRepository(BookRepository):
+    """
+    Makes an in-memory book repository survive restarts.
+
+    Every write is applied to the wrapped repository, appended to the
+    write-ahead log and acknowledged once the log has it under its fsync
+    policy. Reads go straight to the wrapped repository, so they may see a
+    write before it is durable. If its log record cannot be written, the
+    write is undone and the error raised to the writer.
+
+    Every `snapshot_interval` seconds, or once the log grows past
+    `snapshot_wal_bytes`, the catalog is snapshotted in the compact columnar
+    format: its buffers are copied at the same instant the log moves to a
+    new segment, then written off the event loop, after which older
+    snapshots and segments are deleted. Startup loads the latest snapshot,
+    which is memory-mapped and copied without decoding a book, and replays
+    only the segments written since.
+    """
+
+    def __init__(self, inner: InMemoryBookRepository | CompactBookRepository,
+                 directory: Path, fsync: FsyncPolicy = "batch",
+                 fsync_interval: float = 0.005, snapshot_interval: float = 300.0,
+                 snapshot_wal_bytes: int = 64 * 1024 * 1024):
+        self.inner = inner
+        self.directory = Path(directory)
+        self.wal = WriteAheadLog(self.directory, fsync, fsync_interval)
+        self.snapshot_interval = snapshot_interval
+        self.snapshot_wal_bytes = snapshot_wal_bytes
+        self.snapshots = 0
+        self.failures = 0
+        self._snapshot_due = asyncio.Event()
+        self._snapshot_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    def snapshot_path(self, generation: int) -> Path:
+        return self.directory / f"snapshot-{generation:08d}.bin"
+
+    def _generations(self, prefix: str) -> list[int]:
+        pattern = re.compile(rf"{prefix}-(\d+)\.(?:bin|log)")
+        return sorted(int(match.group(1)) for path in self.directory.iterdir()
+                      if (match := pattern.fullmatch(path.name)))
+
+    def _remove_older(self, generation: int):
+        for prefix, path_of in (("snapshot", self.snapshot_path),
+                                ("wal", self.wal.segment_path)):
+            for older in self._generations(prefix):
+                if older < generation:
+                    path_of(older).unlink(missing_ok=True)
+
+    async def connect(self):
+        await self.inner.connect()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.wal.generation = await self._recover()
+        self.wal.rotate()
+        if self.snapshot_interval > 0:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _recover(self) -> int:
+        """Loads the latest snapshot, replays newer segments and returns the last generation."""
+        for temporary in self.directory.glob("*.tmp"):
+            temporary.unlink()
+        base = 0
+        snapshots = self._generations("snapshot")
+        if snapshots:
+            base = snapshots[-1]
+            snapshot = await asyncio.to_thread(CompactBookRepository.load_snapshot,
+                                               self.snapshot_path(base))
+            await self._load(snapshot)
+        segments = [generation for generation in self._generations("wal")
+                    if generation >= base]
+        replayed = 0
+        for generation in segments:
+            path = self.wal.segment_path(generation)
+            records, intact = read_segment(path)
+            for op, payload in records:
+                await self._apply(op, payload)
+            replayed += intact
+            if intact < path.stat().st_size:
+                os.truncate(path, intact)
+        self._remove_older(base)
+        if replayed >= self.snapshot_wal_bytes:
+            self._snapshot_due.set()
+        return max([base, *segments])
+
+    async def _load(self, snapshot: CompactBookRepository):
+        if isinstance(self.inner, CompactBookRepository):
+            self.inner = snapshot
+            return
+        async for batch in snapshot.iter_batches(RECOVERY_BATCH_SIZE):
+            await self.inner.add_many(batch)
+
+    async def _apply(self, op: int, payload: bytes):
+        # Adds and updates both carry whole books, which replace any stored
+        # version; replaying a record twice leaves the same catalog.
+        if op in (ADD, UPDATE):
+            await self._replace(BOOKS_JSON.validate_json(payload))
+        elif op == DELETE:
+            await self._remove(UUID(bytes=payload[start:start + 16])
+                               for start in range(0, len(payload), 16))
+        elif op == CLEAR:
+            await self.inner.clear()
+
+    async def _replace(self, books: list[BookResponse]):
+        await self._remove(book.book_id for book in books)
+        await self.inner.add_many(books)
+
+    async def _remove(self, book_ids: Iterable[UUID]):
+        for book_id in book_ids:
+            await self.inner.delete(book_id)
+
+    async def _log(self, op: int, payload: bytes = b""):
+        # Queued in the same step as the write it records, so a snapshot
+        # either includes the write and starts after its record, or neither.
+        waiter = self.wal.append(encode_record(op, payload))
+        if self.wal.size >= self.snapshot_wal_bytes:
+            self._snapshot_due.set()
+        await waiter
+
+    async def _log_or_undo(self, op: int, payload: bytes, undo: Callable[[], Awaitable]):
+        # A cancelled writer leaves its record queued, so only a failed
+        # write undoes the change.
+        try:
+            await self._log(op, payload)
+        except OSError:
+            await undo()
+            raise
+
+    async def snapshot(self) -> int:
+        """
+        Snapshots the catalog and deletes the snapshots and segments it replaces.
+
+        Returns:
+            int: The generation of the snapshot; the log continues in the
+            segment of the same generation.
+        """
+        async with self._snapshot_lock:
+            generation = self.wal.rotate()
+            if isinstance(self.inner, CompactBookRepository):
+                state = self.inner.capture()
+                await asyncio.to_thread(CompactBookRepository.write_snapshot,
+                                        self.snapshot_path(generation), state)
+            else:
+                books = self.inner.books()
+                await asyncio.to_thread(self._write_books, self.snapshot_path(generation),
+                                        books)
+            self._remove_older(generation)
+            self.snapshots += 1
+        return generation
+
+    @staticmethod
+    def _write_books(path: Path, books: list[BookResponse]):
+        CompactBookRepository.write_snapshot(
+            path, CompactBookRepository.from_books(books).capture())
+
+    async def _run(self):
+        while True:
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._snapshot_due.wait(), self.snapshot_interval)
+            self._snapshot_due.clear()
+            if self.wal.size:
+                try:
+                    await self.snapshot()
+                except OSError:
+                    # The log still holds every write; the next attempt retries.
+                    self.failures += 1
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self.wal.size:
+            await self.snapshot()
+        await self.wal.close()
+        await self.inner.close()
+
+    async def ping(self) -> bool:
+        return await self.inner.ping()
+
+    async def add(self, book: BookResponse):
+        await self.inner.add(book)
+        await self._log_or_undo(ADD, BOOKS_JSON.dump_json([book]),
+                                partial(self.inner.delete, book.book_id))
+
+    async def add_many(self, books: list[BookResponse]) -> list[BookResponse]:
+        skipped = await self.inner.add_many(books)
+        stored = books
+        if skipped:
+            skipped_ids = {book.book_id for book in skipped}
+            stored = [book for book in books if book.book_id not in skipped_ids]
+        if stored:
+            await self._log_or_undo(ADD, BOOKS_JSON.dump_json(stored),
+                                    partial(self._remove, [book.book_id for book in stored]))
+        return skipped
+
+    async def update_many(self, changes: list[tuple[BookResponse, BookResponse]]):
+        await self.inner.update_many(changes)
+        if changes:
+            await self._log_or_undo(UPDATE, BOOKS_JSON.dump_json([new for _, new in changes]),
+                                    partial(self._replace, [old for old, _ in changes]))
+
+    async def get(self, book_id: UUID) -> BookResponse | None:
+        return await self.inner.get(book_id)
+
+    async def get_many(self, book_ids: Iterable[UUID]) -> list[BookResponse]:
+        return await self.inner.get_many(book_ids)
+
+    async def delete(self, book_id: UUID) -> BookResponse | None:
+        book = await self.inner.delete(book_id)
+        if book is not None:
+            await self._log_or_undo(DELETE, book_id.bytes, partial(self.inner.add_many, [book]))
+        return book
+
+    async def existing_isbns(self, isbns: Iterable[str]) -> set[str]:
+        return await self.inner.existing_isbns(isbns)
+
+    async def page(self, after: SortKey | None, limit: int | None) -> list[BookResponse]:
+        return await self.inner.page(after, limit)
+
+    async def count(self) -> int:
+        return await self.inner.count()
+
+    async def clear(self):
+        books = await self.inner.page(None, None)
+        await self.inner.clear()
+        await self._log_or_undo(CLEAR, b"", partial(self.inner.add_many, books))
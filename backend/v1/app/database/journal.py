@@ -0,0 +1,173 @@
+"""Write-Ahead Journal Persisting Loans, Holds and Assessed Fines."""
+
+import json
+import os
+import re
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from uuid import UUID
+
+from backend.v1.app.database.durable import FsyncPolicy, WriteAheadLog, encode_record, read_segment
+from backend.v1.app.models.circulation import Hold, HoldStatus, Loan
+from backend.v1.app.schemas.books import CirculationStatus
+from backend.v1.app.services.circulation import CirculationEngine, CopyState
+from backend.v1.app.services.snapshots import OwnerLock
+
+ACTIONS = {"checkout": 1, "return": 2, "renew": 3, "reserve": 4, "cancel": 5}
+ACTION_NAMES = {op: action for action, op in ACTIONS.items()}
+HOLD_ACTIONS = {"reserve", "cancel"}
+SNAPSHOT, ASSESSED = 16, 17
+OWNER_LOCK = "owner.lock"
+
+
+class CirculationOwnedError(RuntimeError):
+    """Raised when another process already owns the circulation journal."""
+
+
+class CirculationJournal:
+    """
+    Durable journal of circulation changes, one engine process at a time.
+
+    Passed to the CirculationEngine as its `journal`: every checkout, return,
+    renewal, hold and cancellation is appended to a write-ahead log with the
+    time it was made before the engine applies it. The fine engine records
+    the fine assessed per loan after each applied run, so fines already
+    charged are not charged again after a restart.
+
+    Loans and holds live in the memory of one process, so only the process
+    holding the directory's owner lock may serve circulation; other workers
+    of a multi-worker deployment must not. At startup `recover` replays the
+    journal into an engine and `compact` replaces it with a snapshot of the
+    recovered state.
+    """
+
+    def __init__(self, directory: Path, fsync: FsyncPolicy = "batch",
+                 fsync_interval: float = 0.005):
+        self.directory = Path(directory)
+        self.wal = WriteAheadLog(self.directory, fsync, fsync_interval)
+        # Fine already charged per loan, handed to the fine engine after recovery.
+        self.assessed: dict[UUID, float] = {}
+        self.owner = OwnerLock(self.directory / OWNER_LOCK)
+
+    def acquire(self) -> bool:
+        """
+        Takes the owner lock of the journal directory.
+
+        Returns:
+            bool: False if another process owns the journal.
+        """
+        return self.owner.acquire()
+
+    @property
+    def owned(self) -> bool:
+        return self.owner.owned
+
+    def _generations(self) -> list[int]:
+        pattern = re.compile(r"wal-(\d+)\.log")
+        return sorted(int(match.group(1)) for path in self.directory.iterdir()
+                      if (match := pattern.fullmatch(path.name)))
+
+    async def __call__(self, action: str, record: Loan | Hold, at: datetime):
+        payload = json.dumps({"at": at.isoformat(),
+                              "record": record.model_dump(mode="json")}).encode()
+        await self.wal.append(encode_record(ACTIONS[action], payload))
+
+    async def record_assessed(self, assessed: dict[UUID, float], settled: list[UUID]):
+        """
+        Records the fine now charged for loans and the loans settled by a fine run.
+
+        Args:
+            assessed (dict[UUID, float]): Fine charged so far by loan_id.
+            settled (list[UUID]): Returned loans whose final fine is charged.
+        """
+        payload = json.dumps({"assessed": {str(loan_id): fine
+                                           for loan_id, fine in assessed.items()},
+                              "settled": [str(loan_id) for loan_id in settled]}).encode()
+        await self.wal.append(encode_record(ASSESSED, payload))
+
+    def recover(self, engine: CirculationEngine):
+        """
+        Replays the journal into an engine.
+
+        Open loans and returned loans whose final fine was not yet charged are
+        queued as loan changes again, so the fine engine picks them up with
+        the fines in `assessed`.
+
+        Raises:
+            CirculationOwnedError: If another process owns the journal.
+        """
+        if not self.acquire():
+            raise CirculationOwnedError(f"{self.directory} is owned by another process.")
+        returned: dict[UUID, Loan] = {}
+        generations = self._generations()
+        for generation in generations:
+            path = self.wal.segment_path(generation)
+            records, intact = read_segment(path)
+            for op, payload in records:
+                self._apply(engine, op, json.loads(payload), returned)
+            if intact < path.stat().st_size:
+                os.truncate(path, intact)
+                break
+        self.wal.generation = generations[-1] if generations else 0
+        engine.requeue([*engine.active_loans(), *returned.values()])
+
+    def _apply(self, engine: CirculationEngine, op: int, body: dict,
+               returned: dict[UUID, Loan]):
+        if op == SNAPSHOT:
+            for copy in body["copies"]:
+                engine.adopt(UUID(copy["book_id"]), CopyState(
+                    status=CirculationStatus(copy["status"]),
+                    loan=None if copy["loan"] is None else Loan.model_validate(copy["loan"]),
+                    holds=deque(map(Hold.model_validate, copy["holds"]))))
+            returned.update((loan.loan_id, loan) for loan in
+                            map(Loan.model_validate, body["returned"]))
+            self.assessed.update(_assessed(body["assessed"]))
+        elif op == ASSESSED:
+            self.assessed.update(_assessed(body["assessed"]))
+            for loan_id in map(UUID, body["settled"]):
+                self.assessed.pop(loan_id, None)
+                returned.pop(loan_id, None)
+        else:
+            action = ACTION_NAMES[op]
+            model = Hold if action in HOLD_ACTIONS else Loan
+            record = model.model_validate(body["record"])
+            engine.replay(action, record, datetime.fromisoformat(body["at"]))
+            if action == "return":
+                returned[record.loan_id] = record
+
+    async def compact(self, engine: CirculationEngine):
+        """
+        Replaces the journal with a snapshot of a recovered engine.
+
+        Called once at startup after `recover`, before the engine serves
+        requests or its loan changes are consumed, so the queued changes are
+        exactly the loans the snapshot must keep for the fine engine.
+        """
+        pending = engine.loan_changes()
+        keep = {loan.loan_id for loan in pending}
+        snapshot = {
+            "copies": [{"book_id": str(book_id), "status": state.status.value,
+                        "loan": None if state.loan is None else state.loan.model_dump(mode="json"),
+                        "holds": [hold.model_dump(mode="json") for hold in state.holds
+                                  if hold.status in (HoldStatus.WAITING, HoldStatus.READY)]}
+                       for book_id, state in engine.copies()],
+            "returned": [loan.model_dump(mode="json") for loan in pending
+                         if loan.returned_at is not None],
+            "assessed": {str(loan_id): fine for loan_id, fine in self.assessed.items()
+                         if loan_id in keep},
+        }
+        generation = self.wal.rotate()
+        await self.wal.append(encode_record(SNAPSHOT, json.dumps(snapshot).encode()))
+        for older in self._generations():
+            if older < generation:
+                self.wal.segment_path(older).unlink(missing_ok=True)
+
+    async def close(self):
+        """Writes every queued record and releases the owner lock."""
+        await self.wal.close()
+        self.owner.release()
+
+
+def _assessed(body: dict[str, float]) -> dict[UUID, float]:
+    return {UUID(loan_id): fine for loan_id, fine in body.items()}
@@ -0,0 +1,263 @@
+"""Books Repository Interface and In-Memory Implementation."""
+
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Callable, Iterable
+from datetime import datetime
+from typing import NamedTuple
+from uuid import UUID
+
+from backend.v1.app.models.books import BookResponse
+from backend.v1.app.services.pagination import KeysetIndex, SortKey
+
+
+class DuplicateISBNError(Exception):
+    """Raised when a book is stored with an ISBN that already exists."""
+
+    def __init__(self, isbn: str):
+        super().__init__(f"Book with ISBN '{isbn}' already exists.")
+        self.isbn = isbn
+
+
+class VersionConflictError(Exception):
+    """Raised when books were changed or deleted after the version an update was based on."""
+
+    def __init__(self, book_ids: list[UUID]):
+        super().__init__(f"{len(book_ids)} book(s) changed since they were read.")
+        self.book_ids = book_ids
+
+
+def check_updates(changes: list[tuple[BookResponse, BookResponse]],
+                  stored_version: Callable[[UUID], datetime | None], isbns: set[str]):
+    """
+    Checks a batch of (old, new) book versions against an in-memory catalog.
+
+    Args:
+        changes (list[tuple[BookResponse, BookResponse]]): The updates.
+        stored_version (Callable): Returns the last_updated_date of a stored
+            book, or None if it is not stored.
+        isbns (set[str]): Every stored ISBN.
+
+    Raises:
+        VersionConflictError: If a book is missing or no longer at its old version.
+        DuplicateISBNError: If a new ISBN is held by a book outside the batch
+            or given to two books of the batch.
+    """
+    stale = [old.book_id for old, _ in changes
+             if stored_version(old.book_id) != old.last_updated_date]
+    if stale:
+        raise VersionConflictError(stale)
+    released = {old.isbn for old, _ in changes if old.isbn}
+    claimed = set()
+    for _, new in changes:
+        if new.isbn:
+            if new.isbn in claimed or (new.isbn in isbns and new.isbn not in released):
+                raise DuplicateISBNError(new.isbn)
+            claimed.add(new.isbn)
+
+
+class CatalogChange(NamedTuple):
+    """
+    A change another process made to a shared catalog.
+
+    `action` is "add", "update", "delete" or "clear"; `book` is the added,
+    updated or deleted book, or None when the catalog was cleared, and
+    `previous` the version an update replaced.
+    """
+
+    action: str
+    book: BookResponse | None
+    previous: BookResponse | None = None
+
+
+class BookRepository(ABC):
+    """
+    Storage interface the book routes depend on.
+
+    Books are ordered by (book_entry_time, book_id) for paging. ISBNs are
+    unique across the repository.
+    """
+
+    async def connect(self):
+        """Prepares the storage, e.g. opens pools and creates tables."""
+        return None
+
+    async def close(self):
+        """Releases any resources held by the storage."""
+        return None
+
+    @abstractmethod
+    async def ping(self) -> bool:
+        """Returns True if the storage is reachable."""
+
+    @abstractmethod
+    async def add(self, book: BookResponse):
+        """
+        Stores a new book.
+
+        Raises:
+            DuplicateISBNError: If the book's ISBN is already stored.
+        """
+
+    @abstractmethod
+    async def add_many(self, books: list[BookResponse]) -> list[BookResponse]:
+        """
+        Stores new books in one batch.
+
+        Returns:
+            list[BookResponse]: The books that were skipped because their ISBN
+            is already stored.
+        """
+
+    @abstractmethod
+    async def update_many(self, changes: list[tuple[BookResponse, BookResponse]]):
+        """
+        Replaces stored books with new versions, all of them or none.
+
+        Args:
+            changes (list[tuple[BookResponse, BookResponse]]): (old, new)
+                pairs; each book must still be stored at the old version, as
+                identified by its last_updated_date.
+
+        Raises:
+            VersionConflictError: If a book is missing or was changed since.
+            DuplicateISBNError: If a new ISBN belongs to another book.
+        """
+
+    @abstractmethod
+    async def get(self, book_id: UUID) -> BookResponse | None:
+        """Returns a book by id, or None."""
+
+    @abstractmethod
+    async def get_many(self, book_ids: Iterable[UUID]) -> list[BookResponse]:
+        """Returns the books with the given ids in the same order, skipping missing ids."""
+
+    @abstractmethod
+    async def delete(self, book_id: UUID) -> BookResponse | None:
+        """Deletes a book by id and returns it, or None if it does not exist."""
+
+    @abstractmethod
+    async def existing_isbns(self, isbns: Iterable[str]) -> set[str]:
+        """Returns the subset of `isbns` that are already stored."""
+
+    @abstractmethod
+    async def page(self, after: SortKey | None, limit: int | None) -> list[BookResponse]:
+        """Returns up to `limit` books following the `after` key in entry order."""
+
+    @abstractmethod
+    async def count(self) -> int:
+        """Returns the number of stored books."""
+
+    @abstractmethod
+    async def clear(self):
+        """Deletes every book."""
+
+    async def iter_batches(self, batch_size: int = 1000) -> AsyncIterator[list[BookResponse]]:
+        """Yields every book in entry order, `batch_size` books at a time."""
+        after = None
+        while batch := await self.page(after, batch_size):
+            yield batch
+            after = (batch[-1].book_entry_time, batch[-1].book_id)
+
+    async def change_log_position(self) -> int:
+        """Returns the position of the latest change in the shared change log."""
+        return 0
+
+    async def changes_since(self, position: int, limit: int = 1000
+                            ) -> tuple[int, list[CatalogChange]]:
+        """
+        Returns changes other processes made to the catalog after a log position.
+
+        Storage held in process memory has no other writers and never returns
+        changes.
+
+        Args:
+            position (int): The change log position read up to so far.
+            limit (int): The most log entries to read.
+
+        Returns:
+            tuple[int, list[CatalogChange]]: The position of the last entry
+            read, which may be one of this process's own, and the other
+            processes' changes in log order.
+        """
+        return position, []
+
+    async def prune_changes(self, before: datetime):
+        """Deletes change log entries recorded before `before`."""
+        return None
+
+
+class InMemoryBookRepository(BookRepository):
+    """Book repository held in process memory; the default for development and tests."""
+
+    def __init__(self):
+        self._books: dict[UUID, BookResponse] = {}
+        self._isbns: set[str] = set()
+        self._order = KeysetIndex()
+
+    async def ping(self) -> bool:
+        return True
+
+    def _store(self, book: BookResponse):
+        self._books[book.book_id] = book
+        if book.isbn:
+            self._isbns.add(book.isbn)
+        self._order.book_added(book)
+
+    async def add(self, book: BookResponse):
+        if book.isbn and book.isbn in self._isbns:
+            raise DuplicateISBNError(book.isbn)
+        self._store(book)
+
+    async def add_many(self, books: list[BookResponse]) -> list[BookResponse]:
+        skipped = []
+        for book in books:
+            if book.isbn and book.isbn in self._isbns:
+                skipped.append(book)
+            else:
+                self._store(book)
+        return skipped
+
+    async def update_many(self, changes: list[tuple[BookResponse, BookResponse]]):
+        check_updates(changes, lambda book_id: getattr(self._books.get(book_id),
+                                                        "last_updated_date", None),
+                      self._isbns)
+        for old, _ in changes:
+            self._remove(old.book_id)
+        for _, new in changes:
+            self._store(new)
+
+    def books(self) -> list[BookResponse]:
+        """Returns every stored book, in no particular order."""
+        return list(self._books.values())
+
+    async def get(self, book_id: UUID) -> BookResponse | None:
+        return self._books.get(book_id)
+
+    async def get_many(self, book_ids: Iterable[UUID]) -> list[BookResponse]:
+        books = self._books
+        return [books[book_id] for book_id in book_ids if book_id in books]
+
+    def _remove(self, book_id: UUID) -> BookResponse | None:
+        book = self._books.pop(book_id, None)
+        if book is not None:
+            if book.isbn:
+                self._isbns.discard(book.isbn)
+            self._order.book_removed(book)
+        return book
+
+    async def delete(self, book_id: UUID) -> BookResponse | None:
+        return self._remove(book_id)
+
+    async def existing_isbns(self, isbns: Iterable[str]) -> set[str]:
+        return self._isbns.intersection(isbns)
+
+    async def page(self, after: SortKey | None, limit: int | None) -> list[BookResponse]:
+        return [self._books[key[1]] for key in self._order.after(after, limit)]
+
+    async def count(self) -> int:
+        return len(self._books)
+
+    async def clear(self):
+        self._books.clear()
+        self._isbns.clear()
+        self._order.catalog_cleared()
@@ -0,0 +1,289 @@
+"""Async SQL Implementation of the Books Repository."""
+
+import time
+from collections.abc import Iterable
+from datetime import datetime
+from itertools import islice
+from uuid import UUID, uuid4
+
+from pydantic import TypeAdapter
+from sqlalchemy import bindparam, case, delete, func, insert, select, text, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from sqlmodel import SQLModel
+
+from backend.v1.app.database.repository import (
+    BookRepository,
+    CatalogChange,
+    DuplicateISBNError,
+    VersionConflictError,
+)
+from backend.v1.app.models.books import BookCondition, BookCreateCondition, BookResponse
+from backend.v1.app.schemas.books import BookChanges, Books
+from backend.v1.app.services.pagination import SortKey
+
+BOOKS = Books.__table__
+BOOK_FIELDS = tuple(BookResponse.model_fields)
+BOOK_COLUMNS = [BOOKS.c[name] for name in BOOK_FIELDS]
+CHANGES = BookChanges.__table__
+BOOK_PAIR = TypeAdapter(tuple[BookResponse, BookResponse])
+# How each backend names the ISBN unique index in its error messages:
+# SQLite by column, PostgreSQL and MySQL by index name.
+ISBN_INDEX_NAMES = ("books.isbn", next(index.name for index in BOOKS.indexes
+                                       if index.unique and "isbn" in index.columns))
+
+# Keeps IN (...) lists well below the bind parameter limits of every backend.
+IN_CLAUSE_CHUNK = 500
+# Seconds a missing change log seq is waited for before it is skipped. Each
+# write logs its changes last, right before committing.
+CHANGE_GAP_TIMEOUT = 5.0
+
+
+def _chunks(values: Iterable, size: int = IN_CLAUSE_CHUNK) -> Iterable[list]:
+    iterator = iter(values)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _is_duplicate_isbn(error: IntegrityError) -> bool:
+    """Returns whether a write failed on the ISBN unique index rather than another constraint."""
+    message = str(error.orig)
+    return any(name in message for name in ISBN_INDEX_NAMES)
+
+
+def book_to_row(book: BookResponse) -> dict:
+    """Converts a book into a Books table row."""
+    row = {name: getattr(book, name) for name in BOOK_FIELDS}
+    if book.hardcover_condition is not None:
+        row["hardcover_condition"] = BookCondition(book.hardcover_condition.value)
+    return row
+
+
+def row_to_book(row) -> BookResponse:
+    """Converts a Books table row into a book."""
+    data = dict(row._mapping)
+    if data["hardcover_condition"] is not None:
+        data["hardcover_condition"] = BookCreateCondition(data["hardcover_condition"].value)
+    return BookResponse.model_validate(data)
+
+
+class SQLBookRepository(BookRepository):
+    """
+    Book repository backed by the Books table through a pooled async engine.
+
+    Statements are built once at module level so SQLAlchemy's compiled cache
+    and the driver's prepared statement cache are reused across requests.
+    Batches are written with a single executemany insert.
+
+    Several worker processes can share one database. Every write appends to
+    the book_changes log in the same transaction, tagged with this
+    instance's `origin`, so each worker can replay the others' changes into
+    its in-memory listeners. ISBN uniqueness is enforced by the database's
+    unique index, so it holds across workers.
+
+    On SQLite writes are serialized, so log entries become visible in seq
+    order. On PostgreSQL a transaction may commit after one holding a later
+    seq, so `changes_since` stops at a missing seq until it appears or has
+    been missing for `gap_timeout` seconds; a rolled back write leaves such
+    a hole for good. A write taking longer than that between logging and
+    committing is missed by the other workers.
+    """
+
+    def __init__(self, engine: AsyncEngine, gap_timeout: float = CHANGE_GAP_TIMEOUT):
+        self.engine = engine
+        self.origin = uuid4().hex
+        self.gap_timeout = gap_timeout
+        self._select_books = select(*BOOK_COLUMNS)
+        # The first missing seq the change log is waiting for and since when.
+        self._gap: tuple[int, float] | None = None
+
+    async def connect(self):
+        async with self.engine.begin() as connection:
+            await connection.run_sync(SQLModel.metadata.create_all, tables=[BOOKS, CHANGES])
+
+    async def _log(self, connection: AsyncConnection, action: str,
+                   payloads: Iterable[str | bytes | None]):
+        changed_at = datetime.now()
+        await connection.execute(insert(CHANGES), [
+            {"origin": self.origin, "action": action, "changed_at": changed_at,
+             "book": payload.decode() if isinstance(payload, bytes) else payload}
+            for payload in payloads
+        ])
+
+    async def close(self):
+        await self.engine.dispose()
+
+    async def ping(self) -> bool:
+        async with self.engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+        return True
+
+    async def add(self, book: BookResponse):
+        try:
+            async with self.engine.begin() as connection:
+                await connection.execute(insert(BOOKS), [book_to_row(book)])
+                await self._log(connection, "add", [book.model_dump_json()])
+        except IntegrityError as error:
+            if book.isbn is None or not _is_duplicate_isbn(error):
+                raise
+            raise DuplicateISBNError(book.isbn) from error
+
+    async def add_many(self, books: list[BookResponse]) -> list[BookResponse]:
+        if not books:
+            return []
+        try:
+            async with self.engine.begin() as connection:
+                await connection.execute(insert(BOOKS), [book_to_row(book) for book in books])
+                await self._log(connection, "add", [book.model_dump_json() for book in books])
+            return []
+        except IntegrityError as error:
+            if not _is_duplicate_isbn(error):
+                raise
+
+        # Another writer stored one of the ISBNs after the caller checked them,
+        # so fall back to one insert per book to find the conflicting rows.
+        skipped = []
+        for book in books:
+            try:
+                await self.add(book)
+            except DuplicateISBNError:
+                skipped.append(book)
+        return skipped
+
+    async def update_many(self, changes: list[tuple[BookResponse, BookResponse]]):
+        if not changes:
+            return
+        async with self.engine.begin() as connection:
+            stale = []
+            for old, new in changes:
+                row = book_to_row(new)
+                # Changed ISBNs are set in a second pass, so books of the
+                # batch can trade ISBNs without tripping the unique index.
+                if new.isbn != old.isbn:
+                    row["isbn"] = None
+                result = await connection.execute(
+                    update(BOOKS).where(BOOKS.c.book_id == old.book_id,
+                                        BOOKS.c.last_updated_date == old.last_updated_date),
+                    row)
+                if result.rowcount != 1:
+                    stale.append(old.book_id)
+            for old, new in changes:
+                if new.isbn and new.isbn != old.isbn and old.book_id not in stale:
+                    try:
+                        await connection.execute(
+                            update(BOOKS).where(BOOKS.c.book_id == new.book_id),
+                            {"isbn": new.isbn})
+                    except IntegrityError as error:
+                        if not _is_duplicate_isbn(error):
+                            raise
+                        raise DuplicateISBNError(new.isbn) from error
+            # Raising inside the transaction rolls back every row of the batch.
+            if stale:
+                raise VersionConflictError(stale)
+            await self._log(connection, "update", [BOOK_PAIR.dump_json(change)
+                                                   for change in changes])
+
+    async def get(self, book_id: UUID) -> BookResponse | None:
+        async with self.engine.connect() as connection:
+            result = await connection.execute(
+                self._select_books.where(BOOKS.c.book_id == book_id))
+            row = result.first()
+        return None if row is None else row_to_book(row)
+
+    async def get_many(self, book_ids: Iterable[UUID]) -> list[BookResponse]:
+        book_ids = list(book_ids)
+        found = {}
+        async with self.engine.connect() as connection:
+            for chunk in _chunks(book_ids):
+                result = await connection.execute(
+                    self._select_books.where(BOOKS.c.book_id.in_(chunk)))
+                for row in result:
+                    found[row.book_id] = row
+        return [row_to_book(found[book_id]) for book_id in book_ids if book_id in found]
+
+    async def delete(self, book_id: UUID) -> BookResponse | None:
+        # One statement, so a concurrent writer cannot slip in between reading
+        # the row and upgrading the transaction to a write.
+        async with self.engine.begin() as connection:
+            result = await connection.execute(
+                delete(BOOKS).where(BOOKS.c.book_id == book_id).returning(*BOOK_COLUMNS))
+            row = result.first()
+            if row is None:
+                return None
+            book = row_to_book(row)
+            await self._log(connection, "delete", [book.model_dump_json()])
+        return book
+
+    async def existing_isbns(self, isbns: Iterable[str]) -> set[str]:
+        existing = set()
+        async with self.engine.connect() as connection:
+            for chunk in _chunks(set(isbns)):
+                result = await connection.execute(
+                    select(BOOKS.c.isbn).where(BOOKS.c.isbn.in_(chunk)))
+                existing.update(result.scalars())
+        return existing
+
+    async def page(self, after: SortKey | None, limit: int | None) -> list[BookResponse]:
+        statement = self._select_books.order_by(BOOKS.c.book_entry_time, BOOKS.c.book_id)
+        if after is not None:
+            statement = statement.where(
+                tuple_(BOOKS.c.book_entry_time, BOOKS.c.book_id) > tuple_(
+                    bindparam(None, after[0], type_=BOOKS.c.book_entry_time.type),
+                    bindparam(None, after[1], type_=BOOKS.c.book_id.type)))
+        if limit is not None:
+            statement = statement.limit(limit)
+        async with self.engine.connect() as connection:
+            result = await connection.execute(statement)
+            return [row_to_book(row) for row in result]
+
+    async def count(self) -> int:
+        async with self.engine.connect() as connection:
+            return await connection.scalar(select(func.count()).select_from(BOOKS))
+
+    async def clear(self):
+        async with self.engine.begin() as connection:
+            await connection.execute(delete(BOOKS))
+            await self._log(connection, "clear", [None])
+
+    async def change_log_position(self) -> int:
+        async with self.engine.connect() as connection:
+            return await connection.scalar(select(func.coalesce(func.max(CHANGES.c.seq), 0)))
+
+    async def changes_since(self, position: int, limit: int = 1000
+                            ) -> tuple[int, list[CatalogChange]]:
+        # This instance's own entries are read without their payload, only to
+        # move the position past them.
+        statement = (
+            select(CHANGES.c.seq, CHANGES.c.origin, CHANGES.c.action,
+                   case((CHANGES.c.origin == self.origin, None), else_=CHANGES.c.book))
+            .where(CHANGES.c.seq > position).order_by(CHANGES.c.seq).limit(limit))
+        async with self.engine.connect() as connection:
+            rows = self._visible(position, (await connection.execute(statement)).all())
+        changes = []
+        for _, origin, action, book in rows:
+            if origin == self.origin:
+                continue
+            if action == "update":
+                previous, current = BOOK_PAIR.validate_json(book)
+                changes.append(CatalogChange(action, current, previous))
+            else:
+                changes.append(CatalogChange(
+                    action, None if book is None else BookResponse.model_validate_json(book)))
+        return (rows[-1][0] if rows else position), changes
+
+    def _visible(self, position: int, rows: list) -> list:
+        """Cuts the rows read at a seq that may still be committed by another transaction."""
+        expected = position + 1
+        for index, row in enumerate(rows):
+            if row.seq != expected:
+                if self._gap is None or self._gap[0] != expected:
+                    self._gap = (expected, time.monotonic())
+                if time.monotonic() - self._gap[1] < self.gap_timeout:
+                    return rows[:index]
+            expected = row.seq + 1
+        self._gap = None
+        return rows
+
+    async def prune_changes(self, before: datetime):
+        async with self.engine.begin() as connection:
+            await connection.execute(delete(CHANGES).where(CHANGES.c.changed_at < before))
@@ -0,0 +1,37 @@
+"""Pydantic Classes for the Analytics Models"""
+
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+InventoryDimension = Literal["location", "book_type", "condition", "status", "language",
+                             "target_audience"]
+
+
+class InventoryGroup(BaseModel):
+    """Pydantic Model of one Row of an Inventory Cross-Tab."""
+    group: dict[str, str] = Field(description="Value of each grouped dimension.")
+    count: int = Field(description="Books in the group.")
+    priced: int = Field(description="Books in the group with a replacement cost.")
+    replacement_cost: float = Field(description="Total replacement cost of the group.")
+
+
+class InventoryReport(BaseModel):
+    """Pydantic Model to Return an Inventory Cross-Tab."""
+    group_by: list[InventoryDimension]
+    total_books: int
+    groups: list[InventoryGroup]
+
+
+class InventoryMismatch(BaseModel):
+    """Pydantic Model of an Aggregate Cell that differs from a Rebuild."""
+    cell: dict[str, str]
+    expected: list[int] = Field(description="Rebuilt [count, priced, cost in cents].")
+    actual: list[int] = Field(description="Live [count, priced, cost in cents].")
+
+
+class InventoryCheckReport(BaseModel):
+    """Pydantic Model to Return the Outcome of an Aggregate Consistency Check."""
+    books_scanned: int
+    mismatches: list[InventoryMismatch]
+    repaired: bool = Field(description="Whether the live aggregates were replaced.")
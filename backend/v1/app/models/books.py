@@ -2,10 +2,14 @@
 
 from datetime import date, datetime
 from enum import Enum
+from typing import Literal
 from uuid import UUID
 
 from pydantic import BaseModel, Field, model_validator
 
+# Counts are stored as 32-bit integers by the compact and SQL repositories.
+MAX_INT32 = 2**31 - 1
+
 
 class BookFormat(Enum):
     """Enum Class describing the Book Format."""
@@ -82,8 +86,8 @@ class BookCreate(BaseModel):
     ebook_type: EBookType | None = Field(None)
     hardcover_condition: BookCreateCondition | None = Field(None)
     publisher: str | None = Field(None, max_length=100)
-    edition: int| None = Field(None, ge=1)
-    page_count: int = Field(ge=1)
+    edition: int| None = Field(None, ge=1, le=MAX_INT32)
+    page_count: int = Field(ge=1, le=MAX_INT32)
     tags: list[str] | None = Field(None, max_length=10)
     isbn: str | None = Field(None, pattern=r"^(?:\d{10}|\d{13})$")
     genre: str | None = Field(None, max_length=50)
@@ -123,9 +127,9 @@ class BookUpdate(BaseModel):
                                     description="Update description.")
     publisher: str | None = Field(None, max_length=100,
                                   description="Update publisher.")
-    edition: int | None = Field(None, ge=1,
+    edition: int | None = Field(None, ge=1, le=MAX_INT32,
                                 description="Update edition number.")
-    page_count: int | None = Field(None, ge=1,
+    page_count: int | None = Field(None, ge=1, le=MAX_INT32,
                                    description="Update page count.")
     tags: list[str] | None = Field(None, max_length=10,
                                    description="Update list of tags.")
@@ -144,3 +148,49 @@ class BookUpdate(BaseModel):
     ebook_type: EBookType | None = Field(None, description="Update ebook type.")
     hardcover_condition: BookCreateCondition | None = Field(None,
                             description="Update hardcover/hardcover condition.")
+
+
+class BookPatch(BookUpdate):
+    """Pydantic Model to Update one Book of a Batch."""
+    book_id: UUID = Field(description="The book to update.")
+    if_match: str | None = Field(
+        None, description="ETag the book must still have, as in an If-Match header.")
+
+
+class BookBatchUpdateReport(BaseModel):
+    """Pydantic Model to Return the Outcome of a Batch Update."""
+    updated: int = Field(description="Number of books updated.")
+    etags: dict[UUID, str] = Field(description="New ETag of every updated book.")
+
+
+class BookDuplicate(BaseModel):
+    """Pydantic Model to Return a Likely Duplicate of a Book."""
+    book: BookResponse = Field(description="The stored book that looks like a duplicate.")
+    similarity: float = Field(description="Share of title trigrams the two books have in common.")
+
+
+class BookSuggestion(BaseModel):
+    """Pydantic Model describing an Autocomplete Suggestion."""
+    text: str = Field(description="The title or author name as stored.")
+    kind: Literal["title", "author"] = Field(description="Which field the text completes.")
+    popularity: int = Field(description="Times books behind the suggestion were borrowed.")
+    books: int = Field(description="Number of books with this title or author.")
+    book_id: UUID | None = Field(None, description="The book, when exactly one matches.")
+    fuzzy: bool = Field(False, description="Whether the match needed a one-letter correction.")
+
+
+class BulkIngestRejection(BaseModel):
+    """Pydantic Model describing a Rejected Line of a Bulk Ingest."""
+    line: int = Field(description="1-based line number in the uploaded body.")
+    reason: str = Field(description="Why the line was rejected.")
+
+
+class BulkIngestReport(BaseModel):
+    """Pydantic Model to Return the Outcome of a Bulk Ingest."""
+    accepted: int = Field(0, description="Number of books added to the database.")
+    rejected: int = Field(0, description="Number of lines that were not added.")
+    errors: list[BulkIngestRejection] = Field(
+        default_factory=list,
+        description="Rejected lines, truncated to the first max_errors entries.")
+    errors_truncated: bool = Field(
+        False, description="Whether more lines were rejected than are listed in errors.")
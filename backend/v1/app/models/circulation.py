@@ -0,0 +1,74 @@
+"""Pydantic Classes for the Circulation Models"""
+
+from datetime import datetime
+from enum import Enum
+from uuid import UUID, uuid4
+
+from pydantic import BaseModel, Field
+
+from backend.v1.app.schemas.books import CirculationStatus
+
+
+class HoldStatus(Enum):
+    """Enum Class describing the Lifecycle of a Hold."""
+    WAITING = "waiting"
+    READY = "ready"
+    FULFILLED = "fulfilled"
+    CANCELLED = "cancelled"
+    EXPIRED = "expired"
+
+
+class Loan(BaseModel):
+    """Pydantic Model of a Book Checked Out to a User."""
+    loan_id: UUID = Field(default_factory=uuid4)
+    book_id: UUID
+    user_id: UUID
+    user_category: str | None = Field(None, description="UserType value at checkout.")
+    checked_out_at: datetime
+    due_at: datetime
+    renewals: int = Field(0, ge=0, description="Times the loan has been renewed.")
+    returned_at: datetime | None = None
+
+
+class Hold(BaseModel):
+    """Pydantic Model of a User's Place in a Book's Hold Queue."""
+    hold_id: UUID = Field(default_factory=uuid4)
+    book_id: UUID
+    user_id: UUID
+    placed_at: datetime
+    status: HoldStatus = HoldStatus.WAITING
+    ready_until: datetime | None = Field(
+        None, description="End of the pickup window once the book is set aside.")
+
+
+class BookCirculation(BaseModel):
+    """Pydantic Model to Return the Circulation State of a Book."""
+    book_id: UUID
+    status: CirculationStatus
+    due_at: datetime | None = None
+    holds_waiting: int = Field(0, description="Holds queued behind the current one.")
+    held_for: UUID | None = Field(None, description="User the book is set aside for.")
+
+
+class FineDelta(BaseModel):
+    """Pydantic Model of the Change to one User's Fines in a Fine Run."""
+    user_id: UUID
+    delta: float
+
+
+class FineRunReport(BaseModel):
+    """Pydantic Model to Return the Outcome of a Fine Run."""
+    as_of: datetime
+    dry_run: bool
+    incremental: bool
+    loans_considered: int = Field(description="Loans known to the run.")
+    loans_processed: int = Field(description="Loans whose fines were computed.")
+    loans_fined: int = Field(description="Processed loans with a non-zero fine.")
+    users_affected: int
+    users_failed: int = Field(
+        0, description="Users whose change could not be applied; retried by the next run.")
+    total_delta: float = Field(description="Net change to fines owed across all users.")
+    deltas: list[FineDelta] = Field(
+        default_factory=list, description="Largest per-user changes, truncated.")
+    timings_ms: dict[str, float] = Field(
+        default_factory=dict, description="Milliseconds spent per phase.")
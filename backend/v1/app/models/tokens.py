@@ -0,0 +1,41 @@
+"""Pydantic Classes for the Token Models"""
+
+from enum import Enum
+
+from pydantic import BaseModel, Field
+
+
+class TokenType(Enum):
+    """Enum Class describing what a Token may be used for."""
+    ACCESS = "access"
+    REFRESH = "refresh"
+    PASSWORD_RESET = "password_reset"
+
+
+class TokenClaims(BaseModel):
+    """Pydantic Model of the Verified Claims carried by a Token."""
+    sub: str = Field(description="user_id of the account the token was issued to.")
+    username: str = Field(description="Username of the account.")
+    user_category: str = Field(description="UserType value of the account.")
+    type: TokenType = Field(description="What the token may be used for.")
+    jti: str = Field(description="Unique token identifier, used for revocation.")
+    iat: float = Field(description="Issue time as a POSIX timestamp.")
+    exp: float = Field(description="Expiry time as a POSIX timestamp.")
+
+
+class TokenPair(BaseModel):
+    """Pydantic Model to Return an Access and Refresh Token."""
+    access_token: str
+    refresh_token: str
+    token_type: str = "bearer"
+    expires_in: int = Field(description="Seconds until the access token expires.")
+
+
+class RefreshRequest(BaseModel):
+    """Pydantic Model to Exchange a Refresh Token for a new Token Pair."""
+    refresh_token: str
+
+
+class LogoutRequest(BaseModel):
+    """Pydantic Model to Revoke a Refresh Token alongside the Access Token."""
+    refresh_token: str | None = None
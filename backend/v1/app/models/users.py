@@ -7,6 +7,8 @@ from enum import Enum
 
 from beanie import Document
 from pydantic import BaseModel, EmailStr, Field, field_validator
+from pymongo import ASCENDING, IndexModel
+from pymongo.collation import Collation
 
 
 class UserType(Enum):
@@ -135,6 +137,12 @@ class UserDetails(Document, UserRegister):
     
     class Settings:
         name = "users"  # MongoDB collection name
+        # Usernames are stored lowercased; emails are unique whatever their case.
+        indexes = [
+            IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+            IndexModel([("email", ASCENDING)], name="email_unique", unique=True,
+                       collation=Collation("en", strength=2)),
+        ]
         
 
 class UserPasswordUpdate(BaseModel):
@@ -1,10 +1,19 @@
 """Routes Package for LiBookTrac Application."""
 from fastapi import APIRouter
 
+from backend.v1.app.routes.analytics import router as analytics_router
 from backend.v1.app.routes.books import router as books_router
+from backend.v1.app.routes.circulation import router as circulation_router
+from backend.v1.app.routes.recommendations import router as recommendations_router
 from backend.v1.app.routes.system import router as system_router
+from backend.v1.app.routes.users import router as users_router
 
 router = APIRouter()
 
 router.include_router(system_router, tags=["system"])
 router.include_router(books_router, prefix= "/books", tags = ["books"],)
+router.include_router(users_router, prefix="/users", tags=["users"])
+router.include_router(circulation_router, prefix="/circulation", tags=["circulation"])
+router.include_router(recommendations_router, prefix="/recommendations",
+                      tags=["recommendations"])
+router.include_router(analytics_router, prefix="/analytics", tags=["analytics"])
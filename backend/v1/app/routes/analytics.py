@@ -0,0 +1,81 @@
+"""LibookTrac Backend Analytics Endpoints."""
+
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from starlette.status import HTTP_403_FORBIDDEN
+
+from backend.v1.app.auth.tokens import require_access_token
+from backend.v1.app.database.connect import get_book_repository
+from backend.v1.app.database.repository import BookRepository
+from backend.v1.app.models.analytics import (
+    InventoryCheckReport,
+    InventoryDimension,
+    InventoryReport,
+)
+from backend.v1.app.models.tokens import TokenClaims
+from backend.v1.app.routes.circulation import (
+    STAFF_CATEGORIES,
+    circulation_engine,
+    require_circulation_owner,
+)
+from backend.v1.app.services import analytics, events
+
+router = APIRouter()
+
+Repository = Annotated[BookRepository, Depends(get_book_repository)]
+AccessClaims = Annotated[TokenClaims, Depends(require_access_token)]
+
+inventory = events.subscribe(analytics.InventoryAnalytics())
+circulation_engine.status_listeners.append(inventory.set_status)
+
+
+@router.get("/inventory", response_model=InventoryReport)
+async def inventory_report(
+        group_by: Annotated[list[InventoryDimension] | None, Query()] = None):
+    """
+    Counts Books and totals Replacement Cost, Grouped by any Dimensions.
+
+    Dimensions are location, book_type, condition, status (circulation),
+    language and target_audience; repeat `group_by` for a cross-tab.
+    Circulation statuses are only known to the worker serving circulation,
+    so other workers refuse a breakdown by status.
+    """
+    group_by = group_by or []
+    if "status" in group_by:
+        require_circulation_owner()
+    return InventoryReport(group_by=group_by, total_books=len(inventory),
+                           groups=inventory.crosstab(group_by))
+
+
+@router.post("/inventory/check", response_model=InventoryCheckReport,
+             dependencies=[Depends(require_circulation_owner)])
+async def check_inventory(claims: AccessClaims, repository: Repository,
+                          repair: bool = Query(False)):
+    """
+    Rebuild the Inventory Aggregates from the Catalog and Diff them.
+
+    Staff only, and served by the worker owning circulation, which alone
+    knows every book's status. Changes made while the catalog is read are
+    replayed onto the rebuilt aggregates before they are compared. With
+    `repair`, the live aggregates are replaced by the rebuilt ones when
+    they differ.
+    """
+    if claims.user_category not in STAFF_CATEGORIES:
+        raise HTTPException(status_code=HTTP_403_FORBIDDEN, detail="Staff only.")
+    changes = events.subscribe(analytics.InventoryChanges())
+    circulation_engine.status_listeners.append(changes.set_status)
+    try:
+        books = [(book, circulation_engine.current_status(book.book_id))
+                 async for batch in repository.iter_batches() for book in batch]
+    finally:
+        events.unsubscribe(changes)
+        circulation_engine.status_listeners.remove(changes.set_status)
+    # No await from here on, so no change can slip in before the replace.
+    rebuilt = analytics.InventoryAnalytics.rebuild(books)
+    changes.replay(rebuilt)
+    mismatches = inventory.diff(rebuilt)
+    if mismatches and repair:
+        inventory.replace(rebuilt)
+    return InventoryCheckReport(books_scanned=len(books), mismatches=mismatches,
+                                repaired=bool(mismatches and repair))
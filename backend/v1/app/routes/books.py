@@ -1,82 +1,538 @@
 """LibookTrac Backend Books Endpoints."""
 
-from datetime import datetime
+from collections.abc import AsyncIterator, Awaitable, Callable
+from datetime import datetime, timedelta
+from typing import Annotated, Literal
+from urllib.parse import urlencode
 from uuid import UUID, uuid4
 
-from fastapi import APIRouter, HTTPException, Response
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from starlette.status import (
     HTTP_201_CREATED,
     HTTP_204_NO_CONTENT,
+    HTTP_304_NOT_MODIFIED,
+    HTTP_400_BAD_REQUEST,
     HTTP_404_NOT_FOUND,
     HTTP_409_CONFLICT,
+    HTTP_412_PRECONDITION_FAILED,
+    HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+    HTTP_501_NOT_IMPLEMENTED,
 )
 
-from backend.v1.app.models.books import BookCreate, BookResponse
+from backend.v1.app.config.settings import settings
+from backend.v1.app.database.connect import get_book_repository
+from backend.v1.app.database.repository import (
+    BookRepository,
+    DuplicateISBNError,
+    VersionConflictError,
+)
+from backend.v1.app.models.books import (
+    BookBatchUpdateReport,
+    BookCreate,
+    BookDuplicate,
+    BookFormat,
+    BookLocation,
+    BookPatch,
+    BookResponse,
+    BookSuggestion,
+    BookUpdate,
+    BulkIngestRejection,
+    BulkIngestReport,
+)
+from backend.v1.app.services import (
+    autocomplete,
+    change_feed,
+    duplicates,
+    events,
+    export,
+    indexes,
+    ingest,
+    pagination,
+    response_cache,
+    search,
+    serialization,
+)
 
 router = APIRouter()
 
-# Remove After DB is connected
-books_db: dict = {}
-isbn_set: set = set()
+MAX_PAGE_SIZE = 1000
+STREAM_CHUNK_SIZE = 500
+MAX_BATCH_UPDATE = 50_000
+# Book ids listed in the detail of a failed batch update or in a response header.
+MAX_LISTED_IDS = 20
+
+Repository = Annotated[BookRepository, Depends(get_book_repository)]
+
+books_index = events.subscribe(indexes.BookIndex())
+search_index = events.subscribe(search.SearchIndex())
+autocomplete_index = events.subscribe(autocomplete.AutocompleteIndex())
+catalog_version = events.subscribe(response_cache.CatalogVersion())
+book_json = serialization.BookJSONCache()
+if settings.books_backend != "compact":
+    # A JSON copy of every book costs several times what the compact store
+    # keeps per book, so with it books are encoded on each read instead.
+    events.subscribe(book_json)
+duplicate_index = events.subscribe(duplicates.DuplicateIndex())
+catalog_feed = events.subscribe(change_feed.ChangeFeed(
+    settings.change_feed_history, settings.change_feed_max_lag, settings.change_feed_heartbeat,
+    json_cache=book_json))
+books_cache = response_cache.ResponseCache(settings.response_cache_max_bytes)
+
+
+async def cached_books(request: Request,
+                       build: Callable[[], Awaitable[tuple[list[BookResponse], dict[str, str]]]]
+                       ) -> Response:
+    """
+    Serves a list of books from the response cache, building it on a miss.
+
+    Entries are keyed by host, path and sorted query parameters and are valid
+    for the catalog version they were built at. Clients sending a matching
+    `If-None-Match` get an empty 304.
+
+    Args:
+        request (Request): The incoming request.
+        build: Coroutine function returning the books and any extra headers.
+
+    Returns:
+        Response: The JSON body, or a 304 Not Modified.
+    """
+    query = urlencode(sorted(request.query_params.multi_items()))
+    key = f"{request.url.netloc}{request.url.path}?{query}"
+    # Read the version before building, so a write racing the build leaves the
+    # entry already stale rather than cached under the newer version.
+    version = catalog_version.value
+    entry = books_cache.get(key, version)
+    if entry is None:
+        books, headers = await build()
+        body = book_json.encode_list(books)
+        entry = response_cache.CachedResponse(version, body, response_cache.make_etag(body),
+                                              headers)
+        books_cache.put(key, entry)
+
+    headers = {**entry.headers, "ETag": entry.etag, "Cache-Control": "no-cache"}
+    if response_cache.etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
 
 
 @router.post("/add",
              response_model=BookResponse,
              status_code=HTTP_201_CREATED)
-async def create_book(book: BookCreate):
-    """Create a Book in the Database."""
-    if book.isbn and book.isbn in isbn_set:
-        raise HTTPException(
-            status_code=HTTP_409_CONFLICT,
-            detail=f"Book with ISBN '{book.isbn}' already exists."
-        )
-
-    new_book_id = uuid4()
-    while new_book_id in books_db:
-        new_book_id = uuid4()
+async def create_book(book: BookCreate, repository: Repository, response: Response):
+    """
+    Create a Book in the Database.
 
+    Books that look like duplicates of it by title and author are listed in
+    the `X-Possible-Duplicates` header; the book is stored either way.
+    """
     current_time = datetime.now()
 
     book_response = BookResponse(
         **book.model_dump(),
-        book_id=new_book_id,
+        book_id=uuid4(),
         book_entry_time=current_time,
         last_updated_date=current_time
     )
 
-    books_db[new_book_id] = book_response
-    if book.isbn:
-        isbn_set.add(book.isbn)
+    try:
+        await repository.add(book_response)
+    except DuplicateISBNError as error:
+        raise HTTPException(status_code=HTTP_409_CONFLICT, detail=str(error)) from error
+    events.books_added([book_response])
 
+    found = await duplicates.find_duplicates(duplicate_index, repository, book_response)
+    if found:
+        response.headers["X-Possible-Duplicates"] = ",".join(
+            str(duplicate.book_id) for duplicate, _ in found[:MAX_LISTED_IDS])
     return book_response
 
 
+@router.post("/add/bulk", response_model=BulkIngestReport)
+async def create_books_bulk(request: Request,
+                            repository: Repository,
+                            max_errors: int = Query(1000, ge=0, le=100_000)):
+    """
+    Create Books in the Database from a streamed NDJSON or CSV body.
+
+    The body is read and validated in batches so memory stays bounded by the
+    batch size. ISBNs are deduplicated against the database and against the
+    rest of the upload in the same pass.
+    """
+    media_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if media_type not in ingest.NDJSON_MEDIA_TYPES | ingest.CSV_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Bulk ingest accepts application/x-ndjson or text/csv bodies."
+        )
+
+    report = BulkIngestReport()
+    async for batch in ingest.iter_batches(request.stream(), media_type):
+        rejected = batch.rejected
+        existing = await repository.existing_isbns(book.isbn for _, book in batch.valid
+                                                   if book.isbn)
+        current_time = datetime.now()
+        batch_isbns: set = set()
+        accepted: list = []
+        lines: dict = {}
+        for line, book in batch.valid:
+            if book.isbn:
+                if book.isbn in existing or book.isbn in batch_isbns:
+                    rejected.append((line, f"Book with ISBN '{book.isbn}' already exists."))
+                    continue
+                batch_isbns.add(book.isbn)
+
+            # Records were validated as BookCreate above, so skip re-validation.
+            book_response = BookResponse.model_construct(
+                **book.__dict__,
+                book_id=uuid4(),
+                book_entry_time=current_time,
+                last_updated_date=current_time
+            )
+            accepted.append(book_response)
+            lines[book_response.book_id] = line
+
+        skipped = await repository.add_many(accepted)
+        if skipped:
+            skipped_ids = {book.book_id for book in skipped}
+            rejected.extend((lines[book.book_id], f"Book with ISBN '{book.isbn}' already exists.")
+                            for book in skipped)
+            accepted = [book for book in accepted if book.book_id not in skipped_ids]
+        events.books_added(accepted)
+        report.accepted += len(accepted)
+
+        report.rejected += len(rejected)
+        for line, reason in sorted(rejected):
+            if len(report.errors) >= max_errors:
+                report.errors_truncated = True
+                break
+            report.errors.append(BulkIngestRejection(line=line, reason=reason))
+
+    return report
+
+
+async def stream_books(repository: BookRepository,
+                       after: pagination.SortKey | None,
+                       limit: int | None,
+                       stream: Literal["json", "ndjson"]) -> AsyncIterator[bytes]:
+    """
+    Yields books in (book_entry_time, book_id) order as JSON or NDJSON chunks.
+
+    Each chunk is a new keyset page starting after the last book sent, so
+    books added or deleted while streaming never invalidate the iteration.
+    """
+    separator = b"\n" if stream == "ndjson" else b","
+    remaining = limit
+    first = True
+    if stream == "json":
+        yield b"["
+    while remaining is None or remaining > 0:
+        chunk_size = STREAM_CHUNK_SIZE if remaining is None else min(remaining,
+                                                                     STREAM_CHUNK_SIZE)
+        page = await repository.page(after, chunk_size)
+        if not page:
+            break
+        after = pagination.book_key(page[-1])
+        if remaining is not None:
+            remaining -= len(page)
+        if stream == "json" and not first:
+            yield separator
+        first = False
+        body = book_json.encode_many(page, separator)
+        yield body + b"\n" if stream == "ndjson" else body
+    if stream == "json":
+        yield b"]"
+
+
 @router.get("/get/all", response_model=list[BookResponse])
-async def get_all_books():
+async def get_all_books(request: Request,
+                        repository: Repository,
+                        limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+                        cursor: str | None = None,
+                        stream: Literal["json", "ndjson"] | None = None):
     """
-    Retrieves a list of all books stored in the database.
+    Retrieves the books stored in the database in entry order.
+
+    With `limit`, one page is returned and the cursor of the next page is sent
+    in the `X-Next-Cursor` and `Link` headers. With `stream`, the books are
+    written as a chunked JSON array or NDJSON while the catalog is iterated.
+    Pages are cached until the catalog changes and support `If-None-Match`.
     """
-    return list(books_db.values())
+    try:
+        after = pagination.decode_cursor(cursor) if cursor else None
+    except ValueError as error:
+        raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail=str(error)) from error
+
+    if stream is not None:
+        media_type = "application/x-ndjson" if stream == "ndjson" else "application/json"
+        return StreamingResponse(stream_books(repository, after, limit, stream),
+                                 media_type=media_type)
+
+    async def build():
+        page = await repository.page(after, None if limit is None else limit + 1)
+        headers = {}
+        if limit is not None and len(page) > limit:
+            page = page[:limit]
+            next_cursor = pagination.encode_cursor(pagination.book_key(page[-1]))
+            next_url = request.url.include_query_params(cursor=next_cursor)
+            headers["X-Next-Cursor"] = next_cursor
+            headers["Link"] = f'<{next_url}>; rel="next"'
+        return page, headers
+
+    return await cached_books(request, build)
+
+
+@router.get("/export")
+async def export_books(repository: Repository,
+                       export_format: Annotated[export.ExportFormat,
+                                                Query(alias="format")] = "ndjson",
+                       compression: export.Compression = "gzip",
+                       location: BookLocation | None = None,
+                       book_type: BookFormat | None = None,
+                       updated_since: datetime | None = None):
+    """
+    Streams the catalog as NDJSON, CSV or Parquet for offline use.
+
+    NDJSON and CSV are gzip or zstd compressed as they are written; Parquet
+    uses `compression` as its column codec. The response is a download whose
+    `X-Export-Started` header can be passed back as `updated_since` to fetch
+    only the books changed since this export.
+    """
+    started = datetime.now()
+    try:
+        chunks = export.export_chunks(repository, export_format, compression,
+                                      export.ExportFilter(location, book_type, updated_since),
+                                      book_json)
+    except export.ExportUnavailableError as error:
+        raise HTTPException(status_code=HTTP_501_NOT_IMPLEMENTED, detail=str(error)) from error
+    file_name = export.file_name(export_format, compression)
+    headers = {"Content-Disposition": f'attachment; filename="{file_name}"',
+               "X-Export-Started": started.isoformat()}
+    return StreamingResponse(chunks, media_type=export.media_type(export_format, compression),
+                             headers=headers)
+
+
+@router.get("/changes")
+async def follow_changes(last_event_id: Annotated[str | None, Header()] = None,
+                         after: str | None = None):
+    """
+    Streams catalog changes as server-sent events.
+
+    Each `add`, `update`, `delete` or `clear` event carries the book, or its
+    id, and an id to resume from through `Last-Event-ID` (or `after`) after a
+    reconnect. A `resync` event means changes were missed: reload the
+    catalog, then follow the feed again without an id.
+    """
+    return StreamingResponse(catalog_feed.stream(last_event_id or after),
+                             media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@router.get("/duplicates/{book_id}", response_model=list[BookDuplicate])
+async def get_duplicates(book_id: UUID, repository: Repository):
+    """Lists the Books that are Likely Duplicates of a Book, Most Similar First."""
+    book = await repository.get(book_id)
+    if book is None:
+        raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail="Book not found by ID.")
+    found = await duplicates.find_duplicates(duplicate_index, repository, book)
+    return [BookDuplicate(book=duplicate, similarity=score) for duplicate, score in found]
+
+
+@router.get("/search", response_model=list[BookResponse])
+async def search_books(request: Request,
+                       repository: Repository,
+                       q: str = Query(min_length=1, max_length=200),
+                       k: int = Query(10, ge=1, le=100)):
+    """
+    Retrieves the books best matching free text keywords.
+
+    Title, description, author names, tags and genre are searched with
+    case and accent insensitive matching and ranked by BM25.
+    """
+    async def build():
+        ranked = search_index.search(q, k)
+        return await repository.get_many(book_id for _, book_id in ranked), {}
+
+    return await cached_books(request, build)
+
+
+@router.get("/autocomplete", response_model=list[BookSuggestion])
+async def autocomplete_books(q: str = Query(min_length=1, max_length=200),
+                             k: int = Query(10, ge=1, le=autocomplete.TOP_K)):
+    """
+    Completes a partly typed title or author name.
+
+    Matching is case and accent insensitive; the most borrowed titles and
+    authors come first, and a one-letter typo is tolerated when there are
+    fewer than `k` exact completions.
+    """
+    return [
+        BookSuggestion(text=term.text, kind=term.kind, popularity=term.popularity,
+                       books=len(term.books),
+                       book_id=next(iter(term.books)) if len(term.books) == 1 else None,
+                       fuzzy=fuzzy)
+        for term, fuzzy in autocomplete_index.suggest(q, k)
+    ]
 
 
 @router.get("/get/{criteria}", response_model=list[BookResponse])
-async def get_book():
+async def get_book(criteria: str,
+                   request: Request,
+                   repository: Repository,
+                   limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE)):
+    """
+    Retrieves the books matching a filter expression, in entry order.
+
+    The expression is a list of `field=value` pairs joined by `&`, for example
+    `author=tolkien&language=english&publication_year=1930..1960`. Supported
+    fields are author, genre, tag, language, book_type, location,
+    target_audience, publication_year and replacement_cost; the last two take
+    inclusive `low..high` ranges.
+    """
+    try:
+        predicates = indexes.parse_criteria(criteria)
+    except ValueError as error:
+        raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail=str(error)) from error
+
+    async def build():
+        matches = await repository.get_many(books_index.query(predicates))
+        matches.sort(key=pagination.book_key)
+        return matches[:limit], {}
+
+    return await cached_books(request, build)
+
+
+def _listed(book_ids: list[UUID]) -> str:
+    listed = ", ".join(str(book_id) for book_id in book_ids[:MAX_LISTED_IDS])
+    return listed + (", ..." if len(book_ids) > MAX_LISTED_IDS else "")
+
+
+def updated_version(book: BookResponse, update: BookUpdate, now: datetime,
+                    index: int | None = None) -> BookResponse:
+    """
+    Returns a new version of a book with the fields that were set in `update`.
+
+    The merged book is validated as a whole, and its last_updated_date moves
+    forward by at least a microsecond, so every version has its own ETag.
+
+    Raises:
+        RequestValidationError: If the merged book is invalid.
+    """
+    fields = update.model_dump(exclude_unset=True, exclude={"book_id", "if_match"})
+    try:
+        return BookResponse.model_validate({
+            **book.model_dump(), **fields,
+            "last_updated_date": max(now, book.last_updated_date + timedelta(microseconds=1)),
+        })
+    except ValidationError as error:
+        prefix = ("body",) if index is None else ("body", index)
+        raise RequestValidationError([
+            {**detail, "loc": (*prefix, *detail["loc"])}
+            for detail in error.errors(include_url=False, include_context=False)
+        ]) from error
+
+
+async def update_books(repository: BookRepository,
+                       patches: list[tuple[UUID, BookUpdate, str | None]],
+                       batch: bool) -> list[BookResponse]:
+    """
+    Applies partial updates to books, all of them or none.
+
+    Every book is read once, checked against its expected ETag, merged and
+    validated, then the repository replaces the whole batch in one call,
+    failing if any book changed in the meantime, and the catalog listeners
+    are updated in a single pass.
+
+    Args:
+        repository (BookRepository): The book repository.
+        patches (list[tuple[UUID, BookUpdate, str | None]]): Book id, fields
+            to set and the If-Match value of every book.
+        batch (bool): Whether validation errors are located by batch index.
+
+    Returns:
+        list[BookResponse]: The new versions, in the order of `patches`.
     """
-    Retrieves a list of all books stored in the database.
+    book_ids = [book_id for book_id, _, _ in patches]
+    if len(set(book_ids)) != len(book_ids):
+        raise HTTPException(status_code=HTTP_400_BAD_REQUEST,
+                            detail="Each book may only be updated once per batch.")
+    books = {book.book_id: book for book in await repository.get_many(book_ids)}
+    missing = [book_id for book_id in book_ids if book_id not in books]
+    if missing:
+        raise HTTPException(status_code=HTTP_404_NOT_FOUND,
+                            detail=f"Books not found by ID: {_listed(missing)}." if batch
+                            else "Book not found by ID.")
+    stale = [book_id for book_id, _, if_match in patches
+             if not response_cache.if_match_satisfied(
+                 if_match, response_cache.book_etag(books[book_id]))]
+    if stale:
+        raise HTTPException(status_code=HTTP_412_PRECONDITION_FAILED,
+                            detail=f"Books changed since they were read: {_listed(stale)}.")
+
+    now = datetime.now()
+    changes = [(books[book_id], updated_version(books[book_id], update, now,
+                                                index if batch else None))
+               for index, (book_id, update, _) in enumerate(patches)]
+    try:
+        await repository.update_many(changes)
+    except DuplicateISBNError as error:
+        raise HTTPException(status_code=HTTP_409_CONFLICT, detail=str(error)) from error
+    except VersionConflictError as error:
+        raise HTTPException(
+            status_code=HTTP_412_PRECONDITION_FAILED,
+            detail=f"Books changed since they were read: {_listed(error.book_ids)}.",
+        ) from error
+    events.books_updated(changes)
+    return [new for _, new in changes]
+
+
+@router.patch("/update/bulk", response_model=BookBatchUpdateReport)
+async def update_books_bulk(
+        patches: Annotated[list[BookPatch], Body(min_length=1, max_length=MAX_BATCH_UPDATE)],
+        repository: Repository):
+    """
+    Update Many Books at Once.
+
+    Each entry names a book, the fields to change and optionally the ETag
+    the book must still have. The batch is applied as a whole: if any book
+    is missing, changed since it was read, invalid after the change or
+    would duplicate an ISBN, nothing is updated.
+    """
+    updated = await update_books(
+        repository, [(patch.book_id, patch, patch.if_match) for patch in patches], batch=True)
+    return BookBatchUpdateReport(
+        updated=len(updated),
+        etags={book.book_id: response_cache.book_etag(book) for book in updated})
+
+
+@router.patch("/update/{book_id}", response_model=BookResponse)
+async def update_book(book_id: UUID,
+                      update: BookUpdate,
+                      response: Response,
+                      repository: Repository,
+                      if_match: Annotated[str | None, Header()] = None):
+    """
+    Update Fields of a Book.
+
+    Only the fields present in the body are changed. The response carries
+    the book's new ETag; sending it back in `If-Match` makes the next update
+    fail with 412 if someone else changed the book in between.
     """
-    return list(books_db.values())
+    [book] = await update_books(repository, [(book_id, update, if_match)], batch=False)
+    response.headers["ETag"] = response_cache.book_etag(book)
+    return book
 
 
 @router.delete("/delete/{book_id}",
                status_code=HTTP_204_NO_CONTENT)
-async def delete_book(book_id: UUID):
+async def delete_book(book_id: UUID, repository: Repository):
     """Delete a book from the database by its book_id."""
-    if book_id not in books_db:
+    book_to_delete = await repository.delete(book_id)
+    if book_to_delete is None:
         raise HTTPException(status_code=HTTP_404_NOT_FOUND,
                             detail="Book not found by ID.")
+    events.books_removed([book_to_delete])
 
-    book_to_delete = books_db.pop(book_id)
-    if book_to_delete.isbn and book_to_delete.isbn in books_db:
-        del books_db[book_to_delete.isbn]
-    
     return Response(status_code=HTTP_204_NO_CONTENT)
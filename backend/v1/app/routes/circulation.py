@@ -0,0 +1,163 @@
+"""LibookTrac Backend Circulation Endpoints."""
+
+from typing import Annotated
+from uuid import UUID
+
+from beanie.exceptions import CollectionWasNotInitialized
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from pymongo.errors import PyMongoError
+from starlette.status import (
+    HTTP_201_CREATED,
+    HTTP_204_NO_CONTENT,
+    HTTP_403_FORBIDDEN,
+    HTTP_404_NOT_FOUND,
+    HTTP_409_CONFLICT,
+    HTTP_503_SERVICE_UNAVAILABLE,
+)
+
+from backend.v1.app.auth.tokens import require_access_token
+from backend.v1.app.config.settings import settings
+from backend.v1.app.database.connect import get_book_repository
+from backend.v1.app.database.journal import CirculationJournal
+from backend.v1.app.database.repository import BookRepository
+from backend.v1.app.models.circulation import BookCirculation, FineRunReport, Hold, Loan
+from backend.v1.app.models.tokens import TokenClaims
+from backend.v1.app.models.users import UserType
+from backend.v1.app.routes.books import autocomplete_index
+from backend.v1.app.routes.recommendations import recommendation_engine
+from backend.v1.app.services import circulation, events, fines
+from backend.v1.app.services.patrons import PatronStore
+
+circulation_journal = (
+    None if settings.circulation_data_dir is None
+    else CirculationJournal(settings.circulation_data_dir, settings.wal_fsync,
+                            settings.wal_fsync_interval))
+circulation_engine = events.subscribe(circulation.CirculationEngine(journal=circulation_journal))
+fine_engine = fines.FineEngine(
+    journal=None if circulation_journal is None else circulation_journal.record_assessed)
+patrons = PatronStore()
+
+
+def require_circulation_owner():
+    """Refuses circulation requests in workers that do not own the circulation journal."""
+    if circulation_journal is not None and not circulation_journal.owned:
+        raise HTTPException(status_code=HTTP_503_SERVICE_UNAVAILABLE,
+                            detail="Circulation is served by another worker.")
+
+
+router = APIRouter(dependencies=[Depends(require_circulation_owner)])
+
+Repository = Annotated[BookRepository, Depends(get_book_repository)]
+AccessClaims = Annotated[TokenClaims, Depends(require_access_token)]
+
+STAFF_CATEGORIES = {UserType.admin.value, UserType.staff.value}
+
+
+async def ensure_book_exists(repository: BookRepository, book_id: UUID):
+    if await repository.get(book_id) is None:
+        raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail="Book not found by ID.")
+
+
+def circulation_http_error(error: circulation.CirculationError) -> HTTPException:
+    """Maps a circulation error onto the matching HTTP error."""
+    status_code = (HTTP_404_NOT_FOUND if isinstance(error, circulation.LoanNotFoundError)
+                   else HTTP_409_CONFLICT)
+    return HTTPException(status_code=status_code, detail=str(error))
+
+
+@router.post("/checkout/{book_id}", response_model=Loan, status_code=HTTP_201_CREATED)
+async def checkout_book(book_id: UUID, claims: AccessClaims, repository: Repository):
+    """Check a Book out to the Authenticated User."""
+    await ensure_book_exists(repository, book_id)
+    user_id = UUID(claims.sub)
+    limit = await patrons.borrow_limit(user_id)
+    if limit is not None:
+        circulation_engine.set_borrow_limit(user_id, limit)
+    try:
+        loan = await circulation_engine.checkout(book_id, user_id, claims.user_category)
+    except circulation.CirculationError as error:
+        raise circulation_http_error(error) from error
+    await patrons.record_loans(user_id, circulation_engine.borrowed_count(user_id), book_id)
+    autocomplete_index.record_borrow(book_id)
+    recommendation_engine.record_checkout(loan.user_id, book_id)
+    return loan
+
+
+@router.post("/return/{book_id}", response_model=Loan)
+async def return_book(book_id: UUID, claims: AccessClaims):
+    """Return a Checked Out Book; staff may return books borrowed by anyone."""
+    loan = next((loan for loan in circulation_engine.loans(UUID(claims.sub))
+                 if loan.book_id == book_id), None)
+    if loan is None and claims.user_category not in STAFF_CATEGORIES:
+        raise HTTPException(status_code=HTTP_403_FORBIDDEN,
+                            detail="Book is not checked out to this user.")
+    try:
+        returned = await circulation_engine.return_book(book_id)
+    except circulation.CirculationError as error:
+        raise circulation_http_error(error) from error
+    await patrons.record_loans(returned.user_id,
+                               circulation_engine.borrowed_count(returned.user_id))
+    return returned
+
+
+@router.post("/renew/{book_id}", response_model=Loan)
+async def renew_book(book_id: UUID, claims: AccessClaims):
+    """Renew the Authenticated User's Loan of a Book."""
+    try:
+        return await circulation_engine.renew(book_id, UUID(claims.sub))
+    except circulation.CirculationError as error:
+        raise circulation_http_error(error) from error
+
+
+@router.post("/reserve/{book_id}", response_model=Hold, status_code=HTTP_201_CREATED)
+async def reserve_book(book_id: UUID, claims: AccessClaims, repository: Repository):
+    """Place a Hold on a Book for the Authenticated User."""
+    await ensure_book_exists(repository, book_id)
+    try:
+        return await circulation_engine.reserve(book_id, UUID(claims.sub))
+    except circulation.CirculationError as error:
+        raise circulation_http_error(error) from error
+
+
+@router.delete("/reserve/{book_id}", status_code=HTTP_204_NO_CONTENT)
+async def cancel_reservation(book_id: UUID, claims: AccessClaims):
+    """Cancel the Authenticated User's Hold on a Book."""
+    try:
+        await circulation_engine.cancel_hold(book_id, UUID(claims.sub))
+    except circulation.CirculationError as error:
+        raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail=str(error)) from error
+    return Response(status_code=HTTP_204_NO_CONTENT)
+
+
+@router.get("/loans", response_model=list[Loan])
+async def list_loans(claims: AccessClaims):
+    """List the Authenticated User's Open Loans."""
+    return circulation_engine.loans(UUID(claims.sub))
+
+
+@router.get("/status/{book_id}", response_model=BookCirculation)
+async def book_status(book_id: UUID, repository: Repository):
+    """Retrieve the Circulation State of a Book."""
+    await ensure_book_exists(repository, book_id)
+    return circulation_engine.status(book_id)
+
+
+@router.post("/fines/run", response_model=FineRunReport)
+async def run_fines(claims: AccessClaims,
+                    repository: Repository,
+                    incremental: bool = Query(True),
+                    dry_run: bool = Query(False)):
+    """
+    Assess Overdue Fines for every Open and Recently Returned Loan.
+
+    Staff only. With `dry_run`, the report lists the changes to `fines_owed`
+    without applying them.
+    """
+    if claims.user_category not in STAFF_CATEGORIES:
+        raise HTTPException(status_code=HTTP_403_FORBIDDEN, detail="Staff only.")
+    try:
+        return await fines.assess_fines(fine_engine, circulation_engine, repository,
+                                        incremental=incremental, dry_run=dry_run)
+    except (CollectionWasNotInitialized, PyMongoError) as error:
+        raise HTTPException(status_code=HTTP_503_SERVICE_UNAVAILABLE,
+                            detail="User store unavailable; fines were not applied.") from error
@@ -0,0 +1,49 @@
+"""LibookTrac Backend Recommendation Endpoints."""
+
+from typing import Annotated
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from starlette.status import HTTP_404_NOT_FOUND
+
+from backend.v1.app.auth.tokens import require_access_token
+from backend.v1.app.database.connect import get_book_repository
+from backend.v1.app.database.repository import BookRepository
+from backend.v1.app.models.books import BookResponse
+from backend.v1.app.models.tokens import TokenClaims
+from backend.v1.app.services import events, recommendations
+from backend.v1.app.services.patrons import PatronStore
+
+router = APIRouter()
+
+Repository = Annotated[BookRepository, Depends(get_book_repository)]
+AccessClaims = Annotated[TokenClaims, Depends(require_access_token)]
+
+recommendation_engine = events.subscribe(recommendations.RecommendationEngine())
+patrons = PatronStore()
+
+
+async def seed_from_user_store() -> int:
+    """Merges the borrow histories stored in UserDetails into the engine."""
+    return sum([recommendation_engine.seed(user_id, history)
+                async for user_id, history in patrons.histories()])
+
+
+@router.get("/also-borrowed/{book_id}", response_model=list[BookResponse])
+async def also_borrowed(book_id: UUID, repository: Repository,
+                        n: int = Query(10, ge=1, le=recommendations.TOP_N)):
+    """Patrons who Borrowed this Book also Borrowed these, Most Similar First."""
+    if await repository.get(book_id) is None:
+        raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail="Book not found by ID.")
+    similar = recommendation_engine.similar(book_id, n)
+    return await repository.get_many(partner for partner, _ in similar)
+
+
+@router.get("/for-you", response_model=list[BookResponse])
+async def for_you(claims: AccessClaims, repository: Repository,
+                  n: int = Query(10, ge=1, le=recommendations.TOP_N)):
+    """Books for the Authenticated User from their Borrow History and Preferred Genres."""
+    user_id = UUID(claims.sub)
+    ranked = recommendation_engine.for_user(user_id, await patrons.preferred_genres(user_id),
+                                            n)
+    return await repository.get_many(book_id for book_id, _ in ranked)
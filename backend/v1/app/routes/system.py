@@ -1,9 +1,23 @@
 """Libooktrac Backend System Endpoints"""
 
-from fastapi import APIRouter
+import asyncio
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Request, Response
+from fastapi.responses import JSONResponse
+from starlette.status import HTTP_200_OK, HTTP_503_SERVICE_UNAVAILABLE
+
+from backend.v1.app.auth.passwords import password_hasher
+from backend.v1.app.database.connect import get_book_repository
+from backend.v1.app.database.repository import BookRepository
+from backend.v1.app.server.metrics import registry
 
 router = APIRouter()
 
+Repository = Annotated[BookRepository, Depends(get_book_repository)]
+
+READINESS_TIMEOUT = 2.0
+
 
 @router.get("/")
 async def home():
@@ -12,6 +26,32 @@ async def home():
 
 
 @router.get("/health/ready")
-async def healthcheck():
-    """HealthCheck Endpoint."""
-    return {"message": "Welcome to the Libooktrac HealthCheck Endpoint"}
+async def healthcheck(request: Request, repository: Repository):
+    """
+    Readiness Endpoint.
+
+    Returns 503 until the storage is reachable, the in-memory indexes are
+    loaded and the password worker pool can take more work, and again if
+    the replay of other workers' catalog changes stops, so load balancers
+    skip cold, saturated or stale workers.
+    """
+    try:
+        storage = await asyncio.wait_for(repository.ping(), READINESS_TIMEOUT)
+    except Exception:  # noqa: BLE001
+        storage = False
+    sync = getattr(request.app.state, "catalog_sync", None)
+    checks = {
+        "storage": storage,
+        "indexes": getattr(request.app.state, "indexes_loaded", False),
+        "password_workers": password_hasher.healthy(),
+        "catalog_sync": sync is None or sync.healthy(),
+    }
+    ready = all(checks.values())
+    return JSONResponse({"status": "ready" if ready else "unavailable", "checks": checks},
+                        status_code=HTTP_200_OK if ready else HTTP_503_SERVICE_UNAVAILABLE)
+
+
+@router.get("/metrics")
+async def metrics():
+    """Prometheus Metrics Endpoint."""
+    return Response(registry.render(), media_type="text/plain; version=0.0.4")
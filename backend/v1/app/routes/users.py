@@ -1 +1,39 @@
 """LibookTrac Backend Users Endpoints."""
+
+from contextlib import suppress
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException
+from starlette.status import HTTP_204_NO_CONTENT, HTTP_401_UNAUTHORIZED
+
+from backend.v1.app.auth import tokens
+from backend.v1.app.models.tokens import (
+    LogoutRequest,
+    RefreshRequest,
+    TokenClaims,
+    TokenPair,
+    TokenType,
+)
+
+router = APIRouter()
+
+AccessClaims = Annotated[TokenClaims, Depends(tokens.require_access_token)]
+
+
+@router.post("/token/refresh", response_model=TokenPair)
+async def refresh_tokens(request: RefreshRequest):
+    """Exchange a Refresh Token for a new Access and Refresh Token."""
+    try:
+        return tokens.refresh_token_pair(request.refresh_token)
+    except tokens.InvalidTokenError as error:
+        raise HTTPException(status_code=HTTP_401_UNAUTHORIZED, detail=str(error),
+                            headers={"WWW-Authenticate": "Bearer"}) from error
+
+
+@router.post("/logout", status_code=HTTP_204_NO_CONTENT)
+async def logout(claims: AccessClaims, request: LogoutRequest | None = None):
+    """Revoke the Current Access Token and, if given, its Refresh Token."""
+    tokens.revocations.revoke_token(claims.jti, claims.exp)
+    if request is not None and request.refresh_token:
+        with suppress(tokens.InvalidTokenError):
+            tokens.revoke_token(request.refresh_token, TokenType.REFRESH)
@@ -1,9 +1,11 @@
 """Books Table Schema."""
 
-from datetime import date, datetime
+from datetime import date
 from enum import Enum
 from uuid import UUID
 
+from pydantic import NaiveDatetime
+from sqlalchemy import JSON, Index, Text
 from sqlmodel import Column, Field, SQLModel
 from sqlmodel import Enum as SQLModelEnum
 
@@ -29,8 +31,12 @@ class CirculationStatus(Enum):
 
 class Books(SQLModel, table=True):
     """Books Table Class."""
+    __table_args__ = (
+        Index("ix_books_entry_time_book_id", "book_entry_time", "book_id"),
+    )
+
     book_id: UUID = Field(unique=True, nullable=False, primary_key=True)
-    title: str = Field(nullable=False, unique=False)
+    title: str = Field(max_length=200, nullable=False, unique=False)
     author_first_name: str = Field(max_length=100,
                                    nullable=False)
     author_middle_name: str | None = Field(default=None, max_length=100,
@@ -52,19 +58,33 @@ class Books(SQLModel, table=True):
         sa_column=Column(SQLModelEnum(BookCondition), nullable=True)
     )
     publisher: str | None = Field(default=None, nullable=True)
-    edition: int 
+    edition: int | None = Field(default=None, nullable=True)
     page_count: int | None = Field(default=None, nullable=True)
-    tags: list[str] | None = Field(default=None, nullable=True)
-    isbn: str | None = Field(default=None, nullable=False)
-    genre: str | None = Field(default=None)
+    tags: list[str] | None = Field(default=None, sa_column=Column(JSON, nullable=True))
+    isbn: str | None = Field(default=None, nullable=True, unique=True, index=True)
+    genre: str | None = Field(default=None, max_length=50, index=True)
     publication_year: date | None = Field(default=None)
     target_audience: BookAudience = Field(
         sa_column=Column(SQLModelEnum(BookAudience), nullable=False)
     )
     location: BookLocation = Field(
-        sa_column=Column(SQLModelEnum(BookLocation), nullable=False)
+        sa_column=Column(SQLModelEnum(BookLocation), nullable=False, index=True)
     )
     replacement_cost: float | None = Field(default=None)
-    last_access_time: datetime | None = Field(default=None)
-    book_entry_time: datetime
-    last_updated_date: datetime
+    last_access_time: NaiveDatetime | None = Field(default=None)
+    book_entry_time: NaiveDatetime
+    last_updated_date: NaiveDatetime
+
+
+class BookChanges(SQLModel, table=True):
+    """Catalog Change Log Table Class."""
+    __tablename__ = "book_changes"
+    # Sequence numbers are never reused, so pruning old rows cannot make a
+    # reader's position point past new ones.
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    seq: int | None = Field(default=None, primary_key=True)
+    origin: str = Field(max_length=32, nullable=False)
+    action: str = Field(max_length=8, nullable=False)
+    book: str | None = Field(default=None, sa_column=Column(Text, nullable=True))
+    changed_at: NaiveDatetime = Field(nullable=False, index=True)
@@ -0,0 +1,245 @@
+"""LiBookTrac Admission Control, Rate Limiting and Load Shedding."""
+
+import asyncio
+import json
+import math
+import time
+from collections.abc import Callable, Iterable
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from backend.v1.app.auth.tokens import verified_tokens
+from backend.v1.app.server.metrics import MetricsRegistry, registry
+
+READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+# Probes and scrapes must keep working while the app is shedding load.
+EXEMPT_PATHS = frozenset({"/", "/health/ready", "/metrics"})
+# Long-lived streams are rate limited when they connect but do not hold one
+# of the read slots for as long as they stay open.
+STREAM_PATHS = frozenset({"/books/changes"})
+AUTH_PREFIX = "/users/"
+
+
+def route_class(method: str, path: str) -> str | None:
+    """
+    Returns the class a request is admitted under: read, write or auth.
+
+    Returns:
+        str | None: The route class, or None for requests that are never limited.
+    """
+    if path in EXEMPT_PATHS:
+        return None
+    if path.startswith(AUTH_PREFIX):
+        return "auth"
+    return "read" if method in READ_METHODS else "write"
+
+
+class RateLimiter:
+    """
+    Per-client token buckets stored as one float per client.
+
+    Uses the generic cell rate algorithm: a client's state is the time at
+    which its bucket would next be full, so there is no token count or
+    refill timestamp to keep. Clients live in two dicts that rotate every
+    time a bucket takes to refill; a client untouched for a whole rotation
+    has a full bucket, the same as a client never seen, so the older dict
+    is simply dropped. Expiry costs nothing per request and memory tracks
+    only recently active clients.
+    """
+
+    def __init__(self, rate: float, burst: int, clock: Callable[[], float] = time.monotonic):
+        self.interval = 1.0 / rate
+        self.tolerance = (burst - 1) * self.interval
+        self.period = burst * self.interval
+        self.clock = clock
+        self.limited = 0
+        self._current: dict[str, float] = {}
+        self._previous: dict[str, float] = {}
+        self._rotated_at = clock()
+
+    def __len__(self) -> int:
+        return len(self._current) + len(self._previous)
+
+    def acquire(self, client: str) -> float:
+        """
+        Takes a token from a client's bucket.
+
+        Args:
+            client (str): The client key.
+
+        Returns:
+            float: 0 if the request may proceed, otherwise the seconds until
+            the client's next token.
+        """
+        now = self.clock()
+        if now - self._rotated_at >= self.period:
+            self._previous, self._current = self._current, {}
+            self._rotated_at = now
+        full_at = self._current.get(client)
+        if full_at is None:
+            full_at = self._previous.pop(client, now)
+        full_at = max(full_at, now)
+        wait = full_at - now - self.tolerance
+        if wait > 0:
+            self._current[client] = full_at
+            self.limited += 1
+            return wait
+        self._current[client] = full_at + self.interval
+        return 0.0
+
+
+class ConcurrencyLimit:
+    """
+    Caps the requests of one route class being served at once.
+
+    Up to `max_waiting` requests queue for a slot for at most `timeout`
+    seconds; beyond that they are turned away rather than piling up.
+    """
+
+    def __init__(self, limit: int, max_waiting: int, timeout: float):
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.timeout = timeout
+        self._slots = asyncio.Semaphore(limit)
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+
+    async def acquire(self) -> bool:
+        """Waits for a slot and returns False if the request should be shed."""
+        if self._slots.locked() and self.waiting >= self.max_waiting:
+            self.rejected += 1
+            return False
+        self.waiting += 1
+        try:
+            async with asyncio.timeout(self.timeout):
+                await self._slots.acquire()
+        except TimeoutError:
+            self.rejected += 1
+            return False
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+        self._slots.release()
+
+
+class AdmissionController:
+    """
+    Decides whether a request is served, rate limited (429) or shed (503).
+
+    Each route class has its own per-client rate limiter and concurrency
+    limit. Requests are shed outright while the event loop lags more than
+    `max_loop_lag` seconds, since anything admitted then only adds to the
+    backlog.
+    """
+
+    def __init__(self, rates: dict[str, float], bursts: dict[str, int],
+                 concurrency: dict[str, int], max_waiting: int, queue_timeout: float,
+                 max_loop_lag: float, trusted_proxies: Iterable[str] = (),
+                 metrics: MetricsRegistry = registry):
+        self.rate_limiters = {name: RateLimiter(rate, bursts[name])
+                              for name, rate in rates.items()}
+        self.limits = {name: ConcurrencyLimit(limit, max_waiting, queue_timeout)
+                       for name, limit in concurrency.items()}
+        self.max_loop_lag = max_loop_lag
+        self.trusted_proxies = frozenset(trusted_proxies)
+        self.metrics = metrics
+        self.shed = 0
+
+    def client_key(self, scope: Scope, headers: Headers) -> str:
+        """
+        Identifies the client a request counts against.
+
+        Requests with a bearer token that was already verified count against
+        the user, so a user keeps one budget across addresses. Anything else
+        counts against the address, taken from X-Forwarded-For only when the
+        request came through a trusted proxy.
+        """
+        authorization = headers.get("authorization", "")
+        if authorization[:7].lower() == "bearer ":
+            claims = verified_tokens.peek(authorization[7:].strip(), time.time())
+            if claims is not None:
+                return f"user:{claims.sub}"
+        address = scope["client"][0] if scope.get("client") else ""
+        if address in self.trusted_proxies:
+            forwarded = [hop.strip() for hop in headers.get("x-forwarded-for", "").split(",")]
+            for hop in reversed(forwarded):
+                if hop and hop not in self.trusted_proxies:
+                    return f"ip:{hop}"
+        return f"ip:{address}"
+
+    def check(self, name: str, scope: Scope) -> tuple[int, float] | None:
+        """
+        Applies the load shedding and rate limit checks to a request.
+
+        Returns:
+            tuple[int, float] | None: The rejection status and Retry-After
+            seconds, or None if the request may go on to its concurrency limit.
+        """
+        lag = self.metrics.last_loop_lag
+        if lag > self.max_loop_lag:
+            self.shed += 1
+            return 503, max(1.0, lag)
+        limiter = self.rate_limiters.get(name)
+        if limiter is not None:
+            wait = limiter.acquire(self.client_key(scope, Headers(scope=scope)))
+            if wait > 0:
+                return 429, wait
+        return None
+
+
+async def reject(send: Send, status: int, retry_after: float):
+    """Sends a JSON error response with a Retry-After header in whole seconds."""
+    detail = ("Too many requests; slow down." if status == 429
+              else "The server is overloaded; try again later.")
+    body = json.dumps({"detail": detail}).encode()
+    await send({"type": "http.response.start", "status": status, "headers": [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+        (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+    ]})
+    await send({"type": "http.response.body", "body": body})
+
+
+class AdmissionMiddleware:
+    """
+    Pure ASGI middleware admitting requests through an AdmissionController.
+
+    Requests are classified from the method and path before routing, so
+    rejecting one costs a few dict lookups and never reaches the endpoint.
+    """
+
+    def __init__(self, app: ASGIApp, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        path = scope["path"]
+        name = route_class(scope["method"], path)
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+
+        rejection = self.controller.check(name, scope)
+        if rejection is not None:
+            await reject(send, *rejection)
+            return
+        limit = None if path in STREAM_PATHS else self.controller.limits.get(name)
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+        if not await limit.acquire():
+            await reject(send, 503, limit.timeout)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limit.release()
@@ -0,0 +1,242 @@
+"""LiBookTrac Request Metrics and Prometheus Exposition."""
+
+import asyncio
+import contextlib
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+
+from starlette.routing import BaseRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                   2.5, 5.0, 10.0)
+SIZE_BUCKETS = (128, 512, 2048, 8192, 32768, 131072, 524288, 2097152, 8388608)
+LOOP_LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def _format_bound(bound: float) -> str:
+    return repr(float(bound))
+
+
+class Histogram:
+    """Fixed-bucket histogram; observing a value is one bisect and two additions."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> Iterable[str]:
+        """Yields the Prometheus sample lines for this histogram."""
+        prefix = f"{labels}," if labels else ""
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts, strict=False):
+            cumulative += count
+            yield f'{name}_bucket{{{prefix}le="{_format_bound(bound)}"}} {cumulative}'
+        yield f'{name}_bucket{{{prefix}le="+Inf"}} {self.count}'
+        suffix = f"{{{labels}}}" if labels else ""
+        yield f"{name}_sum{suffix} {self.sum}"
+        yield f"{name}_count{suffix} {self.count}"
+
+
+class RouteMetrics:
+    """Counters for one route, created once when the route table is registered."""
+
+    __slots__ = ("labels", "latency", "sizes", "statuses")
+
+    def __init__(self, path: str, methods: str):
+        self.labels = f'route="{path}",method="{methods}"'
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.sizes = Histogram(SIZE_BUCKETS)
+        self.statuses: dict[int, int] = {}
+
+
+class MetricsRegistry:
+    """
+    Route table, process-wide gauges and the Prometheus text renderer.
+
+    Routes are registered once at startup so a request only does a dict
+    lookup by route identity; label strings are built at registration time.
+    """
+
+    def __init__(self):
+        self.routes: dict[int, RouteMetrics] = {}
+        self._registered: list[BaseRoute] = []
+        self.unmatched = RouteMetrics(UNMATCHED_ROUTE, "")
+        self.in_flight = 0
+        self.loop_lag = Histogram(LOOP_LAG_BUCKETS)
+        self.last_loop_lag = 0.0
+        self._gauges: dict[str, tuple[str, Callable[[], float]]] = {}
+
+    def _register(self, route: BaseRoute, path: str) -> RouteMetrics:
+        methods = ",".join(sorted(getattr(route, "methods", None) or ()))
+        route_metrics = self.routes[id(route)] = RouteMetrics(path, methods)
+        # Routes compare by value and are unhashable, so they are keyed by id
+        # and kept referenced here so the ids stay unique.
+        self._registered.append(route)
+        return route_metrics
+
+    def register_routes(self, routes: Iterable[BaseRoute]):
+        """Pre-registers the metrics of every route of an application."""
+        for route in routes:
+            path = getattr(route, "path", None)
+            if path is not None and id(route) not in self.routes:
+                self._register(route, path)
+
+    def lookup(self, scope: Scope) -> RouteMetrics:
+        """
+        Returns the metrics of the route that served a request.
+
+        Routes of routers that the framework resolves lazily are registered on
+        their first request; the router prefix is recovered from the request
+        path so labels show the full path template.
+        """
+        route = scope.get("route")
+        route_metrics = self.routes.get(id(route))
+        if route_metrics is not None:
+            return route_metrics
+        template = getattr(route, "path", None)
+        if template is None:
+            return self.unmatched
+        try:
+            relative = route.path_format.format(**scope.get("path_params", {}))
+        except (AttributeError, KeyError, IndexError):
+            relative = template
+        path = scope.get("path", "")
+        prefix = path[:-len(relative)] if relative and path.endswith(relative) else ""
+        return self._register(route, prefix + template)
+
+    def register_gauge(self, name: str, help_text: str, read: Callable[[], float]):
+        """Registers a gauge whose value is read when /metrics is scraped."""
+        self._gauges[name] = (help_text, read)
+
+    def render(self) -> str:
+        """Returns every metric in the Prometheus text exposition format."""
+        all_routes = [*self.routes.values(), self.unmatched]
+        lines = [
+            "# HELP libooktrac_http_request_duration_seconds Request latency by route.",
+            "# TYPE libooktrac_http_request_duration_seconds histogram",
+        ]
+        for route in all_routes:
+            if route.latency.count:
+                lines.extend(route.latency.render(
+                    "libooktrac_http_request_duration_seconds", route.labels))
+        lines += [
+            "# HELP libooktrac_http_response_size_bytes Response body size by route.",
+            "# TYPE libooktrac_http_response_size_bytes histogram",
+        ]
+        for route in all_routes:
+            if route.sizes.count:
+                lines.extend(route.sizes.render("libooktrac_http_response_size_bytes",
+                                                route.labels))
+        lines += [
+            "# HELP libooktrac_http_requests_total Completed requests by route and status.",
+            "# TYPE libooktrac_http_requests_total counter",
+        ]
+        for route in all_routes:
+            lines.extend(f'libooktrac_http_requests_total{{{route.labels},status="{status}"}} '
+                         f"{count}" for status, count in sorted(route.statuses.items()))
+        lines += [
+            "# HELP libooktrac_http_requests_in_flight Requests currently being served.",
+            "# TYPE libooktrac_http_requests_in_flight gauge",
+            f"libooktrac_http_requests_in_flight {self.in_flight}",
+        ]
+        lines += [
+            "# HELP libooktrac_event_loop_lag_seconds Delay of scheduled event loop wakeups.",
+            "# TYPE libooktrac_event_loop_lag_seconds histogram",
+            *self.loop_lag.render("libooktrac_event_loop_lag_seconds", ""),
+            "# HELP libooktrac_event_loop_lag_last_seconds Most recent event loop lag.",
+            "# TYPE libooktrac_event_loop_lag_last_seconds gauge",
+            f"libooktrac_event_loop_lag_last_seconds {self.last_loop_lag}",
+        ]
+        for name, (help_text, read) in self._gauges.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {read()}"]
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware timing every HTTP request against the route table.
+
+    The matched route is read from scope["route"], which the router sets on
+    the shared scope, after the response has been sent.
+    """
+
+    def __init__(self, app: ASGIApp, metrics: MetricsRegistry = registry):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = self.metrics
+        status = 500
+        size = 0
+
+        async def send_wrapper(message: Message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        metrics.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.in_flight -= 1
+            route = metrics.lookup(scope)
+            route.latency.observe(elapsed)
+            route.sizes.observe(size)
+            route.statuses[status] = route.statuses.get(status, 0) + 1
+
+
+class LoopLagMonitor:
+    """
+    Measures how late the event loop wakes a task that sleeps for `interval`.
+
+    Lag is time spent running other callbacks, i.e. blocking code on the loop.
+    """
+
+    def __init__(self, metrics: MetricsRegistry = registry, interval: float = 0.5):
+        self.metrics = metrics
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - start - self.interval)
+            self.metrics.last_loop_lag = lag
+            self.metrics.loop_lag.observe(lag)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
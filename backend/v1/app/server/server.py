@@ -1,16 +1,165 @@
 """LiBookTrac Application Server Module."""
 
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from datetime import timedelta
+from pathlib import Path
+
 from fastapi import FastAPI
+from pymongo import AsyncMongoClient
+from pymongo.errors import PyMongoError
 from starlette.middleware.cors import CORSMiddleware
 
+from backend.v1.app.auth import tokens
+from backend.v1.app.auth.passwords import password_hasher
+from backend.v1.app.config.settings import settings
+from backend.v1.app.database.connect import get_book_repository, init_user_store
+from backend.v1.app.database.repository import BookRepository
+from backend.v1.app.routes import books, circulation, recommendations
 from backend.v1.app.routes import router as api_router
 from backend.v1.app.server import config as app_config
+from backend.v1.app.server import metrics
+from backend.v1.app.server.admission import AdmissionController, AdmissionMiddleware
+from backend.v1.app.services import events, search
+from backend.v1.app.services.catalog_sync import CatalogSync
+from backend.v1.app.services.snapshots import OwnerLock
+
+catalog_sync = CatalogSync(get_book_repository(), settings.catalog_sync_interval,
+                           timedelta(seconds=settings.catalog_change_retention))
+admission = AdmissionController(settings.rate_limits, settings.rate_limit_bursts,
+                                settings.concurrency_limits, settings.admission_max_waiting,
+                                settings.admission_queue_timeout, settings.shed_loop_lag,
+                                settings.trusted_proxies)
+
+
+def snapshot_owner(path: Path | None) -> OwnerLock | None:
+    """Returns the lock making this worker the one saving the snapshot at `path`, if free."""
+    if path is None:
+        return None
+    lock = OwnerLock(path.with_name(path.name + ".lock"))
+    return lock if lock.acquire() else None
+
+
+def restore_search_index(path: Path) -> search.IndexCatchUp | None:
+    """
+    Restores the search index saved at `path`.
+
+    Returns:
+        search.IndexCatchUp | None: The listener bringing the index up to
+        date during the warm-up pass, or None if there was nothing to restore
+        and the warm-up has to build the index.
+    """
+    if not path.exists():
+        return None
+    try:
+        books.search_index.restore(path)
+    except (OSError, ValueError, KeyError):
+        # Written by another version or damaged.
+        books.search_index.catalog_cleared()
+        return None
+    return search.IndexCatchUp(books.search_index)
+
+
+async def connect_user_store(client: AsyncMongoClient):
+    """Initializes the user store, then seeds recommendations from its borrow histories."""
+    await init_user_store(client, settings)
+    with suppress(PyMongoError):
+        await recommendations.seed_from_user_store()
+
+
+async def compact_circulation(repository: BookRepository):
+    """Drops loans and holds of books no longer cataloged and compacts the journal."""
+    engine, journal = circulation.circulation_engine, circulation.circulation_journal
+    if journal is not None and journal.owned:
+        cataloged = {book.book_id for book in await repository.get_many(engine.book_ids())}
+        engine.forget(set(engine.book_ids()) - cataloged)
+        await journal.compact(engine)
+    engine.report_statuses()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Opens the book repository and warms the in-memory indexes at startup.
+
+    Refuses to start without a token signing key.
+
+    A search index restored from disk is caught up during the same pass over
+    the catalog that warms the other indexes: only books changed or deleted
+    since it was saved are indexed again. The app reports ready once the
+    indexes are loaded, and from then on changes made by other workers
+    sharing the database are replayed into them. At shutdown the search
+    index and recommendation snapshot are saved, each by the one worker
+    holding its lock, the repository is closed and the password worker
+    pool stopped.
+
+    The worker that takes the circulation journal replays it, drops loans
+    and holds of books no longer cataloged and compacts it. The user store
+    is initialized in the background, so startup does not wait for MongoDB,
+    and the borrow histories stored there are then merged into the
+    recommendations.
+    """
+    tokens.signing_key()
+    app.state.indexes_loaded = False
+    loop_lag = metrics.LoopLagMonitor()
+    loop_lag.start()
+    repository = get_book_repository()
+    user_client = AsyncMongoClient(settings.mongodb_url.get_secret_value())
+    user_store = asyncio.get_running_loop().create_task(connect_user_store(user_client))
+    journal = circulation.circulation_journal
+    if journal is not None and journal.acquire():
+        journal.recover(circulation.circulation_engine)
+        circulation.fine_engine.carried = journal.assessed
+    # The change feed only reports changes made while the app is running.
+    restored = {books.catalog_feed}
+    index_path = settings.search_index_path
+    index_owner = snapshot_owner(index_path)
+    catch_up = None if index_path is None else restore_search_index(index_path)
+    if catch_up is not None:
+        restored.add(books.search_index)
+    recommendations_path = settings.recommendations_path
+    recommendations_owner = snapshot_owner(recommendations_path)
+    if recommendations_path is not None and recommendations_path.exists():
+        recommendations.recommendation_engine.restore(recommendations_path)
+
+    await repository.connect()
+    await catalog_sync.mark()
+    stale = [listener for listener in events.listeners if listener not in restored]
+    if catch_up is not None:
+        stale.append(catch_up)
+    async for batch in repository.iter_batches():
+        events.books_added(batch, targets=stale)
+    if catch_up is not None:
+        catch_up.finish()
+    await compact_circulation(repository)
+    catalog_sync.start()
+    app.state.catalog_sync = catalog_sync
+    app.state.indexes_loaded = True
+    yield
+    app.state.indexes_loaded = False
+    await catalog_sync.stop()
+    await loop_lag.stop()
+    if index_owner is not None:
+        books.search_index.save(index_path)
+        index_owner.release()
+    if recommendations_owner is not None:
+        recommendations.recommendation_engine.save(recommendations_path)
+        recommendations_owner.release()
+    await repository.close()
+    if journal is not None:
+        await journal.close()
+    user_store.cancel()
+    with suppress(asyncio.CancelledError):
+        await user_store
+    await user_client.close()
+    password_hasher.shutdown()
 
 
 def libooktrac() -> FastAPI:
     app = FastAPI(name=app_config.TITLE,
                   description=app_config.DESCRIPTION,
                   version=app_config.VERSION,
+                  lifespan=lifespan,
                   )
 
     app.add_middleware(
@@ -20,10 +169,74 @@ def libooktrac() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
-    
+
+    if settings.admission_enabled:
+        # Added before the metrics middleware so rejected requests are still counted.
+        app.add_middleware(AdmissionMiddleware, controller=admission)
+    app.add_middleware(metrics.MetricsMiddleware)
+
     app.include_router(api_router, prefix="")
+    metrics.registry.register_routes(app.routes)
 
     return app
 
 
+def register_gauges(registry: metrics.MetricsRegistry):
+    """Exposes cache and worker pool counters on /metrics."""
+    gauges = {
+        "libooktrac_books_response_cache_hits": (
+            "Catalog responses served from cache.", lambda: books.books_cache.hits),
+        "libooktrac_books_response_cache_misses": (
+            "Catalog responses built on a cache miss.", lambda: books.books_cache.misses),
+        "libooktrac_books_response_cache_bytes": (
+            "Bytes held by the catalog response cache.", lambda: books.books_cache.size),
+        "libooktrac_catalog_sync_applied": (
+            "Catalog changes replayed from other workers.", lambda: catalog_sync.applied),
+        "libooktrac_catalog_sync_failures": (
+            "Polls of the catalog change log that failed.", lambda: catalog_sync.failures),
+        "libooktrac_change_feed_subscribers": (
+            "Clients following the catalog change feed.", lambda: books.catalog_feed.subscribers),
+        "libooktrac_change_feed_resyncs": (
+            "Feed clients told to reload the catalog.", lambda: books.catalog_feed.resyncs),
+        "libooktrac_verified_token_cache_hits": (
+            "Tokens verified from cache.", lambda: tokens.verified_tokens.hits),
+        "libooktrac_verified_token_cache_misses": (
+            "Tokens whose signature was checked.", lambda: tokens.verified_tokens.misses),
+        "libooktrac_revoked_tokens": (
+            "Revocation entries held in memory.", lambda: len(tokens.revocations)),
+        "libooktrac_patron_store_failures": (
+            "User store reads and writes of circulation that failed.",
+            lambda: circulation.patrons.failures),
+        "libooktrac_password_hash_in_flight": (
+            "Password operations running.", lambda: password_hasher.in_flight),
+        "libooktrac_password_hash_waiting": (
+            "Password operations queued.", lambda: password_hasher.waiting),
+        "libooktrac_password_hash_rejected": (
+            "Password operations rejected while saturated.", lambda: password_hasher.rejected),
+    }
+    for name, (help_text, read) in gauges.items():
+        registry.register_gauge(name, help_text, read)
+    for name, limiter in admission.rate_limiters.items():
+        registry.register_gauge(f"libooktrac_admission_{name}_rate_limited",
+                                f"{name.title()} requests refused with 429.",
+                                lambda limiter=limiter: limiter.limited)
+        registry.register_gauge(f"libooktrac_admission_{name}_clients",
+                                f"Clients with {name} rate limit state in memory.",
+                                lambda limiter=limiter: len(limiter))
+    for name, limit in admission.limits.items():
+        registry.register_gauge(f"libooktrac_admission_{name}_in_flight",
+                                f"{name.title()} requests being served.",
+                                lambda limit=limit: limit.in_flight)
+        registry.register_gauge(f"libooktrac_admission_{name}_waiting",
+                                f"{name.title()} requests queued for a slot.",
+                                lambda limit=limit: limit.waiting)
+        registry.register_gauge(f"libooktrac_admission_{name}_shed",
+                                f"{name.title()} requests shed with 503 at the queue.",
+                                lambda limit=limit: limit.rejected)
+    registry.register_gauge("libooktrac_admission_shed_loop_lag",
+                            "Requests shed with 503 while the event loop lagged.",
+                            lambda: admission.shed)
+
+
+register_gauges(metrics.registry)
 app = libooktrac()
\ No newline at end of file
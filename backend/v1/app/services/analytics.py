@@ -0,0 +1,203 @@
+"""LibookTrac Backend Inventory Analytics Service."""
+
+from collections.abc import Callable, Iterable, Sequence
+from enum import Enum
+from uuid import UUID
+
+from backend.v1.app.models.books import BookResponse
+from backend.v1.app.schemas.books import CirculationStatus
+from backend.v1.app.services.events import CatalogListener
+
+DIMENSIONS = ("location", "book_type", "condition", "status", "language", "target_audience")
+NOT_APPLICABLE = "none"
+
+Cell = tuple[str, ...]
+
+
+def _value(member: Enum | None) -> str:
+    return NOT_APPLICABLE if member is None else member.value
+
+
+def _cents(cost: float | None) -> int:
+    return 0 if cost is None else round(cost * 100)
+
+
+class InventoryAnalytics(CatalogListener):
+    """
+    Inventory counts and replacement cost totals kept as an aggregate cube.
+
+    Every book falls into one cell of location x format x condition x
+    circulation status x language x audience, and each cell holds its book
+    count, the number of books with a replacement cost and their total cost
+    in cents, so sums stay exact. Adding, removing or changing a book, or a
+    circulation status change, moves one book between at most two cells.
+    Cross-tabs aggregate the non-empty cells, whose number is bounded by the
+    dimensions rather than the size of the catalog.
+    """
+
+    def __init__(self):
+        self._books: dict[UUID, tuple[Cell, int, bool]] = {}
+        self._cells: dict[Cell, list[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._books)
+
+    @staticmethod
+    def cell(book: BookResponse, status: CirculationStatus) -> Cell:
+        """Returns the cell of a book in the given circulation status."""
+        return (_value(book.location), _value(book.book_type),
+                _value(book.hardcover_condition), status.value, _value(book.language),
+                _value(book.target_audience))
+
+    def _move(self, cell: Cell, cents: int, priced: bool, sign: int):
+        totals = self._cells.get(cell)
+        if totals is None:
+            totals = self._cells[cell] = [0, 0, 0]
+        totals[0] += sign
+        totals[1] += sign * priced
+        totals[2] += sign * cents
+        if not totals[0]:
+            del self._cells[cell]
+
+    def _put(self, book_id: UUID, cell: Cell, cents: int, priced: bool):
+        self._books[book_id] = (cell, cents, priced)
+        self._move(cell, cents, priced, 1)
+
+    def _drop(self, book_id: UUID) -> Cell | None:
+        entry = self._books.pop(book_id, None)
+        if entry is None:
+            return None
+        self._move(*entry, -1)
+        return entry[0]
+
+    def book_added(self, book: BookResponse, status: CirculationStatus | None = None):
+        previous = self._drop(book.book_id)
+        if status is None:
+            status = (CirculationStatus(previous[DIMENSIONS.index("status")])
+                      if previous else CirculationStatus.AVAILABLE)
+        self._put(book.book_id, self.cell(book, status), _cents(book.replacement_cost),
+                  book.replacement_cost is not None)
+
+    def book_removed(self, book: BookResponse):
+        self._drop(book.book_id)
+
+    def book_updated(self, old: BookResponse, new: BookResponse):
+        self.book_added(new)
+
+    def catalog_cleared(self):
+        self._books.clear()
+        self._cells.clear()
+
+    def set_status(self, book_id: UUID, status: CirculationStatus):
+        """Moves a book to the cell of its new circulation status."""
+        entry = self._books.get(book_id)
+        if entry is None:
+            return
+        cell, cents, priced = entry
+        position = DIMENSIONS.index("status")
+        if cell[position] == status.value:
+            return
+        self._drop(book_id)
+        self._put(book_id, (*cell[:position], status.value, *cell[position + 1:]),
+                  cents, priced)
+
+    def crosstab(self, group_by: Sequence[str] = ()) -> list[dict]:
+        """
+        Aggregates the cube over every dimension not in `group_by`.
+
+        Args:
+            group_by (Sequence[str]): Dimensions to break the totals down by.
+
+        Returns:
+            list[dict]: One row per non-empty group, sorted by group, with the
+            group's dimension values, count, priced and replacement_cost.
+
+        Raises:
+            ValueError: If a dimension is unknown.
+        """
+        unknown = set(group_by) - set(DIMENSIONS)
+        if unknown:
+            raise ValueError(f"Unknown dimensions: {', '.join(sorted(unknown))}.")
+        positions = [DIMENSIONS.index(name) for name in group_by]
+        groups: dict[tuple[str, ...], list[int]] = {}
+        for cell, (count, priced, cents) in self._cells.items():
+            key = tuple(cell[position] for position in positions)
+            totals = groups.get(key)
+            if totals is None:
+                groups[key] = [count, priced, cents]
+            else:
+                totals[0] += count
+                totals[1] += priced
+                totals[2] += cents
+        return [
+            {"group": dict(zip(group_by, key, strict=True)), "count": count,
+             "priced": priced, "replacement_cost": cents / 100}
+            for key, (count, priced, cents) in sorted(groups.items())
+        ]
+
+    @classmethod
+    def rebuild(cls, books: Iterable[tuple[BookResponse, CirculationStatus]]
+                ) -> "InventoryAnalytics":
+        """Builds the aggregates from scratch from (book, circulation status) pairs."""
+        analytics = cls()
+        for book, status in books:
+            analytics.book_added(book, status)
+        return analytics
+
+    def diff(self, expected: "InventoryAnalytics") -> list[dict]:
+        """
+        Compares these aggregates with ones rebuilt from scratch.
+
+        Returns:
+            list[dict]: One entry per cell whose totals differ, with the cell's
+            dimension values and the expected and actual [count, priced, cents].
+        """
+        mismatches = []
+        for cell in sorted(self._cells.keys() | expected._cells.keys()):
+            actual = self._cells.get(cell, [0, 0, 0])
+            wanted = expected._cells.get(cell, [0, 0, 0])
+            if actual != wanted:
+                mismatches.append({"cell": dict(zip(DIMENSIONS, cell, strict=True)),
+                                   "expected": list(wanted), "actual": list(actual)})
+        return mismatches
+
+    def replace(self, other: "InventoryAnalytics"):
+        """Takes over the aggregates of another instance, e.g. a rebuilt one."""
+        self._books = other._books
+        self._cells = other._cells
+
+
+class InventoryChanges(CatalogListener):
+    """
+    Records catalog and circulation changes while the inventory is rebuilt.
+
+    A rebuild reads the catalog a page at a time, and books changed while
+    it reads may be seen before or after the change. Replaying the recorded
+    changes in order onto the rebuilt aggregates brings every book to its
+    latest version and status, since each change sets a book's state rather
+    than adjusting it.
+    """
+
+    def __init__(self):
+        self.changes: list[tuple[Callable, tuple]] = []
+
+    def book_added(self, book: BookResponse):
+        self.changes.append((InventoryAnalytics.book_added, (book,)))
+
+    def book_removed(self, book: BookResponse):
+        self.changes.append((InventoryAnalytics.book_removed, (book,)))
+
+    def book_updated(self, old: BookResponse, new: BookResponse):
+        self.changes.append((InventoryAnalytics.book_updated, (old, new)))
+
+    def catalog_cleared(self):
+        self.changes.append((InventoryAnalytics.catalog_cleared, ()))
+
+    def set_status(self, book_id: UUID, status: CirculationStatus):
+        self.changes.append((InventoryAnalytics.set_status, (book_id, status)))
+
+    def replay(self, analytics: InventoryAnalytics):
+        """Applies the recorded changes, in order, to rebuilt aggregates."""
+        for change, arguments in self.changes:
+            change(analytics, *arguments)
+        self.changes = []
@@ -0,0 +1,288 @@
+"""LibookTrac Backend Title and Author Autocomplete Service."""
+
+import heapq
+from collections import Counter
+from uuid import UUID
+
+from backend.v1.app.models.books import BookResponse
+from backend.v1.app.services.events import CatalogListener
+from backend.v1.app.services.search import tokenize
+
+TOP_K = 20
+BUCKET_SIZE = 64
+LEADING_ARTICLES = ("the ", "a ", "an ")
+
+
+def normalize(text: str) -> str:
+    """Folds case and accents and reduces text to single-spaced words."""
+    return " ".join(tokenize(text))
+
+
+def author_name(book: BookResponse) -> str:
+    return " ".join(filter(None, (book.author_first_name, book.author_middle_name,
+                                  book.author_last_name)))
+
+
+class Term:
+    """A completion: one normalized key of a title or author and the books behind it."""
+
+    __slots__ = ("kind", "key", "text", "books", "popularity")
+
+    def __init__(self, kind: str, key: str, text: str):
+        self.kind = kind
+        self.key = key
+        self.text = text
+        self.books: set[UUID] = set()
+        self.popularity = 0
+
+    def rank(self) -> tuple:
+        return (-self.popularity, self.key, self.kind)
+
+
+def _top(terms) -> list[Term]:
+    return heapq.nsmallest(TOP_K, terms, key=Term.rank)
+
+
+class _Node:
+    """
+    A burst trie node.
+
+    A node starts as a bucket listing every term below it. Once the bucket
+    outgrows BUCKET_SIZE it bursts into children by next character and keeps
+    a precomputed top-k list instead; `terms` then only holds the terms whose
+    key ends at this node.
+    """
+
+    __slots__ = ("depth", "terms", "children", "top")
+
+    def __init__(self, depth: int):
+        self.depth = depth
+        self.terms: list[Term] = []
+        self.children: dict[str, _Node] | None = None
+        self.top: list[Term] = []
+
+    @property
+    def is_bucket(self) -> bool:
+        return self.children is None
+
+    def best(self) -> list[Term]:
+        """Returns this node's top-k terms."""
+        return _top(self.terms) if self.is_bucket else self.top
+
+    def recompute(self):
+        self.top = _top([*self.terms, *(term for child in self.children.values()
+                                        for term in child.best())])
+
+
+class AutocompleteIndex(CatalogListener):
+    """
+    Type-ahead over normalized titles and author names, ranked by borrow count.
+
+    Completions live in a burst trie whose internal nodes keep a top-k list
+    of the most borrowed terms below them, so a short, common prefix is
+    answered without visiting its subtree; longer prefixes end in small
+    buckets that are scanned. Adding a book or recording a borrow only moves
+    terms up, which updates the top-k lists along one path; removals rebuild
+    those lists bottom-up along the same path from the children's lists.
+
+    Prefixes with fewer than `k` matches are expanded to every variant within
+    edit distance one over the indexed alphabet.
+    """
+
+    def __init__(self):
+        self.root = _Node(0)
+        self._terms: dict[tuple[str, str], Term] = {}
+        self._book_terms: dict[UUID, list[Term]] = {}
+        self._borrows: Counter[UUID] = Counter()
+        self._alphabet: Counter[str] = Counter()
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    @staticmethod
+    def book_keys(book: BookResponse) -> list[tuple[str, str, str]]:
+        """Returns the (kind, key, text) completions of a book."""
+        keys = []
+        title = normalize(book.title)
+        if title:
+            keys.append(("title", title, book.title))
+            for article in LEADING_ARTICLES:
+                if title.startswith(article) and len(title) > len(article):
+                    keys.append(("title", title[len(article):], book.title))
+        name = author_name(book)
+        words = normalize(name).split()
+        # Every trailing run of the name, so "tolk" finds "John Tolkien".
+        keys.extend(("author", " ".join(words[start:]), name) for start in range(len(words)))
+        return keys
+
+    def _path(self, key: str) -> list[_Node]:
+        """Returns the nodes from the root to the node holding `key`."""
+        node = self.root
+        path = [node]
+        while not node.is_bucket and node.depth < len(key):
+            node = node.children.get(key[node.depth])
+            if node is None:
+                break
+            path.append(node)
+        return path
+
+    def _insert(self, term: Term):
+        node = self.root
+        while not node.is_bucket and node.depth < len(term.key):
+            child = node.children.get(term.key[node.depth])
+            if child is None:
+                child = node.children[term.key[node.depth]] = _Node(node.depth + 1)
+            node = child
+        node.terms.append(term)
+        if node.is_bucket and len(node.terms) > BUCKET_SIZE:
+            self._burst(node)
+        self._alphabet.update(term.key)
+
+    def _burst(self, node: _Node):
+        terms, node.terms, node.children = node.terms, [], {}
+        for term in terms:
+            if len(term.key) == node.depth:
+                node.terms.append(term)
+            else:
+                char = term.key[node.depth]
+                child = node.children.get(char)
+                if child is None:
+                    child = node.children[char] = _Node(node.depth + 1)
+                child.terms.append(term)
+        for child in node.children.values():
+            if len(child.terms) > BUCKET_SIZE:
+                self._burst(child)
+        node.recompute()
+
+    def _raise(self, term: Term):
+        """Updates the top-k lists on the path of a term whose rank improved."""
+        rank = term.rank()
+        for node in self._path(term.key):
+            if node.is_bucket:
+                continue
+            top = node.top
+            if term in top:
+                top.sort(key=Term.rank)
+            elif len(top) < TOP_K or rank < top[-1].rank():
+                top.append(term)
+                top.sort(key=Term.rank)
+                del top[TOP_K:]
+
+    def _lower(self, term: Term):
+        """Rebuilds the top-k lists on the path of a term whose rank dropped."""
+        for node in reversed(self._path(term.key)):
+            if not node.is_bucket:
+                node.recompute()
+
+    def book_added(self, book: BookResponse):
+        if book.book_id in self._book_terms:
+            self.book_removed(book)
+        borrows = self._borrows[book.book_id]
+        terms = []
+        for kind, key, text in self.book_keys(book):
+            term = self._terms.get((kind, key))
+            if term is None:
+                term = self._terms[(kind, key)] = Term(kind, key, text)
+                self._insert(term)
+            elif book.book_id in term.books:
+                continue
+            term.books.add(book.book_id)
+            term.popularity += borrows
+            terms.append(term)
+            self._raise(term)
+        self._book_terms[book.book_id] = terms
+
+    def book_removed(self, book: BookResponse):
+        terms = self._book_terms.pop(book.book_id, None)
+        if terms is None:
+            return
+        borrows = self._borrows.pop(book.book_id, 0)
+        for term in terms:
+            term.books.discard(book.book_id)
+            term.popularity -= borrows
+            if not term.books:
+                del self._terms[(term.kind, term.key)]
+                self._path(term.key)[-1].terms.remove(term)
+                self._alphabet.subtract(term.key)
+            self._lower(term)
+
+    def book_updated(self, old: BookResponse, new: BookResponse):
+        borrows = self._borrows.get(old.book_id, 0)
+        self.book_removed(old)
+        if borrows:
+            self._borrows[new.book_id] = borrows
+        self.book_added(new)
+
+    def catalog_cleared(self):
+        self.root = _Node(0)
+        self._terms.clear()
+        self._book_terms.clear()
+        self._borrows.clear()
+        self._alphabet.clear()
+
+    def record_borrow(self, book_id: UUID, count: int = 1):
+        """Adds to a book's borrow count, moving its titles and authors up the rankings."""
+        self._borrows[book_id] += count
+        for term in self._book_terms.get(book_id, ()):
+            term.popularity += count
+            self._raise(term)
+
+    def _prefix_matches(self, prefix: str) -> list[Term]:
+        """Returns the top-k terms starting with `prefix`."""
+        node = self.root
+        while node.depth < len(prefix):
+            if node.is_bucket:
+                return _top(term for term in node.terms if term.key.startswith(prefix))
+            node = node.children.get(prefix[node.depth])
+            if node is None:
+                return []
+        return node.best()
+
+    def _variants(self, prefix: str) -> set[str]:
+        """Returns the strings within edit distance one of `prefix`, transpositions included."""
+        alphabet = [char for char, count in self._alphabet.items() if count > 0]
+        splits = [(prefix[:i], prefix[i:]) for i in range(len(prefix) + 1)]
+        variants = {left + right[1:] for left, right in splits if right}
+        variants.update(left + right[1] + right[0] + right[2:]
+                        for left, right in splits if len(right) > 1)
+        variants.update(left + char + right[1:] for left, right in splits if right
+                        for char in alphabet)
+        variants.update(left + char + right for left, right in splits for char in alphabet)
+        variants.discard(prefix)
+        variants.discard("")
+        return variants
+
+    def suggest(self, query: str, k: int = 10) -> list[tuple[Term, bool]]:
+        """
+        Returns up to `k` completions of a partly typed title or author name.
+
+        Args:
+            query (str): The text typed so far.
+            k (int): The number of completions, at most TOP_K.
+
+        Returns:
+            list[tuple[Term, bool]]: Completions, most borrowed first, each
+            flagged True if it only matches with one typo. Typo matches
+            follow every exact match.
+        """
+        prefix = normalize(query)
+        if not prefix or k < 1:
+            return []
+        k = min(k, TOP_K)
+        results: list[tuple[Term, bool]] = []
+        seen: set[tuple[str, str]] = set()
+
+        def collect(terms: list[Term], fuzzy: bool):
+            for term in terms:
+                if len(results) >= k:
+                    return
+                if (term.kind, term.text) not in seen:
+                    seen.add((term.kind, term.text))
+                    results.append((term, fuzzy))
+
+        collect(self._prefix_matches(prefix), False)
+        if len(results) < k:
+            candidates = {term for variant in self._variants(prefix)
+                          for term in self._prefix_matches(variant)}
+            collect(_top(candidates), True)
+        return results
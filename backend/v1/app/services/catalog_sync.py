@@ -0,0 +1,110 @@
+"""LibookTrac Backend Cross-Worker Catalog Sync Service."""
+
+import asyncio
+import contextlib
+from datetime import datetime, timedelta
+
+from backend.v1.app.database.repository import BookRepository, CatalogChange
+from backend.v1.app.services import events
+
+PRUNE_EVERY = 600
+
+
+class CatalogSync:
+    """
+    Keeps this worker's catalog listeners in step with other workers' writes.
+
+    Worker processes sharing one database each hold their own indexes,
+    caches and aggregates. Every write is also appended to the repository's
+    change log, so a worker polls the log and replays the changes made by
+    the others through the catalog events, as if it had made them itself.
+
+    `mark` records the log position before the catalog is replayed at
+    startup. Changes committed while the replay runs may then be seen twice,
+    which listeners tolerate because adding a book they hold replaces it.
+
+    A failed poll, whether the database is unreachable, a logged payload
+    does not decode or a listener raises, is counted and retried from the
+    same position. After `failure_limit` failures in a row the sync reports
+    itself unhealthy, as it does if its task ends, so readiness stops
+    routing requests to a worker whose catalog is no longer kept current.
+    """
+
+    def __init__(self, repository: BookRepository, interval: float = 0.5,
+                 retention: timedelta = timedelta(days=1), batch_size: int = 1000,
+                 failure_limit: int = 20):
+        self.repository = repository
+        self.interval = interval
+        self.retention = retention
+        self.batch_size = batch_size
+        self.position = 0
+        self.applied = 0
+        self.failures = 0
+        self.failure_limit = failure_limit
+        self._failed_in_a_row = 0
+        self._polls = 0
+        self._task: asyncio.Task | None = None
+
+    async def mark(self):
+        """Starts following the change log from its current end."""
+        self.position = await self.repository.change_log_position()
+
+    @staticmethod
+    def apply(changes: list[CatalogChange]):
+        """Notifies the catalog listeners of changes made by other workers."""
+        for action, book, previous in changes:
+            if action == "add":
+                events.books_added([book])
+            elif action == "update":
+                events.books_updated([(previous, book)])
+            elif action == "delete":
+                events.books_removed([book])
+            elif action == "clear":
+                events.catalog_cleared()
+
+    async def poll(self) -> int:
+        """Replays every change logged since the last poll and returns their number."""
+        applied = 0
+        while True:
+            position, changes = await self.repository.changes_since(self.position,
+                                                                    self.batch_size)
+            if position == self.position:
+                break
+            self.apply(changes)
+            self.position = position
+            applied += len(changes)
+        self.applied += applied
+        return applied
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.poll()
+                self._polls += 1
+                if self._polls % PRUNE_EVERY == 0:
+                    await self.repository.prune_changes(datetime.now() - self.retention)
+            except Exception:  # noqa: BLE001
+                # The database may be briefly locked or unreachable; the next
+                # poll resumes from the same position.
+                self.failures += 1
+                self._failed_in_a_row += 1
+            else:
+                self._failed_in_a_row = 0
+
+    def healthy(self) -> bool:
+        """Returns False once the sync has stopped or keeps failing to replay changes."""
+        if self._task is None:
+            return True
+        return not self._task.done() and self._failed_in_a_row < self.failure_limit
+
+    def start(self):
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
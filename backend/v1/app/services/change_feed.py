@@ -0,0 +1,138 @@
+"""LibookTrac Backend Catalog Change Feed Service."""
+
+import asyncio
+import json
+from collections import deque
+from collections.abc import AsyncIterator
+from itertools import islice
+from uuid import uuid4
+
+from backend.v1.app.models.books import BookResponse
+from backend.v1.app.services.events import CatalogListener
+from backend.v1.app.services.serialization import BookJSONCache, encode_book
+
+
+def sse_frame(event: str, data: bytes, event_id: str | None = None) -> bytes:
+    """Formats one server-sent event."""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\n".encode() + b"data: " + data + b"\n\n"
+
+
+class ChangeFeed(CatalogListener):
+    """
+    Recent catalog changes, streamed to clients as server-sent events.
+
+    Every add, update, delete and clear is numbered and kept in a ring of
+    the last `history` changes, already formatted as an SSE frame. Writers
+    only append to the ring and wake waiting streams, so publishing costs
+    the same with one subscriber or thousands and never waits on a client.
+
+    Each stream reads the ring from its own position. A client that falls
+    more than `max_lag` changes behind, or asks to resume from a change the
+    ring no longer holds, is sent a `resync` event and disconnected, and
+    should reload the catalog before following the feed again.
+
+    Event ids are `<epoch>-<sequence>`. The epoch is new for every process,
+    so a client resuming against a restarted or different worker is told to
+    resync rather than being given an unrelated sequence.
+    """
+
+    def __init__(self, history: int = 10_000, max_lag: int = 1000,
+                 heartbeat: float = 15.0, json_cache: BookJSONCache | None = None):
+        self.epoch = uuid4().hex[:12]
+        self.sequence = 0
+        self.max_lag = min(max_lag, history)
+        self.heartbeat = heartbeat
+        self.subscribers = 0
+        self.resyncs = 0
+        self._frames: deque[bytes] = deque(maxlen=history)
+        self._changed = asyncio.Event()
+        self._json_cache = json_cache
+
+    def _encode(self, book: BookResponse) -> bytes:
+        return encode_book(book) if self._json_cache is None else self._json_cache.encode(book)
+
+    def _publish(self, event: str, data: bytes):
+        self.sequence += 1
+        self._frames.append(sse_frame(event, data, f"{self.epoch}-{self.sequence}"))
+        # Streams waiting on the current event are woken; later waits use a fresh one.
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def book_added(self, book: BookResponse):
+        self._publish("add", self._encode(book))
+
+    def book_updated(self, old: BookResponse, new: BookResponse):
+        self._publish("update", self._encode(new))
+
+    def book_removed(self, book: BookResponse):
+        self._publish("delete", json.dumps({"book_id": str(book.book_id)}).encode())
+
+    def catalog_cleared(self):
+        self._publish("clear", b"{}")
+
+    @property
+    def oldest(self) -> int:
+        """The sequence of the oldest change still held."""
+        return self.sequence - len(self._frames) + 1
+
+    def position(self, last_event_id: str | None) -> int | None:
+        """
+        Returns the sequence to resume after, or None if the client must resync.
+
+        Args:
+            last_event_id (str | None): The `Last-Event-ID` the client sent, None
+                to follow new changes only.
+
+        Returns:
+            int | None: The last sequence the client has seen.
+        """
+        if not last_event_id:
+            return self.sequence
+        epoch, _, sequence = last_event_id.partition("-")
+        if epoch != self.epoch or not sequence.isdigit():
+            return None
+        sequence = int(sequence)
+        if sequence > self.sequence or sequence < self.oldest - 1:
+            return None
+        return sequence
+
+    def _resync(self) -> bytes:
+        self.resyncs += 1
+        return sse_frame("resync", json.dumps({"sequence": self.sequence}).encode(),
+                         f"{self.epoch}-{self.sequence}")
+
+    async def stream(self, last_event_id: str | None = None) -> AsyncIterator[bytes]:
+        """
+        Yields SSE chunks of the changes after `last_event_id` as they happen.
+
+        Changes published while a chunk is being sent are batched into the
+        next one. A comment is sent after `heartbeat` idle seconds so proxies
+        keep the connection open and dead clients are noticed.
+
+        Args:
+            last_event_id (str | None): The id of the last change the client saw.
+
+        Yields:
+            bytes: One or more SSE frames.
+        """
+        position = self.position(last_event_id)
+        self.subscribers += 1
+        try:
+            while position is not None:
+                changed = self._changed
+                behind = self.sequence - position
+                if behind > self.max_lag or position < self.oldest - 1:
+                    break
+                if behind:
+                    start = len(self._frames) - behind
+                    yield b"".join(islice(self._frames, start, None))
+                    position += behind
+                    continue
+                try:
+                    await asyncio.wait_for(changed.wait(), self.heartbeat)
+                except TimeoutError:
+                    yield b": keepalive\n\n"
+            yield self._resync()
+        finally:
+            self.subscribers -= 1
@@ -0,0 +1,451 @@
+"""LibookTrac Backend Circulation Service."""
+
+import asyncio
+import weakref
+from collections import deque
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from backend.v1.app.config.settings import settings
+from backend.v1.app.models.books import BookResponse
+from backend.v1.app.models.circulation import BookCirculation, Hold, HoldStatus, Loan
+from backend.v1.app.schemas.books import CirculationStatus
+from backend.v1.app.services.events import CatalogListener
+
+
+class CirculationError(Exception):
+    """Base class for circulation operations that cannot be carried out."""
+
+
+class BookUnavailableError(CirculationError):
+    """Raised when a book is on loan or set aside for another user."""
+
+
+class BorrowLimitError(CirculationError):
+    """Raised when a user already has as many books as they may borrow."""
+
+
+class LoanNotFoundError(CirculationError):
+    """Raised when a book has no open loan for the user."""
+
+
+class RenewalError(CirculationError):
+    """Raised when a loan may not be renewed."""
+
+
+class HoldError(CirculationError):
+    """Raised when a hold cannot be placed or cancelled."""
+
+
+@dataclass(slots=True)
+class CopyState:
+    """Circulation state of one book; only changed while holding the book's lock."""
+    status: CirculationStatus = CirculationStatus.AVAILABLE
+    loan: Loan | None = None
+    holds: deque[Hold] = field(default_factory=deque)
+    holders: set[UUID] = field(default_factory=set)
+
+
+# Called with the action, the loan or hold it records and the time it was made.
+Journal = Callable[[str, Loan | Hold, datetime], Awaitable[None]]
+StatusListener = Callable[[UUID, CirculationStatus], None]
+
+
+class CirculationEngine(CatalogListener):
+    """
+    Checkout, return, renew and reserve with per-book locking.
+
+    Each book has its own asyncio lock, so contention on a bestseller never
+    blocks the rest of the catalog, and locks are dropped once no task holds
+    or waits for them. Borrow limits are enforced by reserving a slot in the
+    user's count before any await and releasing it if the checkout fails, so
+    concurrent checkouts by one user cannot overshoot the limit. Holds queue
+    FIFO per book; a returned book is set aside for the next waiting hold for
+    `hold_pickup_days`.
+
+    An optional `journal` coroutine is awaited inside the book's lock before
+    each change is applied, so durable storage sees changes in lock order,
+    and `replay` applies the journaled changes again after a restart.
+    Changed loans are also kept in a log until a consumer such as the fine
+    engine acknowledges them, and `status_listeners` are called with a
+    book's status whenever an operation may have changed it.
+    """
+
+    def __init__(self, journal: Journal | None = None,
+                 clock: Callable[[], datetime] = datetime.now):
+        self.journal = journal
+        self.clock = clock
+        self._copies: dict[UUID, CopyState] = {}
+        self._locks: weakref.WeakValueDictionary[UUID, asyncio.Lock] = (
+            weakref.WeakValueDictionary())
+        self._borrowed: dict[UUID, int] = {}
+        self._limits: dict[UUID, int] = {}
+        self._loans: dict[UUID, dict[UUID, Loan]] = {}
+        self._changes: list[Loan] = []
+        self.status_listeners: list[StatusListener] = []
+
+    def _lock(self, book_id: UUID) -> asyncio.Lock:
+        lock = self._locks.get(book_id)
+        if lock is None:
+            lock = self._locks[book_id] = asyncio.Lock()
+        return lock
+
+    def _copy(self, book_id: UUID) -> CopyState:
+        state = self._copies.get(book_id)
+        if state is None:
+            state = self._copies[book_id] = CopyState()
+        return state
+
+    def _report(self, book_id: UUID, state: CopyState):
+        for listener in self.status_listeners:
+            listener(book_id, state.status)
+
+    async def _record(self, action: str, record: Loan | Hold, now: datetime):
+        if self.journal is not None:
+            await self.journal(action, record, now)
+
+    def book_updated(self, old: BookResponse, new: BookResponse):
+        # Loans and holds are keyed by book_id, which an update keeps.
+        return None
+
+    def book_removed(self, book: BookResponse):
+        self._drop(book.book_id)
+
+    def _drop(self, book_id: UUID):
+        state = self._copies.pop(book_id, None)
+        if state is not None and state.loan is not None:
+            user_loans = self._loans.get(state.loan.user_id, {})
+            user_loans.pop(book_id, None)
+            if not user_loans:
+                self._loans.pop(state.loan.user_id, None)
+            self._release_slot(state.loan.user_id)
+
+    def catalog_cleared(self):
+        self._copies.clear()
+        self._borrowed.clear()
+        self._loans.clear()
+        self._changes.clear()
+
+    def book_ids(self) -> list[UUID]:
+        """Returns the books that have circulated, e.g. to drop those no longer cataloged."""
+        return list(self._copies)
+
+    def forget(self, book_ids: Iterable[UUID]):
+        """Drops the loans and holds of books removed from the catalog."""
+        for book_id in book_ids:
+            self._drop(book_id)
+
+    def copies(self) -> list[tuple[UUID, CopyState]]:
+        """Returns the state of every book that has circulated, e.g. to snapshot it."""
+        return list(self._copies.items())
+
+    def adopt(self, book_id: UUID, state: CopyState):
+        """Installs the state of a book restored from a snapshot."""
+        self._drop(book_id)
+        state.holders = {hold.user_id for hold in state.holds
+                         if hold.status in (HoldStatus.WAITING, HoldStatus.READY)}
+        self._copies[book_id] = state
+        if state.loan is not None:
+            self._borrowed[state.loan.user_id] = self.borrowed_count(state.loan.user_id) + 1
+            self._loans.setdefault(state.loan.user_id, {})[book_id] = state.loan
+
+    def replay(self, action: str, record: Loan | Hold, at: datetime):
+        """
+        Applies a journaled change again without journaling it, e.g. after a restart.
+
+        Changes must be replayed in journal order with the time they were
+        made, so holds are set aside and expire as they did the first time.
+        Borrow limits are not checked: the change was allowed when it was made.
+        """
+        state = self._copy(record.book_id)
+        if action == "checkout":
+            hold = self._set_aside(state, at)
+            self._borrowed[record.user_id] = self.borrowed_count(record.user_id) + 1
+            self._open_loan(state, record,
+                            hold if hold is not None and hold.user_id == record.user_id
+                            else None)
+        elif action == "return":
+            self._close_loan(state, record, at)
+        elif action == "renew":
+            self._next_hold(state, at)
+            self._renew(state, record)
+        elif action == "reserve":
+            self._place_hold(state, record, at)
+        elif action == "cancel":
+            hold = next((hold for hold in state.holds if hold.hold_id == record.hold_id), None)
+            if hold is not None:
+                self._cancel(state, hold, at)
+        else:
+            raise ValueError(f"Unknown circulation action {action!r}.")
+
+    def report_statuses(self):
+        """Calls the status listeners for every book not available, e.g. after warming them."""
+        for book_id, state in self._copies.items():
+            if state.status is not CirculationStatus.AVAILABLE:
+                self._report(book_id, state)
+
+    def requeue(self, loans: Iterable[Loan]):
+        """Queues loans for the change consumers again, e.g. those recovered after a restart."""
+        self._changes.extend(loans)
+
+    def set_borrow_limit(self, user_id: UUID, limit: int):
+        """Sets a user's borrow limit, e.g. from UserDetails.max_borrow_limit."""
+        self._limits[user_id] = limit
+
+    def borrowed_count(self, user_id: UUID) -> int:
+        """Returns the number of books a user has on loan."""
+        return self._borrowed.get(user_id, 0)
+
+    def loans(self, user_id: UUID) -> list[Loan]:
+        """Returns a user's open loans, oldest first."""
+        return list(self._loans.get(user_id, {}).values())
+
+    def active_loans(self) -> list[Loan]:
+        """Returns every open loan."""
+        return [loan for user_loans in self._loans.values() for loan in user_loans.values()]
+
+    def loan_changes(self) -> list[Loan]:
+        """Returns loans checked out, renewed or returned since last acknowledged, in order."""
+        return list(self._changes)
+
+    def acknowledge_changes(self, count: int):
+        """Forgets the first `count` loan changes once a consumer has processed them."""
+        del self._changes[:count]
+
+    def _reserve_slot(self, user_id: UUID):
+        # No await between the check and the increment, so this is atomic on
+        # the event loop.
+        borrowed = self._borrowed.get(user_id, 0)
+        if borrowed >= self._limits.get(user_id, settings.default_borrow_limit):
+            raise BorrowLimitError("Borrow limit reached.")
+        self._borrowed[user_id] = borrowed + 1
+
+    def _release_slot(self, user_id: UUID):
+        borrowed = self._borrowed.get(user_id, 0) - 1
+        if borrowed > 0:
+            self._borrowed[user_id] = borrowed
+        else:
+            self._borrowed.pop(user_id, None)
+
+    def _next_hold(self, state: CopyState, now: datetime) -> Hold | None:
+        """Drops cancelled and expired holds from the head and returns the current one."""
+        holds = state.holds
+        while holds:
+            hold = holds[0]
+            if hold.status is HoldStatus.READY and hold.ready_until <= now:
+                hold.status = HoldStatus.EXPIRED
+            if hold.status in (HoldStatus.WAITING, HoldStatus.READY):
+                return hold
+            holds.popleft()
+            state.holders.discard(hold.user_id)
+        return None
+
+    def _set_aside(self, state: CopyState, now: datetime) -> Hold | None:
+        """Marks a book on the shelf for the next hold in line, or available if none."""
+        hold = self._next_hold(state, now)
+        if state.loan is not None or state.status not in (CirculationStatus.AVAILABLE,
+                                                          CirculationStatus.ON_HOLD):
+            return hold
+        if hold is None:
+            state.status = CirculationStatus.AVAILABLE
+            return None
+        if hold.status is HoldStatus.WAITING:
+            hold.status = HoldStatus.READY
+            hold.ready_until = now + timedelta(days=settings.hold_pickup_days)
+        state.status = CirculationStatus.ON_HOLD
+        return hold
+
+    def _open_loan(self, state: CopyState, loan: Loan, hold: Hold | None):
+        if hold is not None:
+            hold.status = HoldStatus.FULFILLED
+            state.holds.remove(hold)
+            state.holders.discard(loan.user_id)
+        state.loan = loan
+        state.status = CirculationStatus.CHECKED_OUT
+        self._loans.setdefault(loan.user_id, {})[loan.book_id] = loan
+
+    def _close_loan(self, state: CopyState, returned: Loan, now: datetime):
+        state.loan = None
+        state.status = CirculationStatus.AVAILABLE
+        self._set_aside(state, now)
+        user_loans = self._loans.get(returned.user_id, {})
+        user_loans.pop(returned.book_id, None)
+        if not user_loans:
+            self._loans.pop(returned.user_id, None)
+        self._release_slot(returned.user_id)
+
+    def _renew(self, state: CopyState, renewed: Loan):
+        state.loan = renewed
+        self._loans[renewed.user_id][renewed.book_id] = renewed
+
+    def _place_hold(self, state: CopyState, hold: Hold, now: datetime):
+        state.holds.append(hold)
+        state.holders.add(hold.user_id)
+        self._set_aside(state, now)
+
+    def _cancel(self, state: CopyState, hold: Hold, now: datetime):
+        was_ready = hold.status is HoldStatus.READY
+        # Cancelled holds are skipped lazily when they reach the head.
+        hold.status = HoldStatus.CANCELLED
+        state.holders.discard(hold.user_id)
+        if was_ready:
+            self._set_aside(state, now)
+
+    async def checkout(self, book_id: UUID, user_id: UUID,
+                       user_category: str | None = None) -> Loan:
+        """
+        Checks a book out to a user.
+
+        Args:
+            book_id (UUID): The book to borrow.
+            user_id (UUID): The borrowing user.
+            user_category (str | None): The user's UserType value, used to rate fines.
+
+        Returns:
+            Loan: The new loan.
+
+        Raises:
+            BorrowLimitError: If the user is at their borrow limit.
+            BookUnavailableError: If the book is on loan or held for someone else.
+        """
+        self._reserve_slot(user_id)
+        try:
+            async with self._lock(book_id):
+                state = self._copy(book_id)
+                now = self.clock()
+                if state.loan is not None:
+                    raise BookUnavailableError("Book is checked out.")
+                hold = self._set_aside(state, now)
+                self._report(book_id, state)
+                if hold is not None and hold.user_id != user_id:
+                    raise BookUnavailableError("Book is held for another user.")
+                if state.status not in (CirculationStatus.AVAILABLE, CirculationStatus.ON_HOLD):
+                    raise BookUnavailableError(f"Book is {state.status.value}.")
+
+                loan = Loan(book_id=book_id, user_id=user_id, user_category=user_category,
+                            checked_out_at=now,
+                            due_at=now + timedelta(days=settings.loan_period_days))
+                await self._record("checkout", loan, now)
+                self._open_loan(state, loan, hold)
+                self._report(book_id, state)
+                self._changes.append(loan)
+                return loan
+        except BaseException:
+            self._release_slot(user_id)
+            raise
+
+    async def return_book(self, book_id: UUID) -> Loan:
+        """
+        Closes the open loan of a book and sets it aside for the next hold.
+
+        Raises:
+            LoanNotFoundError: If the book is not checked out.
+        """
+        async with self._lock(book_id):
+            state = self._copy(book_id)
+            loan = state.loan
+            if loan is None:
+                raise LoanNotFoundError("Book is not checked out.")
+            now = self.clock()
+            returned = loan.model_copy(update={"returned_at": now})
+            await self._record("return", returned, now)
+            self._close_loan(state, returned, now)
+            self._report(book_id, state)
+            self._changes.append(returned)
+            return returned
+
+    async def renew(self, book_id: UUID, user_id: UUID) -> Loan:
+        """
+        Extends a user's loan by another loan period.
+
+        Raises:
+            LoanNotFoundError: If the user does not have the book.
+            RenewalError: If the renewal limit is reached or other users hold the book.
+        """
+        async with self._lock(book_id):
+            state = self._copy(book_id)
+            loan = state.loan
+            if loan is None or loan.user_id != user_id:
+                raise LoanNotFoundError("Book is not checked out to this user.")
+            if loan.renewals >= settings.max_renewals:
+                raise RenewalError("Renewal limit reached.")
+            now = self.clock()
+            if self._next_hold(state, now) is not None:
+                raise RenewalError("Other users are waiting for this book.")
+            renewed = loan.model_copy(update={
+                "renewals": loan.renewals + 1,
+                "due_at": loan.due_at + timedelta(days=settings.loan_period_days),
+            })
+            await self._record("renew", renewed, now)
+            self._renew(state, renewed)
+            self._changes.append(renewed)
+            return renewed
+
+    async def reserve(self, book_id: UUID, user_id: UUID) -> Hold:
+        """
+        Places a hold at the back of a book's queue.
+
+        A hold on a book nobody has is set aside for the user straight away.
+
+        Raises:
+            HoldError: If the user already holds or has borrowed the book.
+        """
+        async with self._lock(book_id):
+            state = self._copy(book_id)
+            if user_id in state.holders:
+                raise HoldError("User already holds this book.")
+            if state.loan is not None and state.loan.user_id == user_id:
+                raise HoldError("User already has this book.")
+            now = self.clock()
+            hold = Hold(book_id=book_id, user_id=user_id, placed_at=now)
+            await self._record("reserve", hold, now)
+            self._place_hold(state, hold, now)
+            self._report(book_id, state)
+            return hold
+
+    async def cancel_hold(self, book_id: UUID, user_id: UUID) -> Hold:
+        """
+        Cancels a user's hold; a book set aside for them passes to the next hold.
+
+        Raises:
+            HoldError: If the user has no hold on the book.
+        """
+        async with self._lock(book_id):
+            state = self._copy(book_id)
+            hold = next((hold for hold in state.holds if hold.user_id == user_id
+                         and hold.status in (HoldStatus.WAITING, HoldStatus.READY)), None)
+            if hold is None:
+                raise HoldError("User has no hold on this book.")
+            now = self.clock()
+            await self._record("cancel", hold, now)
+            self._cancel(state, hold, now)
+            self._report(book_id, state)
+            return hold
+
+    def current_status(self, book_id: UUID) -> CirculationStatus:
+        """Returns a book's status as last set by an operation, without expiring holds."""
+        state = self._copies.get(book_id)
+        return CirculationStatus.AVAILABLE if state is None else state.status
+
+    def status(self, book_id: UUID) -> BookCirculation:
+        """Returns the circulation state of a book without changing it."""
+        state = self._copies.get(book_id) or CopyState()
+        now = self.clock()
+        active = [hold for hold in state.holds
+                  if hold.status is HoldStatus.WAITING
+                  or (hold.status is HoldStatus.READY and hold.ready_until > now)]
+        status = state.status
+        held_for = None
+        if state.loan is None and status in (CirculationStatus.AVAILABLE,
+                                             CirculationStatus.ON_HOLD):
+            status = CirculationStatus.ON_HOLD if active else CirculationStatus.AVAILABLE
+            held_for = active[0].user_id if active else None
+        return BookCirculation(
+            book_id=book_id,
+            status=status,
+            due_at=state.loan.due_at if state.loan else None,
+            holds_waiting=len(active) - (held_for is not None),
+            held_for=held_for,
+        )
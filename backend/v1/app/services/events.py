@@ -0,0 +1,96 @@
+"""LibookTrac Backend Catalog Event Hooks."""
+
+from collections.abc import Iterable
+
+from backend.v1.app.models.books import BookResponse
+
+
+class CatalogListener:
+    """
+    Base class for in-memory structures kept in step with the books catalog.
+
+    Subclasses override the hooks they need. Hooks run synchronously after the
+    catalog itself has been changed.
+    """
+
+    def book_added(self, book: BookResponse):
+        """
+        Called after a book is stored.
+
+        May be called again for a book the listener already holds, e.g. when
+        another worker's change is replayed; the new version replaces it.
+        """
+
+    def book_removed(self, book: BookResponse):
+        """Called after a book is deleted."""
+
+    def book_updated(self, old: BookResponse, new: BookResponse):
+        """
+        Called after a stored book is changed in place.
+
+        Defaults to removing the old version and adding the new one; listeners
+        that can apply the change more cheaply override it.
+        """
+        self.book_removed(old)
+        self.book_added(new)
+
+    def catalog_cleared(self):
+        """Called after every book is dropped at once."""
+
+
+listeners: list[CatalogListener] = []
+
+
+def subscribe(listener: CatalogListener) -> CatalogListener:
+    """
+    Registers a listener for catalog changes.
+
+    Args:
+        listener (CatalogListener): The structure to keep in step with the catalog.
+
+    Returns:
+        CatalogListener: The same listener, so it can be subscribed at definition.
+    """
+    listeners.append(listener)
+    return listener
+
+
+def unsubscribe(listener: CatalogListener):
+    """Stops notifying a listener; it must have been subscribed."""
+    listeners.remove(listener)
+
+
+def books_added(books: Iterable[BookResponse],
+                targets: Iterable[CatalogListener] | None = None):
+    """
+    Notifies listeners of newly stored books.
+
+    Args:
+        books (Iterable[BookResponse]): The stored books.
+        targets (Iterable[CatalogListener] | None): The listeners to notify,
+            every subscribed listener by default.
+    """
+    targets = listeners if targets is None else list(targets)
+    for book in books:
+        for listener in targets:
+            listener.book_added(book)
+
+
+def books_removed(books: Iterable[BookResponse]):
+    """Notifies every listener of deleted books."""
+    for book in books:
+        for listener in listeners:
+            listener.book_removed(book)
+
+
+def books_updated(changes: Iterable[tuple[BookResponse, BookResponse]]):
+    """Notifies every listener of books changed in place, as (old, new) pairs."""
+    for old, new in changes:
+        for listener in listeners:
+            listener.book_updated(old, new)
+
+
+def catalog_cleared():
+    """Notifies every listener that the catalog was emptied."""
+    for listener in listeners:
+        listener.catalog_cleared()
@@ -0,0 +1,382 @@
+"""
+LibookTrac Backend Catalog Export Service.
+
+Streams the catalog as NDJSON or CSV, optionally gzip or zstd compressed,
+or as Parquet written one row group at a time. Books are read in keyset
+pages, so memory stays bounded by a page whatever the catalog size.
+
+zstd needs the `zstandard` package and Parquet needs `pyarrow`; both are
+optional and only imported here.
+
+    python -m backend.v1.app.services.export catalog.ndjson.gz --compression gzip
+"""
+
+import argparse
+import asyncio
+import csv
+import io
+import sys
+import time
+import zlib
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from datetime import date, datetime
+from enum import Enum
+from pathlib import Path
+from typing import Literal
+from uuid import UUID
+
+from backend.v1.app.database.repository import BookRepository
+from backend.v1.app.models.books import BookFormat, BookLocation, BookResponse
+from backend.v1.app.services.ingest import TAG_SEPARATOR
+from backend.v1.app.services.serialization import BookJSONCache
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - depends on the environment
+    pyarrow = None
+
+ExportFormat = Literal["ndjson", "csv", "parquet"]
+Compression = Literal["none", "gzip", "zstd"]
+
+EXPORT_BATCH_SIZE = 1000
+# Parquet is read in larger pages so each row group holds enough rows for
+# its column encodings and statistics to pay off.
+PARQUET_ROW_GROUP_SIZE = 50_000
+# Fast levels: a nightly export is usually bound by compression, not I/O.
+GZIP_LEVEL = 1
+ZSTD_LEVEL = 3
+
+COLUMNS = list(BookResponse.model_fields)
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv",
+               "parquet": "application/vnd.apache.parquet"}
+COMPRESSED_MEDIA_TYPES = {"gzip": "application/gzip", "zstd": "application/zstd"}
+EXTENSIONS = {"ndjson": "ndjson", "csv": "csv", "parquet": "parquet",
+              "gzip": "gz", "zstd": "zst"}
+
+
+class ExportUnavailableError(Exception):
+    """Raised when an export needs an optional package that is not installed."""
+
+    def __init__(self, package: str, feature: str):
+        super().__init__(f"{feature} export needs the '{package}' package.")
+        self.package = package
+
+
+@dataclass(frozen=True, slots=True)
+class ExportFilter:
+    """Books to include in an export; unset fields match every book."""
+    location: BookLocation | None = None
+    book_type: BookFormat | None = None
+    updated_since: datetime | None = None
+
+    def __post_init__(self):
+        # Stored times are naive local times.
+        if self.updated_since is not None and self.updated_since.tzinfo is not None:
+            object.__setattr__(self, "updated_since",
+                               self.updated_since.astimezone().replace(tzinfo=None))
+
+    def matches(self, book: BookResponse) -> bool:
+        """Returns whether a book passes every set filter."""
+        return ((self.location is None or book.location == self.location)
+                and (self.book_type is None or book.book_type == self.book_type)
+                and (self.updated_since is None or book.last_updated_date >= self.updated_since))
+
+
+def check_available(export_format: ExportFormat, compression: Compression):
+    """
+    Checks that the packages an export needs are installed.
+
+    Raises:
+        ExportUnavailableError: If zstd or Parquet support is missing.
+    """
+    if export_format == "parquet" and pyarrow is None:
+        raise ExportUnavailableError("pyarrow", "Parquet")
+    if compression == "zstd" and zstandard is None and export_format != "parquet":
+        raise ExportUnavailableError("zstandard", "zstd compressed")
+
+
+def media_type(export_format: ExportFormat, compression: Compression) -> str:
+    """Returns the media type of an export."""
+    if export_format == "parquet" or compression == "none":
+        return MEDIA_TYPES[export_format]
+    return COMPRESSED_MEDIA_TYPES[compression]
+
+
+def file_name(export_format: ExportFormat, compression: Compression) -> str:
+    """Returns a file name for an export, e.g. catalog.ndjson.gz."""
+    name = f"catalog.{EXTENSIONS[export_format]}"
+    if export_format == "parquet" or compression == "none":
+        return name
+    return f"{name}.{EXTENSIONS[compression]}"
+
+
+async def iter_books(repository: BookRepository, export_filter: ExportFilter,
+                     batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[list[BookResponse]]:
+    """
+    Yields the books passing `export_filter` in entry order, a page at a time.
+
+    Filtering happens on each page as it is read, so an incremental export
+    still walks the catalog but only holds and ships the changed books.
+    """
+    async for batch in repository.iter_batches(batch_size):
+        books = [book for book in batch if export_filter.matches(book)]
+        if books:
+            yield books
+
+
+def _csv_value(value) -> str | int | float:
+    if value is None:
+        return ""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, list):
+        return TAG_SEPARATOR.join(value)
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+async def ndjson_chunks(batches: AsyncIterator[list[BookResponse]],
+                        json_cache: BookJSONCache | None = None) -> AsyncIterator[bytes]:
+    """Yields each batch as NDJSON, reusing cached book JSON when given a cache."""
+    json_cache = json_cache or BookJSONCache()
+    async for books in batches:
+        yield json_cache.encode_many(books, b"\n") + b"\n"
+
+
+async def csv_chunks(batches: AsyncIterator[list[BookResponse]]) -> AsyncIterator[bytes]:
+    """
+    Yields a header row and then each batch as CSV rows.
+
+    Columns follow BookResponse and tags are joined with the separator the
+    bulk ingest splits on, so an export can be uploaded again.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(COLUMNS)
+    async for books in batches:
+        writer.writerows([_csv_value(book.__dict__[column]) for column in COLUMNS]
+                         for book in books)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Nothing matched: still send the header.
+        yield buffer.getvalue().encode()
+
+
+def parquet_schema():
+    """Returns the Arrow schema of exported books."""
+    string = pyarrow.string()
+    types = {"edition": pyarrow.int32(), "page_count": pyarrow.int32(),
+             "tags": pyarrow.list_(string), "publication_year": pyarrow.date32(),
+             "replacement_cost": pyarrow.float64(),
+             "book_entry_time": pyarrow.timestamp("us"),
+             "last_updated_date": pyarrow.timestamp("us")}
+    return pyarrow.schema([(column, types.get(column, string)) for column in COLUMNS])
+
+
+def _arrow_value(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+class _ChunkSink:
+    """Write-only file collecting what the Parquet writer emits until drained."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def parquet_chunks(batches: AsyncIterator[list[BookResponse]],
+                         compression: Compression = "zstd",
+                         row_group_size: int = PARQUET_ROW_GROUP_SIZE) -> AsyncIterator[bytes]:
+    """
+    Yields a Parquet file one row group at a time.
+
+    Rows are buffered until `row_group_size` books are collected, so memory
+    is bounded by one row group. `compression` is the column codec. Row
+    groups are encoded in a thread so the event loop keeps serving requests.
+
+    Raises:
+        ExportUnavailableError: If pyarrow is not installed.
+    """
+    check_available("parquet", compression)
+    schema = parquet_schema()
+    sink = _ChunkSink()
+    writer = pyarrow.parquet.ParquetWriter(pyarrow.PythonFile(sink, mode="w"), schema,
+                                           compression=compression)
+
+    def write_row_group(books: list[BookResponse]):
+        columns = {column: [_arrow_value(book.__dict__[column]) for book in books]
+                   for column in COLUMNS}
+        writer.write_table(pyarrow.Table.from_pydict(columns, schema=schema),
+                           row_group_size=len(books))
+
+    pending: list[BookResponse] = []
+    async for books in batches:
+        pending.extend(books)
+        while len(pending) >= row_group_size:
+            await asyncio.to_thread(write_row_group, pending[:row_group_size])
+            del pending[:row_group_size]
+            yield sink.drain()
+    if pending:
+        await asyncio.to_thread(write_row_group, pending)
+    writer.close()
+    yield sink.drain()
+
+
+def compressor(compression: Compression):
+    """
+    Returns a streaming compressor with `compress` and `flush` methods.
+
+    Raises:
+        ExportUnavailableError: If zstd is asked for and zstandard is missing.
+    """
+    if compression == "gzip":
+        return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    if zstandard is None:
+        raise ExportUnavailableError("zstandard", "zstd compressed")
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+
+async def compress_chunks(chunks: AsyncIterator[bytes],
+                          compression: Compression) -> AsyncIterator[bytes]:
+    """Compresses a stream of chunks, yielding output as the compressor emits it."""
+    if compression == "none":
+        async for chunk in chunks:
+            yield chunk
+        return
+    stream = compressor(compression)
+    async for chunk in chunks:
+        if output := stream.compress(chunk):
+            yield output
+    yield stream.flush()
+
+
+def export_chunks(repository: BookRepository,
+                  export_format: ExportFormat = "ndjson",
+                  compression: Compression = "none",
+                  export_filter: ExportFilter | None = None,
+                  json_cache: BookJSONCache | None = None) -> AsyncIterator[bytes]:
+    """
+    Streams the catalog in the given format.
+
+    Args:
+        repository (BookRepository): The catalog to export.
+        export_format (str): ndjson, csv or parquet.
+        compression (str): none, gzip or zstd. Parquet uses it as its column
+            codec instead of compressing the whole file.
+        export_filter (ExportFilter | None): The books to include, all by default.
+        json_cache (BookJSONCache | None): Cached book JSON for NDJSON exports.
+
+    Returns:
+        AsyncIterator[bytes]: The export, chunk by chunk.
+
+    Raises:
+        ExportUnavailableError: If an optional package the export needs is missing.
+    """
+    check_available(export_format, compression)
+    export_filter = export_filter or ExportFilter()
+    if export_format == "parquet":
+        return parquet_chunks(iter_books(repository, export_filter, PARQUET_ROW_GROUP_SIZE),
+                              compression)
+    batches = iter_books(repository, export_filter)
+    chunks = (csv_chunks(batches) if export_format == "csv"
+              else ndjson_chunks(batches, json_cache))
+    return compress_chunks(chunks, compression)
+
+
+async def write_export(chunks: AsyncIterator[bytes], output: Path | None) -> int:
+    """Writes an export to `output`, or to stdout when None, and returns its size."""
+    size = 0
+    file = sys.stdout.buffer if output is None else output.open("wb")
+    try:
+        async for chunk in chunks:
+            file.write(chunk)
+            size += len(chunk)
+    finally:
+        if output is not None:
+            file.close()
+    return size
+
+
+async def _export(args: argparse.Namespace):
+    from backend.v1.app.config.settings import settings
+    from backend.v1.app.database.connect import create_book_repository
+
+    if settings.books_backend != "sql":
+        # The in-memory backends live inside the server process; opening their
+        # data directory from here would replay and rotate the server's log.
+        sys.exit("The CLI exports the SQL catalog; export in-memory catalogs through "
+                 "GET /books/export.")
+    repository = create_book_repository(settings)
+    export_filter = ExportFilter(args.location, args.book_type, args.updated_since)
+    try:
+        chunks = export_chunks(repository, args.format, args.compression, export_filter)
+        size = await write_export(chunks, None if args.output == "-" else Path(args.output))
+    except ExportUnavailableError as error:
+        sys.exit(str(error))
+    finally:
+        await repository.close()
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Export the SQL catalog as compressed NDJSON, CSV or Parquet.")
+    parser.add_argument("output", help="File to write, or - for stdout.")
+    parser.add_argument("--format", choices=["ndjson", "csv", "parquet"], default="ndjson")
+    parser.add_argument("--compression", choices=["none", "gzip", "zstd"], default="gzip")
+    parser.add_argument("--location", type=BookLocation,
+                        help=f"One of {', '.join(item.value for item in BookLocation)}.")
+    parser.add_argument("--book-type", type=BookFormat,
+                        help=f"One of {', '.join(item.value for item in BookFormat)}.")
+    parser.add_argument("--updated-since", type=datetime.fromisoformat,
+                        help="Only books updated at or after this ISO time.")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    size = asyncio.run(_export(args))
+    print(f"{size / 1e6:.1f} MB in {time.perf_counter() - start:.1f} s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+"""LibookTrac Backend Overdue Fines Service."""
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable, Iterable, Mapping
+from datetime import datetime
+from uuid import UUID
+
+import numpy as np
+from bson import Binary
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from backend.v1.app.config.settings import settings
+from backend.v1.app.database.repository import BookRepository
+from backend.v1.app.models.circulation import FineDelta, FineRunReport, Loan
+from backend.v1.app.models.users import UserDetails
+from backend.v1.app.services.circulation import CirculationEngine
+
+REPORT_DELTA_LIMIT = 100
+INITIAL_CAPACITY = 1024
+
+# Returns the users whose change could not be applied; None when all were.
+FineApplier = Callable[[dict[UUID, float]], Awaitable[set[UUID] | None]]
+# Records the fine charged so far, or about to be, by loan_id and the loans
+# settled by a run.
+AssessedJournal = Callable[[dict[UUID, float], list[UUID]], Awaitable[None]]
+
+
+def compute_fines(due: np.ndarray, returned: np.ndarray, as_of: datetime,
+                  daily_rate: np.ndarray, cap: np.ndarray) -> np.ndarray:
+    """
+    Computes the fine of every loan in one vectorized pass.
+
+    A loan is fined `daily_rate` for every whole day between its due date and
+    its return, or `as_of` while it is still out, up to `cap`.
+
+    Args:
+        due (np.ndarray): Due dates as datetime64.
+        returned (np.ndarray): Return dates as datetime64, NaT for open loans.
+        as_of (datetime): The time fines are computed at.
+        daily_rate (np.ndarray): Fine per overdue day.
+        cap (np.ndarray): Maximum fine.
+
+    Returns:
+        np.ndarray: The fine of each loan, rounded to cents.
+    """
+    as_of64 = np.datetime64(as_of, "s")
+    end = np.where(np.isnat(returned), as_of64, np.minimum(returned, as_of64))
+    days = (end - due).astype("timedelta64[D]").astype(np.int64)
+    np.maximum(days, 0, out=days)
+    return np.round(np.minimum(days * daily_rate, cap), 2)
+
+
+class LoanTable:
+    """
+    Loans mirrored into parallel NumPy columns, one row per loan.
+
+    Rows are upserted from circulation changes, so only changed loans cost
+    Python work; computing fines over the table is pure array arithmetic.
+    Rows of settled loans are marked dead and compacted away in bulk.
+    """
+
+    COLUMNS = {
+        "due": "datetime64[s]",
+        "returned": "datetime64[s]",
+        "daily_rate": np.float64,
+        "cap": np.float64,
+        "assessed": np.float64,
+        "user_code": np.int64,
+        "live": np.bool_,
+        "dirty": np.bool_,
+        "capped": np.bool_,
+    }
+
+    def __init__(self):
+        self.size = 0
+        self.rows: dict[UUID, int] = {}
+        self.loan_ids: list[UUID] = []
+        self.user_ids: list[UUID] = []
+        self.user_codes: dict[UUID, int] = {}
+        self._allocate(INITIAL_CAPACITY)
+
+    def _allocate(self, capacity: int):
+        for name, dtype in self.COLUMNS.items():
+            column = np.zeros(capacity, dtype=dtype)
+            if name == "returned":
+                column[:] = np.datetime64("NaT")
+            old = getattr(self, name, None)
+            if old is not None:
+                column[:self.size] = old[:self.size]
+            setattr(self, name, column)
+
+    def column(self, name: str) -> np.ndarray:
+        """Returns the filled part of a column."""
+        return getattr(self, name)[:self.size]
+
+    def upsert(self, loans: Iterable[Loan], replacement_costs: Mapping[UUID, float | None],
+               carried: dict[UUID, float] | None = None):
+        """
+        Adds new loans and refreshes changed ones, marking their rows dirty.
+
+        Args:
+            loans (Iterable[Loan]): Loans checked out, renewed or returned.
+            replacement_costs (Mapping[UUID, float | None]): Replacement cost by book_id.
+            carried (dict[UUID, float] | None): Fines charged before a restart by
+                loan_id; new rows take theirs and the entries are removed.
+        """
+        carried = {} if carried is None else carried
+        rates = settings.fine_daily_rates
+        default_rate = settings.fine_default_daily_rate
+        for loan in loans:
+            row = self.rows.get(loan.loan_id)
+            if row is None:
+                if self.size == len(self.live):
+                    self._allocate(2 * len(self.live))
+                row = self.rows[loan.loan_id] = self.size
+                self.size += 1
+                self.loan_ids.append(loan.loan_id)
+                self.assessed[row] = carried.pop(loan.loan_id, 0.0)
+                self.capped[row] = False
+            user_code = self.user_codes.get(loan.user_id)
+            if user_code is None:
+                user_code = self.user_codes[loan.user_id] = len(self.user_ids)
+                self.user_ids.append(loan.user_id)
+            cost = replacement_costs.get(loan.book_id)
+            self.due[row] = np.datetime64(loan.due_at, "s")
+            self.returned[row] = (np.datetime64("NaT") if loan.returned_at is None
+                                  else np.datetime64(loan.returned_at, "s"))
+            self.daily_rate[row] = rates.get(loan.user_category, default_rate)
+            self.cap[row] = settings.fine_default_cap if cost is None else cost
+            self.user_code[row] = user_code
+            self.live[row] = True
+            self.dirty[row] = True
+
+    def compact(self):
+        """Drops dead rows once they make up half of the table."""
+        live = self.column("live")
+        if self.size < INITIAL_CAPACITY or np.count_nonzero(live) * 2 > self.size:
+            return
+        keep = np.flatnonzero(live)
+        for name in self.COLUMNS:
+            column = getattr(self, name)
+            column[:len(keep)] = column[keep]
+        self.loan_ids = [self.loan_ids[row] for row in keep.tolist()]
+        self.rows = {loan_id: row for row, loan_id in enumerate(self.loan_ids)}
+        self.size = len(keep)
+
+
+def mongo_fine_applier(collection) -> FineApplier:
+    """
+    Returns an applier adding fine deltas to `fines_owed` in one bulk write.
+
+    Args:
+        collection: Async pymongo/motor collection of UserDetails documents.
+
+    Returns:
+        FineApplier: Coroutine function applying a {user_id: delta} mapping
+        and returning the users whose update failed.
+    """
+    async def apply(deltas: dict[UUID, float]) -> set[UUID]:
+        if not deltas:
+            return set()
+        user_ids = list(deltas)
+        try:
+            await collection.bulk_write(
+                [UpdateOne({"user_id": Binary.from_uuid(user_id)},
+                           {"$inc": {"fines_owed": deltas[user_id]}})
+                 for user_id in user_ids],
+                ordered=False)
+        except BulkWriteError as error:
+            # An unordered bulk write applies every update it does not report.
+            return {user_ids[failure["index"]] for failure in error.details["writeErrors"]}
+        return set()
+    return apply
+
+
+async def apply_to_users(deltas: dict[UUID, float]) -> set[UUID]:
+    """Applies fine deltas to the UserDetails collection."""
+    return await mongo_fine_applier(UserDetails.get_pymongo_collection())(deltas)
+
+
+class FineEngine:
+    """
+    Batch overdue-fine computation over a columnar loan table.
+
+    Remembers the fine already charged per loan so every run applies only the
+    difference. Incremental runs only compute rows that changed since the
+    last applied run and open overdue loans still below their cap; returned
+    loans are settled and dropped after their final fine is applied.
+
+    Runs hold `lock` from computing fines until they are recorded as
+    assessed, so concurrent runs cannot both charge the same change, and
+    loans of users whose update failed stay unassessed for the next run.
+
+    An optional `journal` coroutine records the fines of each run before the
+    users are charged, and `carried` takes the fines charged before a
+    restart, so loans recovered by the circulation journal are not charged
+    twice. Loans of users whose update failed are then recorded at their
+    previous fine again, along with the loans the run settled. A crash
+    between recording and charging loses that run's change rather than
+    charging it twice.
+    """
+
+    def __init__(self, journal: AssessedJournal | None = None):
+        self.table = LoanTable()
+        self.last_run: datetime | None = None
+        self.lock = asyncio.Lock()
+        self.journal = journal
+        self.carried: dict[UUID, float] = {}
+
+    def ingest(self, loans: Iterable[Loan], replacement_costs: Mapping[UUID, float | None]):
+        """Mirrors changed loans into the loan table; safe to repeat for the same loans."""
+        self.table.upsert(loans, replacement_costs, self.carried)
+
+    async def run(self, apply: FineApplier, as_of: datetime | None = None,
+                  incremental: bool = False, dry_run: bool = False) -> FineRunReport:
+        """
+        Computes fines for the ingested loans and applies per-user changes in one call.
+
+        Args:
+            apply (FineApplier): Receives the {user_id: delta} changes.
+            as_of (datetime | None): The time fines are computed at, now by default.
+            incremental (bool): Only process loans that may have changed.
+            dry_run (bool): Report the changes without applying or remembering them.
+
+        Returns:
+            FineRunReport: Counts, the largest per-user changes and phase timings.
+        """
+        async with self.lock:
+            return await self._run(apply, as_of, incremental, dry_run)
+
+    async def _run(self, apply: FineApplier, as_of: datetime | None, incremental: bool,
+                   dry_run: bool) -> FineRunReport:
+        as_of = as_of or datetime.now()
+        table = self.table
+        timings = {}
+        start = time.perf_counter()
+        live = table.column("live")
+        considered = int(np.count_nonzero(live))
+        if incremental:
+            due = table.column("due")
+            may_accrue = (np.isnat(table.column("returned"))
+                          & (due < np.datetime64(as_of, "s")) & ~table.column("capped"))
+            selected = np.flatnonzero(live & (table.column("dirty") | may_accrue))
+        else:
+            selected = np.flatnonzero(live)
+        timings["select"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        fines = compute_fines(table.due[selected], table.returned[selected], as_of,
+                              table.daily_rate[selected], table.cap[selected])
+        loan_deltas = fines - table.assessed[selected]
+        user_totals = np.round(np.bincount(table.user_code[selected], weights=loan_deltas,
+                                           minlength=len(table.user_ids)), 2)
+        changed_users = np.flatnonzero(user_totals)
+        deltas = {table.user_ids[code]: total for code, total in
+                  zip(changed_users.tolist(), user_totals[changed_users].tolist(), strict=True)}
+        timings["compute"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        failed: set[UUID] = set()
+        if not dry_run:
+            failed = await self._charge(apply, selected, fines, deltas)
+            deltas = {user_id: delta for user_id, delta in deltas.items()
+                      if user_id not in failed}
+            self.last_run = as_of
+        timings["apply"] = time.perf_counter() - start
+
+        largest = sorted(deltas.items(), key=lambda item: abs(item[1]), reverse=True)
+        return FineRunReport(
+            as_of=as_of,
+            dry_run=dry_run,
+            incremental=incremental,
+            loans_considered=considered,
+            loans_processed=len(selected),
+            loans_fined=int(np.count_nonzero(fines)),
+            users_affected=len(deltas),
+            users_failed=len(failed),
+            total_delta=round(sum(deltas.values()), 2),
+            deltas=[FineDelta(user_id=user_id, delta=delta)
+                    for user_id, delta in largest[:REPORT_DELTA_LIMIT]],
+            timings_ms={phase: round(seconds * 1000, 3) for phase, seconds in timings.items()},
+        )
+
+    async def _record(self, rows: np.ndarray, fines: np.ndarray, settled: list[UUID]):
+        loan_ids = [self.table.loan_ids[row] for row in rows.tolist()]
+        await self.journal(dict(zip(loan_ids, fines.tolist(), strict=True)), settled)
+
+    async def _charge(self, apply: FineApplier, selected: np.ndarray, fines: np.ndarray,
+                      deltas: dict[UUID, float]) -> set[UUID]:
+        """Journals, applies and remembers the fines of a run; returns the users that failed."""
+        table = self.table
+        previous = table.assessed[selected]
+        if self.journal is not None:
+            await self._record(selected, fines, [])
+        try:
+            failed = await apply(deltas) or set()
+        except Exception:
+            # Nothing is known to be charged, so the next run retries every user.
+            if self.journal is not None:
+                await self._record(selected, previous, [])
+            raise
+        # Loans of users whose update failed stay as they were, so the next
+        # run computes and applies the same change again.
+        applied = ~np.isin(table.user_code[selected],
+                           [table.user_codes[user_id] for user_id in failed])
+        rows, row_fines = selected[applied], fines[applied]
+        table.assessed[rows] = row_fines
+        table.capped[rows] = row_fines >= table.cap[rows]
+        table.dirty[rows] = False
+        # Returned loans have their final fine now and are settled.
+        table.live[rows] &= np.isnat(table.returned[rows])
+        settled = rows[~table.live[rows]]
+        if self.journal is not None and (len(settled) or not applied.all()):
+            await self._record(selected[~applied], previous[~applied],
+                               [table.loan_ids[row] for row in settled.tolist()])
+        table.compact()
+        return failed
+
+
+async def assess_fines(engine: FineEngine, circulation: CirculationEngine,
+                       repository: BookRepository, apply: FineApplier = apply_to_users,
+                       as_of: datetime | None = None, incremental: bool = False,
+                       dry_run: bool = False) -> FineRunReport:
+    """
+    Pulls loan changes from the circulation engine and runs the fine engine.
+
+    Only loans changed since the previous call are read from the circulation
+    engine, and only their books are looked up for replacement costs.
+
+    Args:
+        engine (FineEngine): Holds the loan table and fines already charged.
+        circulation (CirculationEngine): The source of loan changes.
+        repository (BookRepository): Supplies replacement costs.
+        apply (FineApplier): Receives the per-user changes.
+        as_of (datetime | None): The time fines are computed at.
+        incremental (bool): Only process loans that may have changed.
+        dry_run (bool): Report without applying.
+
+    Returns:
+        FineRunReport: The outcome of the run.
+    """
+    async with engine.lock:
+        changes = circulation.loan_changes()
+        start = time.perf_counter()
+        books = await repository.get_many({loan.book_id for loan in changes})
+        engine.ingest(changes, {book.book_id: book.replacement_cost for book in books})
+        circulation.acknowledge_changes(len(changes))
+        ingest_ms = round((time.perf_counter() - start) * 1000, 3)
+        report = await engine._run(apply, as_of, incremental, dry_run)
+    report.timings_ms = {"ingest": ingest_ms, **report.timings_ms}
+    return report
@@ -0,0 +1,231 @@
+"""LibookTrac Backend Secondary Indexes for Book Queries."""
+
+from collections import defaultdict
+from collections.abc import Hashable
+from dataclasses import dataclass
+from datetime import date
+from enum import Enum
+from urllib.parse import parse_qsl
+from uuid import UUID
+
+from backend.v1.app.models.books import (
+    BookAudience,
+    BookFormat,
+    BookLanguage,
+    BookLocation,
+    BookResponse,
+)
+from backend.v1.app.services.events import CatalogListener
+from backend.v1.app.services.sorted_keys import SortedKeyList
+
+MAX_UUID = UUID(int=(1 << 128) - 1)
+
+ENUM_FIELDS: dict[str, type[Enum]] = {
+    "language": BookLanguage,
+    "book_type": BookFormat,
+    "location": BookLocation,
+    "target_audience": BookAudience,
+}
+TEXT_FIELDS = ("author", "genre", "tag")
+RANGE_FIELDS = ("publication_year", "replacement_cost")
+CRITERIA_ALIASES = {"tags": "tag", "year": "publication_year", "cost": "replacement_cost"}
+
+
+@dataclass(frozen=True, slots=True)
+class Predicate:
+    """
+    A single filter on an indexed field.
+
+    Equality predicates set `value`; range predicates set `low` and/or `high`,
+    both inclusive.
+    """
+    field: str
+    value: Hashable = None
+    low: float | date | None = None
+    high: float | date | None = None
+
+    @property
+    def is_range(self) -> bool:
+        return self.field in RANGE_FIELDS
+
+
+def _fold(text: str) -> str:
+    return text.strip().casefold()
+
+
+def _parse_range(field: str, text: str) -> Predicate:
+    low_text, separator, high_text = text.partition("..")
+    if not separator:
+        high_text = low_text
+    if field == "publication_year":
+        low = date(int(low_text), 1, 1) if low_text else None
+        high = date(int(high_text), 12, 31) if high_text else None
+    else:
+        low = float(low_text) if low_text else None
+        high = float(high_text) if high_text else None
+    if low is None and high is None:
+        raise ValueError(f"Range for '{field}' needs at least one bound.")
+    return Predicate(field, low=low, high=high)
+
+
+def parse_criteria(criteria: str) -> list[Predicate]:
+    """
+    Parses a filter expression such as `genre=fantasy&publication_year=1990..2000`.
+
+    Equality fields are author, genre, tag, language, book_type, location and
+    target_audience. publication_year and replacement_cost take a single value
+    or an inclusive `low..high` range where either bound may be omitted.
+
+    Args:
+        criteria (str): The `&` separated `field=value` pairs.
+
+    Returns:
+        list[Predicate]: One predicate per pair.
+
+    Raises:
+        ValueError: If a field is unknown or a value cannot be parsed.
+    """
+    pairs = parse_qsl(criteria, keep_blank_values=True, strict_parsing=False)
+    if not pairs:
+        raise ValueError(f"Criteria '{criteria}' has no field=value pairs.")
+    predicates = []
+    for raw_field, raw_value in pairs:
+        field = CRITERIA_ALIASES.get(raw_field, raw_field)
+        if not raw_value:
+            raise ValueError(f"Criteria field '{raw_field}' has no value.")
+        if field in ENUM_FIELDS:
+            predicates.append(Predicate(field, ENUM_FIELDS[field](raw_value.lower())))
+        elif field in TEXT_FIELDS:
+            predicates.append(Predicate(field, _fold(raw_value)))
+        elif field in RANGE_FIELDS:
+            predicates.append(_parse_range(field, raw_value))
+        else:
+            raise ValueError(f"Unknown criteria field '{raw_field}'.")
+    return predicates
+
+
+class BookIndex(CatalogListener):
+    """
+    Secondary indexes over the books catalog.
+
+    Equality fields map each value to a posting set of book ids. Range fields
+    are sorted (value, book_id) lists plus a book_id to value map. The
+    equality keys each book was indexed under are kept, so a changed or
+    deleted book leaves the postings of its old values. Queries
+    estimate every predicate's cardinality, start from the most selective one
+    and shrink the candidate set from there.
+    """
+
+    def __init__(self):
+        self._postings: dict[str, defaultdict[Hashable, set[UUID]]] = {
+            field: defaultdict(set) for field in (*ENUM_FIELDS, *TEXT_FIELDS)
+        }
+        self._columns = {field: SortedKeyList() for field in RANGE_FIELDS}
+        self._values: dict[str, dict[UUID, float | date]] = {field: {}
+                                                               for field in RANGE_FIELDS}
+        self._book_keys: dict[UUID, list[tuple[str, Hashable]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._book_keys)
+
+    @staticmethod
+    def _keys(book: BookResponse) -> list[tuple[str, Hashable]]:
+        keys = [(field, getattr(book, field)) for field in ENUM_FIELDS]
+        authors = {book.author_first_name, book.author_middle_name, book.author_last_name}
+        keys.extend(("author", _fold(name)) for name in authors if name)
+        if book.genre:
+            keys.append(("genre", _fold(book.genre)))
+        keys.extend(("tag", tag) for tag in {_fold(tag) for tag in book.tags or ()})
+        return keys
+
+    def book_added(self, book: BookResponse):
+        self.book_removed(book)
+        keys = self._keys(book)
+        for field, value in keys:
+            self._postings[field][value].add(book.book_id)
+        for field in RANGE_FIELDS:
+            value = getattr(book, field)
+            if value is not None:
+                self._columns[field].add((value, book.book_id))
+                self._values[field][book.book_id] = value
+        self._book_keys[book.book_id] = keys
+
+    def book_removed(self, book: BookResponse):
+        for field, value in self._book_keys.pop(book.book_id, ()):
+            posting = self._postings[field][value]
+            posting.discard(book.book_id)
+            if not posting:
+                del self._postings[field][value]
+        for field in RANGE_FIELDS:
+            value = self._values[field].pop(book.book_id, None)
+            if value is not None:
+                self._columns[field].discard((value, book.book_id))
+
+    def catalog_cleared(self):
+        for postings in self._postings.values():
+            postings.clear()
+        for column in self._columns.values():
+            column.clear()
+        for values in self._values.values():
+            values.clear()
+        self._book_keys.clear()
+
+    def estimate(self, predicate: Predicate) -> int:
+        """Returns the number of books matching a single predicate."""
+        if predicate.is_range:
+            return self._columns[predicate.field].count(*self._range_bounds(predicate))
+        return len(self._postings[predicate.field].get(predicate.value, ()))
+
+    @staticmethod
+    def _range_bounds(predicate: Predicate) -> tuple:
+        low = None if predicate.low is None else (predicate.low,)
+        high = None if predicate.high is None else (predicate.high, MAX_UUID)
+        return low, high
+
+    def _range_ids(self, predicate: Predicate) -> set[UUID]:
+        return {book_id for _, book_id in
+                self._columns[predicate.field].irange(*self._range_bounds(predicate))}
+
+    def _filter_range(self, predicate: Predicate, book_ids: set[UUID]) -> set[UUID]:
+        values = self._values[predicate.field]
+        low, high = predicate.low, predicate.high
+        matches = set()
+        for book_id in book_ids:
+            value = values.get(book_id)
+            if (value is not None and (low is None or value >= low)
+                    and (high is None or value <= high)):
+                matches.add(book_id)
+        return matches
+
+    def query(self, predicates: list[Predicate]) -> set[UUID]:
+        """
+        Returns the ids of the books matching every predicate.
+
+        Args:
+            predicates (list[Predicate]): The filters to AND together.
+
+        Returns:
+            set[UUID]: The matching book ids.
+        """
+        if not predicates:
+            return set(self._book_keys)
+        planned = sorted(((self.estimate(predicate), predicate) for predicate in predicates),
+                         key=lambda pair: pair[0])
+        smallest, first = planned[0]
+        if smallest == 0:
+            return set()
+        if first.is_range:
+            result = self._range_ids(first)
+        else:
+            result = set(self._postings[first.field][first.value])
+
+        for estimate, predicate in planned[1:]:
+            if not result:
+                break
+            if not predicate.is_range:
+                result &= self._postings[predicate.field].get(predicate.value, set())
+            elif len(result) <= estimate:
+                result = self._filter_range(predicate, result)
+            else:
+                result &= self._range_ids(predicate)
+        return result
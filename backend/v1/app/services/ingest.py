@@ -0,0 +1,275 @@
+"""LibookTrac Backend Bulk Book Ingest Service."""
+
+import csv
+from collections import deque
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass, field
+from functools import partial
+
+from pydantic import ValidationError
+
+from backend.v1.app.models.books import BookCreate
+
+INGEST_BATCH_SIZE = 1000
+MAX_LINE_BYTES = 64 * 1024
+TAG_SEPARATOR = "|"
+
+NDJSON_MEDIA_TYPES = frozenset({"application/x-ndjson", "application/jsonl",
+                                "application/ndjson"})
+CSV_MEDIA_TYPES = frozenset({"text/csv", "application/csv"})
+
+
+@dataclass(slots=True)
+class IngestBatch:
+    """A batch of parsed lines from a bulk upload."""
+    valid: list[tuple[int, BookCreate]] = field(default_factory=list)
+    rejected: list[tuple[int, str]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.valid) + len(self.rejected)
+
+
+def format_validation_error(error: ValidationError) -> str:
+    """
+    Flattens a pydantic ValidationError into a single short line.
+
+    Args:
+        error (ValidationError): The error raised while validating a record.
+
+    Returns:
+        str: The field locations and messages joined by '; '.
+    """
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'record'}: {err['msg']}"
+        for err in error.errors(include_url=False, include_input=False)
+    )
+
+
+async def iter_lines(chunks: AsyncIterator[bytes],
+                     max_line_bytes: int = MAX_LINE_BYTES,
+                     ) -> AsyncIterator[bytes | None]:
+    """
+    Splits a stream of byte chunks into lines without buffering the whole body.
+
+    Only the current partial line is held in memory. A line longer than
+    `max_line_bytes` is discarded up to its newline and yielded as None so
+    that line numbering stays aligned with the upload.
+
+    Args:
+        chunks (AsyncIterator[bytes]): The request body stream.
+        max_line_bytes (int): The longest line that will be buffered.
+
+    Yields:
+        bytes | None: Each line without its terminator, or None for an oversized line.
+    """
+    pending = b""
+    oversized = False
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            if oversized:
+                oversized = False
+                yield None
+            else:
+                yield line
+        if len(pending) > max_line_bytes:
+            oversized = True
+            pending = b""
+    if oversized:
+        yield None
+    elif pending:
+        yield pending
+
+
+def _ends_quoted(line: str, quoted: bool) -> bool:
+    """Whether a CSV line ends inside a quoted field, given whether it starts in one."""
+    if '"' not in line:
+        return quoted
+    position = 0
+    while True:
+        if quoted:
+            end = line.find('"', position)
+            if end < 0:
+                return True
+            if line.startswith('"', end + 1):
+                position = end + 2
+                continue
+            quoted = False
+            position = end + 1
+        elif line.startswith('"', position):
+            quoted = True
+            position += 1
+            continue
+        delimiter = line.find(",", position)
+        if delimiter < 0:
+            return False
+        position = delimiter + 1
+
+
+class CSVRows:
+    """
+    Parses CSV rows from lines fed one at a time.
+
+    Lines are decoded and passed to a single csv.reader once the quoted
+    fields they open are closed, so a quoted field may span lines. A byte
+    order mark before the header is stripped. A line that is too long or
+    not UTF-8 rejects the row it belongs to, and so does a row that grows
+    beyond `max_record_bytes`.
+    """
+
+    def __init__(self, max_record_bytes: int = MAX_LINE_BYTES):
+        self.max_record_bytes = max_record_bytes
+        self.line_number = 0
+        self._start = 0
+        self._pending: list[str] = []
+        self._size = 0
+        self._quoted = False
+        self._complete: deque[str] = deque()
+        self._reader = csv.reader(self)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self._complete:
+            raise StopIteration
+        return self._complete.popleft()
+
+    def _reject(self, error: str) -> tuple[int, str]:
+        self._pending.clear()
+        self._size = 0
+        self._quoted = False
+        return self._start, error
+
+    def feed(self, line: bytes | None) -> tuple[int, list[str] | str] | None:
+        """
+        Adds the next line of the file.
+
+        Args:
+            line (bytes | None): The line without its newline, None if it was oversized.
+
+        Returns:
+            tuple[int, list[str] | str] | None: The first line number of the row
+            and its fields or why it was rejected, or None while the row continues.
+        """
+        self.line_number += 1
+        if not self._pending:
+            self._start = self.line_number
+        if line is None:
+            return self._reject(f"line exceeds {self.max_record_bytes} bytes")
+        try:
+            text = line.decode("utf-8-sig" if self.line_number == 1 else "utf-8")
+        except UnicodeDecodeError as error:
+            return self._reject(str(error))
+        self._pending.append(text + "\n")
+        self._size += len(line)
+        self._quoted = _ends_quoted(text, self._quoted)
+        if self._quoted:
+            if self._size > self.max_record_bytes:
+                return self._reject(f"row exceeds {self.max_record_bytes} bytes")
+            return None
+        self._complete.extend(self._pending)
+        self._pending.clear()
+        self._size = 0
+        try:
+            return self._start, next(self._reader)
+        except csv.Error as error:
+            self._complete.clear()
+            return self._start, str(error)
+
+    def close(self) -> tuple[int, str] | None:
+        """Returns the error of a row left open by an unterminated quoted field."""
+        return self._reject("unterminated quoted field") if self._pending else None
+
+
+def is_blank(row: list[str]) -> bool:
+    """Whether a CSV row is an empty or whitespace-only line."""
+    return not row or (len(row) == 1 and not row[0].strip())
+
+
+def _csv_book(header: list[str], row: list[str]) -> BookCreate:
+    if len(row) != len(header):
+        raise ValueError(f"expected {len(header)} columns, got {len(row)}")
+    record = {name: value for name, value in zip(header, row, strict=True) if value != ""}
+    record.setdefault("publication_year", None)
+    if "tags" in record:
+        record["tags"] = [tag for tag in record["tags"].split(TAG_SEPARATOR) if tag]
+    return BookCreate.model_validate(record)
+
+
+def _validated(parse: Callable[[], BookCreate]) -> BookCreate | str:
+    try:
+        return parse()
+    except ValidationError as error:
+        return format_validation_error(error)
+    except ValueError as error:
+        return str(error)
+
+
+async def _ndjson_records(chunks: AsyncIterator[bytes]
+                          ) -> AsyncIterator[tuple[int, BookCreate | str]]:
+    line_number = 0
+    async for line in iter_lines(chunks):
+        line_number += 1
+        if line is None:
+            yield line_number, f"line exceeds {MAX_LINE_BYTES} bytes"
+        elif line.strip():
+            yield line_number, _validated(partial(BookCreate.model_validate_json,
+                                                  line.rstrip(b"\r")))
+
+
+async def _csv_records(chunks: AsyncIterator[bytes]
+                       ) -> AsyncIterator[tuple[int, BookCreate | str]]:
+    rows = CSVRows()
+    header: list[str] = []
+    async for line in iter_lines(chunks):
+        parsed = rows.feed(line)
+        if parsed is None:
+            continue
+        line_number, row = parsed
+        if isinstance(row, str):
+            yield line_number, row
+        elif is_blank(row):
+            continue
+        elif not header:
+            header.extend(name.strip() for name in row)
+        else:
+            yield line_number, _validated(partial(_csv_book, header, row))
+    if (unterminated := rows.close()) is not None:
+        yield unterminated
+
+
+async def iter_batches(chunks: AsyncIterator[bytes],
+                       media_type: str,
+                       batch_size: int = INGEST_BATCH_SIZE,
+                       ) -> AsyncIterator[IngestBatch]:
+    """
+    Parses and validates an NDJSON or CSV upload in fixed size batches.
+
+    A CSV row is numbered by the line it starts on; its quoted fields may
+    contain newlines.
+
+    Args:
+        chunks (AsyncIterator[bytes]): The request body stream.
+        media_type (str): The upload media type, NDJSON or CSV.
+        batch_size (int): Number of records collected before a batch is yielded.
+
+    Yields:
+        IngestBatch: The validated books and rejected lines of each batch.
+    """
+    records = (_csv_records(chunks) if media_type in CSV_MEDIA_TYPES
+               else _ndjson_records(chunks))
+    batch = IngestBatch()
+    async for line_number, book in records:
+        if isinstance(book, str):
+            batch.rejected.append((line_number, book))
+        else:
+            batch.valid.append((line_number, book))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = IngestBatch()
+    if len(batch):
+        yield batch
@@ -0,0 +1,89 @@
+"""LibookTrac Backend Keyset Pagination Service."""
+
+import base64
+import binascii
+from datetime import datetime
+from itertools import islice
+from uuid import UUID
+
+from backend.v1.app.models.books import BookResponse
+from backend.v1.app.services.events import CatalogListener
+from backend.v1.app.services.sorted_keys import SortedKeyList
+
+SortKey = tuple[datetime, UUID]
+
+
+def book_key(book: BookResponse) -> SortKey:
+    """Returns the (book_entry_time, book_id) sort key of a book."""
+    return (book.book_entry_time, book.book_id)
+
+
+def encode_cursor(key: SortKey) -> str:
+    """
+    Encodes a sort key as an opaque, URL safe cursor.
+
+    Args:
+        key (tuple[datetime, UUID]): The sort key of the last book on a page.
+
+    Returns:
+        str: The cursor to pass back to fetch the following page.
+    """
+    raw = f"{key[0].isoformat()}|{key[1]}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> SortKey:
+    """
+    Decodes a cursor produced by encode_cursor.
+
+    Args:
+        cursor (str): The opaque cursor.
+
+    Returns:
+        tuple[datetime, UUID]: The sort key the cursor points at.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        entry_time, book_id = raw.split("|")
+        return (datetime.fromisoformat(entry_time), UUID(book_id))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as error:
+        raise ValueError(f"Invalid cursor '{cursor}'.") from error
+
+
+class KeysetIndex(CatalogListener):
+    """Sorted (book_entry_time, book_id) keys of the catalog for keyset pagination."""
+
+    def __init__(self):
+        self._keys = SortedKeyList()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def book_added(self, book: BookResponse):
+        """Adds a book."""
+        self._keys.add(book_key(book))
+
+    def book_removed(self, book: BookResponse):
+        """Removes a book if it is present."""
+        self._keys.discard(book_key(book))
+
+    def catalog_cleared(self):
+        """Removes every key."""
+        self._keys.clear()
+
+    def after(self, key: SortKey | None, limit: int | None = None) -> list[SortKey]:
+        """
+        Returns the keys strictly after `key` in sort order.
+
+        Args:
+            key (tuple[datetime, UUID] | None): The last key already seen, None to start.
+            limit (int | None): The maximum number of keys to return, None for all.
+
+        Returns:
+            list[tuple[datetime, UUID]]: Up to `limit` keys following `key`.
+        """
+        keys = self._keys.irange(key, exclusive_low=True)
+        return list(keys if limit is None else islice(keys, limit))
@@ -0,0 +1,379 @@
+"""
+LibookTrac Backend Bulk Patron Import Service.
+
+Registers patrons in bulk, e.g. a whole school district, from a CSV or
+NDJSON file of UserRegister records:
+
+    python -m backend.v1.app.services.patron_import patrons.csv
+
+Rows are validated in chunks, usernames and emails are checked against
+the accounts already registered and the rows seen before, and only the
+rows that will be inserted have their passwords hashed, on every core.
+Each chunk is written with one unordered insert_many while the next one
+is being hashed. Rejected rows are written to an NDJSON error report, and
+a checkpoint records the last line whose outcome is known, so an
+interrupted import is resumed by running the same command again.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from itertools import islice
+from pathlib import Path
+
+from beanie.odm.utils.encoder import Encoder
+from pydantic import ValidationError
+from pymongo import AsyncMongoClient
+from pymongo.errors import BulkWriteError
+
+from backend.v1.app.auth.passwords import hash_password
+from backend.v1.app.config.settings import settings
+from backend.v1.app.models.users import UserDetails, UserRegister
+from backend.v1.app.services.ingest import CSVRows, format_validation_error, is_blank
+
+DUPLICATE_KEY = 11000
+# Passwords sent to a hashing worker at once; a batch takes about 3 s at the
+# default bcrypt cost, so the pool stays balanced while IPC stays negligible.
+HASH_BATCH = 16
+CHECKPOINT_FORMAT_VERSION = 1
+
+_encoder = Encoder(to_db=True)
+
+
+@dataclass(slots=True)
+class Checkpoint:
+    """Progress of an import, saved after every chunk."""
+    source: str
+    source_size: int
+    line: int = 0
+    imported: int = 0
+    rejected: int = 0
+    errors_offset: int = 0
+    version: int = CHECKPOINT_FORMAT_VERSION
+
+    @classmethod
+    def load(cls, path: Path | None, source: Path) -> "Checkpoint":
+        """
+        Reads the checkpoint of an import of `source`, or starts a new one.
+
+        Args:
+            path (Path | None): The checkpoint file, None to start over.
+            source (Path): The file being imported.
+
+        Raises:
+            ValueError: If the checkpoint belongs to another file or version.
+        """
+        checkpoint = cls(source=str(source.resolve()), source_size=source.stat().st_size)
+        if path is None or not path.exists():
+            return checkpoint
+        saved = cls(**json.loads(path.read_text(encoding="utf-8")))
+        if saved.version != CHECKPOINT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported import checkpoint version in '{path}'.")
+        if (saved.source, saved.source_size) != (checkpoint.source, checkpoint.source_size):
+            raise ValueError(f"'{path}' is the checkpoint of another import.")
+        return saved
+
+    def save(self, path: Path):
+        """Replaces the checkpoint file atomically."""
+        temporary = path.with_suffix(path.suffix + ".tmp")
+        temporary.write_text(json.dumps(asdict(self)), encoding="utf-8")
+        os.replace(temporary, path)
+
+
+@dataclass(slots=True)
+class ImportReport:
+    """Counts of an import run; resumed runs include the earlier runs' counts."""
+    lines: int = 0
+    imported: int = 0
+    rejected: int = 0
+    resumed_after: int = 0
+    seconds: float = 0.0
+
+
+def iter_records(lines: Iterable[bytes], csv_format: bool,
+                 start_after: int = 0) -> Iterator[tuple[int, dict | bytes | str]]:
+    """
+    Numbers the records of a CSV or NDJSON file.
+
+    CSV rows are numbered by the line they start on; quoted fields may span
+    lines, and are read again on resume so rows stay aligned.
+
+    Args:
+        lines (Iterable[bytes]): The file's lines.
+        csv_format (bool): Whether the first line is a CSV header.
+        start_after (int): Lines already imported, whose records are skipped.
+
+    Yields:
+        tuple[int, dict | bytes | str]: The line number and a CSV row as a
+        dict, an NDJSON line, or why a CSV row could not be read.
+    """
+    if not csv_format:
+        for line_number, line in enumerate(lines, 1):
+            if line_number > start_after and line.strip():
+                yield line_number, line
+        return
+    header: list[str] = []
+    for line_number, row in _csv_rows(lines):
+        if isinstance(row, str):
+            if line_number > start_after:
+                yield line_number, row
+        elif not header:
+            header = [name.strip() for name in row]
+        elif line_number <= start_after:
+            continue
+        elif len(row) != len(header):
+            yield line_number, f"expected {len(header)} columns, got {len(row)}"
+        else:
+            yield line_number, {name: value for name, value in zip(header, row, strict=True)
+                                if value != ""}
+
+
+def _csv_rows(lines: Iterable[bytes]) -> Iterator[tuple[int, list[str] | str]]:
+    rows = CSVRows()
+    for line in lines:
+        parsed = rows.feed(line.removesuffix(b"\n").removesuffix(b"\r"))
+        if parsed is not None and (isinstance(parsed[1], str) or not is_blank(parsed[1])):
+            yield parsed
+    if (unterminated := rows.close()) is not None:
+        yield unterminated
+
+
+def to_document(user: UserRegister, password_hash: str) -> dict:
+    """Builds the BSON document of a new UserDetails account."""
+    details = UserDetails.model_construct(**{**user.model_dump(), "password": password_hash})
+    return _encoder.encode(details.model_dump(exclude={"id", "revision_id"}))
+
+
+def _hash_batch(secrets: list[str]) -> list[str]:
+    """Hashes a batch of passwords; runs in a worker."""
+    return [hash_password(secret) for secret in secrets]
+
+
+def _taken(kind: str, value: str, line: int) -> str:
+    return (f"{kind} '{value}' is already registered" if line == 0
+            else f"{kind} '{value}' is already used on line {line}")
+
+
+class PatronImport:
+    """
+    Imports UserRegister records into the UserDetails collection.
+
+    bcrypt is thousands of times slower than everything else an import
+    does, so the pipeline is arranged around it: rows are rejected before
+    they reach the hashing pool, the pool is kept busy with the next chunk
+    while the previous one is inserted, and only hashing runs in parallel.
+
+    Usernames and emails are deduplicated in one pass: the ones already
+    registered are read once when the import starts, and every accepted
+    row adds its own, so a later row reusing them is rejected.
+    """
+
+    def __init__(self, collection, errors_path: Path, checkpoint_path: Path | None = None,
+                 chunk_size: int = settings.patron_import_chunk_size,
+                 executor: Executor | None = None):
+        self.collection = collection
+        self.errors_path = errors_path
+        self.checkpoint_path = checkpoint_path
+        self.chunk_size = chunk_size
+        self.executor = executor
+        self._usernames: dict[str, int] = {}
+        self._emails: dict[str, int] = {}
+
+    async def create_indexes(self):
+        """
+        Creates the unique username and email indexes of UserDetails.
+
+        The rows are checked against the registered accounts, but a user
+        registering during the import is only refused by these indexes.
+
+        Raises:
+            OperationFailure: If registered accounts already share a username
+                or email, or an index of another definition exists.
+        """
+        await self.collection.create_indexes(UserDetails.Settings.indexes)
+
+    async def _load_registered(self):
+        cursor = self.collection.find({}, {"username": 1, "email": 1, "_id": 0})
+        async for user in cursor:
+            if user.get("username"):
+                self._usernames[user["username"]] = 0
+            if user.get("email"):
+                self._emails[user["email"].lower()] = 0
+
+    def _validate(self, records: list[tuple[int, dict | bytes | str]],
+                  rejected: list[tuple[int, str]]) -> list[tuple[int, UserRegister]]:
+        """Validates and deduplicates a chunk, adding the failures to `rejected`."""
+        accepted = []
+        for line_number, record in records:
+            if isinstance(record, str):
+                rejected.append((line_number, record))
+                continue
+            try:
+                user = (UserRegister.model_validate_json(record) if isinstance(record, bytes)
+                        else UserRegister.model_validate(record))
+            except ValidationError as error:
+                rejected.append((line_number, format_validation_error(error)))
+                continue
+            email = user.email.lower()
+            if user.username in self._usernames:
+                rejected.append((line_number, _taken(
+                    "username", user.username, self._usernames[user.username])))
+            elif email in self._emails:
+                rejected.append((line_number, _taken(
+                    "email", user.email, self._emails[email])))
+            else:
+                self._usernames[user.username] = self._emails[email] = line_number
+                accepted.append((line_number, user))
+        return accepted
+
+    async def _hash(self, users: list[tuple[int, UserRegister]]) -> list[str]:
+        loop = asyncio.get_running_loop()
+        secrets = [user.password for _, user in users]
+        batches = await asyncio.gather(*(
+            loop.run_in_executor(self.executor, _hash_batch, secrets[start:start + HASH_BATCH])
+            for start in range(0, len(secrets), HASH_BATCH)))
+        return [password_hash for batch in batches for password_hash in batch]
+
+    async def _insert(self, users: list[tuple[int, UserRegister]],
+                      hashes: list[str]) -> list[tuple[int, str]]:
+        """Inserts a chunk and returns the rows the database refused."""
+        if not users:
+            return []
+        documents = [to_document(user, password_hash)
+                     for (_, user), password_hash in zip(users, hashes, strict=True)]
+        try:
+            await self.collection.insert_many(documents, ordered=False)
+        except BulkWriteError as error:
+            return [(users[failure["index"]][0],
+                     "username or email is already registered"
+                     if failure["code"] == DUPLICATE_KEY else failure["errmsg"])
+                    for failure in error.details["writeErrors"]]
+        return []
+
+    async def _commit(self, checkpoint: Checkpoint, last_line: int,
+                      users: list[tuple[int, UserRegister]], hashes: list[str],
+                      rejected: list[tuple[int, str]], errors):
+        """Inserts a chunk, reports its rejected rows and saves the checkpoint."""
+        refused = await self._insert(users, hashes)
+        rejected = sorted(rejected + refused)
+        errors.writelines(json.dumps({"line": line_number, "error": error}).encode() + b"\n"
+                          for line_number, error in rejected)
+        errors.flush()
+        checkpoint.line = last_line
+        checkpoint.imported += len(users) - len(refused)
+        checkpoint.rejected += len(rejected)
+        checkpoint.errors_offset = errors.tell()
+        if self.checkpoint_path is not None:
+            checkpoint.save(self.checkpoint_path)
+
+    async def run(self, lines: Iterable[bytes], csv_format: bool,
+                  checkpoint: Checkpoint) -> ImportReport:
+        """
+        Imports the records after `checkpoint.line`.
+
+        Args:
+            lines (Iterable[bytes]): The lines of the file being imported.
+            csv_format (bool): Whether the file is CSV rather than NDJSON.
+            checkpoint (Checkpoint): Where a previous run stopped; updated in place.
+
+        Returns:
+            ImportReport: The counts of the import.
+        """
+        start = time.perf_counter()
+        resumed_after = checkpoint.line
+        await self.create_indexes()
+        await self._load_registered()
+        records = iter_records(lines, csv_format, start_after=checkpoint.line)
+        committing: asyncio.Task | None = None
+        with self.errors_path.open("a+b" if resumed_after else "wb") as errors:
+            errors.truncate(checkpoint.errors_offset)
+            errors.seek(checkpoint.errors_offset)
+            while chunk := list(islice(records, self.chunk_size)):
+                rejected: list[tuple[int, str]] = []
+                users = self._validate(chunk, rejected)
+                hashes = await self._hash(users)
+                if committing is not None:
+                    await committing
+                committing = asyncio.create_task(self._commit(
+                    checkpoint, chunk[-1][0], users, hashes, rejected, errors))
+            if committing is not None:
+                await committing
+        return ImportReport(lines=checkpoint.line, imported=checkpoint.imported,
+                            rejected=checkpoint.rejected, resumed_after=resumed_after,
+                            seconds=time.perf_counter() - start)
+
+
+async def import_file(source: Path, collection, errors_path: Path,
+                      checkpoint_path: Path | None, csv_format: bool,
+                      chunk_size: int = settings.patron_import_chunk_size,
+                      workers: int | None = None) -> ImportReport:
+    """
+    Imports a patron file, resuming from its checkpoint if one exists.
+
+    Args:
+        source (Path): The CSV or NDJSON file of UserRegister records.
+        collection: Async pymongo collection of UserDetails documents.
+        errors_path (Path): NDJSON report of the rejected lines.
+        checkpoint_path (Path | None): Progress file, None to always start over.
+        csv_format (bool): Whether the file is CSV rather than NDJSON.
+        chunk_size (int): Rows validated, hashed and inserted together.
+        workers (int | None): Hashing processes, one per core by default.
+
+    Returns:
+        ImportReport: The counts of the import.
+    """
+    checkpoint = Checkpoint.load(checkpoint_path, source)
+    with (ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor,
+          source.open("rb") as lines):
+        importer = PatronImport(collection, errors_path, checkpoint_path,
+                                chunk_size=chunk_size, executor=executor)
+        return await importer.run(lines, csv_format, checkpoint)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Register patrons in bulk from a CSV or NDJSON file.")
+    parser.add_argument("source", type=Path, help="CSV or NDJSON file of UserRegister records.")
+    parser.add_argument("--format", choices=["csv", "ndjson"], default=None,
+                        help="File format, from the file extension by default.")
+    parser.add_argument("--errors", type=Path, default=None,
+                        help="NDJSON report of rejected lines, <source>.errors.ndjson "
+                             "by default.")
+    parser.add_argument("--checkpoint", type=Path, default=None,
+                        help="Progress file, <source>.checkpoint by default.")
+    parser.add_argument("--restart", action="store_true",
+                        help="Ignore the checkpoint and start from the first line.")
+    parser.add_argument("--chunk-size", type=int, default=settings.patron_import_chunk_size)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Hashing processes, one per core by default.")
+    args = parser.parse_args()
+
+    csv_format = (args.format or args.source.suffix.lstrip(".").lower()) == "csv"
+    checkpoint = args.checkpoint or args.source.with_name(args.source.name + ".checkpoint")
+    if args.restart:
+        checkpoint.unlink(missing_ok=True)
+    errors = args.errors or args.source.with_name(args.source.name + ".errors.ndjson")
+
+    async def run() -> ImportReport:
+        client = AsyncMongoClient(settings.mongodb_url.get_secret_value())
+        try:
+            return await import_file(args.source,
+                                     client[settings.mongodb_database][UserDetails.Settings.name],
+                                     errors, checkpoint, csv_format, args.chunk_size,
+                                     args.workers)
+        finally:
+            await client.close()
+
+    report = asyncio.run(run())
+    print(f"{report.imported} patrons imported, {report.rejected} rejected (see {errors}), "
+          f"{report.seconds:.1f} s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""LibookTrac Backend Patron Account Service."""
+
+from collections.abc import AsyncIterator, Callable
+from uuid import UUID
+
+from beanie.exceptions import CollectionWasNotInitialized
+from bson import Binary
+from pymongo.errors import PyMongoError
+
+from backend.v1.app.models.users import UserDetails
+
+UNAVAILABLE = (CollectionWasNotInitialized, PyMongoError)
+
+
+def _uuid(value: Binary | UUID) -> UUID:
+    # Clients configured with a uuidRepresentation decode UUIDs themselves.
+    return value if isinstance(value, UUID) else value.as_uuid()
+
+
+class PatronStore:
+    """
+    Keeps UserDetails documents in step with the circulation engine.
+
+    Borrow limits are read from `max_borrow_limit` before a checkout, and
+    after a checkout or return `books_borrowed` is set to the engine's count
+    and the book is added to `borrow_history`. Setting the count rather than
+    incrementing it lets the next write repair one that failed.
+
+    The user store is best effort: while it is unavailable, limits fall back
+    to the last known or default one and failed writes are counted.
+    """
+
+    def __init__(self, collection: Callable = UserDetails.get_pymongo_collection):
+        self.collection = collection
+        self.failures = 0
+
+    async def borrow_limit(self, user_id: UUID) -> int | None:
+        """Returns a user's borrow limit, or None if unknown or the store is unavailable."""
+        try:
+            user = await self.collection().find_one({"user_id": Binary.from_uuid(user_id)},
+                                                    {"max_borrow_limit": 1})
+        except UNAVAILABLE:
+            self.failures += 1
+            return None
+        return None if user is None else user.get("max_borrow_limit")
+
+    async def preferred_genres(self, user_id: UUID) -> list[str]:
+        """Returns a user's preferred genres, or none while the store is unavailable."""
+        try:
+            user = await self.collection().find_one({"user_id": Binary.from_uuid(user_id)},
+                                                    {"preferred_genres": 1})
+        except UNAVAILABLE:
+            self.failures += 1
+            return []
+        return [] if user is None else user.get("preferred_genres", [])
+
+    async def histories(self) -> AsyncIterator[tuple[UUID, list[UUID]]]:
+        """
+        Yields (user_id, borrow_history) of every user who borrowed a book.
+
+        Raises:
+            CollectionWasNotInitialized: If the user store is not initialized.
+            PyMongoError: If the store cannot be read.
+        """
+        cursor = self.collection().find({"borrow_history.0": {"$exists": True}},
+                                        {"user_id": 1, "borrow_history": 1})
+        async for user in cursor:
+            yield _uuid(user["user_id"]), [_uuid(book_id) for book_id in user["borrow_history"]]
+
+    async def record_loans(self, user_id: UUID, borrowed: int, book_id: UUID | None = None):
+        """
+        Writes a user's loan count and, after a checkout, the borrowed book back.
+
+        Args:
+            user_id (UUID): The borrowing user.
+            borrowed (int): Books the user has on loan now.
+            book_id (UUID | None): A book just checked out, added to the history.
+        """
+        update = {"$set": {"books_borrowed": borrowed}}
+        if book_id is not None:
+            update["$addToSet"] = {"borrow_history": Binary.from_uuid(book_id)}
+        try:
+            await self.collection().update_one({"user_id": Binary.from_uuid(user_id)}, update)
+        except UNAVAILABLE:
+            self.failures += 1
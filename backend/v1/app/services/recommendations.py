@@ -0,0 +1,393 @@
+"""
+LibookTrac Backend Recommendation Service.
+
+"Also borrowed" lists come from an item-item co-occurrence matrix over
+patrons' borrow histories; "for you" lists blend them with genre affinity.
+The matrix is updated on every checkout, and checkouts are also written to
+UserDetails.borrow_history, from which the engine is seeded at startup. A
+full rebuild from exported histories runs offline on every core:
+
+    mongoexport --db libooktrac --collection users \\
+        --fields user_id,borrow_history --out users.ndjson
+    python -m backend.v1.app.services.recommendations users.ndjson recommendations.json.gz
+"""
+
+import argparse
+import base64
+import gzip
+import heapq
+import json
+import math
+import os
+import time
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from pathlib import Path
+from uuid import UUID
+
+from backend.v1.app.models.books import BookResponse
+from backend.v1.app.services.events import CatalogListener
+from backend.v1.app.services.snapshots import write_gzip_json
+
+TOP_N = 20
+HISTORY_WINDOW = 20
+GENRE_WEIGHT = 0.3
+SNAPSHOT_FORMAT_VERSION = 1
+
+
+class RecommendationEngine(CatalogListener):
+    """
+    Sparse item-item co-occurrence recommendations.
+
+    `_pairs[a][b]` counts the patrons who borrowed both a and b, and two
+    books are as similar as their co-occurrence count divided by the
+    geometric mean of their borrower counts. A checkout adds one to the
+    pairs of the book and each earlier book in the patron's history and
+    marks the touched books stale. Their top-N lists are rebuilt on the next
+    read, so a read is a dictionary lookup unless the book just changed.
+    """
+
+    def __init__(self):
+        self._pairs: dict[UUID, Counter[UUID]] = {}
+        self._borrowers: Counter[UUID] = Counter()
+        self._histories: dict[UUID, dict[UUID, None]] = {}
+        self._similar: dict[UUID, list[tuple[UUID, float]]] = {}
+        self._stale: set[UUID] = set()
+        self._genres: dict[UUID, str | None] = {}
+        self._genre_books: dict[str, set[UUID]] = {}
+        self._genre_top: dict[str, list[UUID]] = {}
+
+    def book_added(self, book: BookResponse):
+        # Books are replayed at startup after a snapshot is restored, so this
+        # only tracks the genre and leaves co-occurrence data alone.
+        previous = self._genres.get(book.book_id)
+        if previous and previous != book.genre:
+            self._genre_books[previous].discard(book.book_id)
+            self._genre_top.pop(previous, None)
+        self._genres[book.book_id] = book.genre
+        if book.genre:
+            self._genre_books.setdefault(book.genre, set()).add(book.book_id)
+            self._genre_top.pop(book.genre, None)
+
+    def book_updated(self, old: BookResponse, new: BookResponse):
+        # Co-borrowing follows the book id, so only the genre can change.
+        self.book_added(new)
+
+    def book_removed(self, book: BookResponse):
+        genre = self._genres.pop(book.book_id, None)
+        if genre:
+            self._genre_books.get(genre, set()).discard(book.book_id)
+            self._genre_top.pop(genre, None)
+        for partner in self._pairs.pop(book.book_id, {}):
+            self._pairs[partner].pop(book.book_id, None)
+            self._stale.add(partner)
+        self._similar.pop(book.book_id, None)
+
+    def catalog_cleared(self):
+        self._pairs.clear()
+        self._similar.clear()
+        self._stale.clear()
+        self._genres.clear()
+        self._genre_books.clear()
+        self._genre_top.clear()
+
+    def history(self, user_id: UUID) -> list[UUID]:
+        """Returns the distinct books a patron borrowed, least recent first."""
+        return list(self._histories.get(user_id, ()))
+
+    def record_checkout(self, user_id: UUID, book_id: UUID):
+        """
+        Adds a checkout to the patron's history and the co-occurrence matrix.
+
+        Args:
+            user_id (UUID): The borrowing patron.
+            book_id (UUID): The borrowed book.
+        """
+        history = self._histories.setdefault(user_id, {})
+        if book_id in history:
+            # Borrowing a book again moves it to the recent end only.
+            del history[book_id]
+            history[book_id] = None
+            return
+        row = self._pairs.setdefault(book_id, Counter())
+        for earlier in history:
+            row[earlier] += 1
+            self._pairs.setdefault(earlier, Counter())[book_id] += 1
+        history[book_id] = None
+        self._borrowers[book_id] += 1
+        # The book's borrower count moved, which rescales every pair it is in.
+        self._stale.add(book_id)
+        self._stale.update(row)
+        top = self._genre_top.get(self._genres.get(book_id))
+        if top is not None:
+            # Borrower counts only grow, so the book can only move up.
+            if book_id not in top:
+                top.append(book_id)
+            top.sort(key=self._borrowers.__getitem__, reverse=True)
+            del top[TOP_N:]
+
+    def seed(self, user_id: UUID, history: Iterable[UUID]) -> int:
+        """
+        Records the books of a stored borrow history the engine has not seen.
+
+        Safe to repeat, so histories can be merged from the user store or an
+        older snapshot while checkouts keep coming in.
+
+        Args:
+            user_id (UUID): The patron.
+            history (Iterable[UUID]): Their borrowed books, least recent first.
+
+        Returns:
+            int: The number of books added to the patron's history.
+        """
+        known = self._histories.get(user_id, {})
+        added = 0
+        for book_id in history:
+            if book_id not in known:
+                self.record_checkout(user_id, book_id)
+                known = self._histories[user_id]
+                added += 1
+        return added
+
+    def _rebuild(self, book_id: UUID) -> list[tuple[UUID, float]]:
+        borrowers = self._borrowers
+        own = borrowers[book_id] or 1
+        top = heapq.nlargest(
+            TOP_N, ((partner, count / math.sqrt(own * (borrowers[partner] or 1)))
+                    for partner, count in self._pairs.get(book_id, {}).items()),
+            key=lambda item: item[1])
+        self._similar[book_id] = top
+        self._stale.discard(book_id)
+        return top
+
+    def similar(self, book_id: UUID, n: int = 10) -> list[tuple[UUID, float]]:
+        """
+        Returns the books most often borrowed by patrons who borrowed `book_id`.
+
+        Args:
+            book_id (UUID): The book.
+            n (int): The number of books, at most TOP_N.
+
+        Returns:
+            list[tuple[UUID, float]]: Book ids with cosine similarities, best first.
+        """
+        top = self._similar.get(book_id)
+        if top is None or book_id in self._stale:
+            top = self._rebuild(book_id)
+        return top[:n]
+
+    def refresh(self) -> int:
+        """Rebuilds every stale top-N list and returns how many there were."""
+        stale = list(self._stale)
+        for book_id in stale:
+            self._rebuild(book_id)
+        return len(stale)
+
+    def popular_in(self, genre: str) -> list[UUID]:
+        """Returns the TOP_N most borrowed books of a genre, kept up to date on checkout."""
+        top = self._genre_top.get(genre)
+        if top is None:
+            top = self._genre_top[genre] = heapq.nlargest(
+                TOP_N, self._genre_books.get(genre, ()), key=self._borrowers.__getitem__)
+        return top
+
+    def genre_affinity(self, history: list[UUID], preferred: Iterable[str]) -> dict[str, float]:
+        """
+        Scores genres in [0, 1] from stated preferences and borrowing.
+
+        Half of the score is whether the patron lists the genre as preferred,
+        half is the genre's share of their borrow history.
+        """
+        affinity = dict.fromkeys(preferred, 0.5)
+        genres = Counter(self._genres.get(book_id) for book_id in history)
+        genres.pop(None, None)
+        for genre, count in genres.items():
+            affinity[genre] = affinity.get(genre, 0.0) + 0.5 * count / len(history)
+        return affinity
+
+    def for_user(self, user_id: UUID, preferred_genres: Iterable[str] = (),
+                 n: int = 10) -> list[tuple[UUID, float]]:
+        """
+        Recommends books a patron has not borrowed yet.
+
+        Candidates are the books similar to the patron's recent borrows and
+        the most borrowed books of genres they like. Scores blend normalized
+        co-occurrence with genre affinity, weighted by GENRE_WEIGHT, so new
+        patrons with only preferred genres still get recommendations.
+
+        Args:
+            user_id (UUID): The patron.
+            preferred_genres (Iterable[str]): UserDetails.preferred_genres.
+            n (int): The number of books.
+
+        Returns:
+            list[tuple[UUID, float]]: Book ids with blended scores, best first.
+        """
+        history = self.history(user_id)
+        borrowed = set(history)
+        collaborative: Counter[UUID] = Counter()
+        for book_id in history[-HISTORY_WINDOW:]:
+            for partner, score in self.similar(book_id, TOP_N):
+                if partner not in borrowed:
+                    collaborative[partner] += score
+        affinity = self.genre_affinity(history, preferred_genres)
+        candidates = set(collaborative)
+        for genre in affinity:
+            candidates.update(book_id for book_id in self.popular_in(genre)
+                              if book_id not in borrowed)
+        best = max(collaborative.values(), default=0.0) or 1.0
+        scores = {
+            book_id: ((1 - GENRE_WEIGHT) * collaborative[book_id] / best
+                      + GENRE_WEIGHT * affinity.get(self._genres.get(book_id), 0.0))
+            for book_id in candidates if book_id in self._genres
+        }
+        return heapq.nlargest(n, scores.items(), key=lambda item: item[1])
+
+    def save(self, path: Path):
+        """
+        Writes histories, co-occurrence counts and top-N lists to a gzipped JSON file.
+
+        Book ids are written once and referred to by position. The file is
+        replaced atomically.
+        """
+        self.refresh()
+        book_ids = list({*self._pairs, *self._borrowers,
+                         *(book_id for history in self._histories.values()
+                           for book_id in history)})
+        positions = {book_id: position for position, book_id in enumerate(book_ids)}
+        payload = {
+            "version": SNAPSHOT_FORMAT_VERSION,
+            "book_ids": [str(book_id) for book_id in book_ids],
+            "histories": {str(user_id): [positions[book_id] for book_id in history]
+                          for user_id, history in self._histories.items()},
+            "pairs": {positions[book_id]: [value for partner, count in row.items()
+                                           for value in (positions[partner], count)]
+                      for book_id, row in self._pairs.items() if row},
+            "similar": {positions[book_id]: [value for partner, score in top
+                                             for value in (positions[partner], score)]
+                        for book_id, top in self._similar.items() if top},
+        }
+        write_gzip_json(path, payload)
+
+    def restore(self, path: Path):
+        """
+        Replaces histories and co-occurrence data with a snapshot written by save.
+
+        Genres come from the catalog and are kept. Histories already in the
+        engine are merged back in, so a snapshot older than them, such as one
+        rebuilt offline, never drops checkouts.
+
+        Raises:
+            ValueError: If the file was written by an incompatible version.
+        """
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            payload = json.load(file)
+        if payload.get("version") != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported recommendations snapshot version in '{path}'.")
+        book_ids = [UUID(book_id) for book_id in payload["book_ids"]]
+        live = self._histories
+        self._histories = {UUID(user_id): dict.fromkeys(book_ids[position]
+                                                        for position in history)
+                           for user_id, history in payload["histories"].items()}
+        self._borrowers = Counter(book_id for history in self._histories.values()
+                                  for book_id in history)
+        self._pairs = {book_ids[int(position)]: Counter(
+                           {book_ids[flat[i]]: flat[i + 1] for i in range(0, len(flat), 2)})
+                       for position, flat in payload["pairs"].items()}
+        self._similar = {book_ids[int(position)]: [(book_ids[flat[i]], flat[i + 1])
+                                                   for i in range(0, len(flat), 2)]
+                         for position, flat in payload["similar"].items()}
+        self._stale = set(self._pairs) - set(self._similar)
+        self._genre_top.clear()
+        for user_id, history in live.items():
+            self.seed(user_id, history)
+
+    @classmethod
+    def from_histories(cls, histories: dict[UUID, list[UUID]],
+                       workers: int | None = None) -> "RecommendationEngine":
+        """
+        Builds an engine from complete borrow histories on every core.
+
+        Histories are split into one chunk per worker process, each worker
+        counts the co-occurring pairs of its chunk, and the partial counts are
+        merged before the top-N lists are built.
+
+        Args:
+            histories (dict[UUID, list[UUID]]): Book ids borrowed by each patron.
+            workers (int | None): Worker processes, one per core by default.
+
+        Returns:
+            RecommendationEngine: An engine with every top-N list precomputed.
+        """
+        engine = cls()
+        engine._histories = {user_id: dict.fromkeys(history)
+                             for user_id, history in histories.items()}
+        engine._borrowers = Counter(book_id for history in engine._histories.values()
+                                    for book_id in history)
+        book_ids = list(engine._borrowers)
+        positions = {book_id: position for position, book_id in enumerate(book_ids)}
+        encoded = [[positions[book_id] for book_id in history]
+                   for history in engine._histories.values()]
+        workers = workers or os.cpu_count() or 1
+        chunks = [encoded[start::workers] for start in range(workers)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for partial in pool.map(_count_pairs, chunks):
+                for (first, second), count in partial.items():
+                    a, b = book_ids[first], book_ids[second]
+                    engine._pairs.setdefault(a, Counter())[b] += count
+                    engine._pairs.setdefault(b, Counter())[a] += count
+        engine._stale = set(engine._pairs)
+        engine.refresh()
+        return engine
+
+
+def _count_pairs(histories: list[list[int]]) -> Counter[tuple[int, int]]:
+    """Counts co-occurring book positions in a chunk of histories; runs in a worker."""
+    pairs = Counter()
+    for history in histories:
+        pairs.update(combinations(sorted(set(history)), 2))
+    return pairs
+
+
+def _exported_uuid(value) -> UUID:
+    """Reads a UUID from mongoexport extended JSON or a plain string."""
+    if isinstance(value, dict):
+        if "$uuid" in value:
+            return UUID(value["$uuid"])
+        binary = value["$binary"]
+        return UUID(bytes=base64.b64decode(binary["base64"]))
+    return UUID(value)
+
+
+def read_histories(path: Path) -> Iterator[tuple[UUID, list[UUID]]]:
+    """Yields (user_id, borrow_history) from a mongoexport NDJSON file of UserDetails."""
+    with path.open(encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                record = json.loads(line)
+                yield (_exported_uuid(record["user_id"]),
+                       [_exported_uuid(book_id) for book_id in record.get("borrow_history", ())])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rebuild the recommendation snapshot from exported borrow histories.")
+    parser.add_argument("histories", type=Path, help="mongoexport NDJSON of the users.")
+    parser.add_argument("output", type=Path, help="Snapshot to write, e.g. "
+                        "the LIBOOKTRAC_RECOMMENDATIONS_PATH file.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes, one per core by default.")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    engine = RecommendationEngine.from_histories(dict(read_histories(args.histories)),
+                                                 workers=args.workers)
+    engine.save(args.output)
+    print(f"{len(engine._histories)} patrons, {len(engine._pairs)} books, "
+          f"{time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""LibookTrac Backend Catalog Response Cache."""
+
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from backend.v1.app.models.books import BookResponse
+from backend.v1.app.services.events import CatalogListener
+
+
+class CatalogVersion(CatalogListener):
+    """
+    Monotonically increasing version of the books catalog.
+
+    Every stored, deleted or cleared book bumps the version, so a response
+    built at one version is stale as soon as the version moves on.
+    """
+
+    def __init__(self):
+        self.value = 0
+
+    def book_added(self, book: BookResponse):
+        self.value += 1
+
+    def book_removed(self, book: BookResponse):
+        self.value += 1
+
+    def catalog_cleared(self):
+        self.value += 1
+
+
+@dataclass(slots=True)
+class CachedResponse:
+    """A serialized response body and the catalog version it was built at."""
+    version: int
+    body: bytes
+    etag: str
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+def make_etag(body: bytes) -> str:
+    """Returns a strong ETag derived from the response body."""
+    return f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Checks an If-None-Match header against an ETag using weak comparison.
+
+    Args:
+        if_none_match (str | None): The raw header value.
+        etag (str): The current ETag of the resource.
+
+    Returns:
+        bool: True if the client's copy is still current.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    etag = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == etag
+               for candidate in if_none_match.split(","))
+
+
+def book_etag(book: BookResponse) -> str:
+    """
+    Returns the ETag of a book version.
+
+    The tag is the book's last_updated_date in microseconds since the epoch,
+    so clients holding a book can derive it from the body as well.
+    """
+    micros = (book.last_updated_date - datetime(1970, 1, 1)) // timedelta(microseconds=1)
+    return f'"{micros}"'
+
+
+def if_match_satisfied(if_match: str | None, etag: str) -> bool:
+    """
+    Checks an If-Match header against an ETag using strong comparison.
+
+    Args:
+        if_match (str | None): The raw header value; a missing header matches.
+        etag (str): The current ETag of the resource.
+
+    Returns:
+        bool: True if the change may be applied.
+    """
+    if not if_match or if_match.strip() == "*":
+        return True
+    return any(candidate.strip() == etag for candidate in if_match.split(","))
+
+
+class ResponseCache:
+    """
+    LRU cache of serialized catalog responses bounded by total body size.
+
+    Entries are keyed by route and query string and only served while the
+    catalog version they were built at is still current.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _drop(self, key: str):
+        self.size -= len(self._entries.pop(key).body)
+
+    def get(self, key: str, version: int) -> CachedResponse | None:
+        """Returns the entry for `key` if it was built at `version`, otherwise None."""
+        entry = self._entries.get(key)
+        if entry is None or entry.version != version:
+            if entry is not None:
+                self._drop(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, entry: CachedResponse):
+        """Stores an entry, evicting the least recently used ones beyond `max_bytes`."""
+        if key in self._entries:
+            self._drop(key)
+        if len(entry.body) > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self.size += len(entry.body)
+        while self.size > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+    def stats(self) -> dict[str, int]:
+        """Returns entry, size and hit/miss counters."""
+        return {"entries": len(self._entries), "bytes": self.size, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions}
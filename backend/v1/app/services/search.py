@@ -0,0 +1,287 @@
+"""LibookTrac Backend Full-Text Search Service."""
+
+import gzip
+import heapq
+import json
+import math
+import re
+import unicodedata
+from collections import Counter
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+from pathlib import Path
+from uuid import UUID
+
+from backend.v1.app.models.books import BookResponse
+from backend.v1.app.services.events import CatalogListener
+from backend.v1.app.services.snapshots import write_gzip_json
+
+TOKEN_PATTERN = re.compile(r"\w+")
+INDEX_FORMAT_VERSION = 2
+EPOCH = datetime(1970, 1, 1)
+
+# Term frequencies are weighted so that a match in the title outranks the same
+# word buried in a description.
+FIELD_WEIGHTS = {
+    "title": 3,
+    "author": 2,
+    "tags": 2,
+    "genre": 1,
+    "description": 1,
+}
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def fold(text: str) -> str:
+    """
+    Lowercases text and strips diacritics, so 'Émile' and 'emile' match.
+
+    Args:
+        text (str): The text to fold.
+
+    Returns:
+        str: The folded text.
+    """
+    if not text.isascii():
+        text = "".join(char for char in unicodedata.normalize("NFKD", text)
+                       if not unicodedata.combining(char))
+    return text.casefold()
+
+
+def tokenize(text: str) -> list[str]:
+    """Splits folded text into word tokens."""
+    return TOKEN_PATTERN.findall(fold(text))
+
+
+def book_terms(book: BookResponse) -> Counter:
+    """
+    Returns the weighted term frequencies of a book's searchable fields.
+
+    Args:
+        book (BookResponse): The book to tokenize.
+
+    Returns:
+        Counter: Term to weighted frequency.
+    """
+    fields = {
+        "title": book.title,
+        "author": " ".join(filter(None, (book.author_first_name, book.author_middle_name,
+                                         book.author_last_name))),
+        "tags": " ".join(book.tags or ()),
+        "genre": book.genre,
+        "description": book.description,
+    }
+    terms = Counter()
+    for field, text in fields.items():
+        if text:
+            weight = FIELD_WEIGHTS[field]
+            for token in tokenize(text):
+                terms[token] += weight
+    return terms
+
+
+class SearchIndex(CatalogListener):
+    """
+    Incrementally maintained inverted index with BM25 ranking.
+
+    Each term maps to the books containing it and the weighted term frequency.
+    The terms indexed for each book are kept, so adding or removing a book
+    only touches the postings of the version that was indexed. The
+    last_updated_date of every indexed book is kept, so an index restored
+    from disk can be brought up to date with the catalog (see IndexCatchUp).
+    """
+
+    def __init__(self):
+        self._postings: dict[str, dict[UUID, int]] = {}
+        self._lengths: dict[UUID, int] = {}
+        self._versions: dict[UUID, datetime] = {}
+        self._terms: dict[UUID, tuple[str, ...]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def book_added(self, book: BookResponse):
+        self._drop(book.book_id)
+        terms = book_terms(book)
+        for term, frequency in terms.items():
+            self._postings.setdefault(term, {})[book.book_id] = frequency
+        length = sum(terms.values())
+        self._lengths[book.book_id] = length
+        self._versions[book.book_id] = book.last_updated_date
+        self._terms[book.book_id] = tuple(terms)
+        self._total_length += length
+
+    def book_removed(self, book: BookResponse):
+        self._drop(book.book_id)
+
+    def catalog_cleared(self):
+        self._postings.clear()
+        self._lengths.clear()
+        self._versions.clear()
+        self._terms.clear()
+        self._total_length = 0
+
+    def _drop(self, book_id: UUID):
+        """Removes the indexed version of a book, whatever its current fields are."""
+        length = self._lengths.pop(book_id, None)
+        if length is None:
+            return
+        self._total_length -= length
+        del self._versions[book_id]
+        for term in self._terms.pop(book_id):
+            posting = self._postings[term]
+            del posting[book_id]
+            if not posting:
+                del self._postings[term]
+
+    def version(self, book_id: UUID) -> datetime | None:
+        """Returns the last_updated_date of the indexed version of a book."""
+        return self._versions.get(book_id)
+
+    def book_ids(self) -> list[UUID]:
+        return list(self._lengths)
+
+    def purge(self, book_ids: Iterable[UUID]):
+        """
+        Drops books by id alone.
+
+        Used when the indexed version of the books is no longer at hand, e.g.
+        books changed or deleted while the index was saved to disk.
+        """
+        for book_id in book_ids:
+            self._drop(book_id)
+
+    def search(self, query: str, k: int = 10) -> list[tuple[float, UUID]]:
+        """
+        Ranks the books matching any query term with BM25.
+
+        Args:
+            query (str): Free text keywords.
+            k (int): The number of results to return.
+
+        Returns:
+            list[tuple[float, UUID]]: The top k (score, book_id) pairs, best first.
+        """
+        document_count = len(self._lengths)
+        if not document_count:
+            return []
+        average_length = self._total_length / document_count
+        scores: dict[UUID, float] = {}
+        for term in set(tokenize(query)):
+            posting = self._postings.get(term)
+            if not posting:
+                continue
+            frequency = len(posting)
+            idf = math.log(1 + (document_count - frequency + 0.5) / (frequency + 0.5))
+            for book_id, term_frequency in posting.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[book_id] / average_length)
+                scores[book_id] = (scores.get(book_id, 0.0)
+                                   + idf * term_frequency * (BM25_K1 + 1)
+                                   / (term_frequency + norm))
+        top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(score, book_id) for book_id, score in top]
+
+    def save(self, path: Path):
+        """
+        Writes the index to a gzipped JSON file, replacing it atomically.
+
+        Book ids are written once and postings refer to them by position.
+
+        Args:
+            path (Path): The file to write.
+        """
+        book_ids = list(self._lengths)
+        positions = {book_id: position for position, book_id in enumerate(book_ids)}
+        payload = {
+            "version": INDEX_FORMAT_VERSION,
+            "book_ids": [str(book_id) for book_id in book_ids],
+            "lengths": list(self._lengths.values()),
+            "versions": [(self._versions[book_id] - EPOCH) // timedelta(microseconds=1)
+                         for book_id in book_ids],
+            "postings": {
+                term: [value for book_id, frequency in posting.items()
+                       for value in (positions[book_id], frequency)]
+                for term, posting in self._postings.items()
+            },
+        }
+        write_gzip_json(path, payload)
+
+    @classmethod
+    def load(cls, path: Path) -> "SearchIndex":
+        """
+        Reads an index written by save.
+
+        Args:
+            path (Path): The file to read.
+
+        Returns:
+            SearchIndex: The restored index.
+
+        Raises:
+            ValueError: If the file was written by an incompatible version.
+        """
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            payload = json.load(file)
+        if payload.get("version") != INDEX_FORMAT_VERSION:
+            raise ValueError(f"Unsupported search index version in '{path}'.")
+        index = cls()
+        book_ids = [UUID(book_id) for book_id in payload["book_ids"]]
+        index._lengths = dict(zip(book_ids, payload["lengths"], strict=True))
+        index._versions = {book_id: EPOCH + timedelta(microseconds=micros)
+                           for book_id, micros in zip(book_ids, payload["versions"],
+                                                      strict=True)}
+        index._total_length = sum(index._lengths.values())
+        terms: dict[UUID, list[str]] = {book_id: [] for book_id in book_ids}
+        for term, flat in payload["postings"].items():
+            index._postings[term] = {book_ids[flat[i]]: flat[i + 1]
+                                     for i in range(0, len(flat), 2)}
+            for book_id in index._postings[term]:
+                terms[book_id].append(term)
+        index._terms = {book_id: tuple(indexed) for book_id, indexed in terms.items()}
+        return index
+
+    def restore(self, path: Path):
+        """Replaces the contents of this index with the index saved at `path`."""
+        loaded = self.load(path)
+        self._postings = loaded._postings
+        self._lengths = loaded._lengths
+        self._versions = loaded._versions
+        self._terms = loaded._terms
+        self._total_length = loaded._total_length
+
+
+class IndexCatchUp(CatalogListener):
+    """
+    Brings a restored search index up to date during one pass over the catalog.
+
+    Receives every stored book through book_added, as the startup warm-up
+    sends them. Books indexed at their current last_updated_date are left
+    alone. When the pass is over, `finish` purges the indexed versions of
+    changed books and of books the pass never saw, then indexes the changed
+    and new ones, so only what changed while the index was on disk costs
+    tokenizing.
+    """
+
+    def __init__(self, index: SearchIndex):
+        self.index = index
+        self.seen: set[UUID] = set()
+        self.changed: list[BookResponse] = []
+
+    def book_added(self, book: BookResponse):
+        self.seen.add(book.book_id)
+        if self.index.version(book.book_id) != book.last_updated_date:
+            self.changed.append(book)
+
+    def finish(self) -> int:
+        """Applies the changes found by the pass and returns how many books were affected."""
+        stale = {book.book_id for book in self.changed}
+        stale.update(book_id for book_id in self.index.book_ids() if book_id not in self.seen)
+        self.index.purge(stale)
+        for book in self.changed:
+            self.index.book_added(book)
+        self.seen.clear()
+        self.changed = []
+        return len(stale)
@@ -0,0 +1,63 @@
+"""LibookTrac Backend Book Serialization Service."""
+
+from collections.abc import Iterable
+from uuid import UUID
+
+from backend.v1.app.models.books import BookResponse
+from backend.v1.app.services.events import CatalogListener
+
+_book_serializer = BookResponse.__pydantic_serializer__
+
+
+def encode_book(book: BookResponse) -> bytes:
+    """
+    Encodes a stored book as JSON without validating it again.
+
+    Stored books were validated on insert, so this goes straight to
+    pydantic-core's Rust serializer instead of FastAPI's response_model path.
+
+    Args:
+        book (BookResponse): The stored book.
+
+    Returns:
+        bytes: The JSON encoded book.
+    """
+    return _book_serializer.to_json(book)
+
+
+class BookJSONCache(CatalogListener):
+    """
+    Serialized JSON of every book in the catalog, refreshed when a book changes.
+
+    List responses are built by joining cached buffers, so each book is
+    encoded once per change rather than once per read.
+    """
+
+    def __init__(self):
+        self._bodies: dict[UUID, bytes] = {}
+
+    def __len__(self) -> int:
+        return len(self._bodies)
+
+    def book_added(self, book: BookResponse):
+        self._bodies[book.book_id] = encode_book(book)
+
+    def book_removed(self, book: BookResponse):
+        self._bodies.pop(book.book_id, None)
+
+    def catalog_cleared(self):
+        self._bodies.clear()
+
+    def encode(self, book: BookResponse) -> bytes:
+        """Returns the cached JSON of a book, encoding books the cache has not seen."""
+        body = self._bodies.get(book.book_id)
+        return encode_book(book) if body is None else body
+
+    def encode_many(self, books: Iterable[BookResponse], separator: bytes = b",") -> bytes:
+        """Joins the cached JSON of several books with `separator`."""
+        bodies = self._bodies
+        return separator.join(bodies.get(book.book_id) or encode_book(book) for book in books)
+
+    def encode_list(self, books: Iterable[BookResponse]) -> bytes:
+        """Returns the books as a JSON array."""
+        return b"[" + self.encode_many(books) + b"]"
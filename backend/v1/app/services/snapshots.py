@@ -0,0 +1,77 @@
+"""LibookTrac Backend Snapshot File Service."""
+
+import contextlib
+import fcntl
+import gzip
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import BinaryIO
+
+
+def write_gzip_json(path: Path, payload: dict):
+    """
+    Writes a payload to a gzipped JSON file, replacing it atomically.
+
+    The payload goes to a temporary file of its own in the same directory,
+    so processes saving the same path at once never write into each other's
+    file; the last replace wins with a complete file.
+
+    Args:
+        path (Path): The file to write.
+        payload (dict): JSON-serializable content.
+    """
+    descriptor, temporary = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.",
+                                             suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as raw, gzip.open(raw, "wt", encoding="utf-8",
+                                                           compresslevel=5) as file:
+            json.dump(payload, file, separators=(",", ":"))
+        os.replace(temporary, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(temporary)
+        raise
+
+
+class OwnerLock:
+    """
+    Exclusive lock on a file, held by at most one process at a time.
+
+    Decides which worker of a multi-worker deployment writes state every
+    worker holds a copy of, e.g. a snapshot saved at shutdown. The lock is
+    released on `release` or when the process exits.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file: BinaryIO | None = None
+
+    @property
+    def owned(self) -> bool:
+        return self._file is not None
+
+    def acquire(self) -> bool:
+        """
+        Takes the lock without waiting.
+
+        Returns:
+            bool: False if another process holds it.
+        """
+        if self._file is not None:
+            return True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        file = open(self.path, "ab")
+        try:
+            fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            file.close()
+            return False
+        self._file = file
+        return True
+
+    def release(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,111 @@
+"""LibookTrac Backend Sorted Key List."""
+
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import Iterator
+from itertools import islice
+
+BUCKET_SIZE = 1000
+
+
+class SortedKeyList:
+    """
+    A sorted list of comparable keys stored in bounded buckets.
+
+    Inserting into or deleting from a single flat list moves every key after
+    the position, which dominates at a million keys. Splitting the keys into
+    buckets of at most 2 * BUCKET_SIZE keeps each insert and delete to one
+    small memmove plus a binary search over the bucket maxima.
+    """
+
+    def __init__(self):
+        self._buckets: list[list] = []
+        self._maxes: list = []
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator:
+        for bucket in self._buckets:
+            yield from bucket
+
+    def add(self, key):
+        """Inserts a key, appending in O(1) when keys arrive in order."""
+        buckets, maxes = self._buckets, self._maxes
+        self._size += 1
+        if not buckets:
+            buckets.append([key])
+            maxes.append(key)
+            return
+        index = bisect_left(maxes, key)
+        if index == len(maxes):
+            index -= 1
+            buckets[index].append(key)
+            maxes[index] = key
+        else:
+            insort(buckets[index], key)
+        bucket = buckets[index]
+        if len(bucket) > 2 * BUCKET_SIZE:
+            tail = bucket[BUCKET_SIZE:]
+            del bucket[BUCKET_SIZE:]
+            maxes[index] = bucket[-1]
+            buckets.insert(index + 1, tail)
+            maxes.insert(index + 1, tail[-1])
+
+    def discard(self, key):
+        """Removes a key if it is present."""
+        index = bisect_left(self._maxes, key)
+        if index == len(self._maxes):
+            return
+        bucket = self._buckets[index]
+        position = bisect_left(bucket, key)
+        if position == len(bucket) or bucket[position] != key:
+            return
+        del bucket[position]
+        self._size -= 1
+        if bucket:
+            self._maxes[index] = bucket[-1]
+        else:
+            del self._buckets[index]
+            del self._maxes[index]
+
+    def clear(self):
+        """Removes every key."""
+        self._buckets.clear()
+        self._maxes.clear()
+        self._size = 0
+
+    def _locate(self, key, right: bool) -> tuple[int, int]:
+        index = (bisect_right if right else bisect_left)(self._maxes, key)
+        if index == len(self._buckets):
+            return index, 0
+        search = bisect_right if right else bisect_left
+        return index, search(self._buckets[index], key)
+
+    def count(self, low, high) -> int:
+        """Counts the keys with low <= key <= high; either bound may be None."""
+        start = (0, 0) if low is None else self._locate(low, right=False)
+        end = (len(self._buckets), 0) if high is None else self._locate(high, right=True)
+        if end <= start:
+            return 0
+        return sum(map(len, self._buckets[start[0]:end[0]])) - start[1] + end[1]
+
+    def irange(self, low=None, high=None, exclusive_low: bool = False) -> Iterator:
+        """
+        Iterates the keys between two bounds in order.
+
+        Args:
+            low: The lower bound, None for the first key.
+            high: The inclusive upper bound, None for the last key.
+            exclusive_low (bool): Whether a key equal to `low` is skipped.
+
+        Yields:
+            The keys in [low, high], or (low, high] when exclusive_low is set.
+        """
+        index, position = (0, 0) if low is None else self._locate(low, right=exclusive_low)
+        for bucket in self._buckets[index:]:
+            for key in islice(bucket, position, None):
+                if high is not None and key > high:
+                    return
+                yield key
+            position = 0
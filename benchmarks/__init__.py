@@ -0,0 +1 @@
+"""Benchmarks for the LiBookTrac Application."""
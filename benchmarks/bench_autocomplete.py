@@ -0,0 +1,73 @@
+"""
+Benchmark for the Title and Author Autocomplete Index.
+
+Builds an AutocompleteIndex over a synthetic catalog with skewed borrow
+counts and times exact and typo-tolerant completions of typed prefixes.
+
+    python -m benchmarks.bench_autocomplete --books 200000
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime
+from uuid import uuid4
+
+from backend.v1.app.models.books import BookResponse
+from backend.v1.app.services.autocomplete import AutocompleteIndex
+from benchmarks.common import measure
+
+WORDS = [f"{syllable}{suffix}" for syllable in ("mar", "tol", "hob", "dra", "sil", "ven",
+                                                "cor", "lum", "bri", "ast")
+         for suffix in ("a", "en", "ion", "ith", "or", "us", "ley", "ward")]
+NAMES = [f"{word.title()}{i}" for i, word in enumerate(WORDS * 50)]
+
+
+def make_books(count: int, seed: int = 7) -> list[BookResponse]:
+    rng = random.Random(seed)  # noqa: S311
+    return [
+        BookResponse.model_construct(
+            book_id=uuid4(),
+            title=" ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 5))),
+            author_first_name=rng.choice(NAMES), author_middle_name=None,
+            author_last_name=rng.choice(NAMES), book_entry_time=datetime(2024, 1, 1))
+        for _ in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--books", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=300)
+    args = parser.parse_args()
+
+    books = make_books(args.books)
+    index = AutocompleteIndex()
+    start = time.perf_counter()
+    for book in books:
+        index.book_added(book)
+    rng = random.Random(11)  # noqa: S311
+    for book in books:
+        index.record_borrow(book.book_id, int(rng.paretovariate(1.2)))
+    print(f"{args.books} books, {len(index)} completions, "
+          f"built in {time.perf_counter() - start:.1f} s")
+
+    queries = {
+        "1 letter": "m",
+        "3 letters": "tol",
+        "2 words": "marion hob",
+        "author": "lum",
+        "typo": "tlo",
+        "no match": "zzq",
+    }
+    for name, query in queries.items():
+        stats = measure(lambda query=query: index.suggest(query, 10), args.repeat)
+        print(f"  {name:<10} {query!r:<14} p50 {stats['p50_ms']:>8.3f} ms  "
+              f"p95 {stats['p95_ms']:>8.3f} ms")
+    stats = measure(lambda: index.record_borrow(books[0].book_id), args.repeat)
+    print(f"  record_borrow            p50 {stats['p50_ms']:>8.3f} ms  "
+          f"p95 {stats['p95_ms']:>8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
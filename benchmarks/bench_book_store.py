@@ -0,0 +1,176 @@
+"""
+Memory Benchmark for the Compact Book Store.
+
+Loads the same synthetic catalog into the object-based InMemoryBookRepository
+and the columnar CompactBookRepository and reports bytes per book, measured
+with tracemalloc, plus the cost of materializing books back out. The
+object store costs kilobytes per book, so it can be measured on a smaller
+sample with --baseline-books; its cost per book does not depend on size.
+
+The server also keeps indexes and caches of every book. With --process,
+each backend is loaded again in a fresh process with every route module's
+listeners subscribed, as the server's warm-up feeds them, and the resident
+set size of the whole process is reported.
+
+    python -m benchmarks.bench_book_store --books 1000000 --baseline-books 250000 --process
+"""
+
+import argparse
+import asyncio
+import gc
+import multiprocessing
+import os
+import random
+import resource
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from uuid import uuid4
+
+from backend.v1.app.database.compact import CompactBookRepository
+from backend.v1.app.database.repository import InMemoryBookRepository
+from backend.v1.app.models.books import (
+    BookAudience,
+    BookCreateCondition,
+    BookFormat,
+    BookLanguage,
+    BookLocation,
+    BookResponse,
+)
+
+BATCH_SIZE = 10_000
+START = datetime(2020, 1, 1)
+PUBLISHERS = [f"Publisher {i}" for i in range(500)]
+GENRES = [f"genre{i}" for i in range(200)]
+TAGS = [f"tag{i}" for i in range(300)]
+FIRST_NAMES = [f"First{i}" for i in range(2_000)]
+LAST_NAMES = [f"Surname{i}" for i in range(50_000)]
+
+
+def make_batch(rng: random.Random, start: int, count: int) -> list[BookResponse]:
+    books = []
+    for offset in range(start, start + count):
+        entry_time = START + timedelta(seconds=offset)
+        books.append(BookResponse.model_construct(
+            book_id=uuid4(),
+            title=f"The {rng.choice(LAST_NAMES)} Affair, Volume {offset}",
+            author_first_name=rng.choice(FIRST_NAMES),
+            author_middle_name=None,
+            author_last_name=rng.choice(LAST_NAMES),
+            description=f"A story about {rng.choice(GENRES)} and {rng.choice(TAGS)}.",
+            language=rng.choice(list(BookLanguage)),
+            book_type=BookFormat.HARDCOVER,
+            ebook_type=None,
+            hardcover_condition=rng.choice(list(BookCreateCondition)),
+            publisher=rng.choice(PUBLISHERS),
+            edition=rng.randint(1, 5),
+            page_count=rng.randint(50, 900),
+            tags=sorted(rng.sample(TAGS[:30], 2)),
+            isbn=f"978{offset:010d}",
+            genre=rng.choice(GENRES),
+            publication_year=date(rng.randint(1950, 2024), 1, 1),
+            target_audience=rng.choice(list(BookAudience)),
+            location=rng.choice(list(BookLocation)),
+            replacement_cost=round(rng.uniform(5, 60), 2),
+            book_entry_time=entry_time,
+            last_updated_date=entry_time,
+        ))
+    return books
+
+
+async def load(repository, count: int) -> float:
+    """Loads `count` books batch by batch and returns the bytes the repository retains."""
+    rng = random.Random(7)  # noqa: S311
+    gc.collect()
+    tracemalloc.start()
+    for start in range(0, count, BATCH_SIZE):
+        await repository.add_many(make_batch(rng, start, min(BATCH_SIZE, count - start)))
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return retained
+
+
+async def materialize(repository) -> float:
+    start = time.perf_counter()
+    await repository.page(None, 1000)
+    return (time.perf_counter() - start) * 1000
+
+
+async def run(books: int, baseline_books: int):
+    for name, factory, count in (("objects (memory)", InMemoryBookRepository, baseline_books),
+                                 ("columnar (compact)", CompactBookRepository, books)):
+        repository = factory()
+        retained = await load(repository, count)
+        page_ms = await materialize(repository)
+        print(f"  {name:<20} {count:>9} books {retained / count:>8.0f} bytes/book  "
+              f"{retained / 2**20:>8.1f} MiB  page of 1000: {page_ms:.1f} ms")
+        await repository.clear()
+        del repository
+        gc.collect()
+
+
+def resident_bytes() -> int:
+    """Returns the resident set size of this process."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # Peak rather than current size, in KiB on Linux.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+async def load_server(count: int) -> tuple[int, int]:
+    # Imported here, after the backend is chosen through the environment.
+    from backend.v1.app.database.connect import get_book_repository
+    from backend.v1.app.server import server  # noqa: F401 - subscribes every listener
+    from backend.v1.app.services import events
+
+    repository = get_book_repository()
+    await repository.connect()
+    rng = random.Random(7)  # noqa: S311
+    gc.collect()
+    before = resident_bytes()
+    for start in range(0, count, BATCH_SIZE):
+        batch = make_batch(rng, start, min(BATCH_SIZE, count - start))
+        await repository.add_many(batch)
+        events.books_added(batch)
+    gc.collect()
+    return before, resident_bytes()
+
+
+def server_worker(backend: str, count: int, results):
+    os.environ["LIBOOKTRAC_BOOKS_BACKEND"] = backend
+    os.environ.pop("LIBOOKTRAC_CATALOG_DATA_DIR", None)
+    results.put(asyncio.run(load_server(count)))
+
+
+def run_processes(books: int, baseline_books: int):
+    """Loads each backend in a fresh server process and reports its resident set size."""
+    context = multiprocessing.get_context("spawn")
+    for name, backend, count in (("objects (memory)", "memory", baseline_books),
+                                 ("columnar (compact)", "compact", books)):
+        results = context.Queue()
+        process = context.Process(target=server_worker, args=(backend, count, results))
+        process.start()
+        before, after = results.get()
+        process.join()
+        print(f"  {name:<20} {count:>9} books {(after - before) / count:>8.0f} bytes/book  "
+              f"process RSS {after / 2**20:>8.1f} MiB (listeners included)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--books", type=int, default=1_000_000)
+    parser.add_argument("--baseline-books", type=int, default=None,
+                        help="Books loaded into the object store, --books by default.")
+    parser.add_argument("--process", action="store_true",
+                        help="Also report the whole server process's resident set size.")
+    args = parser.parse_args()
+    asyncio.run(run(args.books, args.baseline_books or args.books))
+    if args.process:
+        run_processes(args.books, args.baseline_books or args.books)
+
+
+if __name__ == "__main__":
+    main()
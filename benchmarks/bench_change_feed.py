@@ -0,0 +1,71 @@
+"""
+Fan-Out Benchmark for the Catalog Change Feed.
+
+Attaches thousands of streaming subscribers to one ChangeFeed, publishes
+bursts of changes and reports what a write costs the writer and how long
+until every subscriber has received the burst. One subscriber never reads,
+to show a stalled client does not hold writers back.
+
+    python -m benchmarks.bench_change_feed --subscribers 1000 5000 --changes 2000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from backend.v1.app.services.change_feed import ChangeFeed
+from benchmarks.bench_book_store import make_batch
+
+BURST = 100
+
+
+async def subscriber(feed: ChangeFeed, target: int, done: list[int]):
+    async for chunk in feed.stream():
+        done[0] += chunk.count(b"\nevent: ")
+        if done[0] >= target:
+            return
+
+
+async def stall(feed: ChangeFeed):
+    """Reads the first change, then never reads again."""
+    stream = feed.stream()
+    await anext(stream)
+    return stream
+
+
+async def run(subscribers: int, changes: int):
+    feed = ChangeFeed(history=changes, max_lag=changes)
+    books = make_batch(random.Random(3), 0, changes)  # noqa: S311
+    counters = [[0] for _ in range(subscribers)]
+    tasks = [asyncio.create_task(subscriber(feed, changes, counter)) for counter in counters]
+    stalled = asyncio.create_task(stall(feed))
+    await asyncio.sleep(0.1)
+
+    publishing = 0.0
+    start = time.perf_counter()
+    for offset in range(0, changes, BURST):
+        burst_start = time.perf_counter()
+        for book in books[offset:offset + BURST]:
+            feed.book_added(book)
+        publishing += time.perf_counter() - burst_start
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+    delivered = time.perf_counter() - start
+    await (await stalled).aclose()
+    print(f"  {subscribers:>6} subscribers: {publishing / changes * 1e6:6.1f} us per write, "
+          f"{changes} changes delivered to all in {delivered:5.2f} s "
+          f"({changes * subscribers / delivered:,.0f} events/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--subscribers", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--changes", type=int, default=2000)
+    args = parser.parse_args()
+    for subscribers in args.subscribers:
+        asyncio.run(run(subscribers, args.changes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark for Near-Duplicate Detection.
+
+Builds a synthetic catalog of random titles with a share of near-duplicates
+(a dropped letter, a changed article, a misspelled surname), then reports:
+- the memory and time of indexing it in DuplicateIndex and of a lookup;
+- the time of a full audit on every core, with the recall of the injected
+  duplicates.
+
+    python -m benchmarks.bench_duplicates --books 200000 --workers 4
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+from datetime import datetime
+from uuid import uuid4
+
+from backend.v1.app.models.books import BookFormat, BookResponse
+from backend.v1.app.services import duplicates
+
+DUPLICATE_SHARE = 0.01
+
+
+def make_word(rng: random.Random) -> str:
+    return "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 9)))
+
+
+def typo(rng: random.Random, text: str) -> str:
+    position = rng.randrange(len(text))
+    return text[:position] + text[position + 1:] if len(text) > 4 else text + "s"
+
+
+def make_catalog(count: int) -> tuple[list[BookResponse], set[frozenset[str]]]:
+    """Returns the books and the id pairs of the injected duplicates."""
+    rng = random.Random(11)  # noqa: S311
+    words = [make_word(rng) for _ in range(20_000)]
+    surnames = [make_word(rng).title() for _ in range(50_000)]
+    books, injected = [], set()
+    start = datetime(2024, 1, 1)
+    for _ in range(count):
+        if books and rng.random() < DUPLICATE_SHARE:
+            original = rng.choice(books)
+            title = typo(rng, original.title) if rng.random() < 0.5 else f"The {original.title}"
+            surname = (typo(rng, original.author_last_name) if rng.random() < 0.5
+                       else original.author_last_name)
+            injected.add(frozenset((str(original.book_id), None)))
+        else:
+            original = None
+            title = " ".join(rng.sample(words, rng.randint(2, 6))).title()
+            surname = rng.choice(surnames)
+        book = BookResponse.model_construct(
+            book_id=uuid4(), title=title, author_first_name="Ann", author_middle_name=None,
+            author_last_name=surname, book_type=BookFormat.HARDCOVER, isbn=None,
+            book_entry_time=start, last_updated_date=start)
+        if original is not None:
+            injected.discard(frozenset((str(original.book_id), None)))
+            injected.add(frozenset((str(original.book_id), str(book.book_id))))
+        books.append(book)
+    return books, injected
+
+
+def bench_index(books: list[BookResponse]):
+    tracemalloc.start()
+    start = time.perf_counter()
+    index = duplicates.DuplicateIndex()
+    for book in books:
+        index.book_added(book)
+    index.candidates(books[0])
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for book in books[:1000]:
+        index.candidates(book)
+    lookup = (time.perf_counter() - start) / 1000
+    print(f"  index: {len(books)} books in {elapsed:5.1f} s (traced), "
+          f"{size / len(books):5.0f} bytes per book, {lookup * 1e6:5.0f} us per lookup")
+
+
+def bench_audit(books: list[BookResponse], injected: set[frozenset[str]], workers: int | None):
+    lines = [book.model_dump_json(include={"book_id", "title", "author_first_name",
+                                           "author_last_name", "book_type", "isbn"}).encode()
+             for book in books]
+    start = time.perf_counter()
+    pairs = duplicates.audit(lines, workers)
+    elapsed = time.perf_counter() - start
+    found = {frozenset(pair[:2]) for pair in pairs}
+    print(f"  audit: {len(books)} books in {elapsed:5.1f} s, {len(pairs)} pairs, "
+          f"recall {len(found & injected) / len(injected):.1%} of {len(injected)} injected")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--books", type=int, default=200_000)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    books, injected = make_catalog(args.books)
+    bench_index(books)
+    bench_audit(books, injected, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Endpoint Benchmarks through an In-Process ASGI Client.
+
+Times adding, listing and deleting books against catalogs of several sizes,
+without a network or server process in the way.
+
+    python -m benchmarks.bench_endpoints --sizes 100 1000 10000
+"""
+
+import argparse
+import asyncio
+import json
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import httpx
+
+from backend.v1.app.database.connect import get_book_repository
+from backend.v1.app.database.repository import InMemoryBookRepository
+from backend.v1.app.models.books import BookCreate, BookResponse
+from backend.v1.app.routes import books
+from backend.v1.app.server.server import admission, app
+from backend.v1.app.services import events
+from benchmarks.bench_models import BOOK
+from benchmarks.common import measure_async
+
+NEW_BOOK = {key: value for key, value in BOOK.items() if key != "isbn"}
+
+
+async def seed(repository: InMemoryBookRepository, count: int):
+    """Fills the catalog directly, bypassing HTTP, so only the timed calls go through it."""
+    await repository.clear()
+    events.catalog_cleared()
+    template = BookCreate(**NEW_BOOK).__dict__
+    start = datetime(2024, 1, 1)
+    seeded = [
+        BookResponse.model_construct(**template, book_id=uuid4(),
+                                     book_entry_time=start + timedelta(seconds=i),
+                                     last_updated_date=start + timedelta(seconds=i))
+        for i in range(count)
+    ]
+    await repository.add_many(seeded)
+    events.books_added(seeded)
+
+
+async def run_size(client: httpx.AsyncClient, size: int, repeat: int) -> dict[str, dict]:
+    added = []
+
+    async def add():
+        response = await client.post("/books/add", json=NEW_BOOK)
+        added.append(response.json()["book_id"])
+
+    async def list_page():
+        await client.get("/books/get/all", params={"limit": 100})
+
+    async def list_all_uncached():
+        books.books_cache.clear()
+        await client.get("/books/get/all")
+
+    async def delete():
+        await client.delete(f"/books/delete/{added.pop()}")
+
+    return {
+        f"endpoints.add@{size}": await measure_async(add, repeat),
+        f"endpoints.list_page@{size}": await measure_async(list_page, repeat),
+        f"endpoints.list_all_uncached@{size}": await measure_async(
+            list_all_uncached, max(5, repeat // max(1, size // 100))),
+        f"endpoints.delete@{size}": await measure_async(delete, repeat, warmup=0),
+    }
+
+
+async def run(sizes: list[int], repeat: int) -> dict[str, dict]:
+    repository = InMemoryBookRepository()
+    app.dependency_overrides[get_book_repository] = lambda: repository
+    # The benchmark is a single client well over any per-client rate.
+    rate_limiters = dict(admission.rate_limiters)
+    admission.rate_limiters.clear()
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for size in sizes:
+            await seed(repository, size)
+            results.update(await run_size(client, size, repeat))
+    app.dependency_overrides.pop(get_book_repository, None)
+    admission.rate_limiters.update(rate_limiters)
+    await repository.clear()
+    events.catalog_cleared()
+    return results
+
+
+def suite(sizes: tuple[int, ...] = (100, 1000, 10_000), repeat: int = 200) -> dict[str, dict]:
+    """Runs the endpoint benchmarks and returns their metrics by name."""
+    return asyncio.run(run(list(sizes), repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10_000])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    print(json.dumps(suite(tuple(args.sizes), args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark for Streaming Catalog Exports.
+
+Exports a synthetic compact catalog in each format and reports the output
+rate and the peak memory traced while exporting, which should not grow
+with the catalog size.
+
+    python -m benchmarks.bench_export --books 100000 400000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import tracemalloc
+
+from backend.v1.app.database.compact import CompactBookRepository
+from backend.v1.app.services import export
+from benchmarks.bench_book_store import BATCH_SIZE, make_batch
+
+CASES = [("ndjson", "none"), ("ndjson", "gzip"), ("ndjson", "zstd"), ("csv", "gzip"),
+         ("parquet", "zstd")]
+
+
+async def load(count: int) -> CompactBookRepository:
+    repository = CompactBookRepository()
+    rng = random.Random(7)  # noqa: S311
+    for start in range(0, count, BATCH_SIZE):
+        await repository.add_many(make_batch(rng, start, min(BATCH_SIZE, count - start)))
+    return repository
+
+
+async def measure(repository: CompactBookRepository, export_format: str,
+                  compression: str) -> tuple[float, int, int]:
+    """Returns the seconds taken, output bytes and peak traced bytes of one export."""
+    size = 0
+    start = time.perf_counter()
+    async for chunk in export.export_chunks(repository, export_format, compression):
+        size += len(chunk)
+    elapsed = time.perf_counter() - start
+
+    # Tracing slows the export down severalfold, so memory is measured in a
+    # second, untimed pass.
+    tracemalloc.start()
+    async for _ in export.export_chunks(repository, export_format, compression):
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, size, peak
+
+
+async def run(sizes: list[int]):
+    for count in sizes:
+        repository = await load(count)
+        print(f"{count} books")
+        for export_format, compression in CASES:
+            try:
+                export.check_available(export_format, compression)
+            except export.ExportUnavailableError as error:
+                print(f"  {export_format:<8}{compression:<6} skipped: {error}")
+                continue
+            elapsed, size, peak = await measure(repository, export_format, compression)
+            print(f"  {export_format:<8}{compression:<6} {size / 1e6:8.1f} MB "
+                  f"{count / elapsed:>9,.0f} books/s {size / 1e6 / elapsed:7.1f} MB/s "
+                  f"peak {peak / 1e6:6.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--books", type=int, nargs="+", default=[100_000, 400_000])
+    args = parser.parse_args()
+    asyncio.run(run(args.books))
+
+
+if __name__ == "__main__":
+    main()
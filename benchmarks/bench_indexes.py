@@ -0,0 +1,108 @@
+"""
+Benchmark for the Books Secondary Indexes.
+
+Builds a BookIndex over a synthetic catalog and times filter queries.
+
+    python -m benchmarks.bench_indexes --books 1000000
+"""
+
+import argparse
+import random
+import statistics
+import time
+from dataclasses import dataclass
+from datetime import date
+from uuid import UUID, uuid4
+
+from backend.v1.app.models.books import BookAudience, BookFormat, BookLanguage, BookLocation
+from backend.v1.app.services.indexes import BookIndex, parse_criteria
+
+GENRES = [f"genre{i}" for i in range(200)]
+TAGS = [f"tag{i}" for i in range(2000)]
+SURNAMES = [f"surname{i}" for i in range(50_000)]
+
+QUERIES = [
+    "author=surname42",
+    "genre=genre7&language=french",
+    "tag=tag99&location=branch2",
+    "genre=genre3&publication_year=1990..1995",
+    "language=english&book_type=ebook&target_audience=children&replacement_cost=10..11",
+    "author=surname7&genre=genre1&tag=tag5",
+]
+
+
+@dataclass(slots=True)
+class BenchBook:
+    """Slotted stand-in carrying only the attributes BookIndex reads."""
+    book_id: UUID
+    author_first_name: str
+    author_middle_name: str | None
+    author_last_name: str | None
+    genre: str | None
+    tags: list[str] | None
+    language: BookLanguage
+    book_type: BookFormat
+    location: BookLocation
+    target_audience: BookAudience
+    publication_year: date | None
+    replacement_cost: float | None
+
+
+def make_books(count: int, seed: int = 7) -> list[BenchBook]:
+    rng = random.Random(seed)  # noqa: S311
+    return [
+        BenchBook(
+            book_id=uuid4(),
+            author_first_name=rng.choice(SURNAMES),
+            author_middle_name=None,
+            author_last_name=rng.choice(SURNAMES),
+            genre=rng.choice(GENRES),
+            tags=rng.sample(TAGS, 3),
+            language=rng.choice(list(BookLanguage)),
+            book_type=rng.choice(list(BookFormat)),
+            location=rng.choice(list(BookLocation)),
+            target_audience=rng.choice(list(BookAudience)),
+            publication_year=date(rng.randint(1900, 2024), rng.randint(1, 12), 1),
+            replacement_cost=round(rng.uniform(1, 100), 2),
+        )
+        for _ in range(count)
+    ]
+
+
+def run(book_count: int, repeat: int) -> dict:
+    books = make_books(book_count)
+    index = BookIndex()
+    start = time.perf_counter()
+    for book in books:
+        index.book_added(book)
+    build_seconds = time.perf_counter() - start
+
+    results = {"books": book_count, "build_seconds": round(build_seconds, 3), "queries": {}}
+    for criteria in QUERIES:
+        predicates = parse_criteria(criteria)
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            matches = index.query(predicates)
+            timings.append(time.perf_counter() - start)
+        results["queries"][criteria] = {
+            "matches": len(matches),
+            "median_ms": round(statistics.median(timings) * 1000, 4),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--books", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    results = run(args.books, args.repeat)
+    print(f"built index over {results['books']} books in {results['build_seconds']}s")
+    for criteria, timing in results["queries"].items():
+        print(f"{timing['median_ms']:>9.4f} ms  {timing['matches']:>7} matches  {criteria}")
+
+
+if __name__ == "__main__":
+    main()
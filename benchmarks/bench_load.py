@@ -0,0 +1,121 @@
+"""
+Local Load Test against a uvicorn Server.
+
+Starts the API in a uvicorn subprocess, seeds the catalog through the bulk
+endpoint and runs concurrent clients with a read-heavy mix of requests.
+
+    python -m benchmarks.bench_load --clients 32 --duration 10
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import secrets
+import socket
+import subprocess  # noqa: S404
+import sys
+import time
+
+import httpx
+
+from benchmarks.bench_endpoints import NEW_BOOK
+from benchmarks.common import summarize
+
+STARTUP_TIMEOUT = 20.0
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int) -> subprocess.Popen:
+    return subprocess.Popen(  # noqa: S603
+        [sys.executable, "-m", "uvicorn", "backend.v1.app.server.server:app",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning",
+         "--no-access-log"],
+        # Every simulated client shares one address, so per-client rate limits
+        # are lifted; the concurrency limits and load shedding stay on.
+        env={"LIBOOKTRAC_JWT_SECRET_KEY": secrets.token_hex(32), **os.environ,
+             "LIBOOKTRAC_RATE_LIMITS": json.dumps(dict.fromkeys(("read", "write", "auth"), 1e9))},
+    )
+
+
+async def wait_until_ready(client: httpx.AsyncClient):
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while True:
+        try:
+            if (await client.get("/health/ready")).status_code == 200:
+                return
+        except httpx.TransportError:
+            if time.monotonic() > deadline:
+                raise
+        await asyncio.sleep(0.1)
+
+
+async def seed(client: httpx.AsyncClient, count: int):
+    body = "\n".join(json.dumps(NEW_BOOK) for _ in range(count))
+    response = await client.post("/books/add/bulk", content=body,
+                                 headers={"Content-Type": "application/x-ndjson"})
+    response.raise_for_status()
+
+
+async def client_loop(client: httpx.AsyncClient, deadline: float, write_ratio: float,
+                      seed_value: int, timings: list[float], errors: list[int]):
+    rng = random.Random(seed_value)  # noqa: S311
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        if rng.random() < write_ratio:
+            response = await client.post("/books/add", json=NEW_BOOK)
+        else:
+            response = await client.get("/books/get/all", params={"limit": 50})
+        timings.append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            errors.append(response.status_code)
+
+
+async def run(clients: int, duration: float, books: int, write_ratio: float) -> dict[str, dict]:
+    port = free_port()
+    server = start_server(port)
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}",
+                                     limits=limits, timeout=30) as client:
+            await wait_until_ready(client)
+            await seed(client, books)
+            timings: list[float] = []
+            errors: list[int] = []
+            start = time.perf_counter()
+            await asyncio.gather(*(client_loop(client, start + duration, write_ratio, i,
+                                               timings, errors) for i in range(clients)))
+            elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+    metrics = summarize(timings, elapsed)
+    metrics["errors"] = len(errors)
+    return {f"load.mixed@{clients}clients": metrics}
+
+
+def suite(clients: int = 16, duration: float = 5.0, books: int = 1000,
+          write_ratio: float = 0.1) -> dict[str, dict]:
+    """Runs the load test and returns its metrics by name."""
+    return asyncio.run(run(clients, duration, books, write_ratio))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--books", type=int, default=1000)
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    args = parser.parse_args()
+    print(json.dumps(suite(args.clients, args.duration, args.books, args.write_ratio),
+                     indent=2))
+
+
+if __name__ == "__main__":
+    main()
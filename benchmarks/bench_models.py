@@ -0,0 +1,65 @@
+"""
+Micro-benchmarks for Model Validation and Password Hashing.
+
+    python -m benchmarks.bench_models
+"""
+
+import argparse
+import json
+
+from backend.v1.app.auth.passwords import hash_password
+from backend.v1.app.models.books import BookCreate
+from backend.v1.app.models.users import UserRegister
+from benchmarks.common import measure
+
+BOOK = {
+    "title": "The Hobbit",
+    "author_first_name": "John",
+    "author_last_name": "Tolkien",
+    "description": "A hobbit is swept into a quest to reclaim a dragon's hoard.",
+    "language": "english",
+    "book_type": "hardcover",
+    "hardcover_condition": "new",
+    "page_count": 310,
+    "tags": ["fantasy", "classic", "adventure"],
+    "isbn": "9780261103344",
+    "genre": "Fantasy",
+    "publication_year": "1937-09-21",
+    "target_audience": "young_adult",
+    "location": "main",
+    "replacement_cost": 12.5,
+}
+
+USER = {
+    "first_name": "bilbo",
+    "last_name": "baggins",
+    "phone_number": "123-456-7890",
+    "date_of_birth": "1990-09-22",
+    "address": "Bag End, Hobbiton",
+    "email": "bilbo@example.com",
+    "username": "Bilbo",
+    "password": "Secret!Pass1",
+    "user_category": "staff",
+}
+
+
+def suite(repeat: int = 2000, hash_repeat: int = 5) -> dict[str, dict]:
+    """Runs the micro-benchmarks and returns their metrics by name."""
+    return {
+        "models.book_create_validate": measure(lambda: BookCreate(**BOOK), repeat),
+        "models.user_register_validate": measure(lambda: UserRegister(**USER), repeat),
+        "models.hash_password": measure(lambda: hash_password(USER["password"]),
+                                        hash_repeat, warmup=1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--hash-repeat", type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(suite(args.repeat, args.hash_repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
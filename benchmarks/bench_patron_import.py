@@ -0,0 +1,112 @@
+"""
+Benchmark for Bulk Patron Imports.
+
+Imports a synthetic NDJSON file of patrons, 2% of them invalid and 1%
+reusing a username, into an in-memory MongoDB stand-in, once row by row
+(validate, look up, hash, insert_one) and once with the chunked import.
+bcrypt runs at `--rounds` to keep the run short; the time a real import
+takes at the production cost is projected from a sample of hashes.
+
+    python -m benchmarks.bench_patron_import --patrons 5000 --workers 4
+
+The stand-in scans the collection on every lookup, which makes the row by
+row loop worse than it would be against an indexed MongoDB.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from mongomock_motor import AsyncMongoMockClient
+from passlib.context import CryptContext
+
+from backend.v1.app.auth import passwords
+from backend.v1.app.models.users import UserRegister
+from backend.v1.app.services import patron_import
+
+PRODUCTION_CONTEXT = passwords.pwd_context
+PROJECTED_PATRONS = 50_000
+
+
+def make_patrons(count: int, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)  # noqa: S311
+    patrons = []
+    for n in range(count):
+        username = f"patron{rng.randrange(count)}" if rng.random() < 0.01 else f"patron{n}"
+        patrons.append({
+            "first_name": "ada", "last_name": "lovelace",
+            "phone_number": f"555-{rng.randrange(1000):03d}-{rng.randrange(10000):04d}",
+            "date_of_birth": f"{rng.randint(1950, 2010)}-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}",
+            "address": f"{rng.randint(1, 999)} Elm Street", "email": f"{username}@example.org",
+            "username": username,
+            "password": "password" if rng.random() < 0.02 else f"Secret!Pass{n}",
+            "user_category": rng.choice(["student", "staff", "parent"]),
+        })
+    return patrons
+
+
+async def row_by_row(source: Path) -> float:
+    """The per-row loop the import replaces."""
+    users = AsyncMongoMockClient()["bench"]["users"]
+    start = time.perf_counter()
+    with source.open("rb") as lines:
+        for line in lines:
+            try:
+                user = UserRegister.model_validate_json(line)
+            except ValueError:
+                continue
+            if await users.find_one({"$or": [{"username": user.username},
+                                             {"email": user.email}]}):
+                continue
+            document = patron_import.to_document(user, passwords.hash_password(user.password))
+            await users.insert_one(document)
+    return time.perf_counter() - start
+
+
+async def chunked(source: Path, workers: int) -> patron_import.ImportReport:
+    users = AsyncMongoMockClient()["bench"]["users"]
+    return await patron_import.import_file(source, users, source.with_suffix(".errors"),
+                                           source.with_suffix(".checkpoint"),
+                                           csv_format=False, workers=workers)
+
+
+def production_hash_seconds(samples: int = 5) -> float:
+    start = time.perf_counter()
+    for _ in range(samples):
+        PRODUCTION_CONTEXT.hash("Secret!Pass1")
+    return (time.perf_counter() - start) / samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--patrons", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--rounds", type=int, default=4, help="bcrypt cost of the benchmark.")
+    args = parser.parse_args()
+
+    passwords.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto",
+                                         bcrypt__rounds=args.rounds)
+    with tempfile.TemporaryDirectory() as directory:
+        source = Path(directory) / "patrons.ndjson"
+        source.write_text("\n".join(json.dumps(patron)
+                                    for patron in make_patrons(args.patrons)) + "\n")
+        serial = asyncio.run(row_by_row(source))
+        report = asyncio.run(chunked(source, args.workers))
+
+    print(f"{args.patrons} patrons, bcrypt cost {args.rounds}, {args.workers} workers")
+    print(f"  row by row   {serial:8.2f} s {args.patrons / serial:>9,.0f} rows/s")
+    print(f"  chunked      {report.seconds:8.2f} s {args.patrons / report.seconds:>9,.0f} rows/s "
+          f"({report.imported} imported, {report.rejected} rejected)")
+    per_hash = production_hash_seconds()
+    projected = PROJECTED_PATRONS * (per_hash / args.workers + report.seconds / args.patrons)
+    print(f"  at the production cost ({per_hash * 1000:.0f} ms per hash) importing "
+          f"{PROJECTED_PATRONS} patrons would take about {projected / 60:.1f} min")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Restart Benchmark for the Durable In-Memory Catalog.
+
+Loads a synthetic catalog through DurableBookRepository, stops it (which
+takes a final snapshot) and times how long a fresh repository takes to
+recover it. For comparison it also times recovering a smaller catalog
+from the write-ahead log alone, with no snapshot, and the throughput of
+concurrent single-book writes under each fsync policy.
+
+    python -m benchmarks.bench_recovery --books 1000000 --wal-books 100000
+"""
+
+import argparse
+import asyncio
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from backend.v1.app.database.compact import CompactBookRepository
+from backend.v1.app.database.durable import DurableBookRepository
+from backend.v1.app.database.repository import InMemoryBookRepository
+from benchmarks.bench_book_store import BATCH_SIZE, make_batch
+
+WRITERS = 50
+WRITES = 2000
+
+
+async def fill(directory: Path, factory, count: int, snapshot: bool):
+    repository = DurableBookRepository(factory(), directory, fsync="never",
+                                       snapshot_interval=0)
+    await repository.connect()
+    rng = random.Random(7)  # noqa: S311
+    for start in range(0, count, BATCH_SIZE):
+        await repository.add_many(make_batch(rng, start, min(BATCH_SIZE, count - start)))
+    if snapshot:
+        await repository.close()
+    else:
+        await repository.wal.close()
+
+
+async def recover(directory: Path, factory) -> tuple[float, int]:
+    start = time.perf_counter()
+    repository = DurableBookRepository(factory(), directory, snapshot_interval=0)
+    await repository.connect()
+    elapsed = time.perf_counter() - start
+    count = await repository.count()
+    await repository.wal.close()
+    return elapsed, count
+
+
+async def write_throughput(directory: Path, fsync: str) -> float:
+    repository = DurableBookRepository(CompactBookRepository(), directory, fsync=fsync,
+                                       snapshot_interval=0)
+    await repository.connect()
+    books = make_batch(random.Random(9), 0, WRITES)  # noqa: S311
+    start = time.perf_counter()
+
+    async def writer(offset: int):
+        for book in books[offset::WRITERS]:
+            await repository.add(book)
+
+    await asyncio.gather(*(writer(offset) for offset in range(WRITERS)))
+    elapsed = time.perf_counter() - start
+    syncs = repository.wal.syncs
+    await repository.wal.close()
+    print(f"  fsync={fsync:<7} {WRITES / elapsed:>9.0f} writes/s  {syncs:>5} fsyncs "
+          f"for {WRITES} writes")
+    return elapsed
+
+
+async def run(books: int, wal_books: int):
+    root = Path(tempfile.mkdtemp(prefix="libooktrac-recovery-"))
+    try:
+        for name, factory in (("compact", CompactBookRepository),
+                              ("memory", InMemoryBookRepository)):
+            count = books if factory is CompactBookRepository else wal_books
+            directory = root / f"snapshot-{name}"
+            await fill(directory, factory, count, snapshot=True)
+            elapsed, recovered = await recover(directory, factory)
+            print(f"  {name:<8} snapshot: {recovered:>9} books recovered in {elapsed:6.2f} s")
+
+        directory = root / "wal-only"
+        await fill(directory, CompactBookRepository, wal_books, snapshot=False)
+        elapsed, recovered = await recover(directory, CompactBookRepository)
+        print(f"  compact  log only: {recovered:>9} books recovered in {elapsed:6.2f} s "
+              f"({recovered / elapsed:,.0f} books/s)")
+
+        for fsync in ("always", "batch", "never"):
+            await write_throughput(root / f"writes-{fsync}", fsync)
+    finally:
+        shutil.rmtree(root)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--books", type=int, default=1_000_000)
+    parser.add_argument("--wal-books", type=int, default=100_000,
+                        help="Books for the log-only and object store recoveries.")
+    args = parser.parse_args()
+    asyncio.run(run(args.books, args.wal_books))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark for Serializing Book Lists.
+
+Compares FastAPI's response_model path with the cached per-book JSON path.
+
+    python -m benchmarks.bench_serialization --books 10000 100000
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import date, datetime, timedelta
+from uuid import uuid4
+
+from pydantic import TypeAdapter
+
+from backend.v1.app.models.books import BookResponse
+from backend.v1.app.services.serialization import BookJSONCache, encode_book
+
+GENRES = [f"genre{i}" for i in range(200)]
+
+
+def make_books(count: int, seed: int = 7) -> list[BookResponse]:
+    rng = random.Random(seed)  # noqa: S311
+    entry_time = datetime(2024, 1, 1)
+    return [
+        BookResponse(
+            book_id=uuid4(),
+            title=f"Book {i}",
+            author_first_name="Author",
+            author_last_name=f"Surname{rng.randint(1, 50_000)}",
+            description="A synthetic book used to benchmark serialization. " * 3,
+            genre=rng.choice(GENRES),
+            tags=[f"tag{rng.randint(1, 2000)}" for _ in range(3)],
+            language="english",
+            book_type="hardcover",
+            hardcover_condition="new",
+            page_count=rng.randint(50, 900),
+            publication_year=date(rng.randint(1900, 2024), 1, 1),
+            target_audience="adult",
+            location="main",
+            replacement_cost=round(rng.uniform(1, 100), 2),
+            book_entry_time=entry_time + timedelta(seconds=i),
+            last_updated_date=entry_time + timedelta(seconds=i),
+        )
+        for i in range(count)
+    ]
+
+
+def response_model_path(adapter: TypeAdapter, books: list[BookResponse]) -> bytes:
+    """What FastAPI does for response_model=list[BookResponse]: validate, dump, json.dumps."""
+    validated = adapter.validate_python(books, from_attributes=True)
+    content = adapter.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None,
+                      separators=(",", ":")).encode()
+
+
+def time_median(function, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def run(book_count: int, repeat: int) -> dict:
+    books = make_books(book_count)
+    adapter = TypeAdapter(list[BookResponse])
+    cache = BookJSONCache()
+    start = time.perf_counter()
+    for book in books:
+        cache.book_added(book)
+    warm_seconds = time.perf_counter() - start
+
+    assert json.loads(cache.encode_list(books)) == json.loads(  # noqa: S101
+        response_model_path(adapter, books))
+    return {
+        "books": book_count,
+        "cache_warm_seconds": round(warm_seconds, 3),
+        "response_model_ms": round(time_median(
+            lambda: response_model_path(adapter, books), repeat) * 1000, 2),
+        "encode_uncached_ms": round(time_median(
+            lambda: b"[" + b",".join(map(encode_book, books)) + b"]", repeat) * 1000, 2),
+        "encode_cached_ms": round(time_median(
+            lambda: cache.encode_list(books), repeat) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--books", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for book_count in args.books:
+        results = run(book_count, args.repeat)
+        print(f"{results['books']:>7} books  response_model {results['response_model_ms']:>9} ms"
+              f"  uncached {results['encode_uncached_ms']:>8} ms"
+              f"  cached {results['encode_cached_ms']:>7} ms"
+              f"  (warm-up {results['cache_warm_seconds']}s)")
+
+
+if __name__ == "__main__":
+    main()
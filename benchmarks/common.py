@@ -0,0 +1,56 @@
+"""Timing Helpers Shared by the Benchmarks."""
+
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """Returns the nearest-rank percentile of `values`, e.g. fraction=0.95 for p95."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+def summarize(timings: list[float], elapsed: float | None = None) -> dict[str, float]:
+    """
+    Reduces per-operation timings to throughput and latency percentiles.
+
+    Args:
+        timings (list[float]): Seconds taken by each operation.
+        elapsed (float | None): Wall-clock seconds for all operations, when they
+            overlapped; the sum of `timings` otherwise.
+
+    Returns:
+        dict[str, float]: ops_per_second, p50_ms and p95_ms.
+    """
+    elapsed = sum(timings) if elapsed is None else elapsed
+    return {
+        "ops_per_second": round(len(timings) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(statistics.median(timings) * 1000, 4),
+        "p95_ms": round(percentile(timings, 0.95) * 1000, 4),
+    }
+
+
+def measure(function: Callable[[], object], repeat: int, warmup: int = 3) -> dict[str, float]:
+    """Times `repeat` calls of a function after `warmup` untimed calls."""
+    for _ in range(warmup):
+        function()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return summarize(timings)
+
+
+async def measure_async(function: Callable[[], Awaitable[object]], repeat: int,
+                        warmup: int = 3) -> dict[str, float]:
+    """Times `repeat` awaited calls of a coroutine function after `warmup` untimed calls."""
+    for _ in range(warmup):
+        await function()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await function()
+        timings.append(time.perf_counter() - start)
+    return summarize(timings)
@@ -0,0 +1,95 @@
+"""
+Benchmark Regression Check.
+
+Runs the model, endpoint and load benchmarks, writes the results next to the
+stored baselines and fails if throughput drops or p95 latency rises past the
+allowed thresholds. Baselines are machine specific; refresh them with
+--update on the machine that runs the check.
+
+    python -m benchmarks.regression
+    python -m benchmarks.regression --update
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from benchmarks import bench_endpoints, bench_load, bench_models
+
+BASELINE_DIR = Path(__file__).parent / "baselines"
+RESULTS_DIR = Path(__file__).parent / "results"
+
+SUITES = {
+    "models": bench_models.suite,
+    "endpoints": bench_endpoints.suite,
+    "load": bench_load.suite,
+}
+
+
+def compare(baseline: dict[str, dict], current: dict[str, dict],
+            max_throughput_drop: float, max_p95_rise: float) -> list[str]:
+    """
+    Lists the metrics that regressed against a baseline.
+
+    Args:
+        baseline (dict[str, dict]): Stored metrics by benchmark name.
+        current (dict[str, dict]): Fresh metrics by benchmark name.
+        max_throughput_drop (float): Allowed relative drop of ops_per_second.
+        max_p95_rise (float): Allowed relative rise of p95_ms.
+
+    Returns:
+        list[str]: One message per regression; empty if none.
+    """
+    failures = []
+    for name, expected in baseline.items():
+        actual = current.get(name)
+        if actual is None:
+            failures.append(f"{name}: missing from current results")
+            continue
+        floor = expected["ops_per_second"] * (1 - max_throughput_drop)
+        if actual["ops_per_second"] < floor:
+            failures.append(f"{name}: {actual['ops_per_second']} ops/s < {floor:.2f} "
+                            f"(baseline {expected['ops_per_second']})")
+        ceiling = expected["p95_ms"] * (1 + max_p95_rise)
+        if actual["p95_ms"] > ceiling:
+            failures.append(f"{name}: p95 {actual['p95_ms']} ms > {ceiling:.4f} "
+                            f"(baseline {expected['p95_ms']})")
+        if actual.get("errors"):
+            failures.append(f"{name}: {actual['errors']} failed requests")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--suite", choices=SUITES, nargs="+", default=list(SUITES))
+    parser.add_argument("--update", action="store_true",
+                        help="Overwrite the baselines with this run.")
+    parser.add_argument("--max-throughput-drop", type=float, default=0.25)
+    parser.add_argument("--max-p95-rise", type=float, default=0.5)
+    args = parser.parse_args()
+
+    failures = []
+    for name in args.suite:
+        results = SUITES[name]()
+        target = BASELINE_DIR if args.update else RESULTS_DIR
+        target.mkdir(exist_ok=True)
+        (target / f"{name}.json").write_text(json.dumps(results, indent=2) + "\n")
+        baseline_path = BASELINE_DIR / f"{name}.json"
+        if args.update:
+            print(f"{name}: baseline updated")
+        elif not baseline_path.exists():
+            print(f"{name}: no baseline, run with --update to create one")
+        else:
+            suite_failures = compare(json.loads(baseline_path.read_text()), results,
+                                     args.max_throughput_drop, args.max_p95_rise)
+            print(f"{name}: {'REGRESSED' if suite_failures else 'ok'}")
+            failures.extend(suite_failures)
+
+    for failure in failures:
+        print(f"  {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Test package for the Libooktrac Authentication Modules."""
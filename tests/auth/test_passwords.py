@@ -0,0 +1,59 @@
+"""Tests for the Password Management Module."""
+
+import asyncio
+
+import pytest
+from passlib.context import CryptContext
+
+from backend.v1.app.auth import passwords
+from backend.v1.app.auth.passwords import PasswordHasher, PasswordHasherBusyError
+
+PASSWORD = "Secret!Pass1"
+
+
+@pytest.fixture(autouse=True)
+def fast_context(monkeypatch):
+    monkeypatch.setattr(passwords, "pwd_context",
+                        CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=4))
+
+
+@pytest.mark.anyio
+async def test_hash_and_verify_in_pool():
+    hasher = PasswordHasher(max_workers=2, max_waiting=8)
+    hashed = await hasher.hash(PASSWORD)
+    assert await hasher.verify(PASSWORD, hashed) == (True, None)
+    assert (await hasher.verify("wrong", hashed))[0] is False
+    assert hasher.stats()["completed"] == 3
+    hasher.shutdown()
+
+
+@pytest.mark.anyio
+async def test_verify_rehashes_deprecated_hash(monkeypatch):
+    legacy = CryptContext(schemes=["sha256_crypt"]).hash(PASSWORD)
+    monkeypatch.setattr(passwords, "pwd_context",
+                        CryptContext(schemes=["bcrypt", "sha256_crypt"], deprecated="auto",
+                                     bcrypt__rounds=4))
+    hasher = PasswordHasher(max_workers=1, max_waiting=1)
+    matched, new_hash = await hasher.verify(PASSWORD, legacy)
+    assert matched
+    assert new_hash.startswith("$2b$")
+    assert passwords.verify_password(PASSWORD, new_hash)
+    hasher.shutdown()
+
+
+@pytest.mark.anyio
+async def test_rejects_work_beyond_queue_limit():
+    hasher = PasswordHasher(max_workers=1, max_waiting=1)
+    results = await asyncio.gather(*(hasher.hash(PASSWORD) for _ in range(3)),
+                                   return_exceptions=True)
+    assert sum(isinstance(result, PasswordHasherBusyError) for result in results) == 1
+    assert hasher.stats()["rejected"] == 1
+    assert hasher.stats()["in_flight"] == hasher.stats()["waiting"] == 0
+    hasher.shutdown()
+
+
+def test_hash_passwords_in_bulk():
+    hashes = passwords.hash_passwords([PASSWORD, "Other!Pass2", PASSWORD], max_workers=2)
+    assert len(hashes) == 3
+    assert hashes[0] != hashes[2]
+    assert passwords.verify_password("Other!Pass2", hashes[1])
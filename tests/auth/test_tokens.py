@@ -0,0 +1,141 @@
+"""Tests for the Token Management Module."""
+
+import time
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.v1.app.auth import tokens
+from backend.v1.app.auth.tokens import InvalidTokenError
+from backend.v1.app.models.tokens import TokenType
+from backend.v1.app.models.users import UserDetails, UserType
+from backend.v1.app.server.server import app
+
+client = TestClient(app)
+
+
+def make_user() -> UserDetails:
+    return UserDetails.model_construct(user_id=uuid4(), username="reader",
+                                       user_category=UserType.student)
+
+
+@pytest.fixture(autouse=True)
+def reset_token_state():
+    tokens.revocations.clear()
+    tokens.verified_tokens.clear()
+
+
+def test_issue_and_decode_access_token():
+    user = make_user()
+    claims = tokens.decode_token(tokens.create_token(user, TokenType.ACCESS))
+    assert claims.sub == str(user.user_id)
+    assert claims.username == "reader"
+    assert claims.user_category == "student"
+    assert claims.type is TokenType.ACCESS
+
+
+def test_repeated_decode_hits_cache():
+    token = tokens.create_token(make_user(), TokenType.ACCESS)
+    tokens.decode_token(token)
+    hits = tokens.verified_tokens.hits
+    tokens.decode_token(token)
+    assert tokens.verified_tokens.hits == hits + 1
+
+
+def test_cache_is_bounded():
+    cache = tokens.VerifiedTokenCache(max_size=2)
+    claims = tokens.decode_token(tokens.create_token(make_user(), TokenType.ACCESS))
+    for token in ("a", "b", "c"):
+        cache.put(token, claims)
+    assert len(cache) == 2
+    assert cache.get("a", time.time()) is None
+
+
+def test_expired_token_is_rejected(monkeypatch):
+    monkeypatch.setitem(tokens.TOKEN_TTLS, TokenType.ACCESS, lambda: -1)
+    token = tokens.create_token(make_user(), TokenType.ACCESS)
+    with pytest.raises(InvalidTokenError):
+        tokens.decode_token(token)
+
+
+def test_tampered_token_is_rejected():
+    token = tokens.create_token(make_user(), TokenType.ACCESS)
+    with pytest.raises(InvalidTokenError):
+        tokens.decode_token(token[:-2] + ("A" if token[-2] != "A" else "B") + token[-1])
+
+
+def test_wrong_token_type_is_rejected():
+    token = tokens.create_token(make_user(), TokenType.REFRESH)
+    with pytest.raises(InvalidTokenError):
+        tokens.decode_token(token, TokenType.ACCESS)
+
+
+def test_revoked_token_is_rejected_even_when_cached():
+    token = tokens.create_token(make_user(), TokenType.ACCESS)
+    tokens.decode_token(token)
+    tokens.revoke_token(token)
+    with pytest.raises(InvalidTokenError):
+        tokens.decode_token(token)
+
+
+def test_revoke_user_tokens_covers_earlier_tokens_only():
+    user = make_user()
+    old = tokens.create_token(user, TokenType.ACCESS)
+    tokens.create_password_reset_token(user)
+    assert user.password_reset_token is not None
+    tokens.revoke_user_tokens(user)
+    assert user.password_reset_token is None
+    with pytest.raises(InvalidTokenError):
+        tokens.decode_token(old)
+    time.sleep(0.001)
+    assert tokens.decode_token(tokens.create_token(user, TokenType.ACCESS))
+
+
+def test_revocations_are_evicted_after_expiry():
+    revocations = tokens.RevocationList()
+    revocations.revoke_token("expired", time.time() - 1)
+    revocations.revoke_token("live", time.time() + 60)
+    assert len(revocations) == 1
+
+
+def test_refresh_rotates_refresh_token():
+    pair = tokens.create_token_pair(make_user())
+    new_pair = tokens.refresh_token_pair(pair.refresh_token)
+    assert tokens.decode_token(new_pair.access_token).username == "reader"
+    with pytest.raises(InvalidTokenError):
+        tokens.refresh_token_pair(pair.refresh_token)
+
+
+def test_refresh_route():
+    pair = tokens.create_token_pair(make_user())
+    response = client.post("/users/token/refresh", json={"refresh_token": pair.refresh_token})
+    assert response.status_code == 200
+    assert response.json()["token_type"] == "bearer"
+    response = client.post("/users/token/refresh", json={"refresh_token": pair.refresh_token})
+    assert response.status_code == 401
+
+
+def test_logout_route_revokes_both_tokens():
+    pair = tokens.create_token_pair(make_user())
+    response = client.post("/users/logout", json={"refresh_token": pair.refresh_token},
+                           headers={"Authorization": f"Bearer {pair.access_token}"})
+    assert response.status_code == 204
+    with pytest.raises(InvalidTokenError):
+        tokens.decode_token(pair.access_token)
+    with pytest.raises(InvalidTokenError):
+        tokens.decode_token(pair.refresh_token, TokenType.REFRESH)
+
+
+def test_logout_requires_token():
+    response = client.post("/users/logout")
+    assert response.status_code == 401
+    assert response.headers["www-authenticate"] == "Bearer"
+
+
+def test_app_refuses_to_start_without_a_signing_key(monkeypatch):
+    monkeypatch.setattr(tokens.settings, "jwt_secret_key", None)
+    with pytest.raises(RuntimeError, match="LIBOOKTRAC_JWT_SECRET_KEY"):
+        tokens.create_token(make_user(), TokenType.ACCESS)
+    with pytest.raises(RuntimeError, match="LIBOOKTRAC_JWT_SECRET_KEY"), TestClient(app):
+        pass
@@ -0,0 +1,14 @@
+"""Shared Fixtures for the LiBookTrac Tests."""
+
+import os
+
+import pytest
+
+# The app refuses to start without a signing key; set before it is imported.
+os.environ.setdefault("LIBOOKTRAC_JWT_SECRET_KEY", "tests-only-signing-key-" + "0" * 32)
+
+
+@pytest.fixture
+def anyio_backend():
+    """Runs anyio marked tests on asyncio only."""
+    return "asyncio"
@@ -0,0 +1,148 @@
+"""Tests for the Write-Ahead Log and Snapshot Persistence."""
+
+import asyncio
+
+import pytest
+
+from backend.v1.app.database.compact import CompactBookRepository
+from backend.v1.app.database.durable import DurableBookRepository, read_segment
+from backend.v1.app.database.repository import DuplicateISBNError, InMemoryBookRepository
+from backend.v1.app.models.books import BookResponse
+from tests.factories import make_book
+
+
+async def contents(repository) -> list[BookResponse]:
+    return await repository.page(None, None)
+
+
+@pytest.fixture(params=[InMemoryBookRepository, CompactBookRepository])
+def open_durable(request, tmp_path):
+    def open_durable(**options) -> DurableBookRepository:
+        options.setdefault("snapshot_interval", 0)
+        return DurableBookRepository(request.param(), tmp_path / "catalog", **options)
+    return open_durable
+
+
+@pytest.mark.anyio
+async def test_catalog_survives_a_restart(open_durable):
+    repository = open_durable()
+    await repository.connect()
+    books = [make_book(offset, isbn=f"978000000000{offset}") for offset in range(6)]
+    await repository.add(books[0])
+    duplicate = make_book(9, isbn=books[0].isbn)
+    assert await repository.add_many([*books[1:], duplicate]) == [duplicate]
+    await repository.delete(books[2].book_id)
+    await repository.close()
+
+    restarted = open_durable()
+    await restarted.connect()
+    assert await contents(restarted) == [book for book in books if book != books[2]]
+    with pytest.raises(DuplicateISBNError):
+        await restarted.add(make_book(10, isbn=books[1].isbn))
+    await restarted.add(make_book(11, isbn=books[2].isbn))
+    assert await restarted.count() == 6
+    await restarted.close()
+
+
+@pytest.mark.anyio
+async def test_recovery_replays_the_log_written_after_the_last_snapshot(open_durable):
+    repository = open_durable(fsync="always")
+    await repository.connect()
+    first = [make_book(offset) for offset in range(50)]
+    await repository.add_many(first)
+    await repository.snapshot()
+    await repository.add(later := make_book(60))
+    await repository.delete(first[0].book_id)
+    # The process dies here: nothing is closed and no final snapshot is taken.
+
+    recovered = open_durable()
+    await recovered.connect()
+    assert await contents(recovered) == [*first[1:], later]
+    await recovered.clear()
+    await recovered.close()
+
+    emptied = open_durable()
+    await emptied.connect()
+    assert await emptied.count() == 0
+    await emptied.close()
+
+
+@pytest.mark.anyio
+async def test_a_torn_record_at_the_end_of_the_log_is_dropped(open_durable, tmp_path):
+    repository = open_durable(fsync="never")
+    await repository.connect()
+    kept = make_book(1)
+    await repository.add(kept)
+    await repository.add(make_book(2))
+    segment = repository.wal.segment_path(repository.wal.generation)
+    await repository.wal.close()
+
+    data = segment.read_bytes()
+    records, intact = read_segment(segment)
+    assert len(records) == 2 and intact == len(data)
+    segment.write_bytes(data[:-5])
+
+    recovered = open_durable()
+    await recovered.connect()
+    assert await contents(recovered) == [kept]
+    assert segment.stat().st_size < len(data) - 5
+    await recovered.close()
+
+
+@pytest.mark.anyio
+async def test_writes_the_log_refuses_are_undone(open_durable, monkeypatch):
+    repository = open_durable(fsync="always")
+    await repository.connect()
+    kept = [make_book(offset) for offset in range(3)]
+    await repository.add_many(kept)
+
+    def full_disk(group):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(repository.wal, "_write", full_disk)
+    with pytest.raises(OSError):
+        await repository.add(make_book(10))
+    with pytest.raises(OSError):
+        await repository.add_many([make_book(11), make_book(12)])
+    with pytest.raises(OSError):
+        await repository.update_many([(kept[0], kept[0].model_copy(update={"title": "New"}))])
+    with pytest.raises(OSError):
+        await repository.delete(kept[1].book_id)
+    with pytest.raises(OSError):
+        await repository.clear()
+    assert await contents(repository) == kept
+    monkeypatch.undo()
+    await repository.close()
+
+
+@pytest.mark.anyio
+async def test_concurrent_writers_share_fsyncs(open_durable):
+    repository = open_durable(fsync="batch", fsync_interval=0.01)
+    await repository.connect()
+    await asyncio.gather(*(repository.add(make_book(offset)) for offset in range(200)))
+    assert await repository.count() == 200
+    assert 0 < repository.wal.syncs < 20
+    await repository.close()
+
+
+@pytest.mark.anyio
+async def test_compact_snapshot_round_trips_every_column(tmp_path):
+    store = CompactBookRepository()
+    books = [make_book(offset, isbn=f"97800000{offset:05d}", edition=offset % 3 or None,
+                       tags=None if offset % 4 == 0 else [f"t{offset % 5}"],
+                       replacement_cost=None if offset % 2 else 9.99,
+                       author_middle_name="Quinn" if offset % 3 else None,
+                       author_last_name="Lee", publisher="Pub", genre="poetry")
+             for offset in range(40)]
+    await store.add_many(books)
+    for book in books[::7]:
+        await store.delete(book.book_id)
+
+    path = tmp_path / "catalog.snapshot"
+    CompactBookRepository.write_snapshot(path, store.capture())
+    loaded = CompactBookRepository.load_snapshot(path)
+    assert await loaded.page(None, None) == await store.page(None, None)
+    assert await loaded.existing_isbns(book.isbn for book in books) == {
+        book.isbn for book in books if book not in books[::7]}
+    await loaded.add(make_book(99, tags=["t1"]))
+    assert len(loaded.pools["tags"]) == len(store.pools["tags"])
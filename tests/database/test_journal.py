@@ -0,0 +1,166 @@
+"""Tests for the Circulation Journal."""
+
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+
+from backend.v1.app.database.journal import CirculationJournal, CirculationOwnedError
+from backend.v1.app.database.repository import InMemoryBookRepository
+from backend.v1.app.schemas.books import CirculationStatus
+from backend.v1.app.services.circulation import BookUnavailableError, CirculationEngine
+from backend.v1.app.services.fines import FineEngine, assess_fines
+
+
+class Clock:
+    def __init__(self):
+        self.now = datetime(2024, 1, 1)
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+class Recorder:
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, deltas):
+        self.calls.append(dict(deltas))
+
+
+async def reopen(directory, clock) -> tuple[CirculationJournal, CirculationEngine]:
+    journal = CirculationJournal(directory, fsync="never")
+    engine = CirculationEngine(journal=journal, clock=clock)
+    journal.recover(engine)
+    await journal.compact(engine)
+    return journal, engine
+
+
+@pytest.mark.anyio
+async def test_loans_and_holds_survive_a_restart(tmp_path):
+    clock = Clock()
+    journal, engine = await reopen(tmp_path, clock)
+    first, second = uuid4(), uuid4()
+    borrower, waiting, cancelled, renewing = uuid4(), uuid4(), uuid4(), uuid4()
+    await engine.checkout(first, borrower)
+    await engine.reserve(first, cancelled)
+    await engine.reserve(first, waiting)
+    await engine.cancel_hold(first, cancelled)
+    clock.now += timedelta(days=2)
+    await engine.return_book(first)
+    await engine.checkout(second, renewing)
+    await engine.renew(second, renewing)
+    await journal.close()
+
+    for _ in range(2):
+        # Once from the log, once from the snapshot the first restart wrote.
+        journal, restored = await reopen(tmp_path, clock)
+        assert restored.status(first) == engine.status(first)
+        assert restored.status(first).held_for == waiting
+        assert restored.loans(renewing) == engine.loans(renewing)
+        assert restored.borrowed_count(renewing) == 1
+        assert restored.borrowed_count(borrower) == 0
+        with pytest.raises(BookUnavailableError, match="held for another user"):
+            await restored.checkout(first, borrower)
+        await journal.close()
+    assert len(list(tmp_path.glob("wal-*.log"))) == 1
+
+
+@pytest.mark.anyio
+async def test_fines_charged_before_a_restart_are_not_charged_again(tmp_path):
+    clock = Clock()
+    repository = InMemoryBookRepository()
+    journal, engine = await reopen(tmp_path, clock)
+    fine_engine = FineEngine(journal=journal.record_assessed)
+    late, settled = uuid4(), uuid4()
+    await engine.checkout(uuid4(), late, "student")
+    await engine.checkout(uuid4(), settled, "student")
+    clock.now += timedelta(days=31)
+    await engine.return_book(engine.loans(settled)[0].book_id)
+    applied = Recorder()
+    await assess_fines(fine_engine, engine, repository, applied, as_of=clock.now)
+    assert applied.calls == [{late: 1.0, settled: 1.0}]
+    await journal.close()
+
+    journal, restored = await reopen(tmp_path, clock)
+    assert [loan.user_id for loan in restored.loan_changes()] == [late]
+    fine_engine = FineEngine(journal=journal.record_assessed)
+    fine_engine.carried = journal.assessed
+    clock.now += timedelta(days=1)
+    await assess_fines(fine_engine, restored, repository, applied, as_of=clock.now)
+    assert applied.calls[1] == {late: pytest.approx(0.1)}
+    await journal.close()
+
+
+@pytest.mark.anyio
+async def test_fines_are_journaled_before_users_are_charged(tmp_path):
+    clock = Clock()
+    repository = InMemoryBookRepository()
+    journal, engine = await reopen(tmp_path, clock)
+    recorded = []
+
+    async def crashing_journal(assessed, settled):
+        recorded.append(assessed)
+        if len(recorded) == 2:
+            raise OSError("disk full")
+        await journal.record_assessed(assessed, settled)
+
+    charged, lost = uuid4(), uuid4()
+    await engine.checkout(uuid4(), charged, "student")
+    clock.now += timedelta(days=31)
+    await engine.return_book(engine.loans(charged)[0].book_id)
+    applied = Recorder()
+    with pytest.raises(OSError):
+        await assess_fines(FineEngine(journal=crashing_journal), engine, repository, applied,
+                           as_of=clock.now)
+    await engine.checkout(uuid4(), lost, "student")
+    clock.now += timedelta(days=31)
+
+    async def unreachable(deltas):
+        raise ConnectionError
+
+    with pytest.raises(ConnectionError):
+        await assess_fines(FineEngine(journal=journal.record_assessed), engine, repository,
+                           unreachable, as_of=clock.now)
+    await journal.close()
+
+    journal, restored = await reopen(tmp_path, clock)
+    fine_engine = FineEngine(journal=journal.record_assessed)
+    fine_engine.carried = journal.assessed
+    await assess_fines(fine_engine, restored, repository, applied, as_of=clock.now)
+    assert applied.calls == [{charged: 1.0}, {lost: 1.0}]
+    await journal.close()
+
+
+@pytest.mark.anyio
+async def test_one_process_owns_the_journal(tmp_path):
+    owner = CirculationJournal(tmp_path)
+    assert owner.acquire()
+    other = CirculationJournal(tmp_path)
+    assert not other.acquire()
+    with pytest.raises(CirculationOwnedError):
+        other.recover(CirculationEngine())
+    await owner.close()
+    assert other.acquire()
+    await other.close()
+
+
+@pytest.mark.anyio
+async def test_forgotten_books_leave_the_snapshot(tmp_path):
+    clock = Clock()
+    journal, engine = await reopen(tmp_path, clock)
+    book_id, user_id = uuid4(), uuid4()
+    await engine.checkout(book_id, user_id)
+    await journal.close()
+
+    journal = CirculationJournal(tmp_path, fsync="never")
+    restored = CirculationEngine(journal=journal, clock=clock)
+    journal.recover(restored)
+    restored.forget([book_id])
+    await journal.compact(restored)
+    await journal.close()
+
+    journal, restored = await reopen(tmp_path, clock)
+    assert restored.current_status(book_id) is CirculationStatus.AVAILABLE
+    assert restored.borrowed_count(user_id) == 0
+    await journal.close()
@@ -0,0 +1,201 @@
+"""Tests for the Books Repository Implementations."""
+
+from datetime import timedelta
+from uuid import uuid4
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+
+from backend.v1.app.config.settings import Settings
+from backend.v1.app.database.compact import BOOK_FIELDS, CompactBookRepository
+from backend.v1.app.database.connect import create_engine
+from backend.v1.app.database.repository import (
+    DuplicateISBNError,
+    InMemoryBookRepository,
+    VersionConflictError,
+)
+from backend.v1.app.database.sql import SQLBookRepository
+from backend.v1.app.models.books import MAX_INT32, BookLocation, BookResponse
+from tests.factories import START, make_book
+
+
+@pytest.fixture(params=["memory", "compact", "sql"])
+async def repository(request, tmp_path):
+    if request.param == "memory":
+        repo = InMemoryBookRepository()
+    elif request.param == "compact":
+        repo = CompactBookRepository()
+    else:
+        url = f"sqlite+aiosqlite:///{tmp_path / 'books.db'}"
+        repo = SQLBookRepository(create_engine(Settings(database_url=url,
+                                                        database_pool_size=2)))
+    await repo.connect()
+    yield repo
+    await repo.close()
+
+
+@pytest.mark.anyio
+async def test_add_get_and_delete(repository):
+    book = make_book(isbn="1234567890", replacement_cost=9.5)
+    await repository.add(book)
+    assert await repository.ping()
+    assert await repository.get(book.book_id) == book
+    assert await repository.count() == 1
+
+    with pytest.raises(DuplicateISBNError):
+        await repository.add(make_book(1, isbn="1234567890"))
+
+    assert await repository.delete(book.book_id) == book
+    assert await repository.delete(book.book_id) is None
+    assert await repository.get(book.book_id) is None
+    await repository.add(make_book(2, isbn="1234567890"))
+
+
+@pytest.mark.anyio
+async def test_add_many_skips_stored_isbns(repository):
+    await repository.add(make_book(0, isbn="0000000001"))
+    batch = [make_book(1, isbn="0000000002"), make_book(2, isbn="0000000001"), make_book(3)]
+    skipped = await repository.add_many(batch)
+    assert [book.book_id for book in skipped] == [batch[1].book_id]
+    assert await repository.count() == 3
+    assert await repository.existing_isbns(["0000000001", "0000000002", "0000000009"]) == {
+        "0000000001", "0000000002"}
+
+
+@pytest.mark.anyio
+async def test_get_many_keeps_requested_order(repository):
+    books = [make_book(offset) for offset in range(3)]
+    await repository.add_many(books)
+    wanted = [books[2].book_id, uuid4(), books[0].book_id]
+    assert await repository.get_many(wanted) == [books[2], books[0]]
+
+
+@pytest.mark.anyio
+async def test_keyset_pages_and_batches(repository):
+    books = [make_book(offset) for offset in (3, 0, 2, 1, 4)]
+    await repository.add_many(books)
+    ordered = sorted(books, key=lambda book: (book.book_entry_time, book.book_id))
+
+    first = await repository.page(None, 2)
+    assert first == ordered[:2]
+    after = (first[-1].book_entry_time, first[-1].book_id)
+    assert await repository.page(after, None) == ordered[2:]
+
+    batches = [batch async for batch in repository.iter_batches(batch_size=2)]
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+
+    await repository.clear()
+    assert await repository.count() == 0
+    assert await repository.page(None, 10) == []
+
+
+@pytest.mark.anyio
+async def test_update_many_checks_versions_and_isbns_all_or_nothing(repository):
+    books = [make_book(offset, isbn=f"000000000{offset}") for offset in range(4)]
+    await repository.add_many(books)
+
+    def changed(book: BookResponse, **fields) -> BookResponse:
+        return book.model_copy(update={**fields, "last_updated_date": START + timedelta(days=1)})
+
+    swapped = [(books[0], changed(books[0], isbn=books[1].isbn,
+                                          location=BookLocation.MAIN)),
+               (books[1], changed(books[1], isbn=books[0].isbn))]
+    await repository.update_many(swapped)
+    assert await repository.get_many([books[0].book_id, books[1].book_id]) == [
+        new for _, new in swapped]
+    assert await repository.page(None, None) == [swapped[0][1], swapped[1][1], *books[2:]]
+
+    with pytest.raises(VersionConflictError) as conflict:
+        await repository.update_many([(books[2], changed(books[2], title="Kept")),
+                                      (books[0], changed(books[0], title="Stale"))])
+    assert conflict.value.book_ids == [books[0].book_id]
+    with pytest.raises(DuplicateISBNError):
+        await repository.update_many([(books[2], changed(books[2], title="Kept")),
+                                      (books[3], changed(books[3], isbn=books[1].isbn))])
+    assert await repository.get_many([books[2].book_id, books[3].book_id]) == books[2:]
+    assert await repository.existing_isbns(book.isbn for book in books) == {
+        book.isbn for book in books}
+
+
+@pytest.mark.anyio
+async def test_sql_repository_only_reports_isbn_conflicts_as_duplicates(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'books.db'}"
+    repository = SQLBookRepository(create_engine(Settings(database_url=url,
+                                                          database_pool_size=2)))
+    await repository.connect()
+    stored = make_book(0, isbn="0000000001")
+    await repository.add(stored)
+    same_id = make_book(1, book_id=stored.book_id)
+
+    with pytest.raises(DuplicateISBNError):
+        await repository.add(make_book(2, isbn="0000000001"))
+    for isbn in (None, "0000000002"):
+        with pytest.raises(IntegrityError):
+            await repository.add(same_id.model_copy(update={"isbn": isbn}))
+    with pytest.raises(IntegrityError):
+        await repository.add_many([make_book(3), same_id])
+    assert await repository.count() == 1
+    await repository.close()
+
+
+@pytest.mark.anyio
+async def test_compact_repository_round_trips_and_compacts():
+    repository = CompactBookRepository()
+    assert set(repository.columns) == BOOK_FIELDS
+    ebook = make_book(0, book_type="ebook", ebook_type="epub", hardcover_condition=None,
+                      author_middle_name="Lee", author_last_name="Smith", publisher="Pan",
+                      edition=2, isbn="9780000000001", genre="poetry", replacement_cost=12.25,
+                      description="Caf\u00e9 verse", tags=None, publication_year=None)
+    books = [ebook, *(make_book(offset, publisher="Pan") for offset in range(1, 2000))]
+    await repository.add_many(books)
+    assert await repository.get(ebook.book_id) == ebook
+    assert repository.view(ebook.book_id).genre == "poetry"
+    assert len(repository.pools["publishers"]) == 1
+
+    for book in books[1:1500]:
+        await repository.delete(book.book_id)
+    assert len(repository.live) < 2000
+    assert await repository.page(None, None) == [ebook, *books[1500:]]
+    assert await repository.existing_isbns(["9780000000001"]) == {"9780000000001"}
+
+
+@pytest.mark.anyio
+async def test_compact_repository_merges_out_of_order_rows_without_a_full_sort():
+    repository = CompactBookRepository()
+    books = [make_book(offset % 5) for offset in range(3000)]
+    await repository.add_many(books)
+
+    def keyset(stored: list[BookResponse]) -> list[BookResponse]:
+        return sorted(stored, key=lambda book: (book.book_entry_time, book.book_id.int))
+
+    assert await repository.page(None, None) == keyset(books)
+    sort_key, calls = repository._sort_key, []
+    repository._sort_key = lambda row: calls.append(row) or sort_key(row)
+    late = make_book(2)
+    await repository.add(late)
+    assert (await repository.page(None, None)) == keyset([*books, late])
+    assert len(calls) < 50
+
+    for book in books[:2000]:
+        await repository.delete(book.book_id)
+    assert len(repository.live) < 3000
+    calls.clear()
+    assert await repository.page(None, None) == keyset([*books[2000:], late])
+    assert not calls
+
+
+@pytest.mark.anyio
+async def test_compact_repository_rolls_back_a_book_that_does_not_fit():
+    repository = CompactBookRepository()
+    first, second = make_book(0), make_book(1)
+    await repository.add(first)
+    oversized = make_book(2).model_copy(update={"page_count": MAX_INT32 + 1})
+    with pytest.raises(OverflowError):
+        await repository.add(oversized)
+    await repository.add(second)
+    assert await repository.get(first.book_id) == first
+    assert await repository.get(second.book_id) == second
+    assert await repository.get(oversized.book_id) is None
+    with pytest.raises(ValidationError):
+        make_book(3, page_count=MAX_INT32 + 1)
@@ -0,0 +1,249 @@
+"""Tests for Worker Processes Sharing One SQLite Catalog."""
+
+import asyncio
+import multiprocessing
+import os
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, insert, select
+
+from backend.v1.app.config.settings import Settings
+from backend.v1.app.database.connect import create_engine
+from backend.v1.app.database.repository import DuplicateISBNError
+from backend.v1.app.database.sql import BOOKS, CHANGES, SQLBookRepository
+from backend.v1.app.models.books import BookResponse
+from backend.v1.app.services import events
+from backend.v1.app.services.catalog_sync import CatalogSync
+from backend.v1.app.services.events import CatalogListener
+from tests.factories import make_book
+
+ISBN_POOL = 150
+
+
+def open_repository(path) -> SQLBookRepository:
+    url = f"sqlite+aiosqlite:///{path}"
+    return SQLBookRepository(create_engine(Settings(database_url=url, database_pool_size=2)))
+
+
+async def _insert(path, worker: int, count: int) -> int:
+    repository = open_repository(path)
+    accepted = 0
+    try:
+        for offset in range(count):
+            # Every worker walks the same ISBNs from a different start, so
+            # they race for each one.
+            isbn = f"978{(offset + worker * 37) % ISBN_POOL:010d}"
+            book = make_book(worker * count + offset, isbn=isbn)
+            if offset % 2:
+                accepted += not await repository.add_many([book])
+            else:
+                try:
+                    await repository.add(book)
+                    accepted += 1
+                except DuplicateISBNError:
+                    pass
+    finally:
+        await repository.close()
+    return accepted
+
+
+def insert_worker(path, worker: int, count: int, results):
+    results.put(asyncio.run(_insert(path, worker, count)))
+
+
+async def _read(path, book_ids, reads: int, ready, go, results):
+    repository = open_repository(path)
+    await repository.get(book_ids[0])
+    ready.put(True)
+    go.wait()
+    start = time.perf_counter()
+    for i in range(reads):
+        await repository.get(book_ids[i % len(book_ids)])
+    results.put(time.perf_counter() - start)
+    await repository.close()
+
+
+def read_worker(path, book_ids, reads: int, ready, go, results):
+    asyncio.run(_read(path, book_ids, reads, ready, go, results))
+
+
+async def _seed(path, count: int) -> list:
+    repository = open_repository(path)
+    await repository.connect()
+    books = [make_book(offset) for offset in range(count)]
+    await repository.add_many(books)
+    await repository.close()
+    return [book.book_id for book in books]
+
+
+def run_readers(context, path, book_ids, workers: int, reads: int) -> float:
+    """Returns the reads per second of `workers` processes reading together."""
+    ready, results, go = context.Queue(), context.Queue(), context.Event()
+    processes = [context.Process(target=read_worker,
+                                 args=(path, book_ids, reads, ready, go, results))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    for _ in processes:
+        ready.get(timeout=60)
+    go.set()
+    elapsed = max(results.get(timeout=120) for _ in processes)
+    for process in processes:
+        process.join()
+    return workers * reads / elapsed
+
+
+@pytest.mark.anyio
+async def test_isbns_stay_unique_across_worker_processes(tmp_path):
+    path = tmp_path / "books.db"
+    repository = open_repository(path)
+    await repository.connect()
+
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    processes = [context.Process(target=insert_worker, args=(path, worker, 200, results))
+                 for worker in range(4)]
+    for process in processes:
+        process.start()
+    accepted = sum(results.get(timeout=120) for _ in processes)
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+
+    async with repository.engine.connect() as connection:
+        rows = await connection.scalar(select(func.count()).select_from(BOOKS))
+        isbns = await connection.scalar(select(func.count(BOOKS.c.isbn.distinct())))
+    await repository.close()
+    assert accepted == rows == isbns == ISBN_POOL
+
+
+class Recorder(CatalogListener):
+    def __init__(self):
+        self.books = {}
+        self.cleared = 0
+
+    def book_added(self, book: BookResponse):
+        self.books[book.book_id] = book
+
+    def book_removed(self, book: BookResponse):
+        self.books.pop(book.book_id, None)
+
+    def catalog_cleared(self):
+        self.books.clear()
+        self.cleared += 1
+
+
+@pytest.mark.anyio
+async def test_changes_from_other_workers_are_replayed(tmp_path, monkeypatch):
+    path = tmp_path / "books.db"
+    writer, reader = open_repository(path), open_repository(path)
+    await writer.connect()
+    await reader.connect()
+    recorder = Recorder()
+    monkeypatch.setattr(events, "listeners", [recorder])
+
+    before = make_book(0, isbn="9780000000001")
+    await writer.add(before)
+    sync = CatalogSync(reader, batch_size=2)
+    await sync.mark()
+    assert await sync.poll() == 0
+
+    added = [make_book(offset) for offset in range(1, 6)]
+    await writer.add_many(added)
+    await reader.add(make_book(9))
+    await writer.delete(added[0].book_id)
+    assert await sync.poll() == 6
+    assert set(recorder.books) == {book.book_id for book in added[1:]}
+    assert recorder.books[added[1].book_id] == added[1]
+
+    await writer.clear()
+    assert await sync.poll() == 1
+    assert recorder.cleared == 1 and not recorder.books
+
+    await reader.prune_changes(datetime.now() + timedelta(seconds=1))
+    await writer.add(make_book(10))
+    assert await sync.poll() == 1
+    await writer.close()
+    await reader.close()
+
+
+async def log_change(repository: SQLBookRepository, seq: int, book: BookResponse):
+    async with repository.engine.begin() as connection:
+        await connection.execute(insert(CHANGES), [{
+            "seq": seq, "origin": "elsewhere", "action": "add",
+            "changed_at": datetime.now(), "book": book.model_dump_json()}])
+
+
+@pytest.mark.anyio
+async def test_changes_wait_for_a_missing_seq_to_commit(tmp_path, monkeypatch):
+    # Simulates PostgreSQL, where seq 2 may commit after seq 3.
+    path = tmp_path / "books.db"
+    reader = open_repository(path)
+    await reader.connect()
+    recorder = Recorder()
+    monkeypatch.setattr(events, "listeners", [recorder])
+    sync = CatalogSync(reader)
+    first, second, third = make_book(1), make_book(2), make_book(3)
+
+    await log_change(reader, 1, first)
+    await log_change(reader, 3, third)
+    assert await sync.poll() == 1
+    assert sync.position == 1
+    await log_change(reader, 2, second)
+    assert await sync.poll() == 2
+    assert list(recorder.books) == [first.book_id, second.book_id, third.book_id]
+
+    # A seq whose transaction rolled back is skipped once the timeout passes.
+    reader.gap_timeout = 0
+    await log_change(reader, 5, make_book(5))
+    assert await sync.poll() == 1
+    assert sync.position == 5
+    await reader.close()
+
+
+@pytest.mark.anyio
+async def test_failing_polls_are_retried_and_reported(tmp_path, monkeypatch):
+    path = tmp_path / "books.db"
+    reader = open_repository(path)
+    await reader.connect()
+    recorder = Recorder()
+    monkeypatch.setattr(events, "listeners", [recorder])
+    sync = CatalogSync(reader, interval=0.01, failure_limit=3)
+    async with reader.engine.begin() as connection:
+        await connection.execute(insert(CHANGES), [{
+            "seq": 1, "origin": "elsewhere", "action": "add",
+            "changed_at": datetime.now(), "book": '{"title": ""}'}])
+
+    sync.start()
+    while sync.failures < 3:
+        await asyncio.sleep(0.01)
+    assert not sync._task.done()
+    assert not sync.healthy()
+
+    book = make_book(1)
+    async with reader.engine.begin() as connection:
+        await connection.execute(CHANGES.update().where(CHANGES.c.seq == 1).values(
+            book=book.model_dump_json()))
+    while sync.position < 1:
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.05)
+    assert sync.healthy()
+    assert list(recorder.books) == [book.book_id]
+    await sync.stop()
+    await reader.close()
+
+
+@pytest.mark.skipif((os.cpu_count() or 1) < 2, reason="Scaling needs several cores.")
+@pytest.mark.anyio
+async def test_sqlite_read_throughput_scales_with_worker_count(tmp_path):
+    # Only measures reads; the replay of other workers' changes is covered above.
+    path = tmp_path / "books.db"
+    book_ids = await _seed(path, 2000)
+    context = multiprocessing.get_context("spawn")
+    workers = min(4, os.cpu_count())
+
+    single = run_readers(context, path, book_ids, 1, 3000)
+    several = run_readers(context, path, book_ids, workers, 3000)
+    assert several > 1.5 * single
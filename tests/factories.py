@@ -0,0 +1,31 @@
+"""Factories Building Model Instances for the LiBookTrac Tests."""
+
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from backend.v1.app.models.books import BookResponse
+
+START = datetime(2025, 1, 1, 9, 30)
+
+
+def make_book(offset: int = 0, **overrides) -> BookResponse:
+    """
+    Builds a valid stored book for tests.
+
+    Args:
+        offset (int): Seconds after START the book entered the catalog, so
+            books made with increasing offsets are in entry order.
+        **overrides: Fields replacing the defaults of a plain hardcover.
+
+    Returns:
+        BookResponse: The validated book, with a new book_id.
+    """
+    book = {
+        "title": f"Book {offset}", "author_first_name": "Ann", "language": "english",
+        "book_type": "hardcover", "hardcover_condition": "good", "page_count": 120,
+        "publication_year": "2001-02-03", "target_audience": "adult", "location": "branch2",
+        "tags": ["a", "b"], "book_id": uuid4(),
+        "book_entry_time": START + timedelta(seconds=offset), "last_updated_date": START,
+    }
+    book.update(overrides)
+    return BookResponse(**book)
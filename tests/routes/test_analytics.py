@@ -0,0 +1,121 @@
+"""Tests for LibookTrac Backend Analytics Routes."""
+
+import asyncio
+from uuid import UUID, uuid4
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.v1.app.auth import tokens
+from backend.v1.app.database.connect import get_book_repository
+from backend.v1.app.database.journal import CirculationJournal
+from backend.v1.app.database.repository import InMemoryBookRepository
+from backend.v1.app.models.tokens import TokenType
+from backend.v1.app.models.users import UserDetails, UserType
+from backend.v1.app.routes import analytics_router, books_router, circulation, circulation_router
+from backend.v1.app.routes.analytics import inventory
+from backend.v1.app.routes.circulation import circulation_engine
+from backend.v1.app.services import events
+
+app = FastAPI()
+app.include_router(books_router, prefix="/books")
+app.include_router(circulation_router, prefix="/circulation")
+app.include_router(analytics_router, prefix="/analytics")
+
+client = TestClient(app)
+repository = InMemoryBookRepository()
+app.dependency_overrides[get_book_repository] = lambda: repository
+
+
+def add_book(location: str, cost: float | None) -> str:
+    book = {"title": "Atlas", "author_first_name": "Ann", "language": "english",
+            "book_type": "hardcover", "hardcover_condition": "good", "page_count": 100,
+            "publication_year": None, "target_audience": "adult", "location": location,
+            "replacement_cost": cost}
+    return client.post("/books/add", json=book).json()["book_id"]
+
+
+def auth_headers(category: UserType) -> dict:
+    user = UserDetails.model_construct(user_id=uuid4(), username="reader",
+                                       user_category=category)
+    return {"Authorization": f"Bearer {tokens.create_token(user, TokenType.ACCESS)}"}
+
+
+def test_inventory_crosstab_and_check():
+    asyncio.run(repository.clear())
+    events.catalog_cleared()
+    first = add_book("main", 10.25)
+    add_book("main", None)
+    add_book("branch1", 5.0)
+    client.post(f"/circulation/checkout/{first}", headers=auth_headers(UserType.student))
+
+    response = client.get("/analytics/inventory",
+                          params=[("group_by", "location"), ("group_by", "status")])
+    assert response.status_code == 200
+    assert response.json()["total_books"] == 3
+    assert response.json()["groups"] == [
+        {"group": {"location": "branch1", "status": "available"}, "count": 1, "priced": 1,
+         "replacement_cost": 5.0},
+        {"group": {"location": "main", "status": "available"}, "count": 1, "priced": 0,
+         "replacement_cost": 0.0},
+        {"group": {"location": "main", "status": "checked_out"}, "count": 1, "priced": 1,
+         "replacement_cost": 10.25},
+    ]
+    assert client.get("/analytics/inventory", params={"group_by": "colour"}).status_code == 422
+
+    staff = auth_headers(UserType.staff)
+    assert client.post("/analytics/inventory/check",
+                       headers=auth_headers(UserType.student)).status_code == 403
+    assert client.post("/analytics/inventory/check", headers=staff).json() == {
+        "books_scanned": 3, "mismatches": [], "repaired": False}
+
+    inventory.catalog_cleared()
+    report = client.post("/analytics/inventory/check", params={"repair": True},
+                         headers=staff).json()
+    assert len(report["mismatches"]) == 3 and report["repaired"]
+    assert client.get("/analytics/inventory").json()["groups"][0]["count"] == 3
+
+
+class ChangingRepository(InMemoryBookRepository):
+    """Runs `during_scan` once the first page of a scan has been read."""
+
+    def __init__(self):
+        super().__init__()
+        self.during_scan = None
+
+    async def page(self, after, limit):
+        if after is not None and self.during_scan is not None:
+            change, self.during_scan = self.during_scan, None
+            await change()
+        return await super().page(after, limit)
+
+
+def test_inventory_check_replays_changes_made_during_the_scan(monkeypatch):
+    changing = ChangingRepository()
+    monkeypatch.setitem(app.dependency_overrides, get_book_repository, lambda: changing)
+    events.catalog_cleared()
+    removed = add_book("main", 1.0)
+    borrowed = add_book("branch1", 2.0)
+
+    async def change():
+        book = await changing.delete(UUID(removed))
+        events.books_removed([book])
+        await circulation_engine.checkout(UUID(borrowed), uuid4())
+
+    changing.during_scan = change
+    report = client.post("/analytics/inventory/check", params={"repair": True},
+                         headers=auth_headers(UserType.staff)).json()
+    assert report == {"books_scanned": 2, "mismatches": [], "repaired": False}
+    assert [row["group"] for row in
+            client.get("/analytics/inventory", params={"group_by": "status"}).json()["groups"]
+            ] == [{"status": "checked_out"}]
+    asyncio.run(circulation_engine.return_book(UUID(borrowed)))
+
+
+def test_workers_not_owning_circulation_refuse_status_reports(monkeypatch, tmp_path):
+    monkeypatch.setattr(circulation, "circulation_journal", CirculationJournal(tmp_path))
+    assert client.get("/analytics/inventory").status_code == 200
+    assert client.get("/analytics/inventory",
+                      params={"group_by": "status"}).status_code == 503
+    assert client.post("/analytics/inventory/check",
+                       headers=auth_headers(UserType.staff)).status_code == 503
@@ -0,0 +1,382 @@
+"""Tests for LibookTrac Backend Books Routes."""
+
+import asyncio
+import gzip
+import json
+from uuid import uuid4
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.v1.app.database.connect import get_book_repository
+from backend.v1.app.database.repository import InMemoryBookRepository
+from backend.v1.app.routes import books as books_routes
+from backend.v1.app.routes import books_router
+from backend.v1.app.services import events
+
+app = FastAPI()
+app.include_router(books_router, prefix="/books")
+
+client = TestClient(app)
+repository = InMemoryBookRepository()
+app.dependency_overrides[get_book_repository] = lambda: repository
+
+
+def make_book(**overrides) -> dict:
+    book = {
+        "title": "The Hobbit",
+        "author_first_name": "John",
+        "author_last_name": "Tolkien",
+        "language": "english",
+        "book_type": "hardcover",
+        "hardcover_condition": "new",
+        "page_count": 310,
+        "publication_year": "1937-09-21",
+        "target_audience": "young_adult",
+        "location": "main",
+    }
+    book.update(overrides)
+    return book
+
+
+def ndjson(*records) -> bytes:
+    return "\n".join(
+        record if isinstance(record, str) else json.dumps(record) for record in records
+    ).encode()
+
+
+def clear_catalog():
+    asyncio.run(repository.clear())
+    events.catalog_cleared()
+
+
+@pytest.fixture(autouse=True)
+def empty_catalog():
+    clear_catalog()
+    yield
+    clear_catalog()
+
+
+def test_create_book():
+    response = client.post("/books/add", json=make_book(isbn="9780261103344"))
+    assert response.status_code == 201
+    assert response.json()["title"] == "The Hobbit"
+    duplicate = client.post("/books/add", json=make_book(isbn="9780261103344"))
+    assert duplicate.status_code == 409
+
+
+def test_delete_book_releases_isbn():
+    book_id = client.post("/books/add", json=make_book(isbn="9780261103344")).json()["book_id"]
+    assert client.delete(f"/books/delete/{book_id}").status_code == 204
+    assert client.post("/books/add", json=make_book(isbn="9780261103344")).status_code == 201
+
+
+def test_bulk_ingest_ndjson():
+    body = ndjson(
+        make_book(isbn="0000000001"),
+        make_book(title="", isbn="0000000002"),
+        "",
+        make_book(isbn="0000000001"),
+        "{not json",
+        make_book(isbn="0000000003"),
+    )
+    response = client.post("/books/add/bulk", content=body,
+                           headers={"content-type": "application/x-ndjson"})
+    assert response.status_code == 200
+    report = response.json()
+    assert report["accepted"] == 2
+    assert report["rejected"] == 3
+    assert [error["line"] for error in report["errors"]] == [2, 4, 5]
+    assert "already exists" in report["errors"][1]["reason"]
+    assert repository._isbns == {"0000000001", "0000000003"}
+    assert len(client.get("/books/get/all").json()) == 2
+
+
+def test_bulk_ingest_rejects_existing_isbn():
+    client.post("/books/add", json=make_book(isbn="0000000001"))
+    response = client.post("/books/add/bulk", content=ndjson(make_book(isbn="0000000001")),
+                           headers={"content-type": "application/x-ndjson"})
+    assert response.json()["accepted"] == 0
+    assert response.json()["rejected"] == 1
+
+
+def test_bulk_ingest_csv():
+    body = (
+        b"title,author_first_name,language,book_type,ebook_type,page_count,"
+        b"target_audience,location,tags,isbn\n"
+        b'Dune,Frank,english,ebook,epub,412,adult,branch1,scifi|classic,0000000010\n'
+        b'"Dune, Messiah",Frank,english,ebook,epub,256,adult,main,,0000000011\n'
+        b"Bad,Frank,english,ebook,,1,adult,main,,\n"
+        b"Short,row\n"
+    )
+    response = client.post("/books/add/bulk", content=body, headers={"content-type": "text/csv"})
+    report = response.json()
+    assert report["accepted"] == 2
+    assert [error["line"] for error in report["errors"]] == [4, 5]
+    titles = sorted(book["title"] for book in client.get("/books/get/all").json())
+    assert titles == ["Dune", "Dune, Messiah"]
+    tags = [book["tags"] for book in client.get("/books/get/all").json()
+            if book["title"] == "Dune"]
+    assert tags == [["scifi", "classic"]]
+
+
+def test_bulk_ingest_csv_reads_quoted_newlines_after_a_byte_order_mark():
+    body = (
+        "\ufefftitle,author_first_name,language,book_type,ebook_type,page_count,"
+        "target_audience,location,description\r\n"
+        'Quoted,Frank,english,ebook,epub,412,adult,branch2,"First line\r\n""Second"", line"\r\n'
+        'Open,Frank,english,ebook,epub,412,adult,branch2,"never closed\n'
+    ).encode()
+    response = client.post("/books/add/bulk", content=body, headers={"content-type": "text/csv"})
+    report = response.json()
+    assert report["accepted"] == 1
+    assert report["errors"] == [{"line": 4, "reason": "unterminated quoted field"}]
+    descriptions = [book["description"] for book in client.get("/books/get/all").json()
+                    if book["title"] == "Quoted"]
+    assert descriptions == ['First line\r\n"Second", line']
+
+
+def test_exported_csv_can_be_ingested_again():
+    client.post("/books/add", json=make_book(title="Round trip", location="branch2",
+                                             description='Two\nlines, "quoted"',
+                                             tags=["a", "b"]))
+    exported = client.get("/books/export", params={"format": "csv", "compression": "none",
+                                                   "location": "branch2"})
+    response = client.post("/books/add/bulk", content=exported.content,
+                           headers={"content-type": "text/csv"})
+    assert response.json()["rejected"] == 0
+    copies = [book for book in client.get("/books/get/all").json()
+              if book["title"] == "Round trip"]
+    assert len(copies) == 2
+    assert {book["description"] for book in copies} == {'Two\nlines, "quoted"'}
+    assert {tuple(book["tags"]) for book in copies} == {("a", "b")}
+
+
+def test_bulk_ingest_truncates_errors():
+    body = ndjson(*["{}"] * 5)
+    response = client.post("/books/add/bulk?max_errors=2", content=body,
+                           headers={"content-type": "application/x-ndjson"})
+    report = response.json()
+    assert report["rejected"] == 5
+    assert len(report["errors"]) == 2
+    assert report["errors_truncated"] is True
+
+
+def test_bulk_ingest_unsupported_media_type():
+    response = client.post("/books/add/bulk", content=b"[]",
+                           headers={"content-type": "application/json"})
+    assert response.status_code == 415
+
+
+def test_get_all_books_keyset_pagination():
+    created = [client.post("/books/add", json=make_book(title=f"Book {i}")).json()["book_id"]
+               for i in range(5)]
+    first = client.get("/books/get/all?limit=2")
+    assert [book["book_id"] for book in first.json()] == created[:2]
+    assert 'rel="next"' in first.headers["link"]
+
+    client.delete(f"/books/delete/{created[2]}")
+    second = client.get("/books/get/all", params={"limit": 2,
+                                                  "cursor": first.headers["x-next-cursor"]})
+    assert [book["book_id"] for book in second.json()] == created[3:]
+    assert "x-next-cursor" not in second.headers
+
+
+def test_get_all_books_rejects_bad_cursor():
+    assert client.get("/books/get/all?cursor=not-a-cursor").status_code == 400
+
+
+def test_get_all_books_streams_json_and_ndjson():
+    created = [client.post("/books/add", json=make_book(title=f"Book {i}")).json()["book_id"]
+               for i in range(3)]
+    streamed = client.get("/books/get/all?stream=json")
+    assert [book["book_id"] for book in streamed.json()] == created
+
+    lines = client.get("/books/get/all?stream=ndjson&limit=2").text.splitlines()
+    assert [json.loads(line)["book_id"] for line in lines] == created[:2]
+
+    clear_catalog()
+    assert client.get("/books/get/all?stream=json").json() == []
+
+
+def test_get_all_books_conditional_get():
+    client.post("/books/add", json=make_book())
+    first = client.get("/books/get/all")
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "no-cache"
+
+    unchanged = client.get("/books/get/all", headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304
+    assert unchanged.content == b""
+
+    client.post("/books/add", json=make_book(title="The Silmarillion"))
+    changed = client.get("/books/get/all", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert len(changed.json()) == 2
+
+
+def test_get_book_by_criteria():
+    hobbit = client.post("/books/add", json=make_book(
+        genre="Fantasy", tags=["Classic"], replacement_cost=12.5)).json()
+    client.post("/books/add", json=make_book(
+        title="Silmarillion", publication_year="1977-09-15", genre="fantasy",
+        replacement_cost=30.0, location="branch1"))
+    dune = client.post("/books/add", json=make_book(
+        title="Dune", author_first_name="Frank", author_last_name="Herbert",
+        publication_year="1965-08-01", genre="scifi", tags=["classic"])).json()
+
+    def titles(criteria: str) -> list[str]:
+        response = client.get(f"/books/get/{criteria}")
+        assert response.status_code == 200, response.text
+        return [book["title"] for book in response.json()]
+
+    assert titles("author=TOLKIEN") == ["The Hobbit", "Silmarillion"]
+    assert titles("genre=fantasy&location=main") == ["The Hobbit"]
+    assert titles("tag=classic") == ["The Hobbit", "Dune"]
+    assert titles("publication_year=1930..1970") == ["The Hobbit", "Dune"]
+    assert titles("publication_year=1977") == ["Silmarillion"]
+    assert titles("replacement_cost=..20&genre=fantasy") == ["The Hobbit"]
+    assert titles("author=herbert&publication_year=..1960") == []
+    assert titles("language=english&target_audience=young_adult") == [
+        "The Hobbit", "Silmarillion", "Dune"]
+
+    client.delete(f"/books/delete/{hobbit['book_id']}")
+    assert titles("tag=classic") == ["Dune"]
+    client.delete(f"/books/delete/{dune['book_id']}")
+    assert titles("tag=classic") == []
+
+
+def test_get_book_rejects_bad_criteria():
+    assert client.get("/books/get/colour=red").status_code == 400
+    assert client.get("/books/get/language=klingon").status_code == 400
+    assert client.get("/books/get/publication_year=..").status_code == 400
+
+
+def test_search_books():
+    client.post("/books/add", json=make_book(title="Le Petit Prince",
+                                             author_first_name="Antoine",
+                                             author_last_name="Saint-Exupéry"))
+    client.post("/books/add", json=make_book())
+    response = client.get("/books/search", params={"q": "saint exupery"})
+    assert response.status_code == 200
+    assert [book["title"] for book in response.json()] == ["Le Petit Prince"]
+    assert client.get("/books/search", params={"q": "hobbit", "k": 1}).json()[0]["title"] == (
+        "The Hobbit")
+
+
+def test_autocomplete_books():
+    clear_catalog()
+    client.post("/books/add", json=make_book())
+    dune = client.post("/books/add", json=make_book(title="Dune", author_first_name="Frank",
+                                                     author_last_name="Herbert")).json()
+    response = client.get("/books/autocomplete", params={"q": "du"})
+    assert response.status_code == 200
+    assert response.json()[0] == {"text": "Dune", "kind": "title", "popularity": 0,
+                                  "books": 1, "book_id": dune["book_id"], "fuzzy": False}
+    assert client.get("/books/autocomplete", params={"q": "hbo"}).json()[0]["text"] == (
+        "The Hobbit")
+    assert client.get("/books/autocomplete", params={"q": "du", "k": 99}).status_code == 422
+
+
+def test_update_book_sets_only_given_fields_and_checks_if_match():
+    book = client.post("/books/add", json=make_book(isbn="9780261103344", genre="fantasy")).json()
+    etag = client.patch(f"/books/update/{book['book_id']}", json={}).headers["etag"]
+
+    response = client.patch(f"/books/update/{book['book_id']}", json={"location": "branch1"},
+                            headers={"If-Match": etag})
+    assert response.status_code == 200, response.text
+    updated = response.json()
+    assert updated["location"] == "branch1" and updated["genre"] == "fantasy"
+    assert updated["last_updated_date"] > book["last_updated_date"]
+    assert response.headers["etag"] != etag
+    assert client.get("/books/get/location=branch1").json() == [updated]
+    assert client.get("/books/get/location=main").json() == []
+
+    stale = client.patch(f"/books/update/{book['book_id']}", json={"title": "Lost Edit"},
+                         headers={"If-Match": etag})
+    assert stale.status_code == 412
+    other = client.post("/books/add", json=make_book(isbn="9780000000002")).json()
+    assert client.patch(f"/books/update/{other['book_id']}",
+                        json={"isbn": "9780261103344"}).status_code == 409
+    assert client.patch(f"/books/update/{book['book_id']}",
+                        json={"title": None}).status_code == 422
+    assert client.patch(f"/books/update/{uuid4()}", json={}).status_code == 404
+    assert client.patch(f"/books/update/{book['book_id']}",
+                        json={"isbn": "9780000000003"}).status_code == 200
+    assert client.post("/books/add", json=make_book(isbn="9780261103344")).status_code == 201
+
+
+def test_update_books_bulk_moves_a_shelf_in_one_batch():
+    body = ndjson(*(make_book(title=f"Book {i}", location="branch1") for i in range(30)))
+    client.post("/books/add/bulk", content=body,
+                headers={"content-type": "application/x-ndjson"})
+    shelf = client.get("/books/get/location=branch1").json()
+    assert len(shelf) == 30
+
+    response = client.patch("/books/update/bulk", json=[
+        {"book_id": book["book_id"], "location": "main"} for book in shelf])
+    assert response.status_code == 200, response.text
+    report = response.json()
+    assert report["updated"] == 30 and len(report["etags"]) == 30
+    assert client.get("/books/get/location=branch1").json() == []
+    assert len(client.get("/books/get/location=main").json()) == 30
+
+    first, second = shelf[0]["book_id"], shelf[1]["book_id"]
+    rejected = client.patch("/books/update/bulk", json=[
+        {"book_id": first, "title": "Renamed", "if_match": report["etags"][first]},
+        {"book_id": second, "title": "Renamed", "if_match": '"0"'}])
+    assert rejected.status_code == 412
+    invalid = client.patch("/books/update/bulk", json=[
+        {"book_id": first, "title": "Renamed"}, {"book_id": second, "title": None}])
+    assert invalid.status_code == 422
+    assert invalid.json()["detail"][0]["loc"][:2] == ["body", 1]
+    assert client.patch("/books/update/bulk", json=[
+        {"book_id": first}, {"book_id": first}]).status_code == 400
+    titles = {book["title"] for book in client.get("/books/get/all").json()}
+    assert "Renamed" not in titles
+
+
+def test_export_books_streams_a_filtered_gzip_download():
+    client.post("/books/add", json=make_book(title="Kept"))
+    client.post("/books/add", json=make_book(title="Elsewhere", location="branch1"))
+    response = client.get("/books/export", params={"format": "csv", "location": "main"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/gzip"
+    assert 'filename="catalog.csv.gz"' in response.headers["content-disposition"]
+    rows = gzip.decompress(response.content).decode().splitlines()
+    assert rows[0].startswith("title,") and len(rows) == 2 and rows[1].startswith("Kept,")
+
+    since = response.headers["x-export-started"]
+    client.post("/books/add", json=make_book(title="Later"))
+    lines = client.get("/books/export", params={"compression": "none",
+                                                "updated_since": since}).text.splitlines()
+    assert [json.loads(line)["title"] for line in lines] == ["Later"]
+
+
+def test_change_feed_publishes_writes_and_asks_stale_clients_to_resync():
+    # Open streams never finish under TestClient, so only the resync path,
+    # which ends the stream, is requested here.
+    feed = books_routes.catalog_feed
+    start = feed.sequence
+    book_id = client.post("/books/add", json=make_book()).json()["book_id"]
+    client.delete(f"/books/delete/{book_id}")
+    assert feed.sequence == start + 2
+
+    stale = client.get("/books/changes", headers={"Last-Event-ID": "restarted-1"})
+    assert stale.headers["content-type"].startswith("text/event-stream")
+    assert f"id: {feed.epoch}-{feed.sequence}\nevent: resync" in stale.text
+
+
+def test_create_book_flags_likely_duplicates():
+    original = client.post("/books/add", json=make_book(title="The Hobbit")).json()
+    assert "x-possible-duplicates" not in client.post(
+        "/books/add", json=make_book(title="The Silmarillion")).headers
+    donated = client.post("/books/add", json=make_book(title="Hobbit", author_last_name="Tolkein"))
+    assert donated.status_code == 201
+    assert donated.headers["x-possible-duplicates"] == original["book_id"]
+
+    found = client.get(f"/books/duplicates/{original['book_id']}").json()
+    assert [entry["book"]["book_id"] for entry in found] == [donated.json()["book_id"]]
+    assert client.get(f"/books/duplicates/{uuid4()}").status_code == 404
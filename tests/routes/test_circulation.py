@@ -0,0 +1,112 @@
+"""Tests for LibookTrac Backend Circulation Routes."""
+
+import asyncio
+from uuid import UUID, uuid4
+
+import pytest
+from bson import Binary
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+from backend.v1.app.auth import tokens
+from backend.v1.app.database.connect import get_book_repository
+from backend.v1.app.database.journal import CirculationJournal
+from backend.v1.app.database.repository import InMemoryBookRepository
+from backend.v1.app.models.tokens import TokenType
+from backend.v1.app.models.users import UserDetails, UserType
+from backend.v1.app.routes import books_router, circulation, circulation_router
+from backend.v1.app.services import events
+
+app = FastAPI()
+app.include_router(books_router, prefix="/books")
+app.include_router(circulation_router, prefix="/circulation")
+
+client = TestClient(app)
+repository = InMemoryBookRepository()
+app.dependency_overrides[get_book_repository] = lambda: repository
+
+BOOK = {
+    "title": "The Hobbit",
+    "author_first_name": "John",
+    "language": "english",
+    "book_type": "ebook",
+    "ebook_type": "epub",
+    "page_count": 310,
+    "publication_year": None,
+    "target_audience": "young_adult",
+    "location": "main",
+}
+
+
+def auth_headers(category: UserType = UserType.student, user_id=None) -> dict:
+    user = UserDetails.model_construct(user_id=user_id or uuid4(), username="reader",
+                                       user_category=category)
+    return {"Authorization": f"Bearer {tokens.create_token(user, TokenType.ACCESS)}"}
+
+
+@pytest.fixture(autouse=True)
+def empty_catalog():
+    asyncio.run(repository.clear())
+    events.catalog_cleared()
+
+
+def test_checkout_reserve_and_return():
+    book_id = client.post("/books/add", json=BOOK).json()["book_id"]
+    borrower, waiting = auth_headers(), auth_headers()
+
+    assert client.post(f"/circulation/checkout/{book_id}", headers=borrower).status_code == 201
+    assert client.post(f"/circulation/checkout/{book_id}", headers=waiting).status_code == 409
+    assert client.post(f"/circulation/reserve/{book_id}", headers=waiting).status_code == 201
+    assert client.post(f"/circulation/renew/{book_id}", headers=borrower).status_code == 409
+    assert len(client.get("/circulation/loans", headers=borrower).json()) == 1
+
+    assert client.post(f"/circulation/return/{book_id}", headers=waiting).status_code == 403
+    assert client.post(f"/circulation/return/{book_id}", headers=borrower).status_code == 200
+    status = client.get(f"/circulation/status/{book_id}").json()
+    assert status["status"] == "on_hold"
+    assert client.post(f"/circulation/checkout/{book_id}", headers=waiting).status_code == 201
+
+
+def test_circulation_requires_existing_book_and_token():
+    missing = uuid4()
+    assert client.post(f"/circulation/checkout/{missing}").status_code == 401
+    assert client.post(f"/circulation/checkout/{missing}",
+                       headers=auth_headers()).status_code == 404
+    staff = auth_headers(UserType.staff)
+    assert client.post(f"/circulation/return/{missing}", headers=staff).status_code == 404
+
+
+def test_fine_run_is_staff_only():
+    assert client.post("/circulation/fines/run?dry_run=true",
+                       headers=auth_headers()).status_code == 403
+    report = client.post("/circulation/fines/run?dry_run=true",
+                         headers=auth_headers(UserType.admin))
+    assert report.status_code == 200
+    assert report.json()["dry_run"] is True
+
+
+def test_checkouts_use_and_update_the_user_store(monkeypatch):
+    users = AsyncMongoMockClient()["libooktrac"]["users"]
+    monkeypatch.setattr(circulation.patrons, "collection", lambda: users)
+    user_id = uuid4()
+    asyncio.run(users.insert_one({"user_id": Binary.from_uuid(user_id), "max_borrow_limit": 1,
+                                  "books_borrowed": 0, "borrow_history": []}))
+    first, second = (client.post("/books/add", json=BOOK).json()["book_id"] for _ in range(2))
+    reader = auth_headers(user_id=user_id)
+
+    assert client.post(f"/circulation/checkout/{first}", headers=reader).status_code == 201
+    assert client.post(f"/circulation/checkout/{second}", headers=reader).status_code == 409
+    stored = asyncio.run(users.find_one({"user_id": Binary.from_uuid(user_id)}))
+    assert stored["books_borrowed"] == 1
+    assert [entry.as_uuid() for entry in stored["borrow_history"]] == [UUID(first)]
+    assert client.post(f"/circulation/return/{first}", headers=reader).status_code == 200
+    stored = asyncio.run(users.find_one({"user_id": Binary.from_uuid(user_id)}))
+    assert stored["books_borrowed"] == 0
+
+
+def test_workers_not_owning_the_journal_refuse_circulation(monkeypatch, tmp_path):
+    monkeypatch.setattr(circulation, "circulation_journal", CirculationJournal(tmp_path))
+    response = client.get("/circulation/loans", headers=auth_headers())
+    assert response.status_code == 503
+    assert response.json()["detail"] == "Circulation is served by another worker."
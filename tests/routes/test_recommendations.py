@@ -0,0 +1,57 @@
+"""Tests for LibookTrac Backend Recommendation Routes."""
+
+import asyncio
+from uuid import uuid4
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.v1.app.auth import tokens
+from backend.v1.app.database.connect import get_book_repository
+from backend.v1.app.database.repository import InMemoryBookRepository
+from backend.v1.app.models.tokens import TokenType
+from backend.v1.app.models.users import UserDetails, UserType
+from backend.v1.app.routes import books_router, circulation_router, recommendations_router
+from backend.v1.app.services import events
+
+app = FastAPI()
+app.include_router(books_router, prefix="/books")
+app.include_router(circulation_router, prefix="/circulation")
+app.include_router(recommendations_router, prefix="/recommendations")
+
+client = TestClient(app)
+repository = InMemoryBookRepository()
+app.dependency_overrides[get_book_repository] = lambda: repository
+
+
+def add_book(title: str, genre: str) -> str:
+    book = {"title": title, "author_first_name": "Ann", "language": "english",
+            "book_type": "ebook", "ebook_type": "epub", "page_count": 100,
+            "publication_year": None, "target_audience": "adult", "location": "main",
+            "genre": genre}
+    return client.post("/books/add", json=book).json()["book_id"]
+
+
+def auth_headers() -> dict:
+    user = UserDetails.model_construct(user_id=uuid4(), username="reader",
+                                       user_category=UserType.student)
+    return {"Authorization": f"Bearer {tokens.create_token(user, TokenType.ACCESS)}"}
+
+
+def test_checkouts_feed_recommendations():
+    asyncio.run(repository.clear())
+    events.catalog_cleared()
+    hobbit, rings = add_book("The Hobbit", "fantasy"), add_book("The Two Towers", "fantasy")
+    patron, reader = auth_headers(), auth_headers()
+    for book_id in (hobbit, rings):
+        client.post(f"/circulation/checkout/{book_id}", headers=patron)
+        client.post(f"/circulation/return/{book_id}", headers=patron)
+    client.post(f"/circulation/checkout/{hobbit}", headers=reader)
+
+    response = client.get(f"/recommendations/also-borrowed/{hobbit}")
+    assert [book["book_id"] for book in response.json()] == [rings]
+    assert client.get(f"/recommendations/also-borrowed/{uuid4()}").status_code == 404
+
+    response = client.get("/recommendations/for-you", headers=reader)
+    assert [book["title"] for book in response.json()] == ["The Two Towers"]
+    assert client.get("/recommendations/for-you").status_code == 401
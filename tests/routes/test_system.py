@@ -4,6 +4,7 @@ from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
 from backend.v1.app.routes import system_router
+from backend.v1.app.server.server import app as server_app
 
 # Create a FastAPI app instance and include your router
 app = FastAPI()
@@ -16,3 +17,28 @@ def test_home_endpoint():
     response = client.get("/")
     assert response.status_code == 200
     assert response.json() == {"message": "Welcome to the Libooktrac API"}
+
+
+def test_readiness_fails_before_indexes_are_loaded():
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["checks"]["indexes"] is False
+
+
+def test_readiness_and_metrics_after_startup():
+    with TestClient(server_app) as started:
+        ready = started.get("/health/ready")
+        assert ready.status_code == 200
+        assert ready.json() == {"status": "ready", "checks": {
+            "storage": True, "indexes": True, "password_workers": True,
+            "catalog_sync": True}}
+
+        started.get("/books/get/all")
+        started.get("/no/such/route")
+        body = started.get("/metrics").text
+    assert ('libooktrac_http_requests_total{route="/books/get/all",method="GET",status="200"}'
+            in body)
+    assert 'route="<unmatched>",method="",status="404"' in body
+    assert 'libooktrac_http_request_duration_seconds_bucket{route="/health/ready"' in body
+    assert "libooktrac_event_loop_lag_seconds_count" in body
+    assert "libooktrac_books_response_cache_misses" in body
@@ -0,0 +1,141 @@
+"""Tests for Admission Control, Rate Limiting and Load Shedding."""
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from backend.v1.app.auth.tokens import verified_tokens
+from backend.v1.app.models.tokens import TokenClaims, TokenType
+from backend.v1.app.server.admission import (
+    AdmissionController,
+    AdmissionMiddleware,
+    RateLimiter,
+    route_class,
+)
+from backend.v1.app.server.metrics import MetricsRegistry
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_rate_limiter_allows_a_burst_then_the_rate():
+    clock = Clock()
+    limiter = RateLimiter(rate=2.0, burst=3, clock=clock)
+    assert [limiter.acquire("a") for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.acquire("a") == pytest.approx(0.5)
+    assert limiter.acquire("b") == 0.0
+    clock.now += 0.5
+    assert limiter.acquire("a") == 0.0
+    assert limiter.acquire("a") > 0
+    assert limiter.limited == 2
+
+
+def test_idle_clients_expire_without_a_sweep():
+    clock = Clock()
+    limiter = RateLimiter(rate=10.0, burst=5, clock=clock)
+    for client in range(1000):
+        limiter.acquire(f"ip:{client}")
+    clock.now += limiter.period
+    limiter.acquire("ip:0")
+    assert len(limiter) == 1000
+    clock.now += limiter.period
+    limiter.acquire("ip:1")
+    # ip:0 was carried over, ip:1 was idle for a full period and starts afresh.
+    assert len(limiter) == 2
+
+
+def test_route_classes():
+    assert route_class("GET", "/books/get/all") == "read"
+    assert route_class("POST", "/books/add") == "write"
+    assert route_class("POST", "/users/token/refresh") == "auth"
+    assert route_class("GET", "/health/ready") is None
+
+
+def make_app(metrics: MetricsRegistry, **overrides) -> tuple[FastAPI, AdmissionController]:
+    options = {"rates": {"read": 1000.0, "write": 1.0}, "bursts": {"read": 1000, "write": 2},
+               "concurrency": {"read": 1, "write": 10}, "max_waiting": 0,
+               "queue_timeout": 0.05, "max_loop_lag": 0.5,
+               "trusted_proxies": ["10.0.0.1"], "metrics": metrics}
+    options.update(overrides)
+    controller = AdmissionController(**options)
+    app = FastAPI()
+    release = asyncio.Event()
+
+    @app.get("/books/slow")
+    async def slow():
+        await release.wait()
+        return {}
+
+    @app.post("/books/add")
+    async def add():
+        return {}
+
+    @app.get("/metrics")
+    async def metrics_route():
+        return {}
+
+    app.add_middleware(AdmissionMiddleware, controller=controller)
+    app.state.release = release
+    return app, controller
+
+
+@pytest.mark.anyio
+async def test_clients_over_their_rate_get_429_with_retry_after():
+    app, _ = make_app(MetricsRegistry())
+    transport = httpx.ASGITransport(app=app, client=("10.0.0.1", 1234))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        first = {"x-forwarded-for": "203.0.113.9, 10.0.0.1"}
+        statuses = [(await client.post("/books/add", headers=first)).status_code
+                    for _ in range(3)]
+        assert statuses == [200, 200, 429]
+        limited = await client.post("/books/add", headers=first)
+        assert limited.headers["retry-after"] == "1"
+        assert limited.json()["detail"].startswith("Too many requests")
+        other = await client.post("/books/add", headers={"x-forwarded-for": "203.0.113.10"})
+        assert other.status_code == 200
+
+
+@pytest.mark.anyio
+async def test_verified_users_share_one_budget_across_addresses():
+    verified_tokens.put("token-1", TokenClaims(
+        sub="user-1", username="ann", user_category="student", type=TokenType.ACCESS,
+        jti="j", iat=0, exp=4e9))
+    app, _ = make_app(MetricsRegistry())
+    try:
+        for address in ("192.0.2.1", "192.0.2.2", "192.0.2.3"):
+            transport = httpx.ASGITransport(app=app, client=(address, 1))
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.post("/books/add",
+                                             headers={"Authorization": "Bearer token-1"})
+        assert response.status_code == 429
+    finally:
+        verified_tokens.clear()
+
+
+@pytest.mark.anyio
+async def test_full_route_classes_and_a_lagging_loop_shed_with_503():
+    metrics = MetricsRegistry()
+    app, controller = make_app(metrics)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        holding = asyncio.ensure_future(client.get("/books/slow"))
+        while controller.limits["read"].in_flight == 0:
+            await asyncio.sleep(0.001)
+        shed = await client.get("/books/slow")
+        assert (shed.status_code, shed.headers["retry-after"]) == (503, "1")
+        assert (await client.post("/books/add")).status_code == 200
+        app.state.release.set()
+        assert (await holding).status_code == 200
+
+        metrics.last_loop_lag = 2.4
+        lagging = await client.post("/books/add")
+        assert (lagging.status_code, lagging.headers["retry-after"]) == (503, "3")
+        assert (await client.get("/metrics")).status_code == 200
+    assert controller.limits["read"].rejected == 1 and controller.shed == 1
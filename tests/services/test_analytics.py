@@ -0,0 +1,78 @@
+"""Tests for the Inventory Analytics Service Module."""
+
+import random
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+
+from backend.v1.app.models.books import (
+    BookAudience,
+    BookCreateCondition,
+    BookFormat,
+    BookLanguage,
+    BookLocation,
+    BookResponse,
+)
+from backend.v1.app.schemas.books import CirculationStatus
+from backend.v1.app.services.analytics import InventoryAnalytics
+
+
+def make_book(rng: random.Random) -> BookResponse:
+    book_type = rng.choice(list(BookFormat))
+    return BookResponse.model_construct(
+        book_id=uuid4(), title="Book", book_type=book_type,
+        hardcover_condition=(rng.choice(list(BookCreateCondition))
+                             if book_type is BookFormat.HARDCOVER else None),
+        location=rng.choice(list(BookLocation)), language=rng.choice(list(BookLanguage)),
+        target_audience=rng.choice(list(BookAudience)),
+        replacement_cost=rng.choice([None, 9.99, 12.5, 0.1]),
+        book_entry_time=datetime(2024, 1, 1))
+
+
+def brute_force(books, statuses, field):
+    totals = {}
+    for book in books.values():
+        value = statuses.get(book.book_id, CirculationStatus.AVAILABLE).value \
+            if field == "status" else getattr(book, field).value
+        count, cost = totals.get(value, (0, 0))
+        totals[value] = (count + 1, cost + round((book.replacement_cost or 0) * 100))
+    return {value: (count, cents / 100) for value, (count, cents) in sorted(totals.items())}
+
+
+@pytest.mark.unit
+def test_aggregates_track_adds_removals_updates_and_status():
+    rng = random.Random(2)  # noqa: S311
+    analytics = InventoryAnalytics()
+    books, statuses = {}, {}
+    for _ in range(500):
+        book = make_book(rng)
+        books[book.book_id] = book
+        analytics.book_added(book)
+    for book_id in rng.sample(sorted(books), 100):
+        analytics.book_removed(books.pop(book_id))
+    for book_id in rng.sample(sorted(books), 100):
+        new = books[book_id].model_copy(update={"location": rng.choice(list(BookLocation)),
+                                                "replacement_cost": 3.33})
+        analytics.book_updated(books[book_id], new)
+        books[book_id] = new
+    for book_id in rng.sample(sorted(books), 100):
+        statuses[book_id] = rng.choice(list(CirculationStatus))
+        analytics.set_status(book_id, statuses[book_id])
+
+    for field in ("location", "status", "language"):
+        rows = analytics.crosstab([field])
+        assert {row["group"][field]: (row["count"], row["replacement_cost"]) for row in rows} \
+            == brute_force(books, statuses, field)
+    assert analytics.crosstab()[0]["count"] == 400
+    assert len(analytics.crosstab(["location", "book_type"])) <= 9
+
+    rebuilt = InventoryAnalytics.rebuild(
+        (book, statuses.get(book.book_id, CirculationStatus.AVAILABLE))
+        for book in books.values())
+    assert analytics.diff(rebuilt) == []
+    analytics.set_status(next(iter(books)), CirculationStatus.LOST)
+    assert analytics.diff(rebuilt)
+
+    with pytest.raises(ValueError):
+        analytics.crosstab(["colour"])
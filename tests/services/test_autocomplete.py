@@ -0,0 +1,81 @@
+"""Tests for the Autocomplete Service Module."""
+
+import random
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+
+from backend.v1.app.models.books import BookResponse
+from backend.v1.app.services.autocomplete import AutocompleteIndex, normalize
+
+
+def make_book(title: str, first: str = "Ann", last: str | None = None) -> BookResponse:
+    return BookResponse.model_construct(
+        book_id=uuid4(), title=title, author_first_name=first, author_middle_name=None,
+        author_last_name=last, book_entry_time=datetime(2024, 1, 1))
+
+
+def texts(results) -> list[str]:
+    return [term.text for term, _ in results]
+
+
+@pytest.mark.unit
+def test_prefixes_rank_by_borrows_and_ignore_case_and_accents():
+    index = AutocompleteIndex()
+    hobbit = make_book("The Hobbit", "John", "Tolkien")
+    holes = make_book("Holes", "Louis", "Sachar")
+    emile = make_book("Émile", "Jean-Jacques", "Rousseau")
+    for book in (hobbit, holes, emile):
+        index.book_added(book)
+
+    assert texts(index.suggest("HO", k=2)) == ["The Hobbit", "Holes"]
+    index.record_borrow(holes.book_id, 3)
+    assert texts(index.suggest("ho", k=2)) == ["Holes", "The Hobbit"]
+    assert texts(index.suggest("emi")) == ["Émile"]
+    assert texts(index.suggest("tolk")) == ["John Tolkien"]
+
+    index.book_removed(hobbit)
+    assert [term.text for term, fuzzy in index.suggest("ho") if not fuzzy] == ["Holes"]
+    assert "John Tolkien" not in texts(index.suggest("tolk"))
+
+
+@pytest.mark.unit
+def test_one_typo_is_tolerated_after_exact_matches():
+    index = AutocompleteIndex()
+    for title in ("Dune", "Dracula", "Drums of Autumn"):
+        index.book_added(make_book(title))
+    results = index.suggest("drac", k=3)
+    assert results[0][0].text == "Dracula" and not results[0][1]
+    assert index.suggest("dnue")[0][0].text == "Dune"
+    assert all(fuzzy for _, fuzzy in index.suggest("dnue"))
+
+
+@pytest.mark.unit
+def test_burst_trie_agrees_with_brute_force_under_churn():
+    rng = random.Random(3)  # noqa: S311
+    words = ["alpha", "alpine", "all", "beta", "bet", "gamma", "gam", "delta"]
+    index = AutocompleteIndex()
+    books = {}
+    for _ in range(1500):
+        title = " ".join(rng.choice(words) for _ in range(3))
+        book = make_book(title, first=rng.choice(words).title())
+        books[book.book_id] = book
+        index.book_added(book)
+    borrows = {}
+    for book_id in rng.sample(sorted(books), 600):
+        borrows[book_id] = rng.randint(1, 50)
+        index.record_borrow(book_id, borrows[book_id])
+    for book_id in rng.sample(sorted(books), 700):
+        index.book_removed(books.pop(book_id))
+
+    for prefix in ("a", "al", "alp", "alpha b", "g", "gamma gam", "d", "beta beta beta"):
+        popularity = {}
+        for book in books.values():
+            title = normalize(book.title)
+            if title.startswith(prefix):
+                popularity[title] = popularity.get(title, 0) + borrows.get(book.book_id, 0)
+        expected = sorted(popularity, key=lambda title: (-popularity[title], title))[:5]
+        titles = [term.key for term, fuzzy in index.suggest(prefix, k=20)
+                  if term.kind == "title" and not fuzzy][:5]
+        assert titles == expected, prefix
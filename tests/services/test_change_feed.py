@@ -0,0 +1,75 @@
+"""Tests for the Catalog Change Feed Module."""
+
+import asyncio
+import json
+
+import pytest
+
+from backend.v1.app.services.change_feed import ChangeFeed
+from tests.factories import make_book
+
+
+def parse(chunk: bytes) -> list[dict]:
+    events = []
+    for frame in chunk.decode().strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in frame.splitlines()
+                      if not line.startswith(":"))
+        if fields:
+            events.append({**fields, "data": json.loads(fields["data"])})
+    return events
+
+
+@pytest.mark.anyio
+async def test_stream_follows_changes_and_resumes_from_an_event_id():
+    feed = ChangeFeed(history=10)
+    stream = feed.stream()
+    pending = asyncio.ensure_future(anext(stream))
+    await asyncio.sleep(0)
+    book = make_book(title="The Hobbit")
+    feed.book_added(book)
+    feed.book_updated(book, renamed := book.model_copy(update={"title": "Renamed"}))
+    feed.book_removed(renamed)
+    added, updated, deleted = parse(await pending)
+    assert (added["event"], added["data"]["title"]) == ("add", "The Hobbit")
+    assert (updated["event"], updated["data"]["title"]) == ("update", "Renamed")
+    assert deleted == {"id": f"{feed.epoch}-3", "event": "delete",
+                       "data": {"book_id": str(book.book_id)}}
+    await stream.aclose()
+
+    feed.catalog_cleared()
+    resumed = feed.stream(added["id"])
+    assert [event["event"] for event in parse(await anext(resumed))] == [
+        "update", "delete", "clear"]
+    await resumed.aclose()
+    assert feed.subscribers == 0
+
+
+@pytest.mark.anyio
+async def test_clients_that_cannot_resume_are_told_to_resync():
+    feed = ChangeFeed(history=5, max_lag=3)
+    for _ in range(8):
+        feed.book_added(make_book())
+    for last_event_id in (f"{feed.epoch}-2", f"{feed.epoch}-99", "other-8", "garbage"):
+        [event] = parse(b"".join([chunk async for chunk in feed.stream(last_event_id)]))
+        assert event["event"] == "resync"
+    assert feed.resyncs == 4
+
+    slow = feed.stream(f"{feed.epoch}-8")
+    pending = asyncio.ensure_future(anext(slow))
+    await asyncio.sleep(0)
+    feed.book_added(make_book())
+    assert len(parse(await pending)) == 1
+    # The client stalls while writers carry on without waiting for it.
+    for _ in range(4):
+        feed.book_added(make_book())
+    assert [event["event"] for event in parse(await anext(slow))] == ["resync"]
+    with pytest.raises(StopAsyncIteration):
+        await anext(slow)
+
+
+@pytest.mark.anyio
+async def test_idle_streams_send_keepalives():
+    feed = ChangeFeed(heartbeat=0.01)
+    stream = feed.stream()
+    assert await anext(stream) == b": keepalive\n\n"
+    await stream.aclose()
@@ -0,0 +1,132 @@
+"""Tests for the Circulation Service Module."""
+
+import asyncio
+import random
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+
+from backend.v1.app.models.circulation import HoldStatus
+from backend.v1.app.schemas.books import CirculationStatus
+from backend.v1.app.services.circulation import (
+    BookUnavailableError,
+    BorrowLimitError,
+    CirculationEngine,
+    CirculationError,
+    HoldError,
+    RenewalError,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = datetime(2024, 1, 1)
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+async def yielding_journal(action, record, at):
+    # Yield to the event loop inside the critical section so concurrent
+    # operations interleave as they would around a real database write.
+    await asyncio.sleep(0)
+
+
+def make_engine(clock=None) -> CirculationEngine:
+    return CirculationEngine(journal=yielding_journal, clock=clock or Clock())
+
+
+@pytest.mark.anyio
+async def test_stress_no_double_checkouts():
+    engine = make_engine()
+    books = [uuid4() for _ in range(10)]
+    users = [uuid4() for _ in range(300)]
+    rng = random.Random(11)  # noqa: S311
+
+    async def attempt(user_id):
+        book_id = rng.choice(books)
+        try:
+            return await engine.checkout(book_id, user_id)
+        except CirculationError:
+            return None
+
+    loans = [loan for loan in await asyncio.gather(*(attempt(user) for user in users)) if loan]
+    assert len(loans) == len(books)
+    assert len({loan.book_id for loan in loans}) == len(books)
+    assert sum(engine.borrowed_count(user) for user in users) == len(books)
+
+
+@pytest.mark.anyio
+async def test_stress_borrow_limit_is_atomic():
+    engine = make_engine()
+    user_id = uuid4()
+    engine.set_borrow_limit(user_id, 5)
+    books = [uuid4() for _ in range(50)]
+    results = await asyncio.gather(*(engine.checkout(book_id, user_id) for book_id in books),
+                                   return_exceptions=True)
+    assert sum(not isinstance(result, Exception) for result in results) == 5
+    assert all(isinstance(result, BorrowLimitError)
+               for result in results if isinstance(result, Exception))
+    assert engine.borrowed_count(user_id) == 5
+    assert len(engine.loans(user_id)) == 5
+
+
+@pytest.mark.anyio
+async def test_stress_holds_are_served_fifo():
+    engine = make_engine()
+    book_id = uuid4()
+    first = uuid4()
+    await engine.checkout(book_id, first)
+    holders = [uuid4() for _ in range(200)]
+    for user_id in holders:
+        await engine.reserve(book_id, user_id)
+    # Everyone who is not next in line races the holder for the returned book.
+    for expected in holders[:20]:
+        await engine.return_book(book_id)
+        contenders = [engine.checkout(book_id, user_id) for user_id in holders[:40]]
+        results = await asyncio.gather(*contenders, return_exceptions=True)
+        winners = [result for result in results if not isinstance(result, Exception)]
+        assert [loan.user_id for loan in winners] == [expected]
+    assert engine.status(book_id).holds_waiting == 180
+
+
+@pytest.mark.anyio
+async def test_expired_hold_passes_to_next_in_line():
+    clock = Clock()
+    engine = make_engine(clock)
+    book_id, first, second = uuid4(), uuid4(), uuid4()
+    first_hold = await engine.reserve(book_id, first)
+    await engine.reserve(book_id, second)
+    assert first_hold.status is HoldStatus.READY
+    assert engine.status(book_id).held_for == first
+
+    clock.now += timedelta(days=4)
+    assert engine.status(book_id).held_for == second
+    with pytest.raises(BookUnavailableError):
+        await engine.checkout(book_id, first)
+    assert (await engine.checkout(book_id, second)).user_id == second
+    assert first_hold.status is HoldStatus.EXPIRED
+
+
+@pytest.mark.anyio
+async def test_renew_and_cancel():
+    engine = make_engine()
+    book_id, borrower, waiting = uuid4(), uuid4(), uuid4()
+    loan = await engine.checkout(book_id, borrower)
+    renewed = await engine.renew(book_id, borrower)
+    assert renewed.due_at > loan.due_at
+    assert renewed.renewals == 1
+
+    await engine.reserve(book_id, waiting)
+    with pytest.raises(HoldError):
+        await engine.reserve(book_id, waiting)
+    with pytest.raises(RenewalError):
+        await engine.renew(book_id, borrower)
+
+    await engine.cancel_hold(book_id, waiting)
+    await engine.renew(book_id, borrower)
+    returned = await engine.return_book(book_id)
+    assert returned.returned_at is not None
+    assert engine.status(book_id).status is CirculationStatus.AVAILABLE
+    assert engine.borrowed_count(borrower) == 0
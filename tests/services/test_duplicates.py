@@ -0,0 +1,77 @@
+"""Tests for the Near-Duplicate Detection Module."""
+
+import pytest
+
+from backend.v1.app.database.repository import InMemoryBookRepository
+from backend.v1.app.services import duplicates
+from backend.v1.app.services.duplicates import DuplicateIndex, Profile, similarity
+from tests.factories import make_book
+
+
+def ebook(title: str, first: str = "John", last: str = "Tolkien") -> dict:
+    """Fields of an ebook; duplicates are only matched within a format."""
+    return {"title": title, "author_first_name": first, "author_last_name": last,
+            "book_type": "ebook", "ebook_type": "epub", "hardcover_condition": None}
+
+
+@pytest.mark.unit
+def test_title_keys_ignore_case_accents_punctuation_and_articles():
+    assert duplicates.title_key("The Lord of the Rings!") == "lord of rings"
+    assert duplicates.title_key("Lord of the Rings, The") == "lord of rings"
+    assert duplicates.title_key("Émile") == duplicates.title_key("emile")
+    assert duplicates.title_key("The") == "the"
+
+
+@pytest.mark.unit
+def test_similarity_needs_title_author_and_format_to_match():
+    fellowship = ebook("The Fellowship of the Ring")
+    original = Profile.of(make_book(**fellowship))
+    assert similarity(original, Profile.of(make_book(**ebook("Fellowship of the Rings",
+                                                             "J. R. R."))))
+    assert similarity(original, Profile.of(make_book(**ebook("The Two Towers")))) is None
+    assert similarity(original, Profile.of(make_book(**ebook(
+        "The Fellowship of the Ring", "Jane", "Austen")))) is None
+    assert similarity(original, Profile.of(make_book(**{
+        **fellowship, "book_type": "hardcover", "ebook_type": None,
+        "hardcover_condition": "new"}))) is None
+    with_isbn = Profile.of(make_book(**fellowship, isbn="9780261102354"))
+    assert similarity(original, with_isbn) == 1.0
+    other_edition = Profile.of(make_book(**fellowship, isbn="9780618574940"))
+    assert similarity(with_isbn, other_edition) is None
+
+
+@pytest.mark.anyio
+async def test_index_finds_duplicates_by_bucket_lookup():
+    repository = InMemoryBookRepository()
+    index = DuplicateIndex()
+    catalog = [make_book(**ebook("The Hobbit, or There and Back Again")),
+               make_book(**ebook("Harry Potter and the Chamber of Secrets", "Joanne", "Rowling")),
+               *(make_book(**ebook(f"Unrelated Title {i}", "Ann", "Lee")) for i in range(200))]
+    await repository.add_many(catalog)
+    for book in catalog:
+        index.book_added(book)
+
+    donated = make_book(**ebook("Hobbit or there and back again", last="Tolkein"))
+    [(found, score)] = await duplicates.find_duplicates(index, repository, donated)
+    assert found == catalog[0] and score > 0.8
+    assert len(index.candidates(donated)) < 5
+
+    await repository.delete(catalog[0].book_id)
+    index.book_removed(catalog[0])
+    assert await duplicates.find_duplicates(index, repository, donated) == []
+    index.catalog_cleared()
+    assert len(index) == 0
+
+
+def test_audit_pairs_duplicates_across_chunks_and_workers(monkeypatch):
+    monkeypatch.setattr(duplicates, "AUDIT_CHUNK_SIZE", 3)
+    books = [make_book(**ebook("Pride and Prejudice", "Jane", "Austen")),
+             make_book(**ebook("Emma", "Jane", "Austen")),
+             make_book(**ebook("The Hobbit")),
+             make_book(**ebook("Pride & Prejudice", "Jane", "Austen")),
+             make_book(**ebook("Hobbit"))]
+    lines = [book.model_dump_json().encode() + b"\n" for book in books] + [b"\n"]
+    pairs = duplicates.audit(lines, workers=2)
+    assert {frozenset(pair[:2]) for pair in pairs} == {
+        frozenset((str(books[0].book_id), str(books[3].book_id))),
+        frozenset((str(books[2].book_id), str(books[4].book_id)))}
@@ -0,0 +1,92 @@
+"""Tests for the Catalog Export Module."""
+
+import gzip
+import io
+from datetime import timedelta
+
+import pytest
+
+from backend.v1.app.database.repository import InMemoryBookRepository
+from backend.v1.app.models.books import BookCreate, BookFormat, BookLocation, BookResponse
+from backend.v1.app.services import export, ingest
+from tests.factories import START, make_book
+
+
+async def collect(chunks) -> bytes:
+    return b"".join([chunk async for chunk in chunks])
+
+
+@pytest.fixture
+async def repository():
+    repository = InMemoryBookRepository()
+    await repository.add_many(
+        [make_book(offset, location="branch1" if offset % 2 else "main",
+                   tags=["poetry", "classic"], replacement_cost=12.5,
+                   last_updated_date=START + timedelta(days=offset % 3))
+         for offset in range(9)]
+        + [make_book(9, book_type="ebook", ebook_type="pdf", hardcover_condition=None,
+                     location="main", tags=None, publication_year=None, replacement_cost=12.5,
+                     last_updated_date=START)])
+    return repository
+
+
+@pytest.mark.anyio
+async def test_incremental_ndjson_export_ships_only_matching_books(repository):
+    export_filter = export.ExportFilter(location=BookLocation.MAIN,
+                                        updated_since=START + timedelta(days=1))
+    batches = export.iter_books(repository, export_filter, batch_size=2)
+    body = gzip.decompress(await collect(
+        export.compress_chunks(export.ndjson_chunks(batches), "gzip")))
+
+    expected = [book for book in await repository.page(None, None)
+                if book.location == BookLocation.MAIN
+                and book.last_updated_date >= START + timedelta(days=1)]
+    assert [BookResponse.model_validate_json(line) for line in body.splitlines()] == expected
+    assert len(expected) == 3
+
+
+@pytest.mark.anyio
+async def test_csv_export_can_be_ingested_again(repository):
+    chunks = export.export_chunks(repository, "csv", "none",
+                                  export.ExportFilter(book_type=BookFormat.EBOOK))
+    body = await collect(chunks)
+    assert body.count(b"\n") == 2
+
+    async def upload():
+        yield body
+
+    batches = [batch async for batch in ingest.iter_batches(upload(), "text/csv")]
+    [(_, book)] = batches[0].valid
+    original = (await repository.page(None, None))[-1]
+    assert book.model_dump() == original.model_dump(include=set(BookCreate.model_fields))
+
+    empty = export.export_chunks(repository, "csv", "gzip",
+                                 export.ExportFilter(updated_since=START + timedelta(days=9)))
+    assert gzip.decompress(await collect(empty)).decode().startswith("title,")
+
+
+@pytest.mark.anyio
+async def test_zstd_export_round_trips(repository):
+    zstandard = pytest.importorskip("zstandard")
+    body = await collect(export.export_chunks(repository, "ndjson", "zstd"))
+    reader = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(body))
+    assert len(reader.read().splitlines()) == 10
+
+
+@pytest.mark.anyio
+async def test_parquet_export_writes_row_groups(repository):
+    parquet = pytest.importorskip("pyarrow.parquet")
+    batches = export.iter_books(repository, export.ExportFilter(), batch_size=3)
+    body = await collect(export.parquet_chunks(batches, "zstd", row_group_size=4))
+    file = parquet.ParquetFile(io.BytesIO(body))
+    assert file.metadata.num_rows == 10 and file.metadata.num_row_groups == 3
+    table = file.read()
+    assert table.column("book_type").to_pylist()[-1] == "ebook"
+    assert table.column("tags").to_pylist()[0] == ["poetry", "classic"]
+
+
+@pytest.mark.skipif(export.pyarrow is not None, reason="pyarrow is installed")
+@pytest.mark.anyio
+async def test_parquet_export_reports_the_missing_package(repository):
+    with pytest.raises(export.ExportUnavailableError, match="pyarrow"):
+        export.export_chunks(repository, "parquet", "gzip")
@@ -0,0 +1,190 @@
+"""Tests for the Overdue Fines Service Module."""
+
+import asyncio
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import numpy as np
+import pytest
+from bson import Binary
+from pymongo.errors import BulkWriteError
+
+from backend.v1.app.database.repository import InMemoryBookRepository
+from backend.v1.app.models.circulation import Loan
+from backend.v1.app.services.circulation import CirculationEngine
+from backend.v1.app.services.fines import (
+    FineEngine,
+    LoanTable,
+    assess_fines,
+    compute_fines,
+    mongo_fine_applier,
+)
+
+AS_OF = datetime(2024, 3, 1, 12)
+
+
+def make_loan(days_overdue: float, category: str = "student", **overrides) -> Loan:
+    due = AS_OF - timedelta(days=days_overdue)
+    loan = {"book_id": uuid4(), "user_id": uuid4(), "user_category": category,
+            "checked_out_at": due - timedelta(days=21), "due_at": due}
+    loan.update(overrides)
+    return Loan(**loan)
+
+
+class Recorder:
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, deltas):
+        self.calls.append(dict(deltas))
+
+
+@pytest.mark.unit
+def test_compute_fines_counts_whole_days_and_caps():
+    due = np.array([AS_OF - timedelta(days=3, hours=5), AS_OF + timedelta(days=1),
+                    AS_OF - timedelta(days=100), AS_OF - timedelta(days=10)],
+                   dtype="datetime64[s]")
+    returned = np.array([None, None, None, AS_OF - timedelta(days=8)], dtype="datetime64[s]")
+    fines = compute_fines(due, returned, AS_OF, np.array([0.1, 0.1, 0.25, 0.5]),
+                          np.array([25.0, 25.0, 12.5, 25.0]))
+    assert fines.tolist() == [0.3, 0.0, 12.5, 1.0]
+
+
+@pytest.mark.anyio
+async def test_runs_apply_only_the_change_since_last_run():
+    engine = FineEngine()
+    overdue = make_loan(5)
+    not_due = make_loan(-5)
+    staff = make_loan(2, category="staff")
+    engine.ingest([overdue, not_due, staff], {})
+    apply = Recorder()
+
+    dry = await engine.run(apply, as_of=AS_OF, dry_run=True)
+    assert dry.users_affected == 2
+    assert apply.calls == []
+
+    first = await engine.run(apply, as_of=AS_OF)
+    assert apply.calls[-1] == {overdue.user_id: 0.5, staff.user_id: 0.5}
+    assert first.total_delta == 1.0
+
+    later = AS_OF + timedelta(days=2)
+    second = await engine.run(apply, as_of=later, incremental=True)
+    assert second.loans_processed == 2
+    assert apply.calls[-1] == {overdue.user_id: 0.2, staff.user_id: 0.5}
+
+    engine.ingest([overdue.model_copy(update={"returned_at": later})], {})
+    third = await engine.run(apply, as_of=later + timedelta(days=3), incremental=True)
+    assert third.loans_processed == 2
+    assert overdue.user_id not in apply.calls[-1]
+    assert third.loans_considered == 3
+    assert (await engine.run(apply, as_of=later)).loans_considered == 2
+
+
+@pytest.mark.anyio
+async def test_capped_loans_are_skipped_incrementally():
+    engine = FineEngine()
+    loan = make_loan(400)
+    engine.ingest([loan], {loan.book_id: 9.99})
+    apply = Recorder()
+    await engine.run(apply, as_of=AS_OF)
+    assert apply.calls[-1] == {loan.user_id: 9.99}
+    report = await engine.run(apply, as_of=AS_OF + timedelta(days=1), incremental=True)
+    assert report.loans_processed == 0
+
+
+@pytest.mark.anyio
+async def test_assess_fines_reads_circulation_changes_once():
+    circulation = CirculationEngine(clock=lambda: AS_OF - timedelta(days=30))
+    repository = InMemoryBookRepository()
+    book_id, user_id = uuid4(), uuid4()
+    await circulation.checkout(book_id, user_id, "student")
+    engine = FineEngine()
+    apply = Recorder()
+
+    report = await assess_fines(engine, circulation, repository, apply, as_of=AS_OF)
+    assert apply.calls[-1] == {user_id: 0.9}
+    assert circulation.loan_changes() == []
+    assert set(report.timings_ms) == {"ingest", "select", "compute", "apply"}
+
+    await assess_fines(engine, circulation, repository, apply,
+                       as_of=AS_OF + timedelta(days=1), incremental=True)
+    assert apply.calls[-1] == {user_id: 0.1}
+
+
+@pytest.mark.unit
+def test_loan_table_grows_and_compacts():
+    table = LoanTable()
+    loans = [make_loan(1) for _ in range(3000)]
+    table.upsert(loans, {})
+    assert table.size == 3000
+    table.live[:2000] = False
+    table.compact()
+    assert table.size == 1000
+    assert table.rows[loans[2500].loan_id] == 500
+
+
+@pytest.mark.anyio
+async def test_concurrent_runs_charge_each_change_once():
+    engine = FineEngine()
+    loan = make_loan(5)
+    engine.ingest([loan], {})
+    calls = []
+
+    async def slow_apply(deltas):
+        calls.append(dict(deltas))
+        await asyncio.sleep(0.01)
+
+    await asyncio.gather(engine.run(slow_apply, as_of=AS_OF, incremental=True),
+                         engine.run(slow_apply, as_of=AS_OF, incremental=True))
+    assert calls == [{loan.user_id: 0.5}, {}]
+
+
+@pytest.mark.anyio
+async def test_failed_users_are_charged_by_the_next_run():
+    engine = FineEngine()
+    failing, working = make_loan(5), make_loan(5)
+    engine.ingest([failing, working], {})
+    apply = Recorder()
+
+    async def partly_failing(deltas):
+        await apply(deltas)
+        return {failing.user_id}
+
+    report = await engine.run(partly_failing, as_of=AS_OF)
+    assert (report.users_affected, report.users_failed, report.total_delta) == (1, 1, 0.5)
+    await engine.run(apply, as_of=AS_OF, incremental=True)
+    assert apply.calls[-1] == {failing.user_id: 0.5}
+
+
+class RecordingCollection:
+    def __init__(self, errors=()):
+        self.writes = []
+        self.errors = list(errors)
+
+    async def bulk_write(self, requests, ordered=True):
+        self.writes.append((requests, ordered))
+        if self.errors:
+            raise BulkWriteError({"writeErrors": [{"index": index, "code": 2, "errmsg": "x"}
+                                                  for index in self.errors]})
+
+
+@pytest.mark.anyio
+async def test_mongo_applier_updates_in_one_bulk_write():
+    collection = RecordingCollection()
+    user_ids = [uuid4(), uuid4()]
+    await mongo_fine_applier(collection)({user_ids[0]: 0.5, user_ids[1]: -2.25})
+    await mongo_fine_applier(collection)({})
+    [(requests, ordered)] = collection.writes
+    assert not ordered
+    assert [(request._filter, request._doc) for request in requests] == [
+        ({"user_id": Binary.from_uuid(user_ids[0])}, {"$inc": {"fines_owed": 0.5}}),
+        ({"user_id": Binary.from_uuid(user_ids[1])}, {"$inc": {"fines_owed": -2.25}}),
+    ]
+
+
+@pytest.mark.anyio
+async def test_mongo_applier_returns_users_whose_update_failed():
+    user_ids = [uuid4(), uuid4(), uuid4()]
+    failed = await mongo_fine_applier(RecordingCollection(errors=[1]))(
+        dict.fromkeys(user_ids, 1.0))
+    assert failed == {user_ids[1]}
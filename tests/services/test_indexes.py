@@ -0,0 +1,26 @@
+"""Tests for the Secondary Indexes Module."""
+
+import pytest
+
+from backend.v1.app.models.books import BookLanguage
+from backend.v1.app.services.indexes import BookIndex, parse_criteria
+from tests.factories import make_book
+
+
+@pytest.mark.unit
+def test_re_added_books_leave_the_postings_of_their_old_values():
+    index = BookIndex()
+    book = make_book(author_last_name="Tolkien", genre="fantasy", tags=["classic"])
+    index.book_added(book)
+    changed = book.model_copy(update={"author_last_name": "Lewis", "genre": "myth",
+                                      "tags": ["new"], "language": BookLanguage.FRENCH})
+    index.book_added(changed)
+
+    for criteria in ("author=tolkien", "genre=fantasy", "tag=classic", "language=english"):
+        assert index.query(parse_criteria(criteria)) == set(), criteria
+    assert index.query(parse_criteria("author=lewis&genre=myth&tag=new&language=french")) == {
+        book.book_id}
+
+    index.book_removed(changed)
+    assert index.query(parse_criteria("genre=myth")) == set()
+    assert len(index) == 0
@@ -0,0 +1,150 @@
+"""Tests for the Bulk Patron Import Module."""
+
+import json
+
+import pytest
+from bson import Binary
+from mongomock_motor import AsyncMongoMockClient
+from passlib.context import CryptContext
+
+from backend.v1.app.auth import passwords
+from backend.v1.app.services import patron_import
+from backend.v1.app.services.patron_import import Checkpoint, PatronImport
+
+PATRON = {"first_name": "ada", "last_name": "lovelace", "phone_number": "555-010-2030",
+          "date_of_birth": "2008-04-01", "address": "12 Elm Street", "email": "ada@example.org",
+          "username": "Ada", "password": "Secret!Pass1", "user_category": "student"}
+HEADER = ",".join(PATRON)
+
+
+def patron(**overrides) -> dict:
+    return {**PATRON, **overrides}
+
+
+def csv_line(record: dict) -> str:
+    return ",".join(str(value) for value in record.values())
+
+
+@pytest.fixture(autouse=True)
+def fast_context(monkeypatch):
+    monkeypatch.setattr(passwords, "pwd_context",
+                        CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=4))
+
+
+@pytest.fixture
+def users():
+    return AsyncMongoMockClient()["libooktrac"]["users"]
+
+
+def read_errors(path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+@pytest.mark.anyio
+async def test_imports_valid_rows_and_reports_the_rest(users, tmp_path):
+    await users.insert_one({"username": "taken", "email": "Grace@Example.org"})
+    source = tmp_path / "patrons.csv"
+    source.write_text("\n".join([
+        HEADER,
+        csv_line(patron()),
+        csv_line(patron(username="ADA", email="other@example.org")),
+        csv_line(patron(username="taken", email="new@example.org")),
+        csv_line(patron(username="grace", email="grace@example.org")),
+        csv_line(patron(username="weak", email="weak@example.org", password="password")),
+        "too,few,columns",
+        csv_line(patron(username="bob", email="bob@example.org")),
+    ]) + "\n")
+
+    report = await patron_import.import_file(source, users, tmp_path / "errors.ndjson",
+                                             None, csv_format=True, chunk_size=3, workers=2)
+
+    assert (report.lines, report.imported, report.rejected) == (8, 2, 5)
+    assert {"username_unique", "email_unique"} <= set(await users.index_information())
+    stored = {user["username"]: user async for user in users.find({"user_id": {"$exists": 1}})}
+    assert sorted(stored) == ["ada", "bob"]
+    assert isinstance(stored["ada"]["user_id"], Binary)
+    assert stored["ada"]["membership_status"] == "inactive"
+    assert passwords.verify_password("Secret!Pass1", stored["ada"]["password"])
+    errors = read_errors(tmp_path / "errors.ndjson")
+    assert [error["line"] for error in errors] == [3, 4, 5, 6, 7]
+    assert errors[0]["error"] == "username 'ada' is already used on line 2"
+    assert errors[1]["error"] == "username 'taken' is already registered"
+    assert errors[2]["error"].startswith("email 'grace@example.org'")
+    assert "uppercase letter" in errors[3]["error"]
+    assert errors[4]["error"] == "expected 9 columns, got 3"
+
+
+def test_csv_rows_may_span_lines_after_a_byte_order_mark():
+    source = "\n".join([HEADER, csv_line(patron(address='"12 Elm Street\nFlat 2"')), "",
+                        csv_line(patron(username="bob"))])
+    lines = ("\ufeff" + source + "\n").encode("utf-8").splitlines(keepends=True)
+    records = list(patron_import.iter_records(lines, csv_format=True))
+    assert [line_number for line_number, _ in records] == [2, 5]
+    assert records[0][1]["address"] == "12 Elm Street\nFlat 2"
+    assert records[0][1]["first_name"] == "ada"
+    assert [line_number for line_number, _ in
+            patron_import.iter_records(lines, csv_format=True, start_after=2)] == [5]
+
+
+class FailingInserts:
+    """Wraps a collection so insert_many fails after `successes` calls."""
+
+    def __init__(self, collection, successes: int):
+        self.collection = collection
+        self.successes = successes
+
+    def find(self, *args, **kwargs):
+        return self.collection.find(*args, **kwargs)
+
+    async def create_indexes(self, indexes):
+        return await self.collection.create_indexes(indexes)
+
+    async def insert_many(self, documents, ordered=True):
+        if self.successes == 0:
+            raise ConnectionError("connection lost")
+        self.successes -= 1
+        return await self.collection.insert_many(documents, ordered=ordered)
+
+
+@pytest.mark.anyio
+async def test_resumes_from_checkpoint(users, tmp_path):
+    source = tmp_path / "patrons.ndjson"
+    records = [patron(username=f"reader{n}", email=f"reader{n}@example.org") for n in range(7)]
+    records[1]["phone_number"] = "5550102030"
+    source.write_text("\n".join(json.dumps(record) for record in records) + "\n")
+    errors_path, checkpoint_path = tmp_path / "errors.ndjson", tmp_path / "import.checkpoint"
+
+    with pytest.raises(ConnectionError):
+        await patron_import.import_file(source, FailingInserts(users, 1), errors_path,
+                                        checkpoint_path, csv_format=False, chunk_size=3,
+                                        workers=1)
+    checkpoint = Checkpoint.load(checkpoint_path, source)
+    assert (checkpoint.line, checkpoint.imported, checkpoint.rejected) == (3, 2, 1)
+    # A later chunk's rejected rows may have been written before the failure.
+    with errors_path.open("ab") as errors:
+        errors.write(b'{"line": 5, "error": "partial"}\n')
+
+    report = await patron_import.import_file(source, users, errors_path, checkpoint_path,
+                                             csv_format=False, chunk_size=3, workers=1)
+    assert (report.resumed_after, report.lines, report.imported, report.rejected) == (3, 7, 6, 1)
+    assert await users.count_documents({}) == 6
+    assert [error["line"] for error in read_errors(errors_path)] == [2]
+
+    source.write_text(source.read_text() + json.dumps(patron(username="late")) + "\n")
+    with pytest.raises(ValueError, match="another import"):
+        Checkpoint.load(checkpoint_path, source)
+
+
+@pytest.mark.anyio
+async def test_reports_rows_refused_by_the_database(users, tmp_path):
+    importer = PatronImport(users, tmp_path / "errors.ndjson")
+    await importer.create_indexes()
+    await users.insert_one({"username": "someone", "email": "ada@example.org"})
+    # Without reading the registered accounts first, only the unique index catches them.
+    records = [(1, json.dumps(patron()).encode()),
+               (2, json.dumps(patron(username="bob", email="bob@example.org")).encode())]
+    rejected = []
+    accepted = importer._validate(records, rejected)
+    refused = await importer._insert(accepted, ["hash-1", "hash-2"])
+    assert rejected == []
+    assert refused == [(1, "username or email is already registered")]
@@ -0,0 +1,53 @@
+"""Tests for the Patron Account Service Module."""
+
+from uuid import uuid4
+
+import pytest
+from bson import Binary
+from mongomock_motor import AsyncMongoMockClient
+
+from backend.v1.app.services.patrons import PatronStore
+
+
+@pytest.mark.anyio
+async def test_reads_limits_and_writes_loans_back():
+    users = AsyncMongoMockClient()["libooktrac"]["users"]
+    user_id, book_id = uuid4(), uuid4()
+    await users.insert_one({"user_id": Binary.from_uuid(user_id), "max_borrow_limit": 2,
+                            "books_borrowed": 0, "borrow_history": []})
+    store = PatronStore(lambda: users)
+
+    assert await store.borrow_limit(user_id) == 2
+    assert await store.borrow_limit(uuid4()) is None
+    await store.record_loans(user_id, 1, book_id)
+    await store.record_loans(user_id, 2, book_id)
+    await store.record_loans(user_id, 1)
+    user = await users.find_one({"user_id": Binary.from_uuid(user_id)})
+    assert user["books_borrowed"] == 1
+    assert user["borrow_history"] == [Binary.from_uuid(book_id)]
+    assert store.failures == 0
+
+
+@pytest.mark.anyio
+async def test_an_uninitialized_user_store_falls_back():
+    store = PatronStore()
+    assert await store.borrow_limit(uuid4()) is None
+    await store.record_loans(uuid4(), 1, uuid4())
+    assert store.failures == 2
+
+
+@pytest.mark.anyio
+async def test_reads_genres_and_borrow_histories():
+    users = AsyncMongoMockClient()["libooktrac"]["users"]
+    reader, idle = uuid4(), uuid4()
+    books = [uuid4(), uuid4()]
+    await users.insert_many([
+        {"user_id": Binary.from_uuid(reader), "preferred_genres": ["fantasy"],
+         "borrow_history": [Binary.from_uuid(book_id) for book_id in books]},
+        {"user_id": Binary.from_uuid(idle), "borrow_history": []},
+    ])
+    store = PatronStore(lambda: users)
+
+    assert await store.preferred_genres(reader) == ["fantasy"]
+    assert await store.preferred_genres(uuid4()) == []
+    assert [history async for history in store.histories()] == [(reader, books)]
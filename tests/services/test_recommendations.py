@@ -0,0 +1,115 @@
+"""Tests for the Recommendation Service Module."""
+
+import json
+import random
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+
+from backend.v1.app.models.books import BookResponse
+from backend.v1.app.services.recommendations import RecommendationEngine, read_histories
+
+
+def make_book(genre: str | None = None) -> BookResponse:
+    return BookResponse.model_construct(book_id=uuid4(), title="Book", genre=genre,
+                                        book_entry_time=datetime(2024, 1, 1))
+
+
+@pytest.mark.unit
+def test_checkouts_build_also_borrowed_lists():
+    engine = RecommendationEngine()
+    hobbit, rings, dune, emma = (make_book("fantasy"), make_book("fantasy"),
+                                 make_book("scifi"), make_book("classic"))
+    for book in (hobbit, rings, dune, emma):
+        engine.book_added(book)
+    for _ in range(3):
+        user = uuid4()
+        engine.record_checkout(user, hobbit.book_id)
+        engine.record_checkout(user, rings.book_id)
+    user = uuid4()
+    for book in (hobbit, dune, hobbit):
+        engine.record_checkout(user, book.book_id)
+
+    similar = engine.similar(hobbit.book_id)
+    assert [book_id for book_id, _ in similar] == [rings.book_id, dune.book_id]
+    assert similar[0][1] == pytest.approx(3 / (4 * 3) ** 0.5)
+    assert engine.history(user) == [dune.book_id, hobbit.book_id]
+
+    engine.book_removed(rings)
+    assert [book_id for book_id, _ in engine.similar(hobbit.book_id)] == [dune.book_id]
+
+
+@pytest.mark.unit
+def test_for_you_blends_co_occurrence_with_genres():
+    engine = RecommendationEngine()
+    books = {name: make_book(genre) for name, genre in (
+        ("hobbit", "fantasy"), ("rings", "fantasy"), ("dune", "scifi"),
+        ("earthsea", "fantasy"), ("emma", "classic"))}
+    for book in books.values():
+        engine.book_added(book)
+    for names in (("hobbit", "rings"), ("hobbit", "dune"), ("hobbit", "dune"), ("emma",)):
+        user = uuid4()
+        for name in names:
+            engine.record_checkout(user, books[name].book_id)
+
+    reader = uuid4()
+    engine.record_checkout(reader, books["hobbit"].book_id)
+    ranked = [book_id for book_id, _ in engine.for_user(reader, ["fantasy"])]
+    # Dune co-occurs more with the Hobbit, but the fantasy affinity lifts Rings.
+    assert ranked[:2] == [books["rings"].book_id, books["dune"].book_id]
+    assert books["hobbit"].book_id not in ranked
+    assert books["earthsea"].book_id in ranked
+
+    newcomer = [book_id for book_id, _ in engine.for_user(uuid4(), ["classic"])]
+    assert newcomer == [books["emma"].book_id]
+
+
+@pytest.mark.unit
+def test_parallel_rebuild_matches_incremental_updates_and_round_trips(tmp_path):
+    rng = random.Random(5)  # noqa: S311
+    books = [uuid4() for _ in range(40)]
+    histories = {uuid4(): rng.sample(books, rng.randint(1, 8)) for _ in range(200)}
+    incremental = RecommendationEngine()
+    for user_id, history in histories.items():
+        for book_id in history:
+            incremental.record_checkout(user_id, book_id)
+
+    rebuilt = RecommendationEngine.from_histories(histories, workers=2)
+    for book_id in books:
+        assert [score for _, score in rebuilt.similar(book_id, 20)] == pytest.approx(
+            [score for _, score in incremental.similar(book_id, 20)])
+
+    path = tmp_path / "recommendations.json.gz"
+    rebuilt.save(path)
+    restored = RecommendationEngine()
+    restored.restore(path)
+    assert restored.similar(books[0]) == rebuilt.similar(books[0])
+    assert restored.history(next(iter(histories))) == next(iter(histories.values()))
+
+
+@pytest.mark.unit
+def test_read_histories_accepts_mongoexport_uuids(tmp_path):
+    user_id, book_id = uuid4(), uuid4()
+    path = tmp_path / "users.ndjson"
+    path.write_text(json.dumps({"user_id": {"$uuid": str(user_id)},
+                                "borrow_history": [str(book_id)]}) + "\n\n")
+    assert list(read_histories(path)) == [(user_id, [book_id])]
+
+
+@pytest.mark.unit
+def test_restoring_an_older_snapshot_keeps_live_histories(tmp_path):
+    patron, reader = uuid4(), uuid4()
+    first, second, third = uuid4(), uuid4(), uuid4()
+    older = RecommendationEngine()
+    older.seed(patron, [first, second])
+    path = tmp_path / "recommendations.json.gz"
+    older.save(path)
+
+    live = RecommendationEngine()
+    live.seed(reader, [first, third])
+    live.restore(path)
+    assert live.history(patron) == [first, second]
+    assert live.history(reader) == [first, third]
+    assert {partner for partner, _ in live.similar(first)} == {second, third}
+    assert live.seed(reader, [first, third]) == 0
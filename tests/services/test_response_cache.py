@@ -0,0 +1,54 @@
+"""Tests for the Catalog Response Cache Module."""
+
+import pytest
+
+from backend.v1.app.services.response_cache import (
+    CachedResponse,
+    CatalogVersion,
+    ResponseCache,
+    etag_matches,
+    make_etag,
+)
+
+
+def entry(version: int, body: bytes) -> CachedResponse:
+    return CachedResponse(version, body, make_etag(body))
+
+
+@pytest.mark.unit
+def test_entries_are_only_served_at_their_version():
+    version = CatalogVersion()
+    cache = ResponseCache(max_bytes=1024)
+    cache.put("/books/get/all?", entry(version.value, b"[]"))
+    assert cache.get("/books/get/all?", version.value).body == b"[]"
+
+    version.catalog_cleared()
+    assert cache.get("/books/get/all?", version.value) is None
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+@pytest.mark.unit
+def test_evicts_least_recently_used_beyond_max_bytes():
+    cache = ResponseCache(max_bytes=10)
+    cache.put("a", entry(0, b"aaaa"))
+    cache.put("b", entry(0, b"bbbb"))
+    cache.get("a", 0)
+    cache.put("c", entry(0, b"cccc"))
+    assert cache.get("b", 0) is None
+    assert cache.get("a", 0) is not None
+    assert cache.size == 8
+    assert cache.evictions == 1
+
+    cache.put("huge", entry(0, b"x" * 11))
+    assert cache.get("huge", 0) is None
+
+
+@pytest.mark.unit
+def test_etag_matches_lists_weak_tags_and_wildcard():
+    etag = make_etag(b"[]")
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+    assert not etag_matches(None, etag)
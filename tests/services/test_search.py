@@ -0,0 +1,113 @@
+"""Tests for the Full-Text Search Module."""
+
+from datetime import timedelta
+
+import pytest
+
+from backend.v1.app.services.search import IndexCatchUp, SearchIndex, tokenize
+from tests.factories import make_book
+
+
+@pytest.mark.unit
+def test_tokenize_folds_case_and_diacritics():
+    assert tokenize("Les Misérables, ÉMILE Zola!") == ["les", "miserables", "emile", "zola"]
+
+
+@pytest.mark.unit
+def test_search_ranks_title_matches_first():
+    index = SearchIndex()
+    in_title = make_book(title="Dragon Tales")
+    in_description = make_book(title="Knights", description="A story with one dragon.")
+    unrelated = make_book(title="Gardening", genre="home")
+    for book in (in_description, in_title, unrelated):
+        index.book_added(book)
+
+    results = [book_id for _, book_id in index.search("dragons dragon", k=5)]
+    assert results == [in_title.book_id, in_description.book_id]
+    assert [book_id for _, book_id in index.search("DRAGON", k=1)] == [in_title.book_id]
+    assert index.search("zeppelin") == []
+
+
+@pytest.mark.unit
+def test_search_matches_authors_tags_and_removes_books():
+    index = SearchIndex()
+    book = make_book(author_first_name="Gabriel", author_last_name="García Márquez",
+                     tags=["Magical Realism"])
+    index.book_added(book)
+    assert index.search("garcia marquez")[0][1] == book.book_id
+    assert index.search("realism")[0][1] == book.book_id
+
+    index.book_removed(book)
+    assert index.search("garcia") == []
+    assert len(index) == 0
+
+
+@pytest.mark.unit
+def test_re_added_books_drop_the_terms_of_the_version_they_replace(tmp_path):
+    index = SearchIndex()
+    other = make_book(title="Other")
+    dune = make_book(title="Dune")
+    index.book_added(other)
+    index.book_added(dune)
+    foundation = dune.model_copy(update={"title": "Foundation"})
+    index.book_added(foundation)
+    assert index.search("dune") == []
+    assert index.search("foundation")[0][1] == dune.book_id
+
+    index.book_removed(foundation)
+    assert index.search("dune") == []
+    assert index.search("foundation") == []
+    assert [book_id for _, book_id in index.search("other")] == [other.book_id]
+
+    path = tmp_path / "search.json.gz"
+    index.book_added(dune)
+    index.save(path)
+    restored = SearchIndex.load(path)
+    restored.book_added(foundation)
+    assert restored.search("dune") == []
+    restored.book_removed(foundation)
+    assert len(restored) == 1
+
+
+@pytest.mark.unit
+def test_save_and_restore_round_trip(tmp_path):
+    index = SearchIndex()
+    books = [make_book(title=f"Volume {number} of the Saga") for number in range(5)]
+    for book in books:
+        index.book_added(book)
+    path = tmp_path / "search.json.gz"
+    index.save(path)
+
+    restored = SearchIndex()
+    restored.restore(path)
+    assert len(restored) == 5
+    assert restored.search("saga volume 3", k=5) == index.search("saga volume 3", k=5)
+
+
+@pytest.mark.unit
+def test_restored_index_catches_up_with_the_catalog(tmp_path):
+    kept, changed, deleted = (make_book(title=title) for title in ("Kept", "Draft", "Deleted"))
+    index = SearchIndex()
+    for book in (kept, changed, deleted):
+        index.book_added(book)
+    path = tmp_path / "search.json.gz"
+    index.save(path)
+
+    # Changed while the index was on disk.
+    revised = changed.model_copy(update={
+        "title": "Revised", "last_updated_date": changed.last_updated_date + timedelta(1)})
+    added = make_book(title="Added")
+    restored = SearchIndex()
+    restored.restore(path)
+    catch_up = IndexCatchUp(restored)
+    for book in (kept, revised, added):
+        catch_up.book_added(book)
+    assert catch_up.finish() == 3
+
+    rebuilt = SearchIndex()
+    for book in (kept, revised, added):
+        rebuilt.book_added(book)
+    assert len(restored) == 3
+    for query in ("kept", "draft", "deleted", "revised", "added"):
+        assert restored.search(query) == rebuilt.search(query)
+    assert restored.search("draft") == []
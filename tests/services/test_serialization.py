@@ -0,0 +1,30 @@
+"""Tests for the Book Serialization Module."""
+
+import json
+
+import pytest
+
+from backend.v1.app.services.serialization import BookJSONCache, encode_book
+from tests.factories import make_book
+
+
+@pytest.mark.unit
+def test_encode_book_matches_model_dump_json():
+    book = make_book(tags=["Classic"])
+    assert encode_book(book) == book.model_dump_json().encode()
+
+
+@pytest.mark.unit
+def test_cache_refreshes_only_on_change():
+    cache = BookJSONCache()
+    book = make_book(title="The Hobbit")
+    cache.book_added(book)
+    renamed = book.model_copy(update={"title": "There and Back Again"})
+    assert json.loads(cache.encode(renamed))["title"] == "The Hobbit"
+
+    cache.book_added(renamed)
+    assert json.loads(cache.encode_list([renamed]))[0]["title"] == "There and Back Again"
+
+    cache.book_removed(renamed)
+    assert len(cache) == 0
+    assert json.loads(cache.encode(renamed))["title"] == "There and Back Again"
@@ -0,0 +1,29 @@
+"""Tests for the Snapshot File Service Module."""
+
+import gzip
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.v1.app.services.snapshots import OwnerLock, write_gzip_json
+
+
+def test_concurrent_saves_leave_one_complete_file(tmp_path):
+    path = tmp_path / "index.json.gz"
+    payloads = [{"writer": writer, "data": list(range(20_000))} for writer in range(8)]
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda payload: write_gzip_json(path, payload), payloads))
+
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        assert json.load(file) in payloads
+    assert [entry.name for entry in tmp_path.iterdir()] == ["index.json.gz"]
+
+
+def test_one_process_holds_the_owner_lock(tmp_path):
+    first, second = OwnerLock(tmp_path / "index.lock"), OwnerLock(tmp_path / "index.lock")
+    assert first.acquire()
+    assert first.acquire()
+    assert not second.acquire()
+    first.release()
+    assert second.acquire()
+    assert not first.owned
+    second.release()
@@ -0,0 +1,53 @@
+"""Tests for the Sorted Key List Module."""
+
+import random
+
+import pytest
+
+from backend.v1.app.services import sorted_keys
+from backend.v1.app.services.sorted_keys import SortedKeyList
+
+
+@pytest.fixture(autouse=True)
+def small_buckets(monkeypatch):
+    monkeypatch.setattr(sorted_keys, "BUCKET_SIZE", 4)
+
+
+@pytest.mark.unit
+def test_matches_sorted_list_under_random_edits():
+    rng = random.Random(3)  # noqa: S311
+    keys = SortedKeyList()
+    expected = []
+    for _ in range(2000):
+        key = rng.randint(0, 300)
+        if rng.random() < 0.35 and expected:
+            key = rng.choice(expected)
+            keys.discard(key)
+            expected.remove(key)
+        else:
+            keys.add(key)
+            expected.append(key)
+        expected.sort()
+    assert list(keys) == expected
+    assert len(keys) == len(expected)
+
+    for low, high in [(None, None), (10, 20), (None, 50), (250, None), (400, 500), (20, 10)]:
+        inside = [key for key in expected
+                  if (low is None or key >= low) and (high is None or key <= high)]
+        assert keys.count(low, high) == len(inside)
+        assert list(keys.irange(low, high)) == inside
+    assert list(keys.irange(10, 20, exclusive_low=True)) == [
+        key for key in expected if 10 < key <= 20]
+
+
+@pytest.mark.unit
+def test_discard_missing_key_is_a_no_op():
+    keys = SortedKeyList()
+    keys.discard(1)
+    keys.add(2)
+    keys.discard(1)
+    keys.discard(3)
+    assert list(keys) == [2]
+    keys.clear()
+    assert list(keys) == []
+    assert keys.count(None, None) == 0